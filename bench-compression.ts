@@ -0,0 +1,64 @@
+/**
+ * Compression Benchmark
+ *
+ * CPU cost versus bytes saved for /mcp JSON responses of several sizes,
+ * with the encodings and settings used by the compression middleware.
+ * Payloads mimic list_machines results (markdown text + structuredContent).
+ *
+ * Usage:
+ *   npx tsx bench-compression.ts [iterations]
+ *   COMPRESSION_BROTLI_QUALITY=6 npx tsx bench-compression.ts
+ */
+
+import { performance } from 'node:perf_hooks';
+import { compressBody, ContentEncoding, DEFAULT_COMPRESSION_OPTIONS } from './src/utils/compression.js';
+
+const ITERATIONS = Number(process.argv[2]) || 50;
+
+function toolResponse(devices: number): Buffer {
+  const items = Array.from({ length: devices }, (_, i) => ({
+    id: `3f1c${String(i).padStart(4, '0')}-8a2b-4c1d-9e0f-${String(i * 7919).padStart(12, '0')}`,
+    name: `Fridge ${i % 17 === 0 ? 'Kitchen' : 'Bakery'} ${i}`,
+    serial: `SN${String(100000 + i)}`,
+    active: true,
+    is_connected: i % 3 !== 0,
+    last_seen: new Date(Date.UTC(2024, 0, 1, 0, i % 60)).toISOString(),
+    machines_group: { id: `group-${i % 5}`, name: `Store ${i % 5}` },
+    machine_model: { id: `model-${i % 3}`, name: `Model ${i % 3}` },
+  }));
+  const text = items.map(m => `- ${m.is_connected ? '🟢' : '🔴'} **${m.name}** (${m.serial}) - ID: ${m.id}`).join('\n');
+  return Buffer.from(JSON.stringify({
+    jsonrpc: '2.0',
+    id: 1,
+    result: { content: [{ type: 'text', text }], structuredContent: { items } },
+  }));
+}
+
+async function measure(body: Buffer, encoding: ContentEncoding) {
+  await compressBody(body, encoding);
+  let size = 0;
+  const start = performance.now();
+  for (let i = 0; i < ITERATIONS; i++) {
+    size = (await compressBody(body, encoding)).length;
+  }
+  return { ms: (performance.now() - start) / ITERATIONS, size };
+}
+
+console.log('='.repeat(80));
+console.log(`⏱️  COMPRESSION BENCHMARK (${ITERATIONS} iterations, brotli q${DEFAULT_COMPRESSION_OPTIONS.brotliQuality}, gzip level ${DEFAULT_COMPRESSION_OPTIONS.gzipLevel})`);
+console.log('='.repeat(80));
+console.log('devices   original   encoding   compressed   saved    cpu/response');
+
+for (const devices of [5, 50, 500, 5000]) {
+  const body = toolResponse(devices);
+  for (const encoding of ['br', 'gzip'] as ContentEncoding[]) {
+    const { ms, size } = await measure(body, encoding);
+    const saved = ((1 - size / body.length) * 100).toFixed(1);
+    console.log(
+      `${String(devices).padEnd(9)} ${`${(body.length / 1024).toFixed(1)}KB`.padEnd(10)} ${encoding.padEnd(10)} ` +
+      `${`${(size / 1024).toFixed(1)}KB`.padEnd(12)} ${`${saved}%`.padEnd(8)} ${ms.toFixed(3)}ms`
+    );
+  }
+}
+
+console.log(`\nResponses under ${DEFAULT_COMPRESSION_OPTIONS.thresholdBytes} bytes (COMPRESSION_THRESHOLD_BYTES) are sent uncompressed.`);
@@ -0,0 +1,104 @@
+/**
+ * Startup Benchmark
+ *
+ * Measures cold start of the Streamable HTTP server:
+ * - time-to-listen: process spawn → "listening on port" log line
+ * - time-to-first-tools/list: process spawn → first tools/list response
+ *   (initialize + notifications/initialized + tools/list, no_auth session)
+ *
+ * Usage (after `npm run build`):
+ *   npx tsx bench-startup.ts [runs] [entry]
+ *   npx tsx bench-startup.ts 10 dist/streamableHttp.js
+ *
+ * Delete dist/tool-manifest.json to compare with eager tool loading.
+ */
+
+import { spawn } from 'node:child_process';
+import { performance } from 'node:perf_hooks';
+
+const RUNS = Number(process.argv[2]) || 5;
+const ENTRY = process.argv[3] || 'dist/streamableHttp.js';
+const BASE_PORT = Number(process.env.BENCH_PORT) || 3900;
+
+interface RunResult {
+  listenMs: number;
+  firstToolsListMs: number;
+  toolsListOnlyMs: number;
+  tools: number;
+}
+
+async function rpc(port: number, body: unknown, sessionId?: string) {
+  const response = await fetch(`http://127.0.0.1:${port}/mcp?no_auth=true`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+      Accept: 'application/json, text/event-stream',
+      ...(sessionId ? { 'mcp-session-id': sessionId } : {}),
+    },
+    body: JSON.stringify(body),
+  });
+  const text = await response.text();
+  return { sessionId: response.headers.get('mcp-session-id') ?? sessionId, json: text ? JSON.parse(text) : null };
+}
+
+async function runOnce(port: number): Promise<RunResult> {
+  const start = performance.now();
+  const child = spawn(process.execPath, [ENTRY], {
+    env: { ...process.env, PORT: String(port) },
+    stdio: ['ignore', 'ignore', 'pipe'],
+  });
+
+  try {
+    const listenMs = await new Promise<number>((resolve, reject) => {
+      let output = '';
+      child.stderr!.on('data', (chunk) => {
+        output += chunk.toString();
+        if (output.includes('listening on port')) resolve(performance.now() - start);
+      });
+      child.once('exit', (code) => reject(new Error(`Server exited with code ${code}:\n${output}`)));
+    });
+
+    const init = await rpc(port, {
+      jsonrpc: '2.0',
+      id: 1,
+      method: 'initialize',
+      params: { protocolVersion: '2025-03-26', capabilities: {}, clientInfo: { name: 'bench-startup', version: '1.0.0' } },
+    });
+    await rpc(port, { jsonrpc: '2.0', method: 'notifications/initialized' }, init.sessionId!);
+
+    const listStart = performance.now();
+    const list = await rpc(port, { jsonrpc: '2.0', id: 2, method: 'tools/list', params: {} }, init.sessionId!);
+    const end = performance.now();
+
+    return {
+      listenMs,
+      firstToolsListMs: end - start,
+      toolsListOnlyMs: end - listStart,
+      tools: list.json?.result?.tools?.length ?? 0,
+    };
+  } finally {
+    child.kill('SIGKILL');
+  }
+}
+
+function stats(values: number[]): string {
+  const sorted = [...values].sort((a, b) => a - b);
+  const median = sorted[Math.floor(sorted.length / 2)];
+  return `median ${median.toFixed(1)}ms  min ${sorted[0].toFixed(1)}ms  max ${sorted[sorted.length - 1].toFixed(1)}ms`;
+}
+
+console.log('='.repeat(80));
+console.log(`⏱️  STARTUP BENCHMARK: ${ENTRY} (${RUNS} runs)`);
+console.log('='.repeat(80));
+
+const results: RunResult[] = [];
+for (let i = 0; i < RUNS; i++) {
+  const result = await runOnce(BASE_PORT + i);
+  results.push(result);
+  console.log(`Run ${i + 1}: listen ${result.listenMs.toFixed(1)}ms, first tools/list ${result.firstToolsListMs.toFixed(1)}ms (${result.tools} tools)`);
+}
+
+console.log('\n📊 Results');
+console.log(`  time-to-listen:           ${stats(results.map(r => r.listenMs))}`);
+console.log(`  time-to-first-tools/list: ${stats(results.map(r => r.firstToolsListMs))}`);
+console.log(`  tools/list request only:  ${stats(results.map(r => r.toolsListOnlyMs))}`);
@@ -0,0 +1,74 @@
+/**
+ * Validation Benchmark
+ *
+ * Measures per-call input validation overhead of tool calls:
+ * - before: SDK parse against the Zod shape rebuilt from the JSON Schema
+ *   (once per session), sanitizer copy, then the handler's own schema parse
+ * - after: the tool's compiled validator (sanitize + tool schema, one pass)
+ *   and a handler that receives the typed result
+ *
+ * Usage:
+ *   npx tsx bench-validation.ts [iterations]
+ */
+
+import { performance } from 'node:perf_hooks';
+import { z } from 'zod';
+import { getEventsReadTool, getMetricsReadTool, getListMachinesTool, getOverviewAlarmsTool } from './src/tools/index.js';
+import { fullSanitize } from './src/utils/inputSanitizer.js';
+import { jsonSchemaPropertiesToZodShape } from './src/utils/jsonSchemaToZod.js';
+import { getToolValidator, parseToolArgs } from './src/utils/toolValidation.js';
+
+const ITERATIONS = Number(process.argv[2]) || 20000;
+
+const cases = [
+  { tool: getEventsReadTool(''), input: { device_id: 'd1', from: '2024-01-01T00:00:00Z', to: '2024-01-02T00:00:00Z', events_names: ['alarm_door'], limit: 100 } },
+  { tool: getMetricsReadTool(''), input: { device_id: 'd1', metric_names: ['temperature', 'pressure'], last_value: true } },
+  { tool: getListMachinesTool(''), input: { search: 'fridge', is_connected: true, limit: 50 } },
+  { tool: getOverviewAlarmsTool(''), input: { from: '2024-01-01T00:00:00Z', to: '2024-01-02T00:00:00Z', severities: ['error'] } },
+];
+
+function measure(label: string, fn: () => void): number {
+  // Warm-up
+  for (let i = 0; i < 1000; i++) fn();
+  const start = performance.now();
+  for (let i = 0; i < ITERATIONS; i++) fn();
+  const perCallUs = ((performance.now() - start) / ITERATIONS) * 1000;
+  console.log(`  ${label.padEnd(36)} ${perCallUs.toFixed(2)}µs/call`);
+  return perCallUs;
+}
+
+console.log('='.repeat(80));
+console.log(`⏱️  VALIDATION BENCHMARK (${ITERATIONS} iterations per case)`);
+console.log('='.repeat(80));
+
+// The sanitizer logs every correction; keep the timings free of console I/O
+const log = console.log;
+const quiet = (fn: () => void) => () => {
+  console.log = () => {};
+  try { fn(); } finally { console.log = log; }
+};
+
+for (const { tool, input } of cases) {
+  const schema = (tool as any).argsSchema as z.ZodTypeAny;
+  log(`\n🔧 ${tool.name}`);
+
+  const before = measure('before: shape + sanitize + handler', quiet(() => {
+    const sdkArgs = z.object(jsonSchemaPropertiesToZodShape(tool.inputSchema)).parse(input);
+    const sanitized = fullSanitize(tool.name, sdkArgs);
+    schema.parse(sanitized);
+  }));
+
+  const sessionShape = z.object(jsonSchemaPropertiesToZodShape(tool.inputSchema));
+  const beforeCached = measure('before (shape reused in session)', quiet(() => {
+    const sanitized = fullSanitize(tool.name, sessionShape.parse(input));
+    schema.parse(sanitized);
+  }));
+
+  const validate = getToolValidator(tool.name, schema, tool.inputSchema);
+  const after = measure('after: compiled validator', quiet(() => {
+    const result = validate(input);
+    if (result.success) parseToolArgs(schema, result.data);
+  }));
+
+  log(`  📊 ${(before / after).toFixed(1)}x faster than first call of a session, ${(beforeCached / after).toFixed(1)}x faster afterwards`);
+}
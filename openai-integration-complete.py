@@ -4,11 +4,48 @@ Integrazione completa OpenAI MCP con Things5
 Include gestione automatica dell'autenticazione e rinnovo token
 """
 
+import asyncio
+import json
 import os
 import time
-from openai import OpenAI
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Union
+from openai import AsyncOpenAI, OpenAI
 from auth_manager import Things5AuthManager
 
+
+@dataclass
+class McpStep:
+    """
+    Passo MCP osservato in streaming (import dei tools o chiamata a un tool)
+    """
+    name: str
+    kind: str
+    started_at: float
+    duration_seconds: Optional[float] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class ChatResult:
+    """
+    Esito di una richiesta chat (usato da achat/chat_many/chat_stream)
+    """
+    message: str
+    output_text: str = ""
+    latency_seconds: float = 0.0
+    mcp_calls: int = 0
+    mcp_tools: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+    # Solo in streaming: secondi al primo token di testo e passi MCP con durata
+    time_to_first_token: Optional[float] = None
+    steps: List[McpStep] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
 class Things5OpenAIIntegration:
     """
     Integrazione completa Things5 + OpenAI MCP con gestione automatica auth
@@ -29,11 +66,16 @@ class Things5OpenAIIntegration:
         # Inizializza gestore autenticazione
         self.auth_manager = Things5AuthManager(username, password)
         
-        # Inizializza client OpenAI
+        # Inizializza client OpenAI (sincrono e asincrono)
         self.openai_client = OpenAI()
+        self.async_openai_client = AsyncOpenAI()
         
         # Stato autenticazione
         self._authenticated = False
+        
+        # Configurazione MCP riusata finché il token non cambia
+        self._mcp_config_cache: Dict[str, Any] = {}
+        self._mcp_config_token: Optional[str] = None
     
     def setup(self) -> bool:
         """
@@ -53,8 +95,34 @@ class Things5OpenAIIntegration:
             print("❌ Integration setup failed - authentication error")
             return False
     
+    def _get_mcp_config(self, require_approval: Union[str, Dict[str, Any]] = "never") -> Dict[str, Any]:
+        """
+        Configurazione MCP per il token corrente, ricreata solo quando il token cambia
+        
+        Args:
+            require_approval: Livello di approvazione per i tools
+            
+        Returns:
+            Configurazione per OpenAI MCP
+        """
+        token = self.auth_manager.get_access_token()
+        if not token:
+            raise Exception("No valid access token available")
+        
+        if token != self._mcp_config_token:
+            self._mcp_config_cache = {}
+            self._mcp_config_token = token
+        
+        key = json.dumps(require_approval, sort_keys=True)
+        if key not in self._mcp_config_cache:
+            self._mcp_config_cache[key] = self.auth_manager.create_openai_mcp_config(
+                server_url=self.server_url,
+                require_approval=require_approval
+            )
+        return self._mcp_config_cache[key]
+    
     def chat(self, message: str, model: str = "gpt-4o", 
-             require_approval: str = "never") -> str:
+             require_approval: str = "never", stream: bool = False) -> str:
         """
         Invia un messaggio a OpenAI con accesso ai tools Things5
         
@@ -62,6 +130,7 @@ class Things5OpenAIIntegration:
             message: Messaggio da inviare
             model: Modello OpenAI da utilizzare
             require_approval: Livello di approvazione per i tools
+            stream: Stampa testo e chiamate MCP man mano che arrivano (vedi chat_stream)
             
         Returns:
             Risposta di OpenAI
@@ -69,12 +138,13 @@ class Things5OpenAIIntegration:
         if not self._authenticated:
             return "❌ Error: Not authenticated. Call setup() first."
         
+        if stream:
+            result = self.chat_stream(message, model=model, require_approval=require_approval)
+            return result.output_text if result.ok else f"❌ Chat error: {result.error}"
+        
         try:
-            # Ottieni configurazione MCP aggiornata (con token fresco)
-            mcp_config = self.auth_manager.create_openai_mcp_config(
-                server_url=self.server_url,
-                require_approval=require_approval
-            )
+            # Ottieni configurazione MCP (ricreata solo se il token è cambiato)
+            mcp_config = self._get_mcp_config(require_approval)
             
             print(f"💬 Sending message to OpenAI with Things5 tools...")
             print(f"   Message: {message}")
@@ -103,6 +173,161 @@ class Things5OpenAIIntegration:
             print(error_msg)
             return error_msg
     
+    def chat_stream(self, message: str, model: str = "gpt-4o",
+                    require_approval: Union[str, Dict[str, Any]] = "never",
+                    verbose: bool = True) -> ChatResult:
+        """
+        Come chat(), ma consuma gli eventi della risposta man mano che arrivano:
+        il testo è stampato in modo incrementale e ogni passo MCP (import dei
+        tools, chiamate) è mostrato all'avvio e alla fine, con la sua durata
+        
+        Args:
+            message: Messaggio da inviare
+            model: Modello OpenAI da utilizzare
+            require_approval: Livello di approvazione per i tools
+            verbose: Stampa testo e passi MCP durante lo streaming
+            
+        Returns:
+            ChatResult con testo, latenza totale, tempo al primo token e passi MCP
+        """
+        result = ChatResult(message=message)
+        if not self._authenticated:
+            result.error = "Not authenticated. Call setup() first."
+            return result
+        
+        start = time.perf_counter()
+        pending: Dict[str, McpStep] = {}
+        chunks: List[str] = []
+        try:
+            mcp_config = self._get_mcp_config(require_approval)
+            
+            stream = self.openai_client.responses.create(
+                model=model,
+                tools=[mcp_config],
+                input=message,
+                stream=True
+            )
+            
+            for event in stream:
+                elapsed = time.perf_counter() - start
+                item = getattr(event, "item", None)
+                
+                if event.type == "response.output_item.added" and item.type in ("mcp_call", "mcp_list_tools"):
+                    step = McpStep(
+                        name=item.name if item.type == "mcp_call" else "tools/list",
+                        kind=item.type,
+                        started_at=elapsed
+                    )
+                    pending[item.id] = step
+                    result.steps.append(step)
+                    if item.type == "mcp_call":
+                        result.mcp_calls += 1
+                        result.mcp_tools.append(step.name)
+                    if verbose:
+                        print(f"\n🔧 [{elapsed:5.2f}s] {step.name} ...", flush=True)
+                
+                elif event.type == "response.output_item.done" and item.id in pending:
+                    step = pending.pop(item.id)
+                    step.duration_seconds = elapsed - step.started_at
+                    step.error = getattr(item, "error", None)
+                    if verbose:
+                        outcome = f"❌ {step.error}" if step.error else "✅"
+                        print(f"   [{elapsed:5.2f}s] {step.name} {outcome} ({step.duration_seconds:.2f}s)", flush=True)
+                
+                elif event.type == "response.output_text.delta":
+                    if result.time_to_first_token is None:
+                        result.time_to_first_token = elapsed
+                        if verbose:
+                            print()
+                    chunks.append(event.delta)
+                    if verbose:
+                        print(event.delta, end="", flush=True)
+                
+                elif event.type == "response.failed":
+                    error = getattr(event.response, "error", None)
+                    result.error = getattr(error, "message", None) or "Response failed"
+                
+                elif event.type == "error":
+                    result.error = getattr(event, "message", None) or "Stream error"
+            
+            result.output_text = "".join(chunks)
+        except Exception as e:
+            result.error = str(e)
+        finally:
+            result.latency_seconds = time.perf_counter() - start
+        
+        if verbose:
+            first_token = f"{result.time_to_first_token:.2f}s" if result.time_to_first_token is not None else "n/a"
+            print(f"\n⏱️  First token: {first_token}, total: {result.latency_seconds:.2f}s, "
+                  f"MCP calls: {result.mcp_calls}")
+            if result.error:
+                print(f"❌ Chat error: {result.error}")
+        
+        return result
+    
+    async def achat(self, message: str, model: str = "gpt-4o",
+                    require_approval: Union[str, Dict[str, Any]] = "never") -> ChatResult:
+        """
+        Versione asincrona di chat(), con latenza e chiamate MCP della richiesta
+        
+        Args:
+            message: Messaggio da inviare
+            model: Modello OpenAI da utilizzare
+            require_approval: Livello di approvazione per i tools
+            
+        Returns:
+            ChatResult con testo, latenza, numero di chiamate MCP o errore
+        """
+        result = ChatResult(message=message)
+        if not self._authenticated:
+            result.error = "Not authenticated. Call setup() first."
+            return result
+        
+        start = time.perf_counter()
+        try:
+            # Il rinnovo del token è una chiamata HTTP sincrona: fuori dall'event loop
+            mcp_config = await asyncio.to_thread(self._get_mcp_config, require_approval)
+            
+            response = await self.async_openai_client.responses.create(
+                model=model,
+                tools=[mcp_config],
+                input=message
+            )
+            
+            mcp_calls = [item for item in response.output if item.type == "mcp_call"]
+            result.output_text = response.output_text
+            result.mcp_calls = len(mcp_calls)
+            result.mcp_tools = [call.name for call in mcp_calls]
+        except Exception as e:
+            result.error = str(e)
+        finally:
+            result.latency_seconds = time.perf_counter() - start
+        
+        return result
+    
+    async def chat_many(self, messages: List[str], concurrency: int = 8,
+                        model: str = "gpt-4o",
+                        require_approval: Union[str, Dict[str, Any]] = "never") -> List[ChatResult]:
+        """
+        Invia molti messaggi in parallelo, con al massimo `concurrency` richieste in corso
+        
+        Args:
+            messages: Messaggi da inviare
+            concurrency: Richieste contemporanee massime
+            model: Modello OpenAI da utilizzare
+            require_approval: Livello di approvazione per i tools
+            
+        Returns:
+            Un ChatResult per messaggio, nello stesso ordine
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        
+        async def run(message: str) -> ChatResult:
+            async with semaphore:
+                return await self.achat(message, model=model, require_approval=require_approval)
+        
+        return await asyncio.gather(*(run(message) for message in messages))
+    
     def get_status(self) -> dict:
         """
         Ottiene lo stato dell'integrazione
@@ -152,17 +377,21 @@ def demo_basic_usage():
             "List the users in my system"
         ]
         
-        for i, message in enumerate(examples, 1):
-            print(f"\n📝 Example {i}: {message}")
+        # Tutti gli esempi in parallelo, senza attese tra una richiesta e l'altra
+        started = time.perf_counter()
+        results = asyncio.run(integration.chat_many(examples, concurrency=4))
+        elapsed = time.perf_counter() - started
+        
+        for i, result in enumerate(results, 1):
+            print(f"\n📝 Example {i}: {result.message}")
             print("-" * 50)
-            
-            response = integration.chat(message)
-            print(f"🤖 OpenAI Response:")
-            print(response)
-            
-            if i < len(examples):
-                print("\n⏱️  Waiting 3 seconds before next example...")
-                time.sleep(3)
+            if result.ok:
+                print(f"🤖 OpenAI Response ({result.latency_seconds:.1f}s, {result.mcp_calls} MCP calls):")
+                print(result.output_text)
+            else:
+                print(f"❌ Chat error: {result.error}")
+        
+        print(f"\n⏱️  {len(results)} examples in {elapsed:.1f}s")
     
     finally:
         integration.cleanup()
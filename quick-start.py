@@ -5,9 +5,135 @@ Esempio minimo per iniziare subito
 """
 
 import os
+import time
 from openai import OpenAI
 from auth_manager import Things5AuthManager
 
+SERVER_URL = "https://things5-mcp-server.onrender.com/sse"
+
+def stream_answer(client, mcp_config, question, model="gpt-4o", previous_response_id=None):
+    """
+    Invia la domanda in streaming: stampa il testo man mano che arriva e
+    mostra ogni passo MCP (import dei tools, chiamate) con la sua durata
+    
+    Returns:
+        Tupla (testo completo della risposta, id della risposta)
+    """
+    start = time.perf_counter()
+    first_token = None
+    started = {}
+    chunks = []
+    response_id = None
+    
+    stream = client.responses.create(
+        model=model,
+        tools=[mcp_config],
+        input=question,
+        previous_response_id=previous_response_id,
+        stream=True
+    )
+    
+    for event in stream:
+        elapsed = time.perf_counter() - start
+        item = getattr(event, "item", None)
+        
+        if event.type == "response.output_item.added" and item.type in ("mcp_call", "mcp_list_tools"):
+            name = item.name if item.type == "mcp_call" else "tools/list"
+            started[item.id] = (name, elapsed)
+            print(f"🔧 [{elapsed:5.2f}s] {name} ...", flush=True)
+        
+        elif event.type == "response.output_item.done" and item.id in started:
+            name, began = started.pop(item.id)
+            error = getattr(item, "error", None)
+            outcome = f"❌ {error}" if error else "✅"
+            print(f"   [{elapsed:5.2f}s] {name} {outcome} ({elapsed - began:.2f}s)", flush=True)
+        
+        elif event.type == "response.output_text.delta":
+            if first_token is None:
+                first_token = elapsed
+                print(f"\n💬 Response:")
+            chunks.append(event.delta)
+            print(event.delta, end="", flush=True)
+        
+        elif event.type == "response.completed":
+            response_id = event.response.id
+        
+        elif event.type == "response.failed":
+            error = getattr(event.response, "error", None)
+            raise Exception(getattr(error, "message", None) or "Response failed")
+        
+        elif event.type == "error":
+            raise Exception(event.message)
+    
+    total = time.perf_counter() - start
+    first = f"{first_token:.2f}s" if first_token is not None else "n/a"
+    print(f"\n⏱️  First token: {first}, total: {total:.2f}s")
+    return "".join(chunks), response_id
+
+class ConversationSession:
+    """
+    Conversazione multi-turno con Things5 MCP
+    
+    Ogni turno è collegato al precedente con previous_response_id: il contesto,
+    compreso l'elenco dei tools importato dal server MCP al primo turno, resta
+    lato OpenAI e non viene reinviato né reimportato a ogni domanda. La
+    configurazione MCP è ricreata solo quando Things5AuthManager rinnova il token.
+    """
+    
+    def __init__(self, client, auth_manager, server_url=SERVER_URL, model="gpt-4o"):
+        self.client = client
+        self.auth_manager = auth_manager
+        self.server_url = server_url
+        self.model = model
+        self.previous_response_id = None
+        self.turns = 0
+        self.config_rebuilds = 0
+        self._mcp_config = None
+        self._token = None
+    
+    def _get_mcp_config(self):
+        """
+        Configurazione MCP per il token corrente (ricreata solo se è cambiato)
+        """
+        token = self.auth_manager.get_access_token()
+        if not token:
+            raise Exception("No valid access token available")
+        
+        if token != self._token:
+            self._mcp_config = self.auth_manager.create_openai_mcp_config(
+                server_url=self.server_url
+            )
+            self._token = token
+            self.config_rebuilds += 1
+        return self._mcp_config
+    
+    def ask(self, question):
+        """
+        Invia la domanda come turno successivo della conversazione
+        
+        Returns:
+            Testo completo della risposta
+        """
+        text, response_id = stream_answer(
+            self.client,
+            self._get_mcp_config(),
+            question,
+            model=self.model,
+            previous_response_id=self.previous_response_id
+        )
+        # Un turno fallito non interrompe la catena: si riparte dall'ultimo riuscito
+        if response_id:
+            self.previous_response_id = response_id
+            self.turns += 1
+        return text
+    
+    def reset(self):
+        """
+        Inizia una nuova conversazione (il prossimo turno reimporta i tools)
+        """
+        self.previous_response_id = None
+        self.turns = 0
+
 def quick_start():
     """
     Esempio rapido per iniziare con Things5 MCP + OpenAI
@@ -41,35 +167,17 @@ def quick_start():
     client = OpenAI()
     print("✅ OpenAI client ready!")
     
-    # 4. Crea configurazione MCP
-    print("\n🔧 Creating MCP configuration...")
-    mcp_config = auth_manager.create_openai_mcp_config(
-        server_url="https://things5-mcp-server.onrender.com/sse"
-    )
-    print("✅ MCP configuration ready!")
+    # 4. Crea la sessione di conversazione (configurazione MCP inclusa)
+    print("\n🔧 Creating MCP conversation session...")
+    session = ConversationSession(client, auth_manager)
+    print("✅ MCP session ready!")
     
-    # 5. Test con OpenAI
+    # 5. Test con OpenAI: primo turno della conversazione, importa i tools
     print("\n💬 Testing OpenAI + Things5 integration...")
     
     try:
-        response = client.responses.create(
-            model="gpt-4o",
-            tools=[mcp_config],
-            input="Hello! Can you show me what IoT tools are available?"
-        )
-        
+        session.ask("Hello! Can you show me what IoT tools are available?")
         print("✅ Integration test successful!")
-        print(f"\n🤖 OpenAI Response:")
-        print("-" * 50)
-        print(response.output_text)
-        print("-" * 50)
-        
-        # Mostra chiamate MCP effettuate
-        mcp_calls = [item for item in response.output if item.type == "mcp_call"]
-        if mcp_calls:
-            print(f"\n🔧 MCP Tools Used: {len(mcp_calls)}")
-            for call in mcp_calls:
-                print(f"   - {call.name}")
         
     except Exception as e:
         print(f"❌ Integration test failed: {e}")
@@ -89,7 +197,7 @@ def quick_start():
     for i, example in enumerate(examples, 1):
         print(f"   {i}. {example}")
     
-    print(f"\n💡 Interactive mode:")
+    print(f"\n💡 Interactive mode ('new' starts a fresh conversation):")
     
     try:
         while True:
@@ -101,21 +209,16 @@ def quick_start():
             if not question:
                 continue
             
-            print("🤖 Thinking...")
-            
-            # Ottieni token fresco automaticamente
-            fresh_config = auth_manager.create_openai_mcp_config(
-                server_url="https://things5-mcp-server.onrender.com/sse"
-            )
+            if question.lower() == 'new':
+                session.reset()
+                print("🆕 New conversation started")
+                continue
             
-            response = client.responses.create(
-                model="gpt-4o",
-                tools=[fresh_config],
-                input=question
-            )
+            print("🤖 Thinking...")
             
-            print(f"\n💬 Response:")
-            print(response.output_text)
+            # Turno successivo della conversazione: token rinnovato automaticamente,
+            # testo e chiamate MCP stampati man mano che arrivano
+            session.ask(question)
             
     except KeyboardInterrupt:
         print(f"\n\n👋 Goodbye!")
@@ -124,6 +227,8 @@ def quick_start():
         print(f"\n❌ Error: {e}")
     
     finally:
+        print(f"📊 Turns: {session.turns}, MCP config rebuilds: {session.config_rebuilds}")
+        
         # Cleanup
         auth_manager.stop_auto_refresh()
         print("🧹 Cleanup completed")
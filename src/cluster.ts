@@ -0,0 +1,205 @@
+#!/usr/bin/env node
+
+/**
+ * Cluster Mode
+ *
+ * Forks N workers, each running the Streamable HTTP server on an internal
+ * port, and runs a small proxy in the primary process on the public PORT.
+ * Requests carrying an `mcp-session-id` are routed to the worker that owns
+ * the session; new sessions go to the worker with the fewest sessions.
+ * Workers report the sessions they create and close over IPC.
+ *
+ * Configuration (environment variables):
+ * - CLUSTER_WORKERS: number of workers (default: available CPU cores)
+ * - CLUSTER_WORKER_BASE_PORT: first internal worker port (default: PORT + 1)
+ *
+ * Use SESSION_STORE=file or SESSION_STORE=redis so sessions owned by a
+ * crashed worker can be rehydrated by another one.
+ */
+
+import cluster, { Worker } from 'node:cluster';
+import http from 'node:http';
+import os from 'node:os';
+
+interface WorkerSlot {
+  index: number;
+  port: number;
+  worker: Worker | null;
+  sessions: number;
+}
+
+const PORT = Number(process.env.PORT || 3000);
+const WORKER_COUNT = Math.max(1, Number(process.env.CLUSTER_WORKERS) || os.availableParallelism());
+const WORKER_BASE_PORT = Number(process.env.CLUSTER_WORKER_BASE_PORT) || PORT + 1;
+
+const slots: WorkerSlot[] = [];
+// mcp-session-id -> index of the owning worker slot
+const sessionOwners: Map<string, number> = new Map<string, number>();
+let nextSlot = 0;
+
+const upstreamAgent = new http.Agent({ keepAlive: true, maxSockets: 256 });
+
+function forkWorker(slot: WorkerSlot): void {
+  const worker = cluster.fork({ PORT: String(slot.port), CLUSTER_WORKER_ID: String(slot.index) });
+  slot.worker = worker;
+
+  worker.on('message', (message: any) => {
+    if (typeof message?.sessionId !== 'string') return;
+    // Workers report every session they create or rehydrate, including /sse
+    // sessions whose id never appears in a response header
+    if (message.type === 'mcp-session-created') {
+      claimSession(message.sessionId, slot);
+    }
+    // Workers report sessions they closed on their own (idle close, errors, ...)
+    if (message.type === 'mcp-session-closed') {
+      releaseSession(message.sessionId);
+    }
+  });
+}
+
+function releaseSession(sessionId: string): void {
+  const owner = sessionOwners.get(sessionId);
+  if (owner !== undefined) {
+    sessionOwners.delete(sessionId);
+    slots[owner].sessions = Math.max(0, slots[owner].sessions - 1);
+  }
+}
+
+function claimSession(sessionId: string, slot: WorkerSlot): void {
+  if (sessionOwners.get(sessionId) === slot.index) {
+    return;
+  }
+  releaseSession(sessionId);
+  sessionOwners.set(sessionId, slot.index);
+  slot.sessions++;
+}
+
+// Pick the live worker with the fewest sessions, round-robin between ties
+function pickSlot(): WorkerSlot | null {
+  let best: WorkerSlot | null = null;
+  for (let i = 0; i < slots.length; i++) {
+    const slot = slots[(nextSlot + i) % slots.length];
+    if (!slot.worker || slot.worker.isDead()) continue;
+    if (!best || slot.sessions < best.sessions) best = slot;
+  }
+  nextSlot = (nextSlot + 1) % slots.length;
+  return best;
+}
+
+function routeRequest(req: http.IncomingMessage): WorkerSlot | null {
+  const sessionId = req.headers['mcp-session-id'];
+  if (typeof sessionId === 'string') {
+    const owner = sessionOwners.get(sessionId);
+    const slot = owner !== undefined ? slots[owner] : undefined;
+    if (slot?.worker && !slot.worker.isDead()) {
+      return slot;
+    }
+  }
+  return pickSlot();
+}
+
+function sendProxyError(res: http.ServerResponse, status: number, message: string): void {
+  if (res.headersSent) {
+    res.destroy();
+    return;
+  }
+  res.writeHead(status, { 'Content-Type': 'application/json' });
+  res.end(JSON.stringify({ jsonrpc: '2.0', error: { code: -32603, message }, id: null }));
+}
+
+function startProxy(): void {
+  const proxy = http.createServer((req, res) => {
+    const slot = routeRequest(req);
+    if (!slot) {
+      sendProxyError(res, 503, 'No worker available');
+      return;
+    }
+
+    const requestSessionId = req.headers['mcp-session-id'];
+    const upstream = http.request({
+      host: '127.0.0.1',
+      port: slot.port,
+      method: req.method,
+      path: req.url,
+      headers: req.headers,
+      agent: upstreamAgent,
+    }, (upstreamRes) => {
+      // Ownership normally arrives over IPC (mcp-session-created); the response
+      // header covers a client that sends its next request before that message
+      const responseSessionId = upstreamRes.headers['mcp-session-id'];
+      if (typeof responseSessionId === 'string') {
+        claimSession(responseSessionId, slot);
+      }
+      if (req.method === 'DELETE' && typeof requestSessionId === 'string' && (upstreamRes.statusCode ?? 500) < 300) {
+        releaseSession(requestSessionId);
+      }
+      res.writeHead(upstreamRes.statusCode ?? 502, upstreamRes.headers);
+      upstreamRes.pipe(res);
+    });
+
+    upstream.on('error', (error) => {
+      console.error(`[Cluster] ❌ Worker ${slot.index} request failed:`, error.message);
+      sendProxyError(res, 502, 'Worker unavailable');
+    });
+    // Streams (SSE) stay open until either side goes away
+    res.on('close', () => upstream.destroy());
+
+    req.pipe(upstream);
+  });
+
+  proxy.listen(PORT, () => {
+    console.error(`[Cluster] MCP cluster proxy listening on port ${PORT} with ${WORKER_COUNT} workers`);
+  });
+}
+
+function runPrimary(): void {
+  if (!process.env.SESSION_STORE || process.env.SESSION_STORE === 'memory') {
+    console.error('[Cluster] ⚠️  SESSION_STORE is in-memory: sessions of a crashed worker cannot be rehydrated');
+  }
+
+  for (let i = 0; i < WORKER_COUNT; i++) {
+    const slot: WorkerSlot = { index: i, port: WORKER_BASE_PORT + i, worker: null, sessions: 0 };
+    slots.push(slot);
+    forkWorker(slot);
+  }
+
+  let shuttingDown = false;
+  cluster.on('exit', (worker, code, signal) => {
+    const slot = slots.find(s => s.worker === worker);
+    if (!slot) return;
+
+    // Sessions of a dead worker are reassigned on their next request
+    for (const [sessionId, owner] of Array.from(sessionOwners.entries())) {
+      if (owner === slot.index) sessionOwners.delete(sessionId);
+    }
+    slot.sessions = 0;
+    slot.worker = null;
+
+    if (!shuttingDown) {
+      console.error(`[Cluster] Worker ${slot.index} exited (${signal || code}), restarting`);
+      forkWorker(slot);
+    }
+  });
+
+  const shutdown = () => {
+    shuttingDown = true;
+    console.error('[Cluster] Shutting down workers...');
+    for (const slot of slots) {
+      slot.worker?.process.kill('SIGINT');
+    }
+    setTimeout(() => process.exit(0), 5000).unref();
+    cluster.on('exit', () => {
+      if (slots.every(s => !s.worker)) process.exit(0);
+    });
+  };
+  process.on('SIGINT', shutdown);
+  process.on('SIGTERM', shutdown);
+
+  startProxy();
+}
+
+if (cluster.isPrimary) {
+  runPrimary();
+} else {
+  await import('./streamableHttp.js');
+}
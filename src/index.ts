@@ -16,11 +16,16 @@ async function run() {
                 // Import and run the streamable HTTP server
                 await import('./streamableHttp.js');
                 break;
+            case 'cluster':
+                // Import and run the multi-worker streamable HTTP server
+                await import('./cluster.js');
+                break;
             default:
                 console.error(`Unknown script: ${scriptName}`);
                 console.log('Available scripts:');
                 console.log('- stdio');
                 console.log('- streamableHttp');
+                console.log('- cluster');
                 process.exit(1);
         }
     } catch (error) {
@@ -1,10 +1,10 @@
 import axios from 'axios';
 import jwt from 'jsonwebtoken';
 
-// Cache for OIDC configurations
-const oidcConfigCache: any = {};
 import { KEYCLOAK_BASE_URL } from './config.js';
-const CACHE_TTL = 3600000; // 1 hour in milliseconds
+import { cachedMetadata } from './utils/metadataCache.js';
+// OIDC configurations are cached in memory and, when enabled, on disk
+const CACHE_TTL_SECONDS = 3600; // 1 hour
 
 export class Keycloak {
 
@@ -59,15 +59,10 @@ export class Keycloak {
    * @returns {Promise<Object>} OIDC configuration
    */
   getKeycloakOIDCConfig = async (realm: string) => {
-    const cacheKey = `oidc-config-${realm}`;
-
-    // Check if we have a fresh cached configuration
-    if (oidcConfigCache[cacheKey] &&
-      oidcConfigCache[cacheKey].timestamp + CACHE_TTL > Date.now()) {
-      console.log(`[${new Date().toISOString()}] Using cached OIDC config for realm '${realm}'`);
-      return oidcConfigCache[cacheKey].config;
-    }
+    return cachedMetadata('oidc', realm, () => this.fetchKeycloakOIDCConfig(realm), CACHE_TTL_SECONDS);
+  }
 
+  private fetchKeycloakOIDCConfig = async (realm: string) => {
     try {
       console.log(`[${new Date().toISOString()}] Fetching OIDC config for realm '${realm}'`);
       const oidcConfigUrl = `${KEYCLOAK_BASE_URL}/auth/realms/${realm}/.well-known/openid-configuration`;
@@ -79,12 +74,6 @@ export class Keycloak {
       });
 
       if (response.status === 200 && response.data) {
-        // Cache the configuration
-        oidcConfigCache[cacheKey] = {
-          config: response.data,
-          timestamp: Date.now()
-        };
-
         console.log(`[${new Date().toISOString()}] Successfully fetched OIDC config for realm '${realm}'`);
         return response.data;
       } else {
@@ -0,0 +1,32 @@
+#!/usr/bin/env node
+
+/**
+ * Generate dist/tool-manifest.json (run after tsc, see "build" in package.json)
+ *
+ * Imports every tool module once at build time so the server can register
+ * tools at startup without importing them.
+ */
+
+import { writeFileSync } from "node:fs";
+import { createRequire } from "node:module";
+import * as toolFactories from "../tools/index.js";
+import { buildToolManifest, TOOL_MANIFEST_PATH, TOOL_MODULES } from "../tools/manifest.js";
+
+const require = createRequire(import.meta.url);
+const pkg = require("../../package.json");
+
+// tools/index.ts and the manifest module list must describe the same tools
+const exported = Object.keys(toolFactories).sort();
+const listed = TOOL_MODULES.map(m => m.factory).sort();
+const missing = exported.filter(name => !listed.includes(name));
+const unknown = listed.filter(name => !exported.includes(name));
+if (missing.length > 0 || unknown.length > 0) {
+  console.error('[ToolManifest] ❌ TOOL_MODULES is out of sync with tools/index.ts');
+  if (missing.length > 0) console.error('  missing from TOOL_MODULES:', missing.join(', '));
+  if (unknown.length > 0) console.error('  not exported by tools/index.ts:', unknown.join(', '));
+  process.exit(1);
+}
+
+const manifest = await buildToolManifest(pkg.version);
+writeFileSync(TOOL_MANIFEST_PATH, JSON.stringify(manifest));
+console.error(`[ToolManifest] ✅ Wrote ${manifest.tools.length} tools to ${TOOL_MANIFEST_PATH}`);
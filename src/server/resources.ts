@@ -0,0 +1,156 @@
+import { McpServer, ResourceTemplate } from "@modelcontextprotocol/sdk/server/mcp.js";
+import {
+  ErrorCode,
+  McpError,
+  SubscribeRequestSchema,
+  UnsubscribeRequestSchema,
+} from "@modelcontextprotocol/sdk/types.js";
+import axios from "axios";
+import { randomUUID } from "node:crypto";
+import { THINGS5_BASE_URL } from "../config.js";
+import { fetchFirstOrganizationId } from "../tools/organizationUtils.js";
+import { fetchMachines, MachineInfo } from "../utils/machineContext.js";
+import { PollTarget, resourcePoller } from "../utils/resourcePoller.js";
+
+/** Look-back window for the active alarms resource */
+const ALARMS_WINDOW_HOURS = Number(process.env.RESOURCE_ALARMS_WINDOW_HOURS) || 24;
+
+const RESOURCE_URI = /^things5:\/\/org\/([^/]+)\/(machines|alarms)$/;
+
+async function fetchActiveAlarms(auth_token: string, organizationId: string): Promise<any[]> {
+  const to = new Date();
+  const from = new Date(to.getTime() - ALARMS_WINDOW_HOURS * 60 * 60 * 1000);
+  const resp = await axios.get(`${THINGS5_BASE_URL}/organizations/${organizationId}/overview/alarms`, {
+    headers: { Authorization: `Bearer ${auth_token}` },
+    params: { from: from.toISOString(), to: to.toISOString(), limit: 100, sorting: 'desc' }
+  });
+  return resp.data?.data ?? [];
+}
+
+function machinesTarget(organizationId: string): PollTarget<MachineInfo[]> {
+  return {
+    uri: `things5://org/${organizationId}/machines`,
+    fetch: (auth_token) => fetchMachines(auth_token, organizationId),
+    // Only connectivity/activation changes are worth a notification
+    fingerprint: (machines) => JSON.stringify(
+      machines.map(m => `${m.id}:${m.is_connected ? 1 : 0}:${m.active === false ? 0 : 1}`).sort()
+    ),
+  };
+}
+
+function alarmsTarget(organizationId: string): PollTarget<any[]> {
+  return {
+    uri: `things5://org/${organizationId}/alarms`,
+    fetch: (auth_token) => fetchActiveAlarms(auth_token, organizationId),
+    fingerprint: (alarms) => JSON.stringify(
+      alarms.map(a => a.id ?? `${a.device_id ?? a.device_name}|${a.event_type}|${a.timestamp}`).sort()
+    ),
+  };
+}
+
+function targetFor(uri: string): PollTarget<any> {
+  const match = uri.match(RESOURCE_URI);
+  if (!match) {
+    throw new McpError(ErrorCode.InvalidParams, `Unknown resource: ${uri}`);
+  }
+  const organizationId = decodeURIComponent(match[1]);
+  return match[2] === 'machines' ? machinesTarget(organizationId) : alarmsTarget(organizationId);
+}
+
+/**
+ * Register the device status and active alarm resources and their
+ * subscription handlers. Returns a cleanup function that drops the
+ * subscriptions of this server instance.
+ */
+export function registerDeviceResources(server: McpServer, auth_token?: string): () => void {
+  const subscriberId = randomUUID();
+
+  const requireToken = (): string => {
+    if (!auth_token) {
+      throw new McpError(ErrorCode.InvalidRequest, 'Authentication is required to read device resources');
+    }
+    return auth_token;
+  };
+
+  const listFor = (kind: 'machines' | 'alarms', name: string, description: string) => async () => {
+    if (!auth_token) return { resources: [] };
+    const organizationId = await fetchFirstOrganizationId(auth_token);
+    return {
+      resources: [{
+        uri: `things5://org/${organizationId}/${kind}`,
+        name,
+        description,
+        mimeType: 'application/json',
+      }],
+    };
+  };
+
+  server.registerResource(
+    'machines',
+    new ResourceTemplate('things5://org/{organization_id}/machines', {
+      list: listFor('machines', 'Machines', 'Connection status of the organization devices'),
+    }),
+    {
+      title: 'Machines',
+      description: 'Devices of the organization with their connection status. Subscribe to be notified when a device connects or disconnects.',
+      mimeType: 'application/json',
+    },
+    async (uri, { organization_id }) => {
+      const machines = await fetchMachines(requireToken(), String(organization_id));
+      const connected = machines.filter(m => m.is_connected).length;
+      return {
+        contents: [{
+          uri: uri.href,
+          mimeType: 'application/json',
+          text: JSON.stringify({ organization_id, connected, offline: machines.length - connected, machines }),
+        }],
+      };
+    }
+  );
+
+  server.registerResource(
+    'alarms',
+    new ResourceTemplate('things5://org/{organization_id}/alarms', {
+      list: listFor('alarms', 'Active alarms', `Alarms raised in the last ${ALARMS_WINDOW_HOURS} hours`),
+    }),
+    {
+      title: 'Active alarms',
+      description: `Alarms raised in the last ${ALARMS_WINDOW_HOURS} hours. Subscribe to be notified when alarms are raised.`,
+      mimeType: 'application/json',
+    },
+    async (uri, { organization_id }) => {
+      const alarms = await fetchActiveAlarms(requireToken(), String(organization_id));
+      return {
+        contents: [{
+          uri: uri.href,
+          mimeType: 'application/json',
+          text: JSON.stringify({ organization_id, window_hours: ALARMS_WINDOW_HOURS, alarms }),
+        }],
+      };
+    }
+  );
+
+  server.server.setRequestHandler(SubscribeRequestSchema, async (request) => {
+    const uri = request.params.uri;
+    const target = targetFor(uri);
+    const token = requireToken();
+
+    // Only subscribe callers that can read the resource themselves
+    let initialData: unknown;
+    try {
+      initialData = await target.fetch(token);
+    } catch (error: any) {
+      throw new McpError(ErrorCode.InvalidRequest, `Cannot subscribe to ${uri}: ${error.response?.data?.message || error.message}`);
+    }
+
+    resourcePoller.subscribe(target, subscriberId, token, (updatedUri) => server.server.sendResourceUpdated({ uri: updatedUri }), initialData);
+    return {};
+  });
+
+  server.server.setRequestHandler(UnsubscribeRequestSchema, async (request) => {
+    resourcePoller.unsubscribe(request.params.uri, subscriberId);
+    return {};
+  });
+
+  return () => resourcePoller.unsubscribeAll(subscriberId);
+}
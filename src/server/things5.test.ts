@@ -1,5 +1,7 @@
 import { describe, it, expect, beforeEach } from 'vitest';
-import { createServer } from './things5.js';
+import { Client } from '@modelcontextprotocol/sdk/client/index.js';
+import { InMemoryTransport } from '@modelcontextprotocol/sdk/inMemory.js';
+import { createServer, getToolsListVersion, parseAllowedTools } from './things5.js';
 
 describe('Things5 MCP Server', () => {
   let server: any;
@@ -38,3 +40,45 @@ describe('Things5 MCP Server', () => {
     await expect(cleanup()).resolves.not.toThrow();
   });
 });
+
+describe('tools/list cache', () => {
+  async function listTools(allowedTools?: string[]) {
+    const { server } = createServer('test-token', { allowedTools });
+    const client = new Client({ name: 'test-client', version: '1.0.0' });
+    const [clientTransport, serverTransport] = InMemoryTransport.createLinkedPair();
+    await Promise.all([server.connect(serverTransport), client.connect(clientTransport)]);
+    const result = await client.listTools();
+    await client.close();
+    return result;
+  }
+
+  it('serves the same versioned payload to every session', async () => {
+    const first = await listTools();
+    const second = await listTools();
+
+    expect(first.tools.length).toBeGreaterThan(0);
+    expect(second).toEqual(first);
+    expect(first._meta?.['things5/tools_version']).toBe(getToolsListVersion());
+  });
+
+  it('advertises the JSON input schemas of the tool manifest', async () => {
+    const { tools } = await listTools(['metrics_read']);
+
+    expect(tools).toHaveLength(1);
+    expect(tools[0].name).toBe('metrics_read');
+    expect(tools[0].inputSchema.type).toBe('object');
+    expect(Object.keys(tools[0].inputSchema.properties ?? {})).toEqual(
+      expect.arrayContaining(['device_id', 'from', 'to', 'metric_names', 'parallel_windows'])
+    );
+  });
+
+  it('caches each allowed-tools subset separately', async () => {
+    const allowedTools = parseAllowedTools('metrics_read,list_machines,not_a_tool');
+    const subset = await listTools(allowedTools);
+
+    expect(allowedTools).toEqual(['list_machines', 'metrics_read']);
+    expect(subset.tools.map(t => t.name).sort()).toEqual(['list_machines', 'metrics_read']);
+    expect(subset._meta?.['things5/tools_version']).toBe(getToolsListVersion(allowedTools));
+    expect(getToolsListVersion(allowedTools)).not.toBe(getToolsListVersion());
+  });
+});
@@ -1,16 +1,105 @@
 import { McpServer } from "@modelcontextprotocol/sdk/server/mcp.js";
-import { LoggingLevel, SetLevelRequestSchema } from "@modelcontextprotocol/sdk/types.js";
-import * as toolFactories from "../tools/index.js";
+import {
+  CallToolRequestSchema,
+  ErrorCode,
+  ListToolsRequestSchema,
+  LoggingLevel,
+  McpError,
+  SetLevelRequestSchema,
+} from "@modelcontextprotocol/sdk/types.js";
+import { loadToolFactory, loadToolManifest, ToolFactory } from "../tools/manifest.js";
 import { createRequire } from "node:module";
-import { z } from "zod";
-import { jsonSchemaPropertiesToZodShape } from "../utils/jsonSchemaToZod.js";
-import { autoResolveParameters, canAutoResolve } from "../utils/toolDependencies.js";
-import { getAvailableMachines, getMachinesSummary, getCacheInfo } from "../utils/machineContext.js";
-import { fullSanitize } from "../utils/inputSanitizer.js";
+import { autoResolveParameters, canAutoResolve, needsMachineContext } from "../utils/toolDependencies.js";
+import { getAvailableMachines, getMachinesSummary, getCacheInfo, MachineInfo } from "../utils/machineContext.js";
+import { generateHelpfulErrorMessage } from "../utils/inputSanitizer.js";
+import { getToolValidator } from "../utils/toolValidation.js";
+import { failure } from "../tools/utils/toolResult.js";
+import { instrumentAxios, parseTraceparent, withSpan } from "../utils/tracing.js";
+import { installResilience } from "../utils/resilience.js";
+import { installAdmission } from "../utils/admission.js";
+import { runWithCallContext, tenantFromToken } from "../utils/callContext.js";
+import { registerDeviceResources } from "./resources.js";
+import axios from "axios";
+import { createHash } from "node:crypto";
 const require = createRequire(import.meta.url);
 const pkg = require("../../package.json");
 
-export const createServer = (auth_token?: string) => {
+// Tool names, descriptions and schemas; tool modules are imported on first call
+const toolManifest = await loadToolManifest((pkg as any).version);
+
+export interface CreateServerOptions {
+  /** Only expose these tools (all tools when undefined) */
+  allowedTools?: string[];
+}
+
+/**
+ * Parse an allowed-tools list ("list_machines,metrics_read"), falling back
+ * to MCP_ALLOWED_TOOLS. Unknown tool names are dropped.
+ */
+export function parseAllowedTools(value: unknown): string[] | undefined {
+  const raw = Array.isArray(value) ? value.join(',') : typeof value === 'string' && value.trim() ? value : process.env.MCP_ALLOWED_TOOLS;
+  if (!raw) {
+    return undefined;
+  }
+  const known = new Set(toolManifest.tools.map(t => t.name));
+  return Array.from(new Set(raw.split(',').map(name => name.trim()).filter(name => known.has(name)))).sort();
+}
+
+function subsetKey(allowedTools?: string[]): string {
+  return allowedTools ? allowedTools.join(',') : '*';
+}
+
+// tools/list only depends on the version and the tool subset, never on the session
+const MAX_TOOLS_LIST_ENTRIES = 100;
+const toolsListCache = new Map<string, { version: string; result?: any }>();
+
+/**
+ * Version marker (ETag) of the tools/list result for a tool subset
+ */
+export function getToolsListVersion(allowedTools?: string[]): string {
+  const key = subsetKey(allowedTools);
+  let entry = toolsListCache.get(key);
+  if (!entry) {
+    const tools = toolManifest.tools.filter(t => !allowedTools || allowedTools.includes(t.name));
+    const version = createHash('sha256')
+      .update(JSON.stringify({ version: (pkg as any).version, tools }))
+      .digest('hex')
+      .substring(0, 16);
+    entry = { version };
+    if (toolsListCache.size >= MAX_TOOLS_LIST_ENTRIES) {
+      toolsListCache.delete(toolsListCache.keys().next().value!);
+    }
+    toolsListCache.set(key, entry);
+  }
+  return entry.version;
+}
+
+/**
+ * tools/list result of a tool subset, built from the manifest (names,
+ * descriptions and JSON input schemas) on first use and then served from memory
+ */
+function getToolsList(allowedTools?: string[]) {
+  const version = getToolsListVersion(allowedTools);
+  const entry = toolsListCache.get(subsetKey(allowedTools))!;
+  if (!entry.result) {
+    entry.result = {
+      tools: toolManifest.tools
+        .filter(t => !allowedTools || allowedTools.includes(t.name))
+        .map(t => ({
+          name: t.name,
+          title: t.name,
+          description: t.description || '',
+          inputSchema: t.inputSchema ?? { type: 'object', properties: {} },
+        })),
+      _meta: { 'things5/tools_version': version },
+    };
+  }
+  return entry.result;
+}
+
+export const createServer = (auth_token?: string, options: CreateServerOptions = {}) => {
+  const { allowedTools } = options;
+
   // 1. Instantiate the MCP Server using McpServer (high-level API)
   const server = new McpServer(
     {
@@ -30,104 +119,144 @@ export const createServer = (auth_token?: string) => {
   // Save token for handlers that need it
   (server as any).auth_token = auth_token;
 
-  // 2. Register tools using the high-level registerTool API
-  Object.values(toolFactories).forEach((factory: any) => {
-    const tool = factory(auth_token);
-    
-    // Convert JSON Schema to Zod RawShape
-    // This preserves all type information (array items, integer vs number, enums, etc.)
-    const jsonSchema = tool.inputSchema || {
-      type: 'object',
-      properties: {},
-      additionalProperties: false
+  // Record a span for every upstream HTTP call (no-op when tracing is disabled)
+  instrumentAxios(axios);
+  // Per-tenant concurrency/rate limits with fair queuing, applied to every
+  // attempt: installed first so the resilience layer wraps it
+  installAdmission(axios);
+  // Timeouts, retries, hedging and circuit breakers for every upstream HTTP call
+  installResilience(axios);
+
+  const tenant = tenantFromToken(auth_token);
+
+  // 2. Register tools: tools/list is served from the manifest and tools/call
+  // dispatches to these callbacks
+  const registeredTools = toolManifest.tools.filter((tool) => !allowedTools || allowedTools.includes(tool.name));
+  // Tool name -> call handler, used by the tools/call handler below
+  const toolCallbacks = new Map<string, (input: any, extra: any) => Promise<any>>();
+  registeredTools.forEach((tool) => {
+    // The tool module is imported, and its factory run, on the first call only
+    let loadedTool: Promise<ReturnType<ToolFactory>> | null = null;
+    const loadTool = () => {
+      if (!loadedTool) {
+        loadedTool = loadToolFactory(tool.factory).then(factory => factory(auth_token as string));
+        loadedTool.catch(() => { loadedTool = null; });
+      }
+      return loadedTool;
     };
-    
-    const zodShape = jsonSchemaPropertiesToZodShape(jsonSchema);
-
-    // Register the tool with the high-level API
-    server.registerTool(
-      tool.name,
-      {
-        title: tool.name,
-        description: tool.description || '',
-        inputSchema: zodShape  // Pass Zod RawShape
-      },
-      async (input: any) => {
-        console.log('\n' + '='.repeat(80));
-        console.log(`[MCP] 🔧 Tool Call: ${tool.name}`);
-        console.log('='.repeat(80));
-        console.log('[MCP] Original input:', JSON.stringify(input, null, 2));
-        
-        // Step 0: Sanitize input to fix common AI mistakes
-        console.log('\n[MCP] 🧹 Sanitizing input...');
-        input = fullSanitize(tool.name, input);
-        
-        // Step 1: Pre-load machine context for AI awareness
-        let machineContext;
-        if (auth_token) {
-          try {
-            console.log('\n[MCP] 📋 Pre-loading machine context...');
-            machineContext = await getAvailableMachines(auth_token);
-            
-            const cacheInfo = getCacheInfo();
-            if (cacheInfo) {
-              console.log(`[MCP] ✅ Machine context loaded: ${cacheInfo.machines} machines`);
-              console.log(`[MCP] Cache age: ${cacheInfo.age_seconds}s, expires in: ${cacheInfo.expires_in_seconds}s`);
-            }
+
+    const callTool = async (input: any, extra: any) => runWithCallContext({ toolName: tool.name, tenant, sessionId: extra?.sessionId }, () => withSpan(`tool ${tool.name}`, { 'mcp.tool': tool.name, 'mcp.tenant': tenant }, async (toolSpan) => {
+      console.log('\n' + '='.repeat(80));
+      console.log(`[MCP] 🔧 Tool Call: ${tool.name}`);
+      console.log('='.repeat(80));
+      console.log('[MCP] Original input:', JSON.stringify(input, null, 2));
+      
+      // Step 1: Pre-load machine context, only when auto-resolution needs the
+      // machine list; it runs concurrently with the tool module import
+      let machineContext: Promise<MachineInfo[] | undefined> | undefined;
+      if (auth_token && needsMachineContext(tool.name, input)) {
+        console.log('\n[MCP] 📋 Pre-loading machine context...');
+        machineContext = withSpan('machine_context.preload', {}, async (span) => {
+          const machines = await getAvailableMachines(auth_token);
+          span.attributes['machines.count'] = machines.length;
+          return machines;
+        }).then((machines) => {
+          const cacheInfo = getCacheInfo(auth_token);
+          if (cacheInfo) {
+            console.log(`[MCP] ✅ Machine context loaded: ${cacheInfo.machines} machines`);
+            console.log(`[MCP] Cache age: ${cacheInfo.age_seconds}s, expires in: ${cacheInfo.expires_in_seconds}s`);
+          }
+          if (machines.length > 0) {
+            const connected = machines.filter(m => m.is_connected).length;
+            console.log(`[MCP] 🟢 ${connected} connected, 🔴 ${machines.length - connected} disconnected`);
             
-            // Log summary for debugging
-            if (machineContext.length > 0) {
-              const connected = machineContext.filter(m => m.is_connected).length;
-              console.log(`[MCP] 🟢 ${connected} connected, 🔴 ${machineContext.length - connected} disconnected`);
-              
-              // Log first few machines for reference
-              console.log('[MCP] Available machines:');
-              machineContext.slice(0, 5).forEach(m => {
-                const status = m.is_connected ? '🟢' : '🔴';
-                console.log(`  ${status} ${m.name} (${m.serial}) - ID: ${m.id.substring(0, 8)}...`);
-              });
-              if (machineContext.length > 5) {
-                console.log(`  ... and ${machineContext.length - 5} more`);
-              }
+            // Log first few machines for reference
+            console.log('[MCP] Available machines:');
+            machines.slice(0, 5).forEach(m => {
+              const status = m.is_connected ? '🟢' : '🔴';
+              console.log(`  ${status} ${m.name} (${m.serial}) - ID: ${m.id.substring(0, 8)}...`);
+            });
+            if (machines.length > 5) {
+              console.log(`  ... and ${machines.length - 5} more`);
             }
-          } catch (error: any) {
-            console.error('[MCP] ⚠️  Failed to pre-load machine context:', error.message);
-            console.error('[MCP] Continuing without context, auto-resolution will use API calls');
           }
-        }
+          return machines;
+        }, (error: any) => {
+          console.error('[MCP] ⚠️  Failed to pre-load machine context:', error.message);
+          console.error('[MCP] Continuing without context, auto-resolution will use API calls');
+          return undefined;
+        });
+      }
+      const toolLoading = loadTool();
+      
+      // Step 2: Auto-resolve missing parameters using machine context
+      let resolvedInput = input;
+      if (canAutoResolve(tool.name) && auth_token) {
+        console.log('\n[MCP] 🔄 Auto-resolving dependencies...');
+        resolvedInput = await withSpan('auto_resolve', {}, () => autoResolveParameters(
+          tool.name, 
+          input, 
+          auth_token,
+          machineContext
+        ));
         
-        // Step 2: Auto-resolve missing parameters using machine context
-        let resolvedInput = input;
-        if (canAutoResolve(tool.name) && auth_token) {
-          console.log('\n[MCP] 🔄 Auto-resolving dependencies...');
-          resolvedInput = await autoResolveParameters(
-            tool.name, 
-            input, 
-            auth_token,
-            machineContext
-          );
-          
-          if (JSON.stringify(resolvedInput) !== JSON.stringify(input)) {
-            console.log('[MCP] ✅ Parameters auto-resolved:');
-            console.log(JSON.stringify(resolvedInput, null, 2));
-          } else {
-            console.log('[MCP] ℹ️  No parameters needed resolution');
-          }
+        if (JSON.stringify(resolvedInput) !== JSON.stringify(input)) {
+          console.log('[MCP] ✅ Parameters auto-resolved:');
+          console.log(JSON.stringify(resolvedInput, null, 2));
+        } else {
+          console.log('[MCP] ℹ️  No parameters needed resolution');
         }
-        
-        // Step 3: Execute tool handler
-        console.log('\n[MCP] ⚡ Executing tool handler...');
-        const result = await tool.handler(resolvedInput, {} as any);
-        
-        console.log('[MCP] ✅ Tool execution completed');
-        console.log('='.repeat(80) + '\n');
-        
-        return result;
       }
-    );
+      
+      // Step 3: Sanitize and validate in a single pass with the tool's compiled
+      // validator; it runs after auto-resolution so resolved parameters are validated too
+      const loadedTool = await toolLoading;
+      const validate = getToolValidator(tool.name, loadedTool.argsSchema, tool.inputSchema);
+      const validation = await withSpan('validate', {}, async () => validate(resolvedInput));
+      if (!validation.success) {
+        console.error(`[MCP] ❌ Invalid arguments for ${tool.name}`);
+        toolSpan.status = 'error';
+        return failure({ message: generateHelpfulErrorMessage(tool.name, validation.error) });
+      }
+
+      // Step 4: Execute tool handler with the typed arguments
+      console.log('\n[MCP] ⚡ Executing tool handler...');
+      const result = await withSpan('handler', {}, () => loadedTool.handler(validation.data, extra));
+      if (result?.isError) {
+        toolSpan.status = 'error';
+      }
+      
+      console.log('[MCP] ✅ Tool execution completed');
+      console.log('='.repeat(80) + '\n');
+      
+      return result;
+    }, { kind: 'server', parent: parseTraceparent(extra?.requestInfo?.headers?.traceparent) }));
+    toolCallbacks.set(tool.name, callTool);
+  });
+
+  // Arguments are validated once, by the tool's compiled validator
+  server.server.setRequestHandler(CallToolRequestSchema, async (request, extra) => {
+    const callTool = toolCallbacks.get(request.params.name);
+    if (!callTool) {
+      throw new McpError(ErrorCode.InvalidParams, `Tool ${request.params.name} not found`);
+    }
+    try {
+      return await callTool(request.params.arguments ?? {}, extra);
+    } catch (error) {
+      return {
+        content: [{ type: 'text', text: error instanceof Error ? error.message : String(error) }],
+        isError: true,
+      };
+    }
   });
 
-  // 3. Simple dynamic logging level handler
+  // The tools/list result is identical for every session with the same tool subset
+  server.server.setRequestHandler(ListToolsRequestSchema, async () => getToolsList(allowedTools));
+
+  // 3. Subscribable device status / active alarm resources (shared poller per organization)
+  const cleanupResources = registerDeviceResources(server, auth_token);
+
+  // 4. Simple dynamic logging level handler
   let currentLevel: LoggingLevel = "info";
   server.server.setRequestHandler(SetLevelRequestSchema, async (req) => {
     currentLevel = req.params.level;
@@ -138,5 +267,10 @@ export const createServer = (auth_token?: string) => {
     return {};
   });
 
-  return { server, cleanup: async () => {} };
+  return {
+    server,
+    cleanup: async () => {
+      cleanupResources();
+    },
+  };
 };
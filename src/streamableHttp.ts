@@ -1,9 +1,20 @@
 import { StreamableHTTPServerTransport } from "@modelcontextprotocol/sdk/server/streamableHttp.js";
 import express, { Request as ExpressRequest, Response, Router } from "express";
-import { createServer } from "./server/things5.js";
+import { createServer, getToolsListVersion, parseAllowedTools } from "./server/things5.js";
 import { randomUUID } from 'node:crypto';
 import { Oauth } from './oauth.js'
 import cors from 'cors';
+import { shutdownTracing } from './utils/tracing.js';
+import { createSessionStore, SessionRecord, SessionStore } from './utils/sessionStore.js';
+import { restoreInitializedSession } from './utils/sdkSessionState.js';
+import { getResilienceMetrics } from './utils/resilience.js';
+import { getAdmissionMetrics } from './utils/admission.js';
+import { getResourcePollerMetrics } from './utils/resourcePoller.js';
+import { attachSseWriter, getSseMetrics } from './utils/sseWriter.js';
+import { getEventStoreMetrics, releaseSessionEventStore, sessionEventStore } from './utils/eventStore.js';
+import { getSeriesCacheMetrics } from './utils/seriesCache.js';
+import { getMetadataCacheMetrics, metadataIdentity } from './utils/metadataCache.js';
+import { compressJsonResponses } from './utils/compression.js';
 
 // Extended Request interface with auth_token property that's added by the OAuth middleware
 interface Request extends ExpressRequest {
@@ -25,11 +36,25 @@ app.use(cors({
   methods: '*'
 }));
 
+// Negotiated brotli/gzip for large /mcp JSON responses (SSE frames are never compressed)
+app.use('/mcp', compressJsonResponses());
+
 // Create sub-router for API (OAuth + MCP)
 const apiRouter: Router = express.Router();
 
 const transports: Map<string, StreamableHTTPServerTransport> = new Map<string, StreamableHTTPServerTransport>();
 
+// Externalized session state (auth binding + negotiated capabilities) so that
+// sessions can be rehydrated after a restart or on another instance
+const sessionStore: SessionStore = createSessionStore();
+const SESSION_TOUCH_INTERVAL_MS = 60 * 1000;
+const sessionTouchedAt: Map<string, number> = new Map<string, number>();
+// Tool subset requested by each session (undefined: all tools)
+const sessionAllowedTools: Map<string, string[] | undefined> = new Map<string, string[] | undefined>();
+// Rehydrations in progress, shared by concurrent requests for the same session
+const rehydrating: Map<string, Promise<StreamableHTTPServerTransport>> = new Map<string, Promise<StreamableHTTPServerTransport>>();
+let shuttingDown = false;
+
 const logRequest = (req: Request, context = '') => {
   const timestamp = new Date().toISOString();
   const userAgent = req.headers['user-agent'] || 'Unknown';
@@ -52,6 +77,187 @@ const oauth = new Oauth({ logger: logRequest });
 // Mount OAuth router under root
 apiRouter.use('/', oauth.getRouter());
 
+// Resolve the bearer token for a request.
+// Require auth by default; allow unauth only if explicitly requested via ?no_auth=true
+// Returns null when the response has already been sent (e.g. 401).
+const authenticateRequest = async (req: Request, res: Response): Promise<{ auth_token?: string; allowNoAuth: boolean } | null> => {
+  const noAuthParam = (req.query?.no_auth ?? '').toString().toLowerCase();
+  const allowNoAuth = ['true', '1', 'yes'].includes(noAuthParam);
+
+  let auth_token = req.auth_token;
+  if (!allowNoAuth) {
+    // Enforce validation (this will 401 if header is missing/invalid)
+    await oauth.validateToken(req as any, res, () => { });
+    if (res.headersSent) {
+      return null; // validation already handled the response
+    }
+    auth_token = (req as any).auth_token;
+  } else {
+    // Optional validation if token present even when no_auth=true
+    const authHeader = req.headers.authorization;
+    if (!auth_token && authHeader && authHeader.startsWith('Bearer ')) {
+      await oauth.validateToken(req as any, res, () => { });
+      if (res.headersSent) {
+        return null;
+      }
+      auth_token = (req as any).auth_token;
+    }
+  }
+  return { auth_token, allowNoAuth };
+}
+
+// Save the session state once the client has completed the initialize handshake
+const persistSession = async (sessionId: string, auth_token: string | undefined, server: any, allowedTools?: string[]) => {
+  const now = Date.now();
+  try {
+    await sessionStore.set({
+      session_id: sessionId,
+      auth_binding: auth_token ? metadataIdentity(auth_token) : null,
+      no_auth: !auth_token,
+      client_capabilities: server.server.getClientCapabilities(),
+      client_info: server.server.getClientVersion(),
+      ...(allowedTools ? { allowed_tools: allowedTools } : {}),
+      created_at: now,
+      last_seen_at: now,
+    });
+    sessionTouchedAt.set(sessionId, now);
+  } catch (error: any) {
+    console.error(`Failed to persist session ${sessionId}:`, error.message);
+  }
+}
+
+// Refresh the idle TTL of a stored session (at most once per interval)
+const touchSession = async (sessionId: string) => {
+  const now = Date.now();
+  if (now - (sessionTouchedAt.get(sessionId) ?? 0) < SESSION_TOUCH_INTERVAL_MS) {
+    return;
+  }
+  sessionTouchedAt.set(sessionId, now);
+  try {
+    const record = await sessionStore.get(sessionId);
+    if (record) {
+      await sessionStore.set({ ...record, last_seen_at: now });
+    }
+  } catch (error: any) {
+    console.error(`Failed to refresh session ${sessionId}:`, error.message);
+  }
+}
+
+// Let the cluster primary (when running in cluster mode) route the session to this worker
+const announceSession = (sessionId: string) => {
+  process.send?.({ type: 'mcp-session-created', sessionId });
+}
+
+// Remove a session's transport and, unless the process is shutting down,
+// its stored state (shutdown must leave sessions resumable)
+const forgetSession = async (sessionId: string) => {
+  transports.delete(sessionId);
+  sessionTouchedAt.delete(sessionId);
+  sessionAllowedTools.delete(sessionId);
+  // Replayable events stay on disk (when file-backed) across a restart
+  void releaseSessionEventStore(sessionId, shuttingDown);
+  // Let the cluster primary (when running in cluster mode) release its sticky route
+  process.send?.({ type: 'mcp-session-closed', sessionId });
+  if (!shuttingDown) {
+    try {
+      await sessionStore.delete(sessionId);
+    } catch (error: any) {
+      console.error(`Failed to delete stored session ${sessionId}:`, error.message);
+    }
+  }
+}
+
+// tools/list responses carry the version of the (cached) tool list, so
+// clients re-importing the list on every call can skip unchanged payloads
+const setToolsListEtag = (req: Request, res: Response, allowedTools?: string[]) => {
+  if (req.body?.method === 'tools/list') {
+    res.setHeader('ETag', `"${getToolsListVersion(allowedTools)}"`);
+  }
+}
+
+// Rebuild a session that is not in this process from the session store.
+// Returns the transport, or null if the session is unknown / the response was sent.
+const rehydrateSession = async (req: Request, res: Response, sessionId: string): Promise<StreamableHTTPServerTransport | null> => {
+  let record;
+  try {
+    record = await sessionStore.get(sessionId);
+  } catch (error: any) {
+    console.error(`Failed to load session ${sessionId} from store:`, error.message);
+    return null;
+  }
+  if (!record) {
+    return null;
+  }
+
+  let auth_token: string | undefined;
+  if (!record.no_auth) {
+    await oauth.validateToken(req as any, res, () => { });
+    if (res.headersSent) {
+      return null;
+    }
+    auth_token = (req as any).auth_token;
+    // Bound to the user (iss|sub), not the token: a refreshed token keeps the session
+    if (!auth_token || metadataIdentity(auth_token) !== record.auth_binding) {
+      // Never hand a session to a different identity: make the client re-initialize
+      console.error(`Session ${sessionId} is bound to a different identity, refusing to rehydrate`);
+      res.status(404).json({
+        jsonrpc: '2.0',
+        error: { code: -32001, message: 'Session not found' },
+        id: req?.body?.id ?? null,
+      });
+      return null;
+    }
+  }
+
+  // Concurrent requests for the same session (e.g. POST and GET right after a
+  // restart) share one rebuild instead of racing to install two transports
+  const existing = transports.get(sessionId);
+  if (existing) {
+    return existing;
+  }
+  let pending = rehydrating.get(sessionId);
+  if (!pending) {
+    pending = buildRehydratedTransport(sessionId, record, auth_token)
+      .finally(() => rehydrating.delete(sessionId));
+    rehydrating.set(sessionId, pending);
+  }
+  return await pending;
+}
+
+// Create the server and transport of a rehydrated session
+const buildRehydratedTransport = async (sessionId: string, record: SessionRecord, auth_token: string | undefined): Promise<StreamableHTTPServerTransport> => {
+  console.error(`Rehydrating session ${sessionId} from session store`);
+  const { server, cleanup } = createServer(auth_token, { allowedTools: record.allowed_tools });
+  sessionAllowedTools.set(sessionId, record.allowed_tools);
+  const transport = new StreamableHTTPServerTransport({
+    sessionIdGenerator: () => sessionId,
+    enableJsonResponse: true,
+    eventStore: sessionEventStore(sessionId),
+  });
+
+  transport.onclose = async () => {
+    if (transports.get(sessionId) === transport) {
+      console.error(`Transport closed for session ${sessionId}, removing from transports map`);
+      await forgetSession(sessionId);
+      await cleanup();
+    }
+  };
+
+  await server.connect(transport);
+
+  // Restore the state normally established by the initialize handshake
+  restoreInitializedSession(transport, server.server, {
+    sessionId,
+    client_capabilities: record.client_capabilities,
+    client_info: record.client_info,
+  });
+
+  transports.set(sessionId, transport);
+  announceSession(sessionId);
+  void touchSession(sessionId);
+  return transport;
+}
+
 
 app.use((req, res, next) => {
   logRequest(req, 'INCOMING REQUEST');
@@ -80,7 +286,20 @@ apiRouter.post('/mcp', async (req: Request, res: Response) => {
       // Reuse existing transport
       console.error(`Reusing existing session: ${sessionId}`);
       transport = transports.get(sessionId)!;
+      void touchSession(sessionId);
+      setToolsListEtag(req, res, sessionAllowedTools.get(sessionId));
     } else {
+      // The session may live in the session store (created before a restart or on another instance)
+      const rehydrated = sessionId ? await rehydrateSession(req, res, sessionId) : null;
+      if (res.headersSent) {
+        return; // rehydration already handled the response
+      }
+      if (rehydrated) {
+        setToolsListEtag(req, res, sessionAllowedTools.get(sessionId!));
+        await rehydrated.handleRequest(req, res, req.body);
+        return;
+      }
+
       // Create new session if:
       // 1. No session ID provided, OR
       // 2. Session ID provided but doesn't exist (expired/lost after server restart)
@@ -91,42 +310,39 @@ apiRouter.post('/mcp', async (req: Request, res: Response) => {
         console.error('No session ID provided, creating new session');
       }
       
-      // Require auth by default; allow unauth only if explicitly requested via ?no_auth=true
-      const noAuthParam = (req.query?.no_auth ?? '').toString().toLowerCase();
-      const allowNoAuth = ['true', '1', 'yes'].includes(noAuthParam);
-
-      let auth_token = req.auth_token;
-      if (!allowNoAuth) {
-        // Enforce validation (this will 401 if header is missing/invalid)
-        await oauth.validateToken(req as any, res, () => { });
-        if (res.headersSent) {
-          return; // validation already handled the response
-        }
-        auth_token = (req as any).auth_token;
-      } else {
-        // Optional validation if token present even when no_auth=true
-        const authHeader = req.headers.authorization;
-        if (!auth_token && authHeader && authHeader.startsWith('Bearer ')) {
-          await oauth.validateToken(req as any, res, () => { });
-          if (res.headersSent) {
-            return;
-          }
-          auth_token = (req as any).auth_token;
-        }
+      const auth = await authenticateRequest(req, res);
+      if (!auth) {
+        return; // validation already handled the response
       }
+      const auth_token = auth.auth_token;
       //console.error(`Using authentication token for API calls: ${auth_token ? 'Available' : 'Not available'}`);
 
-      const { server, cleanup } = createServer(auth_token);
+      // Optional tool subset, e.g. /mcp?allowed_tools=list_machines,metrics_read
+      const allowedTools = parseAllowedTools(req.query?.allowed_tools);
+      const { server, cleanup } = createServer(auth_token, { allowedTools });
+
+      // Persist auth binding + negotiated capabilities once initialization completes
+      server.server.oninitialized = () => {
+        if (transport.sessionId) {
+          void persistSession(transport.sessionId, auth_token, server, allowedTools);
+        }
+      };
 
       // New session initialization
+      const newSessionId = randomUUID();
       transport = new StreamableHTTPServerTransport({
-        sessionIdGenerator: () => randomUUID(),
+        sessionIdGenerator: () => newSessionId,
         enableJsonResponse: true,
+        // The standalone GET stream can be resumed with Last-Event-ID; JSON
+        // responses to POST requests are not stored
+        eventStore: sessionEventStore(newSessionId),
         onsessioninitialized: (newSessionId: string) => {
           // Store the transport by session ID when session is initialized
           // This avoids race conditions where requests might come in before the session is stored
           console.error(`Session initialized with ID: ${newSessionId}`);
           transports.set(newSessionId, transport);
+          sessionAllowedTools.set(newSessionId, allowedTools);
+          announceSession(newSessionId);
         }
       });
 
@@ -135,7 +351,7 @@ apiRouter.post('/mcp', async (req: Request, res: Response) => {
         const sid = transport.sessionId;
         if (sid && transports.has(sid)) {
           console.error(`Transport closed for session ${sid}, removing from transports map`);
-          transports.delete(sid);
+          await forgetSession(sid);
           await cleanup();
         }
       };
@@ -176,7 +392,18 @@ apiRouter.get('/mcp', async (req: Request, res: Response) => {
     if (sessionId && transports.has(sessionId)) {
       // Reuse existing transport
       transport = transports.get(sessionId)!;
+      void touchSession(sessionId);
     } else {
+      // The session may live in the session store (created before a restart or on another instance)
+      const rehydrated = sessionId ? await rehydrateSession(req, res, sessionId) : null;
+      if (res.headersSent) {
+        return; // rehydration already handled the response
+      }
+      if (rehydrated) {
+        attachSseWriter(res, sessionId);
+        await rehydrated.handleRequest(req, res);
+        return;
+      }
       // Invalid request - no session ID or not initialization request
       res.status(400).json({
         jsonrpc: '2.0',
@@ -191,6 +418,8 @@ apiRouter.get('/mcp', async (req: Request, res: Response) => {
 
     // Handle the request with existing transport - no need to reconnect
     // The existing transport is already connected to the server
+    // Standalone SSE stream: bounded buffering and keepalives
+    attachSseWriter(res, sessionId);
     await transport.handleRequest(req, res);
   } catch (error) {
     console.error('Error handling MCP GET request:', error);
@@ -220,6 +449,8 @@ apiRouter.get('/sse', async (req: Request, res: Response) => {
     'Access-Control-Allow-Origin': '*',
     'Access-Control-Allow-Headers': 'Cache-Control'
   });
+  // Bounded buffering, slow-client handling and keepalives for the stream
+  const sseWriter = attachSseWriter(res);
 
   try {
     // Require auth by default; allow unauth only if explicitly requested via ?no_auth=true
@@ -262,15 +493,29 @@ apiRouter.get('/sse', async (req: Request, res: Response) => {
       }
     }
 
-    const { server, cleanup } = createServer(auth_token);
+    const allowedTools = parseAllowedTools(req.query?.allowed_tools);
+    const { server, cleanup } = createServer(auth_token, { allowedTools });
+
+    // Persist auth binding + negotiated capabilities once initialization completes
+    server.server.oninitialized = () => {
+      if (transport.sessionId) {
+        void persistSession(transport.sessionId, auth_token, server, allowedTools);
+      }
+    };
     
     // Create SSE transport
+    const newSessionId = randomUUID();
     const transport = new StreamableHTTPServerTransport({
-      sessionIdGenerator: () => randomUUID(),
+      sessionIdGenerator: () => newSessionId,
       enableJsonResponse: false, // SSE mode
+      // Streams can be resumed with Last-Event-ID without re-running requests
+      eventStore: sessionEventStore(newSessionId),
       onsessioninitialized: (sessionId: string) => {
         console.error(`SSE Session initialized with ID: ${sessionId}`);
         transports.set(sessionId, transport);
+        sessionAllowedTools.set(sessionId, allowedTools);
+        announceSession(sessionId);
+        sseWriter.sessionId = sessionId;
         
         // Send session ID to client
         res.write('event: session\n');
@@ -283,7 +528,7 @@ apiRouter.get('/sse', async (req: Request, res: Response) => {
       const sid = transport.sessionId;
       if (sid && transports.has(sid)) {
         console.error(`SSE Transport closed for session ${sid}`);
-        transports.delete(sid);
+        await forgetSession(sid);
         await cleanup();
       }
     };
@@ -307,6 +552,13 @@ apiRouter.get('/sse', async (req: Request, res: Response) => {
 // Handle DELETE requests for session termination (according to MCP spec)
 apiRouter.delete('/mcp', async (req: Request, res: Response) => {
   const sessionId = req.headers['mcp-session-id'] as string | undefined;
+  if (sessionId && !transports.has(sessionId)) {
+    // Terminating a session owned by a previous process/instance
+    await rehydrateSession(req, res, sessionId);
+    if (res.headersSent) {
+      return;
+    }
+  }
   if (!sessionId || !transports.has(sessionId)) {
     res.status(400).json({
       jsonrpc: '2.0',
@@ -357,6 +609,21 @@ apiRouter.get('/health', (req, res) => {
   //console.log(`[${new Date().toISOString()}] HEALTH RESPONSE SENT`);
 });
 
+// Runtime metrics endpoint (no auth required)
+apiRouter.get('/metrics', (req, res) => {
+  res.status(200).json({
+    timestamp: new Date().toISOString(),
+    sessions: transports.size,
+    upstream: getResilienceMetrics(),
+    admission: getAdmissionMetrics(),
+    resources: getResourcePollerMetrics(),
+    sse: getSseMetrics(),
+    event_store: getEventStoreMetrics(),
+    series_cache: getSeriesCacheMetrics(),
+    metadata_cache: getMetadataCacheMetrics(),
+  });
+});
+
 
 // Mount API router
 app.use('/', apiRouter);
@@ -371,17 +638,21 @@ app.listen(PORT, () => {
 process.on('SIGINT', async () => {
   console.error('Shutting down server...');
 
-  // Close all active transports to properly clean up resources
-  for (const sessionId in transports) {
+  // Close all active transports to properly clean up resources.
+  // Stored session state is kept so clients can resume after the restart.
+  shuttingDown = true;
+  for (const [sessionId, transport] of Array.from(transports.entries())) {
     try {
       console.error(`Closing transport for session ${sessionId}`);
-      await transports.get(sessionId)!.close();
+      await transport.close();
       transports.delete(sessionId);
     } catch (error) {
       console.error(`Error closing transport for session ${sessionId}:`, error);
     }
   }
 
+  await shutdownTracing();
+
   console.error('Server shutdown complete');
   process.exit(0);
 });
@@ -5,6 +5,7 @@ import { zodToJsonSchema } from "zod-to-json-schema";
 import { fetchFirstOrganizationId } from "./organizationUtils.js";
 import { THINGS5_BASE_URL } from "../config.js";
 import { success, failure } from './utils/toolResult.js';
+import { parseToolArgs } from '../utils/toolValidation.js';
 
 export const CreateDeviceGroupUserSchema = z.object({
   group_id: z.string().describe('ID of the device group'),
@@ -16,6 +17,7 @@ export type CreateDeviceGroupUserArgs = z.infer<typeof CreateDeviceGroupUserSche
 
 export const getCreateDeviceGroupUserTool = (auth_token: string): Tool => ({
   name: "create_device_group_user",
+  argsSchema: CreateDeviceGroupUserSchema,
   description: "Add a user to a device group, optionally assigning a role.",
   inputSchema: zodToJsonSchema(CreateDeviceGroupUserSchema) as any,
   outputSchema: zodToJsonSchema(z.object({
@@ -25,7 +27,7 @@ export const getCreateDeviceGroupUserTool = (auth_token: string): Tool => ({
   handler: async (rawArgs: unknown) => {
     let args: CreateDeviceGroupUserArgs;
     try {
-      args = CreateDeviceGroupUserSchema.parse(rawArgs);
+      args = parseToolArgs(CreateDeviceGroupUserSchema, rawArgs);
     } catch (e) {
       throw new Error("Invalid arguments for create_device_group_user tool: " + e);
     }
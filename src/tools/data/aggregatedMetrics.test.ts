@@ -0,0 +1,176 @@
+import { describe, it, expect, vi, beforeEach } from 'vitest';
+import axios from 'axios';
+import {
+  getAggregatedMetricsTool,
+  AGGREGATED_METRICS_CHUNK_SIZE,
+  AGGREGATED_METRICS_MAX_CHUNK_ATTEMPTS,
+  decodeChunkCursor,
+  encodeChunkCursor,
+  deviceListHash,
+} from './aggregatedMetrics.js';
+import { mapWithConcurrency } from '../../utils/concurrency.js';
+
+vi.mock('axios');
+const mockedAxios = axios as any;
+
+const deviceIds = (count: number) => Array.from({ length: count }, (_, i) => `device-${i}`);
+
+describe('aggregated_metrics', () => {
+  const tool = getAggregatedMetricsTool('test-token');
+
+  beforeEach(() => {
+    vi.clearAllMocks();
+  });
+
+  it('uses a single request for small device lists', async () => {
+    mockedAxios.get = vi.fn().mockResolvedValue({
+      data: { data: [{ name: 'temp', avg: 4, device_id: 'device-0' }], pagination: { after: 'c1' } },
+    });
+
+    const result = await tool.handler({ device_ids: deviceIds(3) });
+
+    expect(mockedAxios.get).toHaveBeenCalledTimes(1);
+    expect(result.structuredContent.aggregated_metrics).toHaveLength(1);
+    expect(result.structuredContent.pagination).toEqual({ after: 'c1' });
+  });
+
+  it('splits large device lists into chunks and merges them in order', async () => {
+    mockedAxios.get = vi.fn().mockImplementation(async (_url: string, { params }: any) => ({
+      data: { data: params['device_ids[]'].map((id: string) => ({ name: 'temp', device_id: id })) },
+    }));
+
+    const ids = deviceIds(AGGREGATED_METRICS_CHUNK_SIZE * 2 + 1);
+    const result = await tool.handler({ device_ids: ids });
+
+    expect(mockedAxios.get).toHaveBeenCalledTimes(3);
+    expect(result.structuredContent.aggregated_metrics.map((m: any) => m.device_id)).toEqual(ids);
+    expect(result.structuredContent.pagination).toBeNull();
+    expect(result.structuredContent.failed_chunks).toBeUndefined();
+  });
+
+  it('sorts merged rows by timestamp', async () => {
+    mockedAxios.get = vi.fn().mockImplementation(async (_url: string, { params }: any) => ({
+      data: {
+        data: params['device_ids[]'][0] === 'device-0'
+          ? [{ name: 'a', timestamp: '2024-01-01T00:00:03Z' }]
+          : [{ name: 'b', timestamp: '2024-01-01T00:00:01Z' }],
+      },
+    }));
+
+    const result = await tool.handler({ device_ids: deviceIds(AGGREGATED_METRICS_CHUNK_SIZE + 1), sorting: 'desc' });
+
+    expect(result.structuredContent.aggregated_metrics.map((m: any) => m.name)).toEqual(['a', 'b']);
+  });
+
+  it('reports failed chunks without failing the whole call', async () => {
+    mockedAxios.get = vi.fn().mockImplementation(async (_url: string, { params }: any) => {
+      if (params['device_ids[]'][0] !== 'device-0') {
+        throw Object.assign(new Error('boom'), { response: { status: 502, data: { message: 'Bad gateway' } } });
+      }
+      return { data: { data: [{ name: 'temp', device_id: 'device-0' }] } };
+    });
+
+    const result = await tool.handler({ device_ids: deviceIds(AGGREGATED_METRICS_CHUNK_SIZE + 1) });
+
+    expect(result.isError).toBeUndefined();
+    expect(result.structuredContent.aggregated_metrics).toHaveLength(1);
+    expect(result.structuredContent.failed_chunks).toEqual([
+      { chunk: 1, device_ids: ['device-' + AGGREGATED_METRICS_CHUNK_SIZE], status: 502, message: 'Bad gateway', attempts: 1, final: false },
+    ]);
+  });
+
+  it('continues only the chunks that still have pages', async () => {
+    mockedAxios.get = vi.fn().mockImplementation(async (_url: string, { params }: any) => ({
+      data: {
+        data: [{ name: 'temp', device_id: params['device_ids[]'][0] }],
+        pagination: params['device_ids[]'][0] === 'device-0' && !params.after ? { after: 'page-2' } : undefined,
+      },
+    }));
+    const ids = deviceIds(AGGREGATED_METRICS_CHUNK_SIZE + 1);
+
+    const first = await tool.handler({ device_ids: ids });
+    const cursor = decodeChunkCursor(first.structuredContent.pagination.after);
+    expect(cursor?.after).toEqual({ '0': 'page-2' });
+
+    mockedAxios.get.mockClear();
+    const second = await tool.handler({ device_ids: ids, after: first.structuredContent.pagination.after });
+
+    expect(mockedAxios.get).toHaveBeenCalledTimes(1);
+    expect(mockedAxios.get.mock.calls[0][1].params.after).toBe('page-2');
+    expect(second.structuredContent.pagination).toBeNull();
+  });
+
+  it('retries a chunk that failed on its first page from the beginning', async () => {
+    let failing = true;
+    mockedAxios.get = vi.fn().mockImplementation(async (_url: string, { params }: any) => {
+      if (params['device_ids[]'][0] !== 'device-0' && failing) {
+        throw Object.assign(new Error('boom'), { response: { status: 502, data: { message: 'Bad gateway' } } });
+      }
+      return { data: { data: [{ name: 'temp', device_id: params['device_ids[]'][0] }] } };
+    });
+    const ids = deviceIds(AGGREGATED_METRICS_CHUNK_SIZE + 1);
+
+    const first = await tool.handler({ device_ids: ids });
+    expect(decodeChunkCursor(first.structuredContent.pagination.after)?.after).toEqual({ '1': '' });
+
+    failing = false;
+    mockedAxios.get.mockClear();
+    const second = await tool.handler({ device_ids: ids, after: first.structuredContent.pagination.after });
+
+    expect(mockedAxios.get).toHaveBeenCalledTimes(1);
+    expect(mockedAxios.get.mock.calls[0][1].params.after).toBeUndefined();
+    expect(second.structuredContent.aggregated_metrics.map((m: any) => m.device_id)).toEqual(['device-' + AGGREGATED_METRICS_CHUNK_SIZE]);
+    expect(second.structuredContent.pagination).toBeNull();
+  });
+
+  it('drops a chunk that keeps failing so the cursor runs out', async () => {
+    mockedAxios.get = vi.fn().mockImplementation(async (_url: string, { params }: any) => {
+      if (params['device_ids[]'][0] !== 'device-0') {
+        throw Object.assign(new Error('boom'), { response: { status: 502, data: { message: 'Bad gateway' } } });
+      }
+      return { data: { data: [{ name: 'temp', device_id: 'device-0' }] } };
+    });
+    const ids = deviceIds(AGGREGATED_METRICS_CHUNK_SIZE + 1);
+
+    let page = (await tool.handler({ device_ids: ids })).structuredContent;
+    for (let attempt = 2; attempt <= AGGREGATED_METRICS_MAX_CHUNK_ATTEMPTS; attempt++) {
+      expect(page.pagination).not.toBeNull();
+      const next = await tool.handler({ device_ids: ids, after: page.pagination.after });
+      // Only the failing chunk is left, so follow-up pages fail as a whole
+      expect(next.isError).toBe(true);
+      page = next.structuredContent.data;
+    }
+
+    expect(page.failed_chunks).toHaveLength(1);
+    expect(page.failed_chunks[0]).toMatchObject({ chunk: 1, attempts: AGGREGATED_METRICS_MAX_CHUNK_ATTEMPTS, final: true });
+    expect(page.pagination).toBeNull();
+  });
+
+  it('rejects a chunk cursor issued for another device list of the same size', async () => {
+    mockedAxios.get = vi.fn();
+    const after = encodeChunkCursor({ size: AGGREGATED_METRICS_CHUNK_SIZE, devices: deviceListHash(['a', 'b']), after: { '0': 'x' } });
+
+    const result = await tool.handler({ device_ids: deviceIds(2), after });
+
+    expect(result.isError).toBe(true);
+    expect(mockedAxios.get).not.toHaveBeenCalled();
+  });
+});
+
+describe('mapWithConcurrency', () => {
+  it('never exceeds the concurrency limit and keeps input order', async () => {
+    let inFlight = 0;
+    let maxInFlight = 0;
+    const results = await mapWithConcurrency([1, 2, 3, 4, 5, 6], 2, async (n) => {
+      inFlight++;
+      maxInFlight = Math.max(maxInFlight, inFlight);
+      await new Promise(resolve => setTimeout(resolve, 5));
+      inFlight--;
+      if (n === 4) throw new Error('four');
+      return n * 10;
+    });
+
+    expect(maxInFlight).toBe(2);
+    expect(results.map(r => r.status === 'fulfilled' ? r.value : 'err')).toEqual([10, 20, 30, 'err', 50, 60]);
+  });
+});
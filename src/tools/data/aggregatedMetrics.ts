@@ -1,10 +1,24 @@
 import axios from "axios";
+import { createHash } from "node:crypto";
 import { z } from "zod";
 import { Tool } from "@modelcontextprotocol/sdk/types.js";
 import { zodToJsonSchema } from "zod-to-json-schema";
 import { THINGS5_BASE_URL } from '../../config.js';
 import { success, failure } from '../utils/toolResult.js';
 import { fixArraySchemas } from '../utils/schemaUtils.js';
+import { chunkArray, mapWithConcurrency } from '../../utils/concurrency.js';
+import { parseToolArgs } from '../../utils/toolValidation.js';
+
+/** Device lists longer than this are split into chunks fetched in parallel */
+export const AGGREGATED_METRICS_CHUNK_SIZE = Number(process.env.AGGREGATED_METRICS_CHUNK_SIZE) || 50;
+/** Max chunk requests in flight for a single tool call */
+export const AGGREGATED_METRICS_CONCURRENCY = Number(process.env.AGGREGATED_METRICS_CONCURRENCY) || 4;
+/** Consecutive failed pages after which a chunk is dropped from the cursor */
+export const AGGREGATED_METRICS_MAX_CHUNK_ATTEMPTS = Number(process.env.AGGREGATED_METRICS_MAX_CHUNK_ATTEMPTS) || 3;
+
+const CHUNK_CURSOR_PREFIX = 'chunks:';
+/** Chunk cursor value of a chunk to read again from its first page */
+const RESTART_CHUNK = '';
 
 export const AggregatedMetricsSchema = z.object({
   device_ids: z.array(z.string()).describe("Array of device ids (UUIDs)"),
@@ -18,50 +32,228 @@ export const AggregatedMetricsSchema = z.object({
 
 export type AggregatedMetricsArgs = z.infer<typeof AggregatedMetricsSchema>;
 
+interface ChunkCursor {
+  /** chunk size used to split device_ids when the cursor was issued */
+  size: number;
+  /** hash of the device_ids list the cursor was issued for (see deviceListHash) */
+  devices: string;
+  /** chunk index -> upstream cursor of the chunks that still have pages ('' = from the first page) */
+  after: Record<string, string>;
+  /** chunk index -> consecutive failed attempts of the chunks being retried */
+  failures?: Record<string, number>;
+}
+
+interface FailedChunk {
+  chunk: number;
+  device_ids: string[];
+  status?: number;
+  message: string;
+  /** failed attempts so far, this one included */
+  attempts: number;
+  /** true when the chunk was dropped and will not be retried on later pages */
+  final: boolean;
+}
+
+/**
+ * Hash identifying a device_ids list. Chunks are cut in request order, so the
+ * order is part of the hash: a reordered list would put other devices in a chunk.
+ */
+export function deviceListHash(device_ids: string[]): string {
+  return createHash('sha256').update(JSON.stringify(device_ids)).digest('hex').substring(0, 32);
+}
+
+export function encodeChunkCursor(cursor: ChunkCursor): string {
+  return CHUNK_CURSOR_PREFIX + Buffer.from(JSON.stringify(cursor)).toString('base64url');
+}
+
+export function decodeChunkCursor(value: string): ChunkCursor | null {
+  if (!value.startsWith(CHUNK_CURSOR_PREFIX)) {
+    return null;
+  }
+  try {
+    const cursor = JSON.parse(Buffer.from(value.slice(CHUNK_CURSOR_PREFIX.length), 'base64url').toString('utf8'));
+    if (typeof cursor?.size === 'number' && typeof cursor?.devices === 'string' && cursor.after && typeof cursor.after === 'object' &&
+      (cursor.failures === undefined || (cursor.failures && typeof cursor.failures === 'object'))) {
+      return cursor;
+    }
+  } catch {
+    // fall through
+  }
+  return null;
+}
+
+// Merged chunks keep the upstream order: by timestamp when the rows carry one,
+// otherwise in device_ids order (chunks are concatenated in order)
+function mergeChunkResults(results: any[][], sorting?: 'asc' | 'desc'): any[] {
+  const merged = results.flat();
+  if (merged.length > 0 && merged.every(row => row?.timestamp)) {
+    const direction = sorting === 'desc' ? -1 : 1;
+    merged.sort((a, b) => direction * (Date.parse(a.timestamp) - Date.parse(b.timestamp)));
+  }
+  return merged;
+}
+
+function formatSummary(data: any): string {
+  let summary = `# Aggregated Metrics\n`;
+  if (Array.isArray(data)) {
+    summary += data.map((metric: any) =>
+      `- **${metric.name}**: avg=${metric.avg ?? '-'}, min=${metric.min ?? '-'}, max=${metric.max ?? '-'}, last=${metric.last ?? '-'}, device=${metric.device_id ?? '-'} `
+    ).join('\n');
+  } else {
+    summary += 'No aggregated metrics found.';
+  }
+  return summary;
+}
+
 export const getAggregatedMetricsTool = (auth_token: string): Tool => ({
   name: "aggregated_metrics",
+  argsSchema: AggregatedMetricsSchema,
   description: `
   Read machine_variables of type metric for multiple devices. 
+  Large device lists are fetched in parallel chunks of ${AGGREGATED_METRICS_CHUNK_SIZE} devices; in that case
+  limit applies per chunk and the returned pagination.after cursor continues all chunks at once.
+  A chunk that fails is retried on the next page, up to ${AGGREGATED_METRICS_MAX_CHUNK_ATTEMPTS} attempts.
   Returns a markdown summary and raw JSON.`,
   inputSchema: fixArraySchemas(zodToJsonSchema(AggregatedMetricsSchema)) as any,
   outputSchema: zodToJsonSchema(z.object({
     aggregated_metrics: z.array(z.any()),
+    pagination: z.object({ after: z.string() }).nullable().optional(),
+    failed_chunks: z.array(z.object({
+      chunk: z.number(),
+      device_ids: z.array(z.string()),
+      status: z.number().optional(),
+      message: z.string(),
+      attempts: z.number(),
+      final: z.boolean(),
+    })).optional(),
   })) as any,
   handler: async (rawArgs: unknown) => {
     let args: AggregatedMetricsArgs;
     try {
-      args = AggregatedMetricsSchema.parse(rawArgs);
+      args = parseToolArgs(AggregatedMetricsSchema, rawArgs);
     } catch (e) {
       throw new Error('Invalid arguments for aggregated_metrics tool: ' + e);
     }
     const { device_ids, from, to, metric_names, sorting, after, limit } = args;
     const url = `${THINGS5_BASE_URL}/metrics/aggregated`;
-    const params: Record<string, any> = {};
-    if (device_ids) params['device_ids[]'] = device_ids;
-    if (from) params.from = from;
-    if (to) params.to = to;
-    if (metric_names) params['metric_names[]'] = metric_names;
-    if (sorting) params.sorting = sorting;
-    if (after) params.after = after;
-    if (limit) params.limit = limit;
-    try {
-      const resp = await axios.get(url, {
-        headers: auth_token ? { Authorization: `Bearer ${auth_token}` } : undefined,
-        params
-      });
-      const data = resp.data?.data;
-      let summary = `# Aggregated Metrics\n`;
-      if (Array.isArray(data)) {
-        summary += data.map((metric: any) =>
-          `- **${metric.name}**: avg=${metric.avg ?? '-'}, min=${metric.min ?? '-'}, max=${metric.max ?? '-'}, last=${metric.last ?? '-'}, device=${metric.device_id ?? '-'} `
-        ).join('\n');
+    const headers = auth_token ? { Authorization: `Bearer ${auth_token}` } : undefined;
+
+    const buildParams = (ids: string[], cursor?: string): Record<string, any> => {
+      const params: Record<string, any> = {};
+      if (ids) params['device_ids[]'] = ids;
+      if (from) params.from = from;
+      if (to) params.to = to;
+      if (metric_names) params['metric_names[]'] = metric_names;
+      if (sorting) params.sorting = sorting;
+      if (cursor) params.after = cursor;
+      if (limit) params.limit = limit;
+      return params;
+    };
+
+    const chunkCursor = after ? decodeChunkCursor(after) : null;
+
+    // Small lists: a single upstream request, exactly as before
+    if (!chunkCursor && device_ids.length <= AGGREGATED_METRICS_CHUNK_SIZE) {
+      try {
+        const resp = await axios.get(url, { headers, params: buildParams(device_ids, after) });
+        const data = resp.data?.data;
+        const nextAfter = resp.data?.pagination?.after;
+        return success({
+          text: formatSummary(data),
+          structured: { aggregated_metrics: data ?? [], pagination: nextAfter ? { after: nextAfter } : null }
+        });
+      } catch (error: any) {
+        const message = `❌ Error fetching aggregated metrics: ${error.response?.data?.message || error.message}`;
+        return failure({ message, status: error.response?.status, data: error.response?.data || null });
+      }
+    }
+
+    if (chunkCursor && chunkCursor.devices !== deviceListHash(device_ids)) {
+      return failure({ message: '❌ Invalid "after" cursor: it was issued for a different device_ids list' });
+    }
+
+    const chunkSize = chunkCursor?.size ?? AGGREGATED_METRICS_CHUNK_SIZE;
+    const chunks = chunkArray(device_ids, chunkSize)
+      .map((ids, index) => ({ index, ids, cursor: chunkCursor?.after[String(index)] }))
+      // On follow-up pages only chunks that still have data are fetched
+      .filter(chunk => !chunkCursor || chunk.cursor !== undefined);
+
+    if (chunks.length === 0) {
+      return success({ text: formatSummary([]), structured: { aggregated_metrics: [], pagination: null } });
+    }
+
+    const results = await mapWithConcurrency(chunks, AGGREGATED_METRICS_CONCURRENCY, async (chunk) => {
+      const resp = await axios.get(url, { headers, params: buildParams(chunk.ids, chunk.cursor) });
+      return resp.data;
+    });
+
+    const rows: any[][] = [];
+    const nextCursors: Record<string, string> = {};
+    const nextFailures: Record<string, number> = {};
+    const failedChunks: FailedChunk[] = [];
+
+    results.forEach((result, i) => {
+      const chunk = chunks[i];
+      if (result.status === 'fulfilled') {
+        const data = result.value?.data;
+        if (Array.isArray(data)) rows.push(data);
+        const nextAfter = result.value?.pagination?.after;
+        if (nextAfter) nextCursors[String(chunk.index)] = nextAfter;
       } else {
-        summary += 'No aggregated metrics found.';
+        const error: any = result.reason;
+        const attempts = (chunkCursor?.failures?.[String(chunk.index)] ?? 0) + 1;
+        const final = attempts >= AGGREGATED_METRICS_MAX_CHUNK_ATTEMPTS;
+        failedChunks.push({
+          chunk: chunk.index,
+          device_ids: chunk.ids,
+          status: error?.response?.status,
+          message: error?.response?.data?.message || error?.message || String(error),
+          attempts,
+          final,
+        });
+        // A failed chunk is retried on the next page, from its first page when
+        // it never got one, so its devices are not dropped from later pages.
+        // After too many attempts it is dropped so the cursor can run out.
+        if (!final) {
+          nextCursors[String(chunk.index)] = chunk.cursor ?? RESTART_CHUNK;
+          nextFailures[String(chunk.index)] = attempts;
+        }
+      }
+    });
+
+    const pagination = Object.keys(nextCursors).length > 0
+      ? {
+        after: encodeChunkCursor({
+          size: chunkSize,
+          devices: deviceListHash(device_ids),
+          after: nextCursors,
+          ...(Object.keys(nextFailures).length > 0 ? { failures: nextFailures } : {}),
+        })
       }
-      return success({ text: summary, structured: { aggregated_metrics: data ?? [] } });
-    } catch (error: any) {
-      const message = `❌ Error fetching aggregated metrics: ${error.response?.data?.message || error.message}`;
-      return failure({ message, status: error.response?.status, data: error.response?.data || null });
+      : null;
+
+    if (failedChunks.length === chunks.length) {
+      const first = failedChunks[0];
+      const message = `❌ Error fetching aggregated metrics: ${first?.message ?? 'no chunk succeeded'}`;
+      // The cursor counts this attempt, so retrying with it eventually gives up
+      return failure({ message, status: first?.status, data: { failed_chunks: failedChunks, pagination } });
+    }
+
+    const data = mergeChunkResults(rows, sorting);
+    let summary = formatSummary(data);
+    if (failedChunks.length > 0) {
+      summary += `\n\n⚠️ ${failedChunks.length} of ${chunks.length} device chunks failed: ` +
+        failedChunks.map(f => `chunk ${f.chunk} (${f.device_ids.length} devices): ${f.message}` +
+          (f.final ? ` (gave up after ${f.attempts} attempts)` : '')).join('; ');
+    }
+
+    const structured: Record<string, any> = {
+      aggregated_metrics: data,
+      pagination,
+    };
+    if (failedChunks.length > 0) {
+      structured.failed_chunks = failedChunks;
     }
+    return success({ text: summary, structured });
   }
 });
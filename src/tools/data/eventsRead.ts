@@ -4,7 +4,11 @@ import { Tool } from "@modelcontextprotocol/sdk/types.js";
 import { zodToJsonSchema } from "zod-to-json-schema";
 import { THINGS5_BASE_URL } from '../../config.js';
 import { success, failure } from '../utils/toolResult.js';
+import { reportProgress } from '../utils/resultBuilder.js';
 import { fixArraySchemas } from '../utils/schemaUtils.js';
+import { fetchParallelWindows, describeWindowIssues, TimeWindow } from '../../utils/timeWindows.js';
+import { readSeriesCached, isSeriesCacheable, seriesScope } from '../../utils/seriesCache.js';
+import { parseToolArgs } from '../../utils/toolValidation.js';
 
 export const EventsReadSchema = z.object({
   device_id: z.string().describe("Device id (UUID)"),
@@ -14,13 +18,27 @@ export const EventsReadSchema = z.object({
   sorting: z.enum(['asc', 'desc']).optional().describe("Sorting order (optional)"),
   after: z.string().optional().describe("Pagination cursor (optional)"),
   severity: z.array(z.string()).optional().describe("Array of severities to filter (optional)"),
-  limit: z.number().int().max(1000).optional().describe("Max results (optional, default 1000)")
+  limit: z.number().int().max(1000).optional().describe("Max results (optional, default 1000)"),
+  parallel_windows: z.number().int().min(2).max(32).optional().describe("Split from/to into this many sub-windows fetched concurrently, each paged to completion (optional, for long ranges; not combinable with after)")
 });
 
 export type EventsReadArgs = z.infer<typeof EventsReadSchema>;
 
+function formatEventsSummary(data: any): string {
+  let summary = `# Device Events\n`;
+  if (Array.isArray(data)) {
+    summary += data.map((event: any) =>
+      `- **${event.name}**: ${event.timestamp}`
+    ).join('\n');
+  } else {
+    summary += 'No events found.';
+  }
+  return summary;
+}
+
 export const getEventsReadTool = (auth_token: string): Tool => ({
   name: "events_read",
+  argsSchema: EventsReadSchema,
   description: `
   Read  a machine_variable of type event, usually it's an alarm. 
   Note that to know that a machine variable is an event you must first get the machine firmware and see that machine_variable type is event
@@ -28,15 +46,17 @@ export const getEventsReadTool = (auth_token: string): Tool => ({
   inputSchema: fixArraySchemas(zodToJsonSchema(EventsReadSchema)) as any,
   outputSchema: zodToJsonSchema(z.object({
     events: z.array(z.any()),
+    parallel_windows: z.any().optional(),
+    series_cache: z.any().optional(),
   })) as any,
-  handler: async (rawArgs: unknown) => {
+  handler: async (rawArgs: unknown, extra?: any) => {
     let args: EventsReadArgs;
     try {
-      args = EventsReadSchema.parse(rawArgs);
+      args = parseToolArgs(EventsReadSchema, rawArgs);
     } catch (e) {
       throw new Error('Invalid arguments for events_read tool: ' + e);
     }
-    const { device_id, from, to, events_names, sorting, after, severity, limit } = args;
+    const { device_id, from, to, events_names, sorting, after, severity, limit, parallel_windows } = args;
     const url = `${THINGS5_BASE_URL}/devices/${encodeURIComponent(device_id)}/events`;
     const params: Record<string, any> = { from, to };
     if (events_names) params.events_names = events_names;
@@ -44,20 +64,66 @@ export const getEventsReadTool = (auth_token: string): Tool => ({
     if (after) params.after = after;
     if (severity) params['severity[]'] = severity;
     if (limit) params.limit = limit;
+    // With the cache enabled, ranges reaching past the grace period go through it.
+    // A plain limited read keeps its single upstream page.
+    const cacheable = !after && !(limit && !parallel_windows) && isSeriesCacheable(from, to);
+    if (parallel_windows || cacheable) {
+      if (after) {
+        return failure({ message: '❌ parallel_windows cannot be combined with an "after" cursor' });
+      }
+      const headers = auth_token ? { Authorization: `Bearer ${auth_token}` } : undefined;
+      // Cache fills page with the upstream default size, not the caller's limit
+      const { limit: _limit, ...fillParams } = params;
+      const pageParams = cacheable ? fillParams : params;
+      let pages = 0;
+      let rows = 0;
+      const fetchRange = (range: TimeWindow, names?: string[]) => fetchParallelWindows({
+        from: range.from,
+        to: range.to,
+        windows: parallel_windows ?? 1,
+        sorting,
+        timestampKey: 'timestamp',
+        fetchPage: async (window, cursor) => {
+          const resp = await axios.get(url, {
+            headers,
+            params: { ...pageParams, ...(names ? { events_names: names } : {}), from: window.from, to: window.to, ...(cursor ? { after: cursor } : {}) }
+          });
+          return { data: resp.data?.data ?? [], after: resp.data?.pagination?.after };
+        },
+        onPage: (_window, pageRows) => {
+          pages++;
+          rows += pageRows;
+          void reportProgress(extra, pages, undefined, `${rows} event rows from ${pages} pages`);
+        },
+      });
+      const result = cacheable
+        ? await readSeriesCached({
+          scope: seriesScope(auth_token, url, { severity }),
+          names: events_names,
+          from, to,
+          sorting,
+          timestampKey: 'timestamp',
+          fetchRange,
+        })
+        : { ...await fetchRange({ from, to }), cache: undefined };
+      if (result.windows.length > 0 && result.windows.every(w => w.status === 'failed')) {
+        const first = result.windows[0];
+        const message = `❌ Error fetching device events: ${first.message}`;
+        return failure({ message, status: first.http_status, data: { windows: result.windows } });
+      }
+      const { data, cache, ...report } = result;
+      return success({
+        text: formatEventsSummary(data) + describeWindowIssues(result),
+        structured: { events: data, ...(parallel_windows ? { parallel_windows: report } : {}), ...(cache ? { series_cache: cache } : {}) }
+      });
+    }
     try {
       const resp = await axios.get(url, {
         headers: auth_token ? { Authorization: `Bearer ${auth_token}` } : undefined,
         params
       });
       const data = resp.data?.data;
-      let summary = `# Device Events\n`;
-      if (Array.isArray(data)) {
-        summary += data.map((event: any) =>
-          `- **${event.name}**: ${event.timestamp}`
-        ).join('\n');
-      } else {
-        summary += 'No events found.';
-      }
+      const summary = formatEventsSummary(data);
       return success({ text: summary, structured: { events: data ?? [] } });
     } catch (error: any) {
       const message = `❌ Error fetching device events: ${error.response?.data?.message || error.message}`;
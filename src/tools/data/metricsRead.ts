@@ -4,7 +4,11 @@ import { Tool } from "@modelcontextprotocol/sdk/types.js";
 import { zodToJsonSchema } from "zod-to-json-schema";
 import { THINGS5_BASE_URL } from '../../config.js';
 import { success, failure } from '../utils/toolResult.js';
+import { TextResultBuilder, reportProgress } from '../utils/resultBuilder.js';
 import { fixArraySchemas } from '../utils/schemaUtils.js';
+import { fetchParallelWindows, describeWindowIssues, TimeWindow } from '../../utils/timeWindows.js';
+import { readSeriesCached, isSeriesCacheable, seriesScope } from '../../utils/seriesCache.js';
+import { parseToolArgs } from '../../utils/toolValidation.js';
 
 export const MetricsReadSchema = z.object({
   device_id: z.string().optional().describe("Device ID (UUID). If not provided, use device_name or serial"),
@@ -16,7 +20,8 @@ export const MetricsReadSchema = z.object({
   sorting: z.enum(['asc', 'desc']).optional().describe("Sorting order (optional)"),
   after: z.string().optional().describe("Pagination cursor (optional)"),
   last_value: z.boolean().optional().describe("Return only last value for each metric (optional)"),
-  limit: z.number().int().max(1000).optional().describe("Max results (optional, default 1000)")
+  limit: z.number().int().max(1000).optional().describe("Max results (optional, default 1000)"),
+  parallel_windows: z.number().int().min(2).max(32).optional().describe("Split from/to into this many sub-windows fetched concurrently, each paged to completion (optional, for long ranges; not combinable with after or last_value)")
 }).refine(
   data => data.device_id || data.device_name || data.serial,
   { message: "Must provide either device_id, device_name, or serial" }
@@ -24,8 +29,24 @@ export const MetricsReadSchema = z.object({
 
 export type MetricsReadArgs = z.infer<typeof MetricsReadSchema>;
 
+function formatMetricsSummary(data: any, last_value?: boolean): string {
+  const summary = new TextResultBuilder();
+  summary.line('# Device Metrics');
+  if (Array.isArray(data)) {
+    for (const metric of data) {
+      summary.line(last_value === true
+        ? `- **${metric.name}**: value=${metric.value ?? '-'} `
+        : `- **${metric.name}**: avg=${metric.avg ?? '-'}, min=${metric.min ?? '-'}, max=${metric.max ?? '-'}, last=${metric.last ?? '-'}, timestamp=${metric.timestamp ?? '-'} `);
+    }
+  } else {
+    summary.line('No metrics found.');
+  }
+  return summary.toString();
+}
+
 export const getMetricsReadTool = (auth_token: string): Tool => ({
   name: "metrics_read",
+  argsSchema: MetricsReadSchema,
   description: `
   Read a machine_variable of type metric from a device. If interested only in the last value of a metric provide last_value param. Otherwise from and to parameters are required.
   Note that to know that a machine_variable is a metric you must first get the machine firmware and see that machine_variable type is metric
@@ -33,15 +54,17 @@ export const getMetricsReadTool = (auth_token: string): Tool => ({
   inputSchema: fixArraySchemas(zodToJsonSchema(MetricsReadSchema)) as any,
   outputSchema: zodToJsonSchema(z.object({
     metrics: z.array(z.any()),
+    parallel_windows: z.any().optional(),
+    series_cache: z.any().optional(),
   })) as any,
-  handler: async (rawArgs: unknown) => {
+  handler: async (rawArgs: unknown, extra?: any) => {
     let args: MetricsReadArgs;
     try {
-      args = MetricsReadSchema.parse(rawArgs);
+      args = parseToolArgs(MetricsReadSchema, rawArgs);
     } catch (e) {
       throw new Error('Invalid arguments for metrics_read tool: ' + e);
     }
-    const { device_id, from, to, metric_names, sorting, after, last_value, limit } = args;
+    const { device_id, from, to, metric_names, sorting, after, last_value, limit, parallel_windows } = args;
     
     // device_id should be present after auto-resolution
     if (!device_id) {
@@ -58,27 +81,70 @@ export const getMetricsReadTool = (auth_token: string): Tool => ({
     if (typeof last_value !== 'undefined') params.last_value = last_value;
     if (limit) params.limit = limit;
     console.log('params:', params);
+    // With the cache enabled, ranges reaching past the grace period go through it.
+    // A plain limited read keeps its single upstream page.
+    const cacheable = !after && !last_value && !(limit && !parallel_windows) && isSeriesCacheable(from, to);
+    if (parallel_windows || cacheable) {
+      if (after) {
+        return failure({ message: '❌ parallel_windows cannot be combined with an "after" cursor' });
+      }
+      if (!from || !to || last_value) {
+        return failure({ message: '❌ parallel_windows requires from and to and cannot be used with last_value' });
+      }
+      const headers = auth_token ? { Authorization: `Bearer ${auth_token}` } : undefined;
+      // Cache fills page with the upstream default size, not the caller's limit
+      const { limit: _limit, ...fillParams } = params;
+      const pageParams = cacheable ? fillParams : params;
+      let pages = 0;
+      let rows = 0;
+      const fetchRange = (range: TimeWindow, names?: string[]) => fetchParallelWindows({
+        from: range.from,
+        to: range.to,
+        windows: parallel_windows ?? 1,
+        sorting,
+        timestampKey: 'timestamp',
+        fetchPage: async (window, cursor) => {
+          const resp = await axios.get(url, {
+            headers,
+            params: { ...pageParams, ...(names ? { 'metric_names[]': names } : {}), from: window.from, to: window.to, ...(cursor ? { after: cursor } : {}) }
+          });
+          return { data: resp.data?.data ?? [], after: resp.data?.pagination?.after };
+        },
+        onPage: (_window, pageRows) => {
+          pages++;
+          rows += pageRows;
+          void reportProgress(extra, pages, undefined, `${rows} metric rows from ${pages} pages`);
+        },
+      });
+      const result = cacheable
+        ? await readSeriesCached({
+          scope: seriesScope(auth_token, url, {}),
+          names: metric_names,
+          from: from!, to: to!,
+          sorting,
+          timestampKey: 'timestamp',
+          fetchRange,
+        })
+        : { ...await fetchRange({ from: from!, to: to! }), cache: undefined };
+      if (result.windows.length > 0 && result.windows.every(w => w.status === 'failed')) {
+        const first = result.windows[0];
+        const message = `❌ Error fetching device metrics: ${first.message}`;
+        return failure({ message, status: first.http_status, data: { windows: result.windows } });
+      }
+      const { data, cache, ...report } = result;
+      return success({
+        text: formatMetricsSummary(data, last_value) + describeWindowIssues(result),
+        structured: { metrics: data, ...(parallel_windows ? { parallel_windows: report } : {}), ...(cache ? { series_cache: cache } : {}) }
+      });
+    }
     try {
       const resp = await axios.get(url, {
         headers: auth_token ? { Authorization: `Bearer ${auth_token}` } : undefined,
         params
       });
-      console.log('resp:', JSON.stringify(resp.data));
+      console.log(`resp: ${Array.isArray(resp.data?.data) ? resp.data.data.length : 0} metric rows`);
       const data = resp.data?.data;
-      let summary = `# Device Metrics\n`;
-      if (Array.isArray(data)) {
-        if (last_value === true) {
-          summary += data.map((metric: any) =>
-            `- **${metric.name}**: value=${metric.value ?? '-'} `
-          ).join('\n');
-        } else {
-          summary += data.map((metric: any) =>
-            `- **${metric.name}**: avg=${metric.avg ?? '-'}, min=${metric.min ?? '-'}, max=${metric.max ?? '-'}, last=${metric.last ?? '-'}, timestamp=${metric.timestamp ?? '-'} `
-          ).join('\n');
-        }
-      } else {
-        summary += 'No metrics found.';
-      }
+      const summary = formatMetricsSummary(data, last_value);
       return success({ text: summary, structured: { metrics: data ?? [] } });
     } catch (error: any) {
       const message = `❌ Error fetching device metrics: ${error.response?.data?.message || error.message}`;
@@ -4,7 +4,9 @@ import { Tool } from "@modelcontextprotocol/sdk/types.js";
 import { zodToJsonSchema } from "zod-to-json-schema";
 import { THINGS5_BASE_URL } from '../../config.js';
 import { success, failure } from '../utils/toolResult.js';
+import { TextResultBuilder } from '../utils/resultBuilder.js';
 import { fixArraySchemas } from '../utils/schemaUtils.js';
+import { parseToolArgs } from '../../utils/toolValidation.js';
 
 // Schema basato su OpenAPI
 export const ReadParametersSchema = z.object({
@@ -17,6 +19,7 @@ export type ReadParametersArgs = z.infer<typeof ReadParametersSchema>;
 
 export const getReadParametersTool = (auth_token: string): Tool => ({
   name: "read_parameters",
+  argsSchema: ReadParametersSchema,
   description: `Read machine_variables of type parameter from a things5 device. 
   Do not use this tool unless you are 100% sure that the machine variable is a parameter.
   Note that to know that a machine variable is a parameter you must first get the machine firmware and see that machine_variable type is parameter.
@@ -41,7 +44,7 @@ export const getReadParametersTool = (auth_token: string): Tool => ({
     console.log('[read_parameters] rawArgs:', JSON.stringify(rawArgs));
     let args: ReadParametersArgs;
     try {
-      args = ReadParametersSchema.parse(rawArgs);
+      args = parseToolArgs(ReadParametersSchema, rawArgs);
     } catch (e) {
       console.error('[read_parameters] Zod parse error:', e);
       throw e;
@@ -55,28 +58,24 @@ export const getReadParametersTool = (auth_token: string): Tool => ({
       });
       const raw = response.data;
       // Normalizza assets/values
-      const parameters = (raw.assets || []).flatMap((asset: any) =>
-        (asset.values || []).map((v: any) => ({
-          asset: asset.name,
-          name: v.name,
-          type: v.type,
-          value: v.value
-        }))
-      );
-      const summaryLines = [
-        parameters.length > 0
-          ? `✅ Read (${parameters.length}) parameters for device ${args.device_id}`
-          : `ℹ️ No parameter found for device ${args.device_id}`
-      ];
+      const parameters: { asset: string; name: string; type: any; value: any }[] = [];
+      for (const asset of raw.assets || []) {
+        for (const v of asset.values || []) {
+          parameters.push({ asset: asset.name, name: v.name, type: v.type, value: v.value });
+        }
+      }
+      const summary = new TextResultBuilder();
+      summary.line(parameters.length > 0
+        ? `✅ Read (${parameters.length}) parameters for device ${args.device_id}`
+        : `ℹ️ No parameter found for device ${args.device_id}`);
       if (parameters.length > 0) {
-        summaryLines.push('\n---');
-        summaryLines.push('| Asset | Name | Type | Value |');
-        summaryLines.push('|-------|------|------|-------|');
+        summary.line('\n---');
+        summary.table(['Asset', 'Name', 'Type', 'Value']);
         for (const p of parameters) {
-          summaryLines.push(`| ${p.asset} | ${p.name} | ${p.type} | ${p.value} |`);
+          summary.row([p.asset, p.name, p.type, p.value]);
         }
       }
-      return success({ text: summaryLines.join('\n'), structured: { parameters, request_id: raw.request_id } });
+      return success({ text: summary.toString(), structured: { parameters, request_id: raw.request_id } });
     } catch (error: any) {
       const message = `❌ Error reading parameters: ${error.response?.data?.message || error.message}`;
       return failure({ message, status: error.response?.status, data: error.response?.data || null });
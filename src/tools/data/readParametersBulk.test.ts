@@ -0,0 +1,58 @@
+import { describe, it, expect, vi, beforeEach } from 'vitest';
+import axios from 'axios';
+import { getReadParametersBulkTool } from './readParametersBulk.js';
+import { matchesPredicate } from '../utils/bulkDevices.js';
+
+vi.mock('axios');
+vi.mock('../../utils/machineContext.js', () => ({
+  getAvailableMachines: vi.fn().mockResolvedValue([
+    { id: 'd1', name: 'Fridge 1', serial: 'S1', is_connected: true },
+    { id: 'd2', name: 'Fridge 2', serial: 'S2', is_connected: true },
+    { id: 'd3', name: 'Oven 1', serial: 'S3', is_connected: false },
+  ]),
+}));
+const mockedAxios = axios as any;
+
+describe('read_parameters_bulk', () => {
+  beforeEach(() => {
+    vi.clearAllMocks();
+    mockedAxios.get = vi.fn().mockImplementation(async (url: string) => {
+      if (url.includes('/devices/d2/')) {
+        throw Object.assign(new Error('timeout'), { response: { status: 504, data: { message: 'Gateway timeout' } } });
+      }
+      const setpoint = url.includes('/d1/') ? 7 : 3;
+      return { data: { assets: [{ name: 'main', values: [{ name: 'setpoint', type: 'number', value: setpoint }, { name: 'unit', value: 'C' }] }] } };
+    });
+  });
+
+  it('builds a device × parameter matrix for the filtered devices', async () => {
+    const tool = getReadParametersBulkTool('token');
+    const result = await tool.handler({ device_filter: 'fridge', parameter_name_list: ['setpoint'] });
+
+    expect(mockedAxios.get).toHaveBeenCalledTimes(2);
+    expect(mockedAxios.get.mock.calls[0][1].params).toEqual({ 'configuration_filter[]': ['setpoint'] });
+    expect(result.structuredContent.columns).toEqual(['setpoint']);
+    expect(result.structuredContent.rows).toEqual([{ device_id: 'd1', device_name: 'Fridge 1', serial: 'S1', values: { setpoint: 7 } }]);
+    expect(result.structuredContent.failed).toEqual([{ device_id: 'd2', device_name: 'Fridge 2', error: 'Gateway timeout' }]);
+    expect(result.content[0].text).toContain('| Fridge 1 | S1 | 7 |');
+  });
+
+  it('keeps only the devices matching the condition', async () => {
+    const tool = getReadParametersBulkTool('token');
+    const result = await tool.handler({ device_ids: ['d1', 'd3'], where: { name: 'setpoint', op: 'lt', value: 5 } });
+
+    expect(result.structuredContent.rows.map((r: any) => r.device_id)).toEqual(['d3']);
+    expect(result.structuredContent.columns).toEqual(['setpoint', 'unit']);
+    expect(result.structuredContent.matched).toBe(1);
+  });
+});
+
+describe('matchesPredicate', () => {
+  it('compares numerically when both sides are numbers, as text otherwise', () => {
+    expect(matchesPredicate('10', { name: 'x', op: 'gt', value: 9 })).toBe(true);
+    expect(matchesPredicate('abc', { name: 'x', op: 'gt', value: 9 })).toBe(false);
+    expect(matchesPredicate('defrost', { name: 'x', op: 'eq', value: 'defrost' })).toBe(true);
+    expect(matchesPredicate('Cooling', { name: 'x', op: 'contains', value: 'cool' })).toBe(true);
+    expect(matchesPredicate(undefined, { name: 'x', op: 'neq', value: 1 })).toBe(false);
+  });
+});
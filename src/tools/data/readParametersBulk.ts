@@ -0,0 +1,70 @@
+import axios from "axios";
+import { z } from "zod";
+import { Tool } from "@modelcontextprotocol/sdk/types.js";
+import { zodToJsonSchema } from "zod-to-json-schema";
+import { THINGS5_BASE_URL } from '../../config.js';
+import { success, failure } from '../utils/toolResult.js';
+import { fixArraySchemas } from '../utils/schemaUtils.js';
+import { BulkDeviceSelectionShape, BulkPredicateSchema, BulkMatrixOutputSchema, selectBulkDevices, readDeviceMatrix, formatDeviceMatrix } from '../utils/bulkDevices.js';
+import { parseToolArgs } from '../../utils/toolValidation.js';
+
+export const ReadParametersBulkSchema = z.object({
+  ...BulkDeviceSelectionShape,
+  parameter_name_list: z.array(z.string()).optional().describe("Parameters to read on every device (optional, default: all parameters)"),
+  where: BulkPredicateSchema.optional().describe("Only return devices whose parameter matches this condition, e.g. {name: \"setpoint\", op: \"gt\", value: 5} (optional)"),
+});
+
+export type ReadParametersBulkArgs = z.infer<typeof ReadParametersBulkSchema>;
+
+export const getReadParametersBulkTool = (auth_token: string): Tool => ({
+  name: "read_parameters_bulk",
+  argsSchema: ReadParametersBulkSchema,
+  description: `Read parameters from many things5 devices in a single call.
+  Devices are selected by device_ids or by a name/serial filter; parameters are read server-side in parallel
+  and returned as a device × parameter matrix, so there is no need to call read_parameters per device.
+  Use where to keep only the devices whose parameter matches a condition.
+
+  Usage examples:
+    - "show the setpoint of all fridges" → device_filter: "fridge", parameter_name_list: ["setpoint"]
+    - "which devices have setpoint above 5?" → parameter_name_list: ["setpoint"], where: {name: "setpoint", op: "gt", value: 5}
+  `,
+  inputSchema: fixArraySchemas(zodToJsonSchema(ReadParametersBulkSchema)) as any,
+  outputSchema: zodToJsonSchema(BulkMatrixOutputSchema) as any,
+  handler: async (rawArgs: unknown) => {
+    let args: ReadParametersBulkArgs;
+    try {
+      args = parseToolArgs(ReadParametersBulkSchema, rawArgs);
+    } catch (e) {
+      throw new Error('Invalid arguments for read_parameters_bulk tool: ' + e);
+    }
+    const headers = auth_token ? { Authorization: `Bearer ${auth_token}` } : undefined;
+    // The condition parameter is read even when it is not one of the requested columns
+    const filter = args.parameter_name_list?.length
+      ? Array.from(new Set([...args.parameter_name_list, ...(args.where ? [args.where.name] : [])]))
+      : undefined;
+
+    try {
+      const { devices, available } = await selectBulkDevices(auth_token, args);
+      if (devices.length === 0) {
+        return failure({ message: '❌ No devices match the selection' });
+      }
+      const matrix = await readDeviceMatrix(devices, available, async (device) => {
+        const response = await axios.get(`${THINGS5_BASE_URL}/devices/${encodeURIComponent(device.id)}/parameters`, {
+          headers,
+          params: filter ? { "configuration_filter[]": filter } : undefined
+        });
+        const values: Record<string, unknown> = {};
+        for (const asset of response.data?.assets || []) {
+          for (const v of asset.values || []) {
+            if (!(v.name in values)) values[v.name] = v.value;
+          }
+        }
+        return values;
+      }, { names: args.parameter_name_list, where: args.where });
+
+      return success({ text: formatDeviceMatrix('Parameters', matrix, args.where), structured: matrix });
+    } catch (error: any) {
+      return failure({ message: `❌ Error reading parameters: ${error.response?.data?.message || error.message}` });
+    }
+  }
+});
@@ -4,6 +4,7 @@ import { Tool } from "@modelcontextprotocol/sdk/types.js";
 import { zodToJsonSchema } from "zod-to-json-schema";
 import { THINGS5_BASE_URL } from '../../config.js';
 import { success, failure } from '../utils/toolResult.js';
+import { parseToolArgs } from '../../utils/toolValidation.js';
 
 // Input schema: device_id and parameter_label
 export const ReadSingleParameterSchema = z.object({
@@ -15,6 +16,7 @@ export type ReadSingleParameterArgs = z.infer<typeof ReadSingleParameterSchema>;
 
 export const getReadSingleParameterTool = (auth_token: string): Tool => ({
   name: "read_single_parameter",
+  argsSchema: ReadSingleParameterSchema,
   description: `Read a single machine_variable of type parameter from a things5 device, by parameter label.
   Do not use this tool unless you are 100% sure that the machine variable is a parameter.
   Note that to know that a machine variable is a parameter you must first get the machine firmware and see that machine_variable type is parameter
@@ -30,7 +32,7 @@ export const getReadSingleParameterTool = (auth_token: string): Tool => ({
     console.log('[read_single_parameter] rawArgs:', JSON.stringify(rawArgs));
     let args: ReadSingleParameterArgs;
     try {
-      args = ReadSingleParameterSchema.parse(rawArgs);
+      args = parseToolArgs(ReadSingleParameterSchema, rawArgs);
     } catch (e) {
       console.error('[read_single_parameter] Zod parse error:', e);
       throw e;
@@ -5,6 +5,7 @@ import { zodToJsonSchema } from "zod-to-json-schema";
 import { THINGS5_BASE_URL } from '../../config.js';
 import { success, failure } from '../utils/toolResult.js';
 import { fixArraySchemas } from '../utils/schemaUtils.js';
+import { parseToolArgs } from '../../utils/toolValidation.js';
 
 export const StateReadLastValueSchema = z.object({
   device_id: z.string().describe("Device id (UUID)"),
@@ -15,6 +16,7 @@ export type StateReadLastValueArgs = z.infer<typeof StateReadLastValueSchema>;
 
 export const getStateReadLastValueTool = (auth_token: string): Tool => ({
   name: "state_read_last_value",
+  argsSchema: StateReadLastValueSchema,
   description: `
   Read the last value of a machine_variable of type state from a device.
   Note that to know that a machine_variable is a state you must first get the machine firmware and see that machine_variable type is state
@@ -26,7 +28,7 @@ export const getStateReadLastValueTool = (auth_token: string): Tool => ({
   handler: async (rawArgs: unknown) => {
     let args: StateReadLastValueArgs;
     try {
-      args = StateReadLastValueSchema.parse(rawArgs);
+      args = parseToolArgs(StateReadLastValueSchema, rawArgs);
     } catch (e) {
       throw new Error('Invalid arguments for state_read_last_value tool: ' + e);
     }
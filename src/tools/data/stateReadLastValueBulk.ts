@@ -0,0 +1,65 @@
+import axios from "axios";
+import { z } from "zod";
+import { Tool } from "@modelcontextprotocol/sdk/types.js";
+import { zodToJsonSchema } from "zod-to-json-schema";
+import { THINGS5_BASE_URL } from '../../config.js';
+import { success, failure } from '../utils/toolResult.js';
+import { fixArraySchemas } from '../utils/schemaUtils.js';
+import { BulkDeviceSelectionShape, BulkPredicateSchema, BulkMatrixOutputSchema, selectBulkDevices, readDeviceMatrix, formatDeviceMatrix } from '../utils/bulkDevices.js';
+import { parseToolArgs } from '../../utils/toolValidation.js';
+
+export const StateReadLastValueBulkSchema = z.object({
+  ...BulkDeviceSelectionShape,
+  states_names: z.array(z.string()).optional().describe("State names to read on every device (optional, default: all states)"),
+  where: BulkPredicateSchema.optional().describe("Only return devices whose state matches this condition, e.g. {name: \"mode\", op: \"eq\", value: \"defrost\"} (optional)"),
+});
+
+export type StateReadLastValueBulkArgs = z.infer<typeof StateReadLastValueBulkSchema>;
+
+export const getStateReadLastValueBulkTool = (auth_token: string): Tool => ({
+  name: "state_read_last_value_bulk",
+  argsSchema: StateReadLastValueBulkSchema,
+  description: `
+  Read the last value of states from many devices in a single call.
+  Devices are selected by device_ids or by a name/serial filter; last states are read server-side in parallel
+  and returned as a device × state matrix, so there is no need to call state_read_last_value per device.
+  Use where to keep only the devices whose state matches a condition.
+  Returns a markdown summary and raw JSON.`,
+  inputSchema: fixArraySchemas(zodToJsonSchema(StateReadLastValueBulkSchema)) as any,
+  outputSchema: zodToJsonSchema(BulkMatrixOutputSchema) as any,
+  handler: async (rawArgs: unknown) => {
+    let args: StateReadLastValueBulkArgs;
+    try {
+      args = parseToolArgs(StateReadLastValueBulkSchema, rawArgs);
+    } catch (e) {
+      throw new Error('Invalid arguments for state_read_last_value_bulk tool: ' + e);
+    }
+    const headers = auth_token ? { Authorization: `Bearer ${auth_token}` } : undefined;
+    // The condition state is read even when it is not one of the requested columns
+    const statesNames = args.states_names?.length
+      ? Array.from(new Set([...args.states_names, ...(args.where ? [args.where.name] : [])]))
+      : undefined;
+
+    try {
+      const { devices, available } = await selectBulkDevices(auth_token, args);
+      if (devices.length === 0) {
+        return failure({ message: '❌ No devices match the selection' });
+      }
+      const matrix = await readDeviceMatrix(devices, available, async (device) => {
+        const resp = await axios.get(`${THINGS5_BASE_URL}/devices/${encodeURIComponent(device.id)}/last_states`, {
+          headers,
+          params: statesNames ? { states_names: statesNames } : {}
+        });
+        const values: Record<string, unknown> = {};
+        for (const state of resp.data?.data ?? []) {
+          values[state.name] = state.value;
+        }
+        return values;
+      }, { names: args.states_names, where: args.where });
+
+      return success({ text: formatDeviceMatrix('Last State Values', matrix, args.where), structured: matrix });
+    } catch (error: any) {
+      return failure({ message: `❌ Error fetching last state values: ${error.response?.data?.message || error.message}` });
+    }
+  }
+});
@@ -4,6 +4,7 @@ import { Tool } from "@modelcontextprotocol/sdk/types.js";
 import { zodToJsonSchema } from "zod-to-json-schema";
 import { THINGS5_RECIPES_BASE_URL } from "../../config.js";
 import { success, failure } from "../utils/toolResult.js";
+import { parseToolArgs } from '../../utils/toolValidation.js';
 
 export const DeviceManagedRecipesSchema = z.object({
   machine_id: z.string().describe("Machine unique id (UUID) of the device")
@@ -13,6 +14,7 @@ export type DeviceManagedRecipesArgs = z.infer<typeof DeviceManagedRecipesSchema
 
 export const getDeviceManagedRecipesTool = (auth_token: string): Tool => ({
   name: "device_managed_recipes",
+  argsSchema: DeviceManagedRecipesSchema,
   description: "Primary tool to fetch a device's recipes (device-managed recipes). Use this when the context is recipes to list the recipes available on a machine.",
   inputSchema: zodToJsonSchema(DeviceManagedRecipesSchema) as any,
   outputSchema: zodToJsonSchema(z.object({
@@ -23,7 +25,7 @@ export const getDeviceManagedRecipesTool = (auth_token: string): Tool => ({
   handler: async (rawArgs: unknown) => {
     let args: DeviceManagedRecipesArgs;
     try {
-      args = DeviceManagedRecipesSchema.parse(rawArgs);
+      args = parseToolArgs(DeviceManagedRecipesSchema, rawArgs);
     } catch (e) {
       throw new Error('Invalid arguments for device_managed_recipes tool: ' + e);
     }
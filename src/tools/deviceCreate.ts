@@ -5,6 +5,7 @@ import { zodToJsonSchema } from "zod-to-json-schema";
 import { fetchFirstOrganizationId } from "./organizationUtils.js";
 import { THINGS5_BASE_URL } from "../config.js";
 import { success, failure } from "./utils/toolResult.js";
+import { parseToolArgs } from '../utils/toolValidation.js';
 
 export const DeviceCreateSchema = z.object({
   serial: z.string().describe("Device serial"),
@@ -18,6 +19,7 @@ export type DeviceCreateArgs = z.infer<typeof DeviceCreateSchema>;
 
 export const getDeviceCreateTool = (auth_token: string): Tool => ({
   name: "device_create",
+  argsSchema: DeviceCreateSchema,
   description: `Create a new device on Things5. Requires serial, machine_model_id, machine_firmware_id, and (for admins) organization_id. For standard users, machines_group_id is required. Name is optional.`,
   inputSchema: zodToJsonSchema(DeviceCreateSchema) as any,
   outputSchema: zodToJsonSchema(z.object({
@@ -26,7 +28,7 @@ export const getDeviceCreateTool = (auth_token: string): Tool => ({
   handler: async (rawArgs: unknown) => {
     let args: DeviceCreateArgs;
     try {
-      args = DeviceCreateSchema.parse(rawArgs);
+      args = parseToolArgs(DeviceCreateSchema, rawArgs);
     } catch (e) {
       throw new Error('Invalid arguments for device_create tool: ' + e);
     }
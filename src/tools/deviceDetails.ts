@@ -4,6 +4,7 @@ import { Tool } from "@modelcontextprotocol/sdk/types.js";
 import { zodToJsonSchema } from "zod-to-json-schema";
 import { THINGS5_BASE_URL } from '../config.js';
 import { success, failure } from './utils/toolResult.js';
+import { parseToolArgs } from '../utils/toolValidation.js';
 
 export const DeviceDetailsSchema = z.object({
   device_id: z.string().describe("Device id (UUID)"),
@@ -15,13 +16,14 @@ export type DeviceDetailsArgs = z.infer<typeof DeviceDetailsSchema>;
 
 export const getDeviceDetailsTool = (auth_token: string): Tool => ({
   name: "device_details",
+  argsSchema: DeviceDetailsSchema,
   description: `Get details for a device, including connection status, firmware, model, and group info. Uses the device-details endpoint from the API.`,
   inputSchema: zodToJsonSchema(DeviceDetailsSchema) as any,
   outputSchema: zodToJsonSchema(z.object({ device: z.any() })) as any,
   handler: async (rawArgs: unknown) => {
     let args: DeviceDetailsArgs;
     try {
-      args = DeviceDetailsSchema.parse(rawArgs);
+      args = parseToolArgs(DeviceDetailsSchema, rawArgs);
     } catch (e) {
       throw new Error('Invalid arguments for device_details tool: ' + e);
     }
@@ -4,6 +4,7 @@ import { Tool } from "@modelcontextprotocol/sdk/types.js";
 import { zodToJsonSchema } from "zod-to-json-schema";
 import { THINGS5_BASE_URL } from "../../config.js";
 import { success, failure } from '../utils/toolResult.js';
+import { parseToolArgs } from '../../utils/toolValidation.js';
 
 export const DeviceFirmwareCreateSchema = z.object({
   machine_model_id: z.string().describe("Device model ID to create firmware for"),
@@ -17,6 +18,7 @@ export type DeviceFirmwareCreateArgs = z.infer<typeof DeviceFirmwareCreateSchema
 
 export const getDeviceFirmwareCreateTool = (auth_token: string): Tool => ({
   name: "device_firmware_create",
+  argsSchema: DeviceFirmwareCreateSchema,
   description: "Create a new device firmware for a given device model.",
   inputSchema: zodToJsonSchema(DeviceFirmwareCreateSchema) as any,
   outputSchema: zodToJsonSchema(z.object({
@@ -25,7 +27,7 @@ export const getDeviceFirmwareCreateTool = (auth_token: string): Tool => ({
   handler: async (rawArgs: unknown) => {
     let args: DeviceFirmwareCreateArgs;
     try {
-      args = DeviceFirmwareCreateSchema.parse(rawArgs);
+      args = parseToolArgs(DeviceFirmwareCreateSchema, rawArgs);
     } catch (e) {
       throw new Error('Invalid arguments for device_firmware_create tool: ' + e);
     }
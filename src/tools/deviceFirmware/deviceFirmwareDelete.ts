@@ -4,6 +4,7 @@ import { Tool } from "@modelcontextprotocol/sdk/types.js";
 import { zodToJsonSchema } from "zod-to-json-schema";
 import { THINGS5_BASE_URL } from "../../config.js";
 import { success, failure } from '../utils/toolResult.js';
+import { parseToolArgs } from '../../utils/toolValidation.js';
 
 export const DeviceFirmwareDeleteSchema = z.object({
   machine_firmware_id: z.string().describe("Firmware ID to delete")
@@ -13,6 +14,7 @@ export type DeviceFirmwareDeleteArgs = z.infer<typeof DeviceFirmwareDeleteSchema
 
 export const getDeviceFirmwareDeleteTool = (auth_token: string): Tool => ({
   name: "device_firmware_delete",
+  argsSchema: DeviceFirmwareDeleteSchema,
   description: "Delete a device firmware by ID.",
   inputSchema: zodToJsonSchema(DeviceFirmwareDeleteSchema) as any,
   outputSchema: zodToJsonSchema(z.object({
@@ -22,7 +24,7 @@ export const getDeviceFirmwareDeleteTool = (auth_token: string): Tool => ({
   handler: async (rawArgs: unknown) => {
     let args: DeviceFirmwareDeleteArgs;
     try {
-      args = DeviceFirmwareDeleteSchema.parse(rawArgs);
+      args = parseToolArgs(DeviceFirmwareDeleteSchema, rawArgs);
     } catch (e) {
       throw new Error('Invalid arguments for device_firmware_delete tool: ' + e);
     }
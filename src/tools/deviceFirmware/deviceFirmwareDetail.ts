@@ -5,6 +5,7 @@ import { zodToJsonSchema } from "zod-to-json-schema";
 import { fetchFirstOrganizationId } from "../../tools/organizationUtils.js";
 import { THINGS5_BASE_URL } from "../../config.js";
 import { success, failure } from "../utils/toolResult.js";
+import { parseToolArgs } from '../../utils/toolValidation.js';
 
 export const DeviceFirmwareDetailSchema = z.object({
   machine_id: z.string().describe("Machine (device) ID to get firmware detail for"),
@@ -16,6 +17,7 @@ export type DeviceFirmwareDetailArgs = z.infer<typeof DeviceFirmwareDetailSchema
 
 export const getDeviceFirmwareDetailTool = (auth_token: string): Tool => ({
   name: "device_firmware_detail",
+  argsSchema: DeviceFirmwareDetailSchema,
   description: "Get detail for the firmware currently associated with a device. Machine commands and machine variables can be found here",
   inputSchema: zodToJsonSchema(DeviceFirmwareDetailSchema) as any,
   outputSchema: zodToJsonSchema(z.object({
@@ -47,7 +49,7 @@ export const getDeviceFirmwareDetailTool = (auth_token: string): Tool => ({
   handler: async (rawArgs: unknown) => {
     let args: DeviceFirmwareDetailArgs;
     try {
-      args = DeviceFirmwareDetailSchema.parse(rawArgs);
+      args = parseToolArgs(DeviceFirmwareDetailSchema, rawArgs);
     } catch (e) {
       throw new Error('Invalid arguments for device_firmware_detail tool: ' + e);
     }
@@ -4,6 +4,7 @@ import { Tool } from "@modelcontextprotocol/sdk/types.js";
 import { zodToJsonSchema } from "zod-to-json-schema";
 import { THINGS5_BASE_URL } from "../../config.js";
 import { success, failure } from "../utils/toolResult.js";
+import { parseToolArgs } from '../../utils/toolValidation.js';
 
 export const DeviceFirmwareListSchema = z.object({
   machine_model_id: z.string().describe("Device model ID to list firmwares for")
@@ -13,6 +14,7 @@ export type DeviceFirmwareListArgs = z.infer<typeof DeviceFirmwareListSchema>;
 
 export const getDeviceFirmwareListTool = (auth_token: string): Tool => ({
   name: "device_firmware_list",
+  argsSchema: DeviceFirmwareListSchema,
   description: "List all device firmwares for a given device model.",
   inputSchema: zodToJsonSchema(DeviceFirmwareListSchema) as any,
   outputSchema: zodToJsonSchema(z.object({
@@ -22,7 +24,7 @@ export const getDeviceFirmwareListTool = (auth_token: string): Tool => ({
   handler: async (rawArgs: unknown) => {
     let args: DeviceFirmwareListArgs;
     try {
-      args = DeviceFirmwareListSchema.parse(rawArgs);
+      args = parseToolArgs(DeviceFirmwareListSchema, rawArgs);
     } catch (e) {
       throw new Error('Invalid arguments for device_firmware_list tool: ' + e);
     }
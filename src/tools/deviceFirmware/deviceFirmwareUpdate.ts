@@ -4,6 +4,7 @@ import { Tool } from "@modelcontextprotocol/sdk/types.js";
 import { zodToJsonSchema } from "zod-to-json-schema";
 import { THINGS5_BASE_URL } from "../../config.js";
 import { success, failure } from '../utils/toolResult.js';
+import { parseToolArgs } from '../../utils/toolValidation.js';
 
 export const DeviceFirmwareUpdateSchema = z.object({
   machine_firmware_id: z.string().describe("Firmware ID to update"),
@@ -16,6 +17,7 @@ export type DeviceFirmwareUpdateArgs = z.infer<typeof DeviceFirmwareUpdateSchema
 
 export const getDeviceFirmwareUpdateTool = (auth_token: string): Tool => ({
   name: "device_firmware_update",
+  argsSchema: DeviceFirmwareUpdateSchema,
   description: "Update a device firmware by ID. Supports updating changelog, draft status, and firmware file.",
   inputSchema: zodToJsonSchema(DeviceFirmwareUpdateSchema) as any,
   outputSchema: zodToJsonSchema(z.object({
@@ -25,7 +27,7 @@ export const getDeviceFirmwareUpdateTool = (auth_token: string): Tool => ({
   handler: async (rawArgs: unknown) => {
     let args: DeviceFirmwareUpdateArgs;
     try {
-      args = DeviceFirmwareUpdateSchema.parse(rawArgs);
+      args = parseToolArgs(DeviceFirmwareUpdateSchema, rawArgs);
     } catch (e) {
       throw new Error('Invalid arguments for device_firmware_update tool: ' + e);
     }
@@ -4,6 +4,7 @@ import { Tool } from "@modelcontextprotocol/sdk/types.js";
 import { zodToJsonSchema } from "zod-to-json-schema";
 import { THINGS5_BASE_URL } from "../../config.js";
 import { success, failure } from '../utils/toolResult.js';
+import { parseToolArgs } from '../../utils/toolValidation.js';
 
 export const DeviceFirmwareUpdateCancelSchema = z.object({
   device_id: z.string().describe("Device ID to cancel firmware update for")
@@ -13,6 +14,7 @@ export type DeviceFirmwareUpdateCancelArgs = z.infer<typeof DeviceFirmwareUpdate
 
 export const getDeviceFirmwareUpdateCancelTool = (auth_token: string): Tool => ({
   name: "device_firmware_update_cancel",
+  argsSchema: DeviceFirmwareUpdateCancelSchema,
   description: "Cancel a pending firmware update for a device. No message is sent to the device; the update is deleted only on Things5 side.",
   inputSchema: zodToJsonSchema(DeviceFirmwareUpdateCancelSchema) as any,
   outputSchema: zodToJsonSchema(z.object({
@@ -22,7 +24,7 @@ export const getDeviceFirmwareUpdateCancelTool = (auth_token: string): Tool => (
   handler: async (rawArgs: unknown) => {
     let args: DeviceFirmwareUpdateCancelArgs;
     try {
-      args = DeviceFirmwareUpdateCancelSchema.parse(rawArgs);
+      args = parseToolArgs(DeviceFirmwareUpdateCancelSchema, rawArgs);
     } catch (e) {
       throw new Error('Invalid arguments for device_firmware_update_cancel tool: ' + e);
     }
@@ -4,6 +4,7 @@ import { Tool } from "@modelcontextprotocol/sdk/types.js";
 import { zodToJsonSchema } from "zod-to-json-schema";
 import { THINGS5_BASE_URL } from "../../config.js";
 import { success, failure } from "../utils/toolResult.js";
+import { parseToolArgs } from '../../utils/toolValidation.js';
 
 export const DeviceFirmwareUpdateRequestSchema = z.object({
   device_id: z.string().describe("Device ID to update firmware on"),
@@ -14,6 +15,7 @@ export type DeviceFirmwareUpdateRequestArgs = z.infer<typeof DeviceFirmwareUpdat
 
 export const getDeviceFirmwareUpdateRequestTool = (auth_token: string): Tool => ({
   name: "device_firmware_update_request",
+  argsSchema: DeviceFirmwareUpdateRequestSchema,
   description: "Request a firmware update on a device.",
   inputSchema: zodToJsonSchema(DeviceFirmwareUpdateRequestSchema) as any,
   outputSchema: zodToJsonSchema(z.object({
@@ -23,7 +25,7 @@ export const getDeviceFirmwareUpdateRequestTool = (auth_token: string): Tool =>
   handler: async (rawArgs: unknown) => {
     let args: DeviceFirmwareUpdateRequestArgs;
     try {
-      args = DeviceFirmwareUpdateRequestSchema.parse(rawArgs);
+      args = parseToolArgs(DeviceFirmwareUpdateRequestSchema, rawArgs);
     } catch (e) {
       throw new Error('Invalid arguments for device_firmware_update_request tool: ' + e);
     }
@@ -4,6 +4,7 @@ import { Tool } from "@modelcontextprotocol/sdk/types.js";
 import { zodToJsonSchema } from "zod-to-json-schema";
 import { THINGS5_BASE_URL } from "../../config.js";
 import { success, failure } from '../utils/toolResult.js';
+import { parseToolArgs } from '../../utils/toolValidation.js';
 
 export const DeviceFirmwareUpdateStatusSchema = z.object({
   device_id: z.string().describe("Device ID to get firmware update status for")
@@ -13,6 +14,7 @@ export type DeviceFirmwareUpdateStatusArgs = z.infer<typeof DeviceFirmwareUpdate
 
 export const getDeviceFirmwareUpdateStatusTool = (auth_token: string): Tool => ({
   name: "device_firmware_update_status",
+  argsSchema: DeviceFirmwareUpdateStatusSchema,
   description: "Get the last firmware update status and progress for a device.",
   inputSchema: zodToJsonSchema(DeviceFirmwareUpdateStatusSchema) as any,
   outputSchema: zodToJsonSchema(z.object({
@@ -22,7 +24,7 @@ export const getDeviceFirmwareUpdateStatusTool = (auth_token: string): Tool => (
   handler: async (rawArgs: unknown) => {
     let args: DeviceFirmwareUpdateStatusArgs;
     try {
-      args = DeviceFirmwareUpdateStatusSchema.parse(rawArgs);
+      args = parseToolArgs(DeviceFirmwareUpdateStatusSchema, rawArgs);
     } catch (e) {
       throw new Error('Invalid arguments for device_firmware_update_status tool: ' + e);
     }
@@ -5,6 +5,7 @@ import { zodToJsonSchema } from "zod-to-json-schema";
 import { fetchFirstOrganizationId } from "../../tools/organizationUtils.js";
 import { THINGS5_BASE_URL } from "../../config.js";
 import { success, failure } from '../utils/toolResult.js';
+import { parseToolArgs } from '../../utils/toolValidation.js';
 
 export const DeviceModelCreateSchema = z.object({
   name: z.string().describe("Model name"),
@@ -15,6 +16,7 @@ export type DeviceModelCreateArgs = z.infer<typeof DeviceModelCreateSchema>;
 
 export const getDeviceModelCreateTool = (auth_token: string): Tool => ({
   name: "device_model_create",
+  argsSchema: DeviceModelCreateSchema,
   description: `Create a new device model for the current organization. Requires name and identifier. Image is optional.`,
 
   inputSchema: zodToJsonSchema(DeviceModelCreateSchema) as any,
@@ -24,7 +26,7 @@ export const getDeviceModelCreateTool = (auth_token: string): Tool => ({
   handler: async (rawArgs: unknown) => {
     let args: DeviceModelCreateArgs;
     try {
-      args = DeviceModelCreateSchema.parse(rawArgs);
+      args = parseToolArgs(DeviceModelCreateSchema, rawArgs);
     } catch (e) {
       throw new Error('Invalid arguments for device_model_create tool: ' + e);
 
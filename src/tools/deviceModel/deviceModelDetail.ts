@@ -4,6 +4,7 @@ import { Tool } from "@modelcontextprotocol/sdk/types.js";
 import { zodToJsonSchema } from "zod-to-json-schema";
 import { THINGS5_BASE_URL } from "../../config.js";
 import { success, failure } from "../utils/toolResult.js";
+import { parseToolArgs } from '../../utils/toolValidation.js';
 
 export const DeviceModelDetailSchema = z.object({
   machine_model_id: z.string().describe("Device model ID"),
@@ -14,6 +15,7 @@ export type DeviceModelDetailArgs = z.infer<typeof DeviceModelDetailSchema>;
 
 export const getDeviceModelDetailTool = (auth_token: string): Tool => ({
   name: "device_model_detail",
+  argsSchema: DeviceModelDetailSchema,
   description: "Returns the details of a device model. Optionally includes associated firmwares.",
   inputSchema: zodToJsonSchema(DeviceModelDetailSchema) as any,
   outputSchema: zodToJsonSchema(z.object({
@@ -22,7 +24,7 @@ export const getDeviceModelDetailTool = (auth_token: string): Tool => ({
   handler: async (rawArgs: unknown) => {
     let args: DeviceModelDetailArgs;
     try {
-      args = DeviceModelDetailSchema.parse(rawArgs);
+      args = parseToolArgs(DeviceModelDetailSchema, rawArgs);
     } catch (e) {
       throw new Error('Invalid arguments for device_model_detail tool: ' + e);
     }
@@ -4,6 +4,7 @@ import { Tool } from "@modelcontextprotocol/sdk/types.js";
 import { zodToJsonSchema } from "zod-to-json-schema";
 import { THINGS5_BASE_URL } from "../config.js";
 import { success, failure } from "./utils/toolResult.js";
+import { parseToolArgs } from '../utils/toolValidation.js';
 
 export const DeviceUpdateSchema = z.object({
   device_id: z.string().describe("Device ID (UUID) to update"),
@@ -15,6 +16,7 @@ export type DeviceUpdateArgs = z.infer<typeof DeviceUpdateSchema>;
 
 export const getDeviceUpdateTool = (auth_token: string): Tool => ({
   name: "device_update",
+  argsSchema: DeviceUpdateSchema,
   description: `Update a device on Things5. You must specify the device_id and at least one of: name, serial. Only provided fields will be updated.`,
   inputSchema: zodToJsonSchema(DeviceUpdateSchema) as any,
   outputSchema: zodToJsonSchema(z.object({
@@ -23,7 +25,7 @@ export const getDeviceUpdateTool = (auth_token: string): Tool => ({
   handler: async (rawArgs: unknown) => {
     let args: DeviceUpdateArgs;
     try {
-      args = DeviceUpdateSchema.parse(rawArgs);
+      args = parseToolArgs(DeviceUpdateSchema, rawArgs);
     } catch (e) {
       throw new Error('Invalid arguments for device_update tool: ' + e);
     }
@@ -5,6 +5,7 @@ import { zodToJsonSchema } from "zod-to-json-schema";
 import { fetchFirstOrganizationId } from "./organizationUtils.js";
 import { THINGS5_BASE_URL } from "../config.js";
 import { success, failure } from './utils/toolResult.js';
+import { parseToolArgs } from '../utils/toolValidation.js';
 
 export const DevicesGroupsListSchema = z.object({
   parent_group_id: z.string().optional().describe("Optional parent group ID to filter device groups by parent"),
@@ -14,6 +15,7 @@ export type DevicesGroupsListArgs = z.infer<typeof DevicesGroupsListSchema>;
 
 export const getDevicesGroupsListTool = (auth_token: string): Tool => ({
   name: "devices_groups_list",
+  argsSchema: DevicesGroupsListSchema,
   description: "List all device groups for the current organization, optionally filtered by parent_group_id.",
   inputSchema: zodToJsonSchema(DevicesGroupsListSchema) as any,
   outputSchema: zodToJsonSchema(z.object({
@@ -23,7 +25,7 @@ export const getDevicesGroupsListTool = (auth_token: string): Tool => ({
   handler: async (rawArgs: unknown) => {
     let args: DevicesGroupsListArgs;
     try {
-      args = DevicesGroupsListSchema.parse(rawArgs);
+      args = parseToolArgs(DevicesGroupsListSchema, rawArgs);
     } catch (e) {
       throw new Error("Invalid arguments for devices_groups_list tool: " + e);
     }
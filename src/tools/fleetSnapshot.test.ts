@@ -0,0 +1,82 @@
+import { describe, it, expect, vi, beforeEach } from 'vitest';
+import axios from 'axios';
+import { getFleetSnapshotTool, FLEET_SNAPSHOT_MAX_ALARM_PAGES } from './fleetSnapshot.js';
+
+vi.mock('axios');
+vi.mock('./organizationUtils.js', () => ({ fetchFirstOrganizationId: vi.fn().mockResolvedValue('org-1') }));
+vi.mock('../utils/machineContext.js', () => ({
+  getAvailableMachines: vi.fn().mockResolvedValue([
+    { id: 'd1', name: 'Fridge 1', serial: 'S1', is_connected: true },
+    { id: 'd2', name: 'Fridge 2', serial: 'S2', is_connected: true },
+    { id: 'd3', name: 'Fridge 3', serial: 'S3', is_connected: false },
+  ]),
+}));
+const mockedAxios = axios as any;
+
+describe('fleet_snapshot', () => {
+  beforeEach(() => {
+    vi.clearAllMocks();
+    mockedAxios.get = vi.fn().mockImplementation(async (url: string) => {
+      if (url.endsWith('/overview/alarms')) {
+        return { data: { data: [
+          { device_id: 'd1', device_name: 'Fridge 1', event_type: 'door_open', timestamp: '2024-01-01T10:00:00Z' },
+          { device_id: 'd1', device_name: 'Fridge 1', event_type: 'high_temp', timestamp: '2024-01-01T09:00:00Z' },
+        ] } };
+      }
+      if (url.includes('/devices/d2/')) {
+        throw Object.assign(new Error('timeout'), { response: { status: 504, data: { message: 'Gateway timeout' } } });
+      }
+      if (url.endsWith('/metrics')) {
+        return { data: { data: [{ name: 'temperature', value: url.includes('/d1/') ? 9.5 : 4 }] } };
+      }
+      return { data: { data: [{ name: 'mode', value: 'cooling' }] } };
+    });
+  });
+
+  it('aggregates connectivity, alarms and out-of-range metrics in one call', async () => {
+    const tool = getFleetSnapshotTool('token');
+    const result = await tool.handler({ metric_thresholds: [{ name: 'temperature', max: 8 }] });
+
+    expect(result.structuredContent.totals).toEqual({
+      devices: 3,
+      connected: 2,
+      offline: 1,
+      alarm_events: 2,
+      alarm_events_truncated: false,
+      devices_with_alarms: 1,
+      out_of_range: 1,
+      read_failures: 1,
+    });
+    expect(result.structuredContent.out_of_range[0]).toMatchObject({ device_id: 'd1', metric: 'temperature', value: 9.5 });
+    expect(result.structuredContent.alarms_by_device[0]).toMatchObject({ device: 'Fridge 1', count: 2 });
+    expect(result.content[0].text).toContain('Fridge 3');
+  });
+
+  it('pages through alarm events and flags truncation', async () => {
+    const alarmsPage = vi.fn(async (params: any) => ({ data: {
+      data: [{ device_id: 'd1', device_name: 'Fridge 1', event_type: 'door_open' }],
+      pagination: { after: `page-${(Number(params.after?.slice(5)) || 0) + 1}`, total_count: 7500 },
+    } }));
+    mockedAxios.get = vi.fn().mockImplementation(async (url: string, { params }: any) =>
+      url.endsWith('/overview/alarms') ? alarmsPage(params) : { data: { data: [] } }
+    );
+
+    const tool = getFleetSnapshotTool('token');
+    const result = await tool.handler({ include_states: false });
+
+    expect(alarmsPage).toHaveBeenCalledTimes(FLEET_SNAPSHOT_MAX_ALARM_PAGES);
+    expect(alarmsPage.mock.calls[1][0].after).toBe('page-1');
+    expect(result.structuredContent.totals).toMatchObject({ alarm_events: 7500, alarm_events_truncated: true });
+    expect(result.structuredContent.alarms_by_device[0].count).toBe(FLEET_SNAPSHOT_MAX_ALARM_PAGES);
+    expect(result.content[0].text).toContain('Alarm events (last 24h)**: 7500');
+  });
+
+  it('skips offline devices when only_connected is set', async () => {
+    const tool = getFleetSnapshotTool('token');
+    await tool.handler({ only_connected: true, include_states: false, metric_names: ['temperature'] });
+
+    const deviceCalls = mockedAxios.get.mock.calls.filter(([url]: [string]) => url.includes('/devices/'));
+    expect(deviceCalls.map(([url]: [string]) => url)).not.toContainEqual(expect.stringContaining('/d3/'));
+    expect(deviceCalls).toHaveLength(2);
+  });
+});
@@ -0,0 +1,288 @@
+import axios from "axios";
+import { z } from "zod";
+import { Tool } from "@modelcontextprotocol/sdk/types.js";
+import { zodToJsonSchema } from "zod-to-json-schema";
+import { THINGS5_BASE_URL } from '../config.js';
+import { success, failure } from './utils/toolResult.js';
+import { fixArraySchemas } from './utils/schemaUtils.js';
+import { fetchFirstOrganizationId } from './organizationUtils.js';
+import { getAvailableMachines, MachineInfo } from '../utils/machineContext.js';
+import { mapWithConcurrency } from '../utils/concurrency.js';
+import { parseToolArgs } from '../utils/toolValidation.js';
+
+/** Max per-device reads in flight for one snapshot */
+export const FLEET_SNAPSHOT_CONCURRENCY = Number(process.env.FLEET_SNAPSHOT_CONCURRENCY) || 8;
+/** Max pages of alarm events read for one snapshot */
+export const FLEET_SNAPSHOT_MAX_ALARM_PAGES = Number(process.env.FLEET_SNAPSHOT_MAX_ALARM_PAGES) || 5;
+const ALARM_PAGE_SIZE = 1000;
+
+export const FleetSnapshotSchema = z.object({
+  states_names: z.array(z.string()).optional().describe("State names to read the last value of on every device (optional, default: all states)"),
+  metric_names: z.array(z.string()).optional().describe("Metric names to read the last value of on every device (optional)"),
+  metric_thresholds: z.array(z.object({
+    name: z.string().describe("Metric name"),
+    min: z.number().optional().describe("Lowest acceptable value"),
+    max: z.number().optional().describe("Highest acceptable value"),
+  })).optional().describe("Key metrics with their acceptable range; values outside it are reported (optional)"),
+  include_states: z.boolean().optional().default(true).describe("Read last state values of every device (default true)"),
+  only_connected: z.boolean().optional().default(false).describe("Only read values from connected devices (default false)"),
+  alarms_hours: z.number().int().min(1).max(168).optional().default(24).describe("Look-back window for alarm events, in hours (default 24)"),
+  max_devices: z.number().int().min(1).max(1000).optional().default(200).describe("Max devices to read values from (default 200)"),
+});
+
+export type FleetSnapshotArgs = z.infer<typeof FleetSnapshotSchema>;
+
+interface DeviceSnapshot {
+  id: string;
+  name: string;
+  serial: string;
+  is_connected: boolean;
+  last_states?: any[];
+  last_metrics?: any[];
+  error?: string;
+}
+
+interface OutOfRange {
+  device_id: string;
+  device_name: string;
+  metric: string;
+  value: number;
+  min?: number;
+  max?: number;
+}
+
+interface AlarmEvents {
+  alarms: any[];
+  /** events in the window: upstream total_count when given, otherwise the events read */
+  total: number;
+  /** true when more events exist than were read (per-device counts cover the latest ones) */
+  truncated: boolean;
+  error: string | null;
+}
+
+/**
+ * Page through the organization's alarm events in [from, to], newest first
+ */
+async function fetchAlarmEvents(auth_token: string, headers: Record<string, string> | undefined, from: Date, to: Date): Promise<AlarmEvents> {
+  const alarms: any[] = [];
+  let totalCount: number | undefined;
+  let after: string | undefined;
+  let pages = 0;
+  try {
+    const organization_id = await fetchFirstOrganizationId(auth_token);
+    do {
+      const resp = await axios.get(`${THINGS5_BASE_URL}/organizations/${organization_id}/overview/alarms`, {
+        headers,
+        params: { from: from.toISOString(), to: to.toISOString(), limit: ALARM_PAGE_SIZE, sorting: 'desc', ...(after ? { after } : {}) }
+      });
+      pages++;
+      alarms.push(...(resp.data?.data ?? []));
+      const pagination = resp.data?.pagination;
+      if (typeof pagination?.total_count === 'number') totalCount = pagination.total_count;
+      after = pagination?.after || undefined;
+    } while (after && pages < FLEET_SNAPSHOT_MAX_ALARM_PAGES);
+  } catch (error: any) {
+    return { alarms: [], total: 0, truncated: false, error: error.response?.data?.message || error.message };
+  }
+  return { alarms, total: Math.max(totalCount ?? 0, alarms.length), truncated: Boolean(after), error: null };
+}
+
+function checkThresholds(device: DeviceSnapshot, thresholds: FleetSnapshotArgs['metric_thresholds']): OutOfRange[] {
+  const result: OutOfRange[] = [];
+  for (const threshold of thresholds ?? []) {
+    const metric = device.last_metrics?.find((m: any) => m.name === threshold.name);
+    const value = Number(metric?.value ?? metric?.last);
+    if (!metric || !Number.isFinite(value)) continue;
+    if ((threshold.min !== undefined && value < threshold.min) || (threshold.max !== undefined && value > threshold.max)) {
+      result.push({
+        device_id: device.id,
+        device_name: device.name,
+        metric: threshold.name,
+        value,
+        ...(threshold.min !== undefined ? { min: threshold.min } : {}),
+        ...(threshold.max !== undefined ? { max: threshold.max } : {}),
+      });
+    }
+  }
+  return result;
+}
+
+export const getFleetSnapshotTool = (auth_token: string): Tool => ({
+  name: "fleet_snapshot",
+  argsSchema: FleetSnapshotSchema,
+  description: `
+  Fleet health snapshot in a single call: connected/offline counts, recent alarm events per device and
+  key metrics outside their acceptable range. Last state and metric values of all devices are read
+  server-side in parallel, so there is no need to call state_read_last_value or metrics_read per device.
+  Use metric_thresholds to define which metric values count as out of range.
+  Returns a markdown summary and raw JSON.`,
+  inputSchema: fixArraySchemas(zodToJsonSchema(FleetSnapshotSchema)) as any,
+  outputSchema: zodToJsonSchema(z.object({
+    totals: z.object({
+      devices: z.number(),
+      connected: z.number(),
+      offline: z.number(),
+      alarm_events: z.number(),
+      alarm_events_truncated: z.boolean(),
+      devices_with_alarms: z.number(),
+      out_of_range: z.number(),
+      read_failures: z.number(),
+    }),
+    offline: z.array(z.any()),
+    alarms_by_device: z.array(z.any()),
+    out_of_range: z.array(z.any()),
+    devices: z.array(z.any()),
+  })) as any,
+  handler: async (rawArgs: unknown) => {
+    let args: FleetSnapshotArgs;
+    try {
+      args = parseToolArgs(FleetSnapshotSchema, rawArgs);
+    } catch (e) {
+      throw new Error('Invalid arguments for fleet_snapshot tool: ' + e);
+    }
+    const headers = auth_token ? { Authorization: `Bearer ${auth_token}` } : undefined;
+    const metricNames = Array.from(new Set([
+      ...(args.metric_names ?? []),
+      ...(args.metric_thresholds ?? []).map(t => t.name),
+    ]));
+
+    let machines: MachineInfo[];
+    try {
+      machines = await getAvailableMachines(auth_token);
+    } catch (error: any) {
+      return failure({ message: `❌ Error loading machines: ${error.message}` });
+    }
+    if (machines.length === 0) {
+      return failure({ message: '❌ No machines available for the fleet snapshot' });
+    }
+
+    const to = new Date();
+    const from = new Date(to.getTime() - args.alarms_hours * 60 * 60 * 1000);
+    // Started first so it runs alongside the per-device reads
+    const alarmsRequest = fetchAlarmEvents(auth_token, headers, from, to);
+
+    const targets = machines
+      .filter(m => !args.only_connected || m.is_connected)
+      .slice(0, args.max_devices);
+
+    const snapshots = await mapWithConcurrency(targets, FLEET_SNAPSHOT_CONCURRENCY, async (machine): Promise<DeviceSnapshot> => {
+      const snapshot: DeviceSnapshot = {
+        id: machine.id,
+        name: machine.name,
+        serial: machine.serial,
+        is_connected: machine.is_connected,
+      };
+      const deviceUrl = `${THINGS5_BASE_URL}/devices/${encodeURIComponent(machine.id)}`;
+      const [states, metrics] = await Promise.all([
+        args.include_states
+          ? axios.get(`${deviceUrl}/last_states`, {
+            headers,
+            params: args.states_names ? { states_names: args.states_names } : {}
+          })
+          : null,
+        metricNames.length > 0
+          ? axios.get(`${deviceUrl}/metrics`, {
+            headers,
+            params: { 'metric_names[]': metricNames, last_value: true }
+          })
+          : null,
+      ]);
+      if (states) snapshot.last_states = states.data?.data ?? [];
+      if (metrics) snapshot.last_metrics = metrics.data?.data ?? [];
+      return snapshot;
+    });
+
+    const devices: DeviceSnapshot[] = snapshots.map((result, i) => {
+      if (result.status === 'fulfilled') return result.value;
+      const error: any = result.reason;
+      const machine = targets[i];
+      return {
+        id: machine.id,
+        name: machine.name,
+        serial: machine.serial,
+        is_connected: machine.is_connected,
+        error: error?.response?.data?.message || error?.message || String(error),
+      };
+    });
+
+    const { alarms, total: alarmEvents, truncated: alarmsTruncated, error: alarmsError } = await alarmsRequest;
+
+    const alarmsByDevice = new Map<string, { device: string; count: number; latest: any }>();
+    for (const alarm of alarms) {
+      const key = alarm.device_id ?? alarm.device_name ?? 'unknown';
+      const entry = alarmsByDevice.get(key);
+      if (entry) {
+        entry.count++;
+      } else {
+        alarmsByDevice.set(key, { device: alarm.device_name ?? key, count: 1, latest: alarm });
+      }
+    }
+
+    const offline = machines.filter(m => !m.is_connected).map(m => ({ id: m.id, name: m.name, serial: m.serial }));
+    const outOfRange = devices.flatMap(device => checkThresholds(device, args.metric_thresholds));
+    const failedDevices = devices.filter(d => d.error);
+
+    const totals = {
+      devices: machines.length,
+      connected: machines.length - offline.length,
+      offline: offline.length,
+      alarm_events: alarmEvents,
+      alarm_events_truncated: alarmsTruncated,
+      devices_with_alarms: alarmsByDevice.size,
+      out_of_range: outOfRange.length,
+      read_failures: failedDevices.length,
+    };
+
+    const summaryLines: string[] = [];
+    summaryLines.push('# Fleet Snapshot');
+    summaryLines.push(`- **Devices**: ${totals.devices} (🟢 ${totals.connected} connected, 🔴 ${totals.offline} offline)`);
+    summaryLines.push(`- **Alarm events (last ${args.alarms_hours}h)**: ${alarmsError
+      ? `unavailable (${alarmsError})`
+      : `${totals.alarm_events}${alarmsTruncated && totals.alarm_events === alarms.length ? '+' : ''} on ${totals.devices_with_alarms}${alarmsTruncated ? '+' : ''} devices`}`);
+    if (alarmsTruncated) {
+      summaryLines.push(`- ⚠️ Per-device alarm counts cover the latest ${alarms.length} events only`);
+    }
+    if (args.metric_thresholds?.length) {
+      summaryLines.push(`- **Out-of-range metrics**: ${totals.out_of_range}`);
+    }
+    if (targets.length < machines.length) {
+      summaryLines.push(`- Values read from ${targets.length} of ${machines.length} devices`);
+    }
+
+    if (offline.length > 0) {
+      summaryLines.push('\n## Offline');
+      summaryLines.push(...offline.slice(0, 20).map(m => `- ${m.name} (${m.serial})`));
+      if (offline.length > 20) summaryLines.push(`- ... and ${offline.length - 20} more`);
+    }
+    if (alarmsByDevice.size > 0) {
+      summaryLines.push('\n## Alarms');
+      const sorted = Array.from(alarmsByDevice.values()).sort((a, b) => b.count - a.count);
+      summaryLines.push(...sorted.slice(0, 20).map(a =>
+        `- ${a.device}: ${a.count} alarm${a.count === 1 ? '' : 's'}, latest **${a.latest.event_type ?? a.latest.id}**${a.latest.timestamp ? ` at ${a.latest.timestamp}` : ''}`
+      ));
+      if (sorted.length > 20) summaryLines.push(`- ... and ${sorted.length - 20} more devices`);
+    }
+    if (outOfRange.length > 0) {
+      summaryLines.push('\n## Out of Range');
+      summaryLines.push(...outOfRange.slice(0, 50).map(o =>
+        `- ${o.device_name}: **${o.metric}** = ${o.value} (range ${o.min ?? '-∞'} … ${o.max ?? '+∞'})`
+      ));
+      if (outOfRange.length > 50) summaryLines.push(`- ... and ${outOfRange.length - 50} more`);
+    }
+    if (failedDevices.length > 0) {
+      summaryLines.push(`\n⚠️ Could not read values from ${failedDevices.length} devices: ` +
+        failedDevices.slice(0, 10).map(d => `${d.name} (${d.error})`).join(', '));
+    }
+
+    return success({
+      text: summaryLines.join('\n'),
+      structured: {
+        totals,
+        offline,
+        alarms_by_device: Array.from(alarmsByDevice.values()).map(a => ({ device: a.device, count: a.count, latest: a.latest })),
+        out_of_range: outOfRange,
+        devices,
+      }
+    });
+  }
+});
@@ -1,5 +1,6 @@
 export { getListMachinesTool } from "./listMachines.js";
 export { getReadParametersTool } from "./data/readParameters.js";
+export { getReadParametersBulkTool } from "./data/readParametersBulk.js";
 export { getReadSingleParameterTool } from "./data/readSingleParameter.js";
 export { getOrganizationDetailTool } from "./organizationDetail.js";
 export { getPerformActionTool } from "./performAction.js";
@@ -36,6 +37,8 @@ export { getDeviceManagedRecipesTool } from './device-recipes/deviceManagedRecip
 // Data tools exports
 export { getStatesReadTool } from './data/statesRead.js';
 export { getStateReadLastValueTool } from './data/stateReadLastValue.js';
+export { getStateReadLastValueBulkTool } from './data/stateReadLastValueBulk.js';
 export { getMetricsReadTool } from './data/metricsRead.js';
 export { getAggregatedMetricsTool } from './data/aggregatedMetrics.js';
 export { getEventsReadTool } from './data/eventsRead.js';
+export { getFleetSnapshotTool } from './fleetSnapshot.js';
@@ -5,6 +5,8 @@ import { zodToJsonSchema } from "zod-to-json-schema";
 import { THINGS5_BASE_URL } from '../config.js';
 import { fetchFirstOrganizationId } from './organizationUtils.js';
 import { success, failure } from './utils/toolResult.js';
+import { TextResultBuilder } from './utils/resultBuilder.js';
+import { parseToolArgs } from '../utils/toolValidation.js';
 
 // ---------------- Schema ----------------
 export const ListMachinesSchema = z.object({
@@ -140,6 +142,7 @@ export const getListMachinesTool = (auth_token: string): Tool => {
   }
   return {
     name: "list_machines",
+    argsSchema: ListMachinesSchema,
     description: "List IoT devices with extensive filtering. This is a paginated resource (default page size: 50). If the machine you are looking for is not in the current page, I can fetch more results using the `after` cursor, or you can provide a `search` filter to narrow results.",
     inputSchema: schem as any,
     // Output schema describes the shape of structuredContent
@@ -159,7 +162,7 @@ export const getListMachinesTool = (auth_token: string): Tool => {
       })),
     })) as any,
     handler: async (rawArgs: unknown) => {
-      const validatedArgs = ListMachinesSchema.parse(rawArgs);
+      const validatedArgs = parseToolArgs(ListMachinesSchema, rawArgs);
       try {
         const organization_id = await fetchFirstOrganizationId(auth_token);
         const params = cleanQueryParams(validatedArgs);
@@ -185,31 +188,29 @@ export const getListMachinesTool = (auth_token: string): Tool => {
         const connected = machines.filter((m) => m.is_connected).length;
         const totalCount = apiResponse.data.pagination.total_count
 
-        const summaryLines: string[] = [];
-        summaryLines.push("📊 **Things5 IoT Devices**\n");
-        summaryLines.push(`➡️ Paginated results. Showing up to ${validatedArgs.limit ?? 50} items. Use the after cursor for more, or provide a search filter to narrow results.`);
-        if (validatedArgs.search) summaryLines.push(`🔍 Search: \"${validatedArgs.search}\"`);
-        if (validatedArgs.serial) summaryLines.push(`📟 Serial: \"${validatedArgs.serial}\"`);
-        if (validatedArgs.is_connected !== undefined) summaryLines.push(`🔗 Connection: ${validatedArgs.is_connected ? 'Connected only' : 'Disconnected only'}`);
-        if (validatedArgs.no_group_assigned) summaryLines.push(`📂 No group assigned`);
-        if (validatedArgs.machine_groups_ids?.length) summaryLines.push(`👥 Groups: ${validatedArgs.machine_groups_ids.length} selected`);
+        const summary = new TextResultBuilder();
+        summary.line("📊 **Things5 IoT Devices**\n");
+        summary.line(`➡️ Paginated results. Showing up to ${validatedArgs.limit ?? 50} items. Use the after cursor for more, or provide a search filter to narrow results.`);
+        if (validatedArgs.search) summary.line(`🔍 Search: \"${validatedArgs.search}\"`);
+        if (validatedArgs.serial) summary.line(`📟 Serial: \"${validatedArgs.serial}\"`);
+        if (validatedArgs.is_connected !== undefined) summary.line(`🔗 Connection: ${validatedArgs.is_connected ? 'Connected only' : 'Disconnected only'}`);
+        if (validatedArgs.no_group_assigned) summary.line(`📂 No group assigned`);
+        if (validatedArgs.machine_groups_ids?.length) summary.line(`👥 Groups: ${validatedArgs.machine_groups_ids.length} selected`);
 
         if (pageTotal === 0) {
-          summaryLines.push("No devices found with the specified filters.");
+          summary.line("No devices found with the specified filters.");
         } else {
-          // summaryLines.push(`\n🟢 Active (this page): ${active}/${totalCount}`);
-          // summaryLines.push(`🔗 Connected (this page): ${connected}/${totalCount}`);
-          // summaryLines.push(`📡 Offline (this page): ${totalCount - connected}/${totalCount}`);
-          // summaryLines.push(`📦 Total available across all pages: ${totalCount}\n`);
+          // summary.line(`\n🟢 Active (this page): ${active}/${totalCount}`);
+          // summary.line(`🔗 Connected (this page): ${connected}/${totalCount}`);
+          // summary.line(`📡 Offline (this page): ${totalCount - connected}/${totalCount}`);
+          // summary.line(`📦 Total available across all pages: ${totalCount}\n`);
 
-          const headers: string[] = [
+          summary.table([
             "ID", "Name", "Serial", "Status", "Connected",
             ...(validatedArgs.include_machines_group ? ["Group"] : []),
             ...(validatedArgs.include_machine_model ? ["Model"] : []),
             "Last Seen",
-          ];
-          summaryLines.push(`| ${headers.join(" | ")} |`);
-          summaryLines.push(`| ${headers.map(() => "------").join(" | ")} |`);
+          ]);
 
           machines.forEach((machine) => {
             const row: string[] = [];
@@ -222,11 +223,12 @@ export const getListMachinesTool = (auth_token: string): Tool => {
             if (validatedArgs.include_machine_model) row.push(machine.machine_model?.name || "N/A");
             const lastSeen = machine.last_seen ? new Date(machine.last_seen).toLocaleString("en-US", { day: "2-digit", month: "2-digit", year: "numeric", hour: "2-digit", minute: "2-digit" }) : "Never";
             row.push(lastSeen);
-            summaryLines.push(`| ${row.join(" | ")} |`);
+            summary.row(row);
           });
+          summary.endTable();
         }
 
-        if (hasMore) summaryLines.push(`\n📄 **Pagination available**: Use \`after: \"${hasMore}\"\` to see more results.`);
+        if (hasMore) summary.line(`\n📄 **Pagination available**: Use \`after: \"${hasMore}\"\` to see more results.`);
 
         // Build structured payload alongside human-readable text content
         const structured = {
@@ -250,7 +252,7 @@ export const getListMachinesTool = (auth_token: string): Tool => {
           })),
         };
 
-        return success({ text: summaryLines.join("\n"), structured });
+        return success({ text: summary.toString(), structured });
       } catch (error: any) {
         console.error("API Error:", error);
         const message = `❌ Error retrieving devices: ${error.response?.data?.message || error.message}`;
@@ -5,6 +5,7 @@ import { zodToJsonSchema } from "zod-to-json-schema";
 import { THINGS5_BASE_URL } from "../../config.js";
 import { success, failure } from '../utils/toolResult.js';
 import { fixArraySchemas } from '../utils/schemaUtils.js';
+import { parseToolArgs } from '../../utils/toolValidation.js';
 
 export const MachineCommandCreateSchema = z.object({
   machine_firmware_id: z.string().describe("Machine firmware ID to create command for"),
@@ -21,6 +22,7 @@ export type MachineCommandCreateArgs = z.infer<typeof MachineCommandCreateSchema
 
 export const getMachineCommandCreateTool = (auth_token: string): Tool => ({
   name: "machine_command_create",
+  argsSchema: MachineCommandCreateSchema,
   description: "Create a new machine command for a given machine firmware.",
   inputSchema: fixArraySchemas(zodToJsonSchema(MachineCommandCreateSchema)) as any,
   outputSchema: zodToJsonSchema(z.object({
@@ -29,7 +31,7 @@ export const getMachineCommandCreateTool = (auth_token: string): Tool => ({
   handler: async (rawArgs: unknown) => {
     let args: MachineCommandCreateArgs;
     try {
-      args = MachineCommandCreateSchema.parse(rawArgs);
+      args = parseToolArgs(MachineCommandCreateSchema, rawArgs);
     } catch (e) {
       throw new Error('Invalid arguments for machine_command_create tool: ' + e);
     }
@@ -4,6 +4,7 @@ import { Tool } from "@modelcontextprotocol/sdk/types.js";
 import { zodToJsonSchema } from "zod-to-json-schema";
 import { THINGS5_BASE_URL } from "../../config.js";
 import { success, failure } from '../utils/toolResult.js';
+import { parseToolArgs } from '../../utils/toolValidation.js';
 
 export const MachineCommandDeleteSchema = z.object({
   machine_command_id: z.string().describe("Machine command ID to delete")
@@ -13,6 +14,7 @@ export type MachineCommandDeleteArgs = z.infer<typeof MachineCommandDeleteSchema
 
 export const getMachineCommandDeleteTool = (auth_token: string): Tool => ({
   name: "machine_command_delete",
+  argsSchema: MachineCommandDeleteSchema,
   description: "Delete an existing machine command by its ID.",
   inputSchema: zodToJsonSchema(MachineCommandDeleteSchema) as any,
   outputSchema: zodToJsonSchema(z.object({
@@ -22,7 +24,7 @@ export const getMachineCommandDeleteTool = (auth_token: string): Tool => ({
   handler: async (rawArgs: unknown) => {
     let args: MachineCommandDeleteArgs;
     try {
-      args = MachineCommandDeleteSchema.parse(rawArgs);
+      args = parseToolArgs(MachineCommandDeleteSchema, rawArgs);
     } catch (e) {
       throw new Error('Invalid arguments for machine_command_delete tool: ' + e);
     }
@@ -4,6 +4,7 @@ import { Tool } from "@modelcontextprotocol/sdk/types.js";
 import { zodToJsonSchema } from "zod-to-json-schema";
 import { THINGS5_BASE_URL } from "../../config.js";
 import { success, failure } from '../utils/toolResult.js';
+import { parseToolArgs } from '../../utils/toolValidation.js';
 
 export const MachineCommandExecuteSchema = z.object({
   device_id: z.string().optional().describe("Device ID (UUID) to execute command on. If not provided, use device_name or serial"),
@@ -24,6 +25,7 @@ export type MachineCommandExecuteArgs = z.infer<typeof MachineCommandExecuteSche
 
 export const getMachineCommandExecuteTool = (auth_token: string): Tool => ({
   name: "machine_command_execute",
+  argsSchema: MachineCommandExecuteSchema,
   description: "Execute a machine command on a device with optional parameter overrides.",
   inputSchema: zodToJsonSchema(MachineCommandExecuteSchema) as any,
   outputSchema: zodToJsonSchema(z.object({
@@ -32,7 +34,7 @@ export const getMachineCommandExecuteTool = (auth_token: string): Tool => ({
   handler: async (rawArgs: unknown) => {
     let args: MachineCommandExecuteArgs;
     try {
-      args = MachineCommandExecuteSchema.parse(rawArgs);
+      args = parseToolArgs(MachineCommandExecuteSchema, rawArgs);
     } catch (e) {
       throw new Error('Invalid arguments for machine_command_execute tool: ' + e);
     }
@@ -5,6 +5,7 @@ import { zodToJsonSchema } from "zod-to-json-schema";
 import { THINGS5_BASE_URL } from "../../config.js";
 import { success, failure } from '../utils/toolResult.js';
 import { fixArraySchemas } from '../utils/schemaUtils.js';
+import { parseToolArgs } from '../../utils/toolValidation.js';
 
 export const MachineCommandUpdateSchema = z.object({
   machine_command_id: z.string().describe("Machine command ID to update"),
@@ -21,6 +22,7 @@ export type MachineCommandUpdateArgs = z.infer<typeof MachineCommandUpdateSchema
 
 export const getMachineCommandUpdateTool = (auth_token: string): Tool => ({
   name: "machine_command_update",
+  argsSchema: MachineCommandUpdateSchema,
   description: "Update an existing machine command with new name and/or parameters.",
   inputSchema: fixArraySchemas(zodToJsonSchema(MachineCommandUpdateSchema)) as any,
   outputSchema: zodToJsonSchema(z.object({
@@ -29,7 +31,7 @@ export const getMachineCommandUpdateTool = (auth_token: string): Tool => ({
   handler: async (rawArgs: unknown) => {
     let args: MachineCommandUpdateArgs;
     try {
-      args = MachineCommandUpdateSchema.parse(rawArgs);
+      args = parseToolArgs(MachineCommandUpdateSchema, rawArgs);
     } catch (e) {
       throw new Error('Invalid arguments for machine_command_update tool: ' + e);
     }
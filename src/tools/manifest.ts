@@ -0,0 +1,149 @@
+/**
+ * Tool Manifest
+ *
+ * Tools are registered from a lightweight manifest (name, description and
+ * precomputed JSON input schema) instead of importing every tool module at
+ * startup. A tool's module - with zod, zod-to-json-schema and its schema
+ * construction - is only imported the first time the tool is called.
+ *
+ * The manifest is generated at build time into dist/tool-manifest.json by
+ * scripts/generateToolManifest.ts. When it is missing or was built for
+ * another version (e.g. running from sources with tsx), it is computed
+ * in-process once by importing all tool modules.
+ */
+
+import { readFileSync } from "node:fs";
+import { fileURLToPath } from "node:url";
+import type { Tool } from "@modelcontextprotocol/sdk/types.js";
+import type { ZodTypeAny } from "zod";
+
+export type ToolFactory = (auth_token: string) => Tool & {
+  /** Zod schema of the arguments, compiled into the tool's validator */
+  argsSchema?: ZodTypeAny;
+  handler: (args: any, extra?: any) => Promise<any>;
+};
+
+export interface ToolModule {
+  /** Name of the factory exported by the module (also re-exported by tools/index.ts) */
+  factory: string;
+  load: () => Promise<any>;
+}
+
+export interface ToolManifestEntry {
+  name: string;
+  factory: string;
+  description: string;
+  inputSchema: Tool['inputSchema'];
+}
+
+export interface ToolManifest {
+  version: string;
+  generated_at: string;
+  tools: ToolManifestEntry[];
+}
+
+/** Every tool module; keep in sync with tools/index.ts (checked by the manifest generator) */
+export const TOOL_MODULES: ToolModule[] = [
+  { factory: 'getListMachinesTool', load: () => import('./listMachines.js') },
+  { factory: 'getReadParametersTool', load: () => import('./data/readParameters.js') },
+  { factory: 'getReadParametersBulkTool', load: () => import('./data/readParametersBulk.js') },
+  { factory: 'getReadSingleParameterTool', load: () => import('./data/readSingleParameter.js') },
+  { factory: 'getOrganizationDetailTool', load: () => import('./organizationDetail.js') },
+  { factory: 'getPerformActionTool', load: () => import('./performAction.js') },
+  { factory: 'getDeviceDetailsTool', load: () => import('./deviceDetails.js') },
+  { factory: 'getDeviceCreateTool', load: () => import('./deviceCreate.js') },
+  { factory: 'getDeviceUpdateTool', load: () => import('./deviceUpdate.js') },
+  { factory: 'getDeviceModelsListTool', load: () => import('./deviceModel/deviceModelsList.js') },
+  { factory: 'getDeviceModelDetailTool', load: () => import('./deviceModel/deviceModelDetail.js') },
+  { factory: 'getDeviceModelCreateTool', load: () => import('./deviceModel/deviceModelCreate.js') },
+  { factory: 'getDeviceFirmwareListTool', load: () => import('./deviceFirmware/deviceFirmwareList.js') },
+  { factory: 'getDeviceFirmwareDetailTool', load: () => import('./deviceFirmware/deviceFirmwareDetail.js') },
+  { factory: 'getDeviceFirmwareCreateTool', load: () => import('./deviceFirmware/deviceFirmwareCreate.js') },
+  { factory: 'getDeviceFirmwareUpdateTool', load: () => import('./deviceFirmware/deviceFirmwareUpdate.js') },
+  { factory: 'getDeviceFirmwareDeleteTool', load: () => import('./deviceFirmware/deviceFirmwareDelete.js') },
+  { factory: 'getDeviceFirmwareUpdateRequestTool', load: () => import('./deviceFirmware/deviceFirmwareUpdateRequest.js') },
+  { factory: 'getDeviceFirmwareUpdateStatusTool', load: () => import('./deviceFirmware/deviceFirmwareUpdateStatus.js') },
+  { factory: 'getDeviceFirmwareUpdateCancelTool', load: () => import('./deviceFirmware/deviceFirmwareUpdateCancel.js') },
+  { factory: 'getMachineCommandCreateTool', load: () => import('./machineCommands/machineCommandCreate.js') },
+  { factory: 'getMachineCommandUpdateTool', load: () => import('./machineCommands/machineCommandUpdate.js') },
+  { factory: 'getMachineCommandDeleteTool', load: () => import('./machineCommands/machineCommandDelete.js') },
+  { factory: 'getMachineCommandExecuteTool', load: () => import('./machineCommands/machineCommandExecute.js') },
+  { factory: 'getDevicesGroupsListTool', load: () => import('./devicesGroupsList.js') },
+  { factory: 'getShowDeviceGroupTool', load: () => import('./showDeviceGroup.js') },
+  { factory: 'getRolesListTool', load: () => import('./rolesList.js') },
+  { factory: 'getCreateDeviceGroupUserTool', load: () => import('./createDeviceGroupUser.js') },
+  { factory: 'getOverviewAlarmsTool', load: () => import('./overview/overviewAlarms.js') },
+  { factory: 'getOverviewEventsTool', load: () => import('./overview/overviewEvents.js') },
+  { factory: 'getUsersListTool', load: () => import('./user/usersList.js') },
+  { factory: 'getUsersDetailTool', load: () => import('./user/usersDetail.js') },
+  { factory: 'getUserCreateTool', load: () => import('./user/userCreate.js') },
+  { factory: 'getDeviceManagedRecipesTool', load: () => import('./device-recipes/deviceManagedRecipes.js') },
+  { factory: 'getStatesReadTool', load: () => import('./data/statesRead.js') },
+  { factory: 'getStateReadLastValueTool', load: () => import('./data/stateReadLastValue.js') },
+  { factory: 'getStateReadLastValueBulkTool', load: () => import('./data/stateReadLastValueBulk.js') },
+  { factory: 'getMetricsReadTool', load: () => import('./data/metricsRead.js') },
+  { factory: 'getAggregatedMetricsTool', load: () => import('./data/aggregatedMetrics.js') },
+  { factory: 'getEventsReadTool', load: () => import('./data/eventsRead.js') },
+  { factory: 'getFleetSnapshotTool', load: () => import('./fleetSnapshot.js') },
+];
+
+export const TOOL_MANIFEST_PATH = fileURLToPath(new URL('../tool-manifest.json', import.meta.url));
+
+const factoryLoads = new Map<string, Promise<ToolFactory>>();
+
+/**
+ * Import a tool module (once per process) and return its factory
+ */
+export function loadToolFactory(factory: string): Promise<ToolFactory> {
+  let loading = factoryLoads.get(factory);
+  if (!loading) {
+    const toolModule = TOOL_MODULES.find(m => m.factory === factory);
+    if (!toolModule) {
+      return Promise.reject(new Error(`Unknown tool factory: ${factory}`));
+    }
+    loading = toolModule.load().then(mod => {
+      if (typeof mod[factory] !== 'function') {
+        throw new Error(`Tool module does not export ${factory}`);
+      }
+      return mod[factory] as ToolFactory;
+    });
+    // A failed import is retried on the next call
+    loading.catch(() => factoryLoads.delete(factory));
+    factoryLoads.set(factory, loading);
+  }
+  return loading;
+}
+
+/**
+ * Build the manifest by importing every tool module
+ */
+export async function buildToolManifest(version: string): Promise<ToolManifest> {
+  const tools = await Promise.all(TOOL_MODULES.map(async ({ factory }) => {
+    const tool = (await loadToolFactory(factory))('');
+    return {
+      name: tool.name,
+      factory,
+      description: tool.description || '',
+      inputSchema: tool.inputSchema,
+    };
+  }));
+  return { version, generated_at: new Date().toISOString(), tools };
+}
+
+/**
+ * Load the prebuilt manifest, falling back to building it in-process
+ */
+export async function loadToolManifest(version: string): Promise<ToolManifest> {
+  try {
+    const manifest = JSON.parse(readFileSync(TOOL_MANIFEST_PATH, 'utf8')) as ToolManifest;
+    if (manifest.version === version && Array.isArray(manifest.tools)) {
+      return manifest;
+    }
+    console.error(`[ToolManifest] ⚠️  Manifest was built for version ${manifest.version}, rebuilding in-process`);
+  } catch (error: any) {
+    if (error.code !== 'ENOENT') {
+      console.error('[ToolManifest] ⚠️  Failed to read tool manifest, rebuilding in-process:', error.message);
+    }
+  }
+  return buildToolManifest(version);
+}
@@ -10,9 +10,11 @@ export const OrganizationDetailSchema = z.object({});
 export type OrganizationDetailArgs = z.infer<typeof OrganizationDetailSchema>;
 
 import { fetchFirstOrganizationId } from './organizationUtils.js';
+import { parseToolArgs } from '../utils/toolValidation.js';
 
 export const getOrganizationDetailTool = (auth_token: string): Tool => ({
   name: "organization_detail",
+  argsSchema: OrganizationDetailSchema,
   description: `Get the details of an organization, including custom attributes and permissions. Uses the organization-detail endpoint from the API.`,
   inputSchema: zodToJsonSchema(OrganizationDetailSchema) as any,
   outputSchema: zodToJsonSchema(z.object({
@@ -21,7 +23,7 @@ export const getOrganizationDetailTool = (auth_token: string): Tool => ({
   handler: async (rawArgs: unknown) => {
     let args: OrganizationDetailArgs;
     try {
-      args = OrganizationDetailSchema.parse(rawArgs);
+      args = parseToolArgs(OrganizationDetailSchema, rawArgs);
     } catch (e) {
       throw new Error('Invalid arguments for organization_detail tool: ' + e);
     }
@@ -1,15 +1,40 @@
 import axios from "axios";
 import { THINGS5_BASE_URL } from '../config.js';
+import { cachedMetadata, metadataIdentity } from '../utils/metadataCache.js';
 
 export async function fetchFirstOrganizationId(auth_token: string): Promise<string> {
-  const url = `${THINGS5_BASE_URL}/organizations`;
-  const resp = await axios.get(url, {
-    headers: auth_token ? { Authorization: `Bearer ${auth_token}` } : undefined
+  const load = async () => {
+    const url = `${THINGS5_BASE_URL}/organizations`;
+    const resp = await axios.get(url, {
+      headers: auth_token ? { Authorization: `Bearer ${auth_token}` } : undefined
+    });
+    // API returns { data: [{ id: ... }] }
+    const orgs = resp.data?.data || [];
+    if (!Array.isArray(orgs) || orgs.length === 0 || !orgs[0].id) {
+      throw new Error("No organizations found for the user");
+    }
+    return orgs[0].id as string;
+  };
+  return auth_token ? cachedMetadata('organization', metadataIdentity(auth_token), load) : load();
+}
+
+/**
+ * Firmware of a machine with its commands or variables (cached per user and machine)
+ */
+export async function fetchMachineFirmware(
+  auth_token: string,
+  deviceId: string,
+  include: 'machine_commands' | 'machine_variables'
+): Promise<any> {
+  return cachedMetadata('firmware', `${metadataIdentity(auth_token)}|${deviceId}|${include}`, async () => {
+    const organizationId = await fetchFirstOrganizationId(auth_token);
+    const response = await axios.get(
+      `${THINGS5_BASE_URL}/organizations/${organizationId}/machines/${deviceId}/machine_firmware`,
+      {
+        headers: { Authorization: `Bearer ${auth_token}` },
+        params: { [`include_${include}`]: true }
+      }
+    );
+    return response.data?.data ?? null;
   });
-  // API returns { data: [{ id: ... }] }
-  const orgs = resp.data?.data || [];
-  if (!Array.isArray(orgs) || orgs.length === 0 || !orgs[0].id) {
-    throw new Error("No organizations found for the user");
-  }
-  return orgs[0].id;
 }
@@ -0,0 +1,56 @@
+import { describe, it, expect, vi, beforeEach } from 'vitest';
+import axios from 'axios';
+import { getOverviewAlarmsTool } from './overviewAlarms.js';
+import { getAvailableMachines } from '../../utils/machineContext.js';
+
+vi.mock('axios');
+vi.mock('../organizationUtils.js', () => ({ fetchFirstOrganizationId: vi.fn().mockResolvedValue('org-1') }));
+vi.mock('../../utils/machineContext.js', async (importOriginal) => ({
+  ...await importOriginal<typeof import('../../utils/machineContext.js')>(),
+  getAvailableMachines: vi.fn(),
+}));
+const mockedAxios = axios as any;
+const mockedMachines = getAvailableMachines as any;
+
+const alarm = (id: string, device_id: string) => ({ id, device_id, timestamp: '2024-01-01T10:00:00Z' });
+const pages: Record<string, any> = {
+  start: { data: [alarm('a1', 'd9'), alarm('a2', 'd9')], pagination: { after: 'p2' } },
+  p2: { data: [alarm('a3', 'd1'), alarm('a4', 'd9')], pagination: { after: 'p3' } },
+  p3: { data: [alarm('a5', 'd1')], pagination: { after: null } },
+};
+const args = { from: '2024-01-01T00:00:00Z', to: '2024-01-02T00:00:00Z', limit: '2', machine_groups_ids: ['g1'] };
+
+describe('overview_alarms with machine_groups_ids', () => {
+  beforeEach(() => {
+    vi.clearAllMocks();
+    mockedAxios.get = vi.fn().mockImplementation(async (_url: string, { params }: any) => ({ data: pages[params.after ?? 'start'] }));
+    mockedMachines.mockResolvedValue([
+      { id: 'd1', name: 'A', serial: '1', is_connected: true, machines_group_id: 'g1' },
+      { id: 'd9', name: 'B', serial: '9', is_connected: true, machines_group_id: 'g2' },
+    ]);
+  });
+
+  it('keeps paging until limit alarms of the groups are collected', async () => {
+    const result = await getOverviewAlarmsTool('token').handler(args);
+
+    expect(mockedAxios.get).toHaveBeenCalledTimes(3);
+    expect(result.structuredContent.alarms.map((a: any) => a.id)).toEqual(['a3', 'a5']);
+    expect(result.structuredContent.after).toBeNull();
+  });
+
+  it('returns the upstream cursor when it stops early', async () => {
+    const result = await getOverviewAlarmsTool('token').handler({ ...args, limit: '1' });
+
+    expect(mockedAxios.get).toHaveBeenCalledTimes(2);
+    expect(result.structuredContent.after).toBe('p3');
+    expect(result.content[0].text).toContain('after="p3"');
+  });
+
+  it('fails when the group scope cannot be resolved', async () => {
+    mockedMachines.mockResolvedValue([]);
+    const result = await getOverviewAlarmsTool('token').handler(args);
+
+    expect(result.isError).toBe(true);
+    expect(result.content[0].text).toContain('machine_groups_ids');
+  });
+});
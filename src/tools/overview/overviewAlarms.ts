@@ -6,6 +6,12 @@ import { fetchFirstOrganizationId } from "../organizationUtils.js";
 import { THINGS5_BASE_URL } from "../../config.js";
 import { success, failure } from "../utils/toolResult.js";
 import { fixArraySchemas } from '../utils/schemaUtils.js';
+import { watermarkKey, getWatermark, setWatermark, filterSinceWatermark, advanceWatermark } from '../../utils/watermarks.js';
+import { parseToolArgs } from '../../utils/toolValidation.js';
+import { resolveGroupMachineIds } from '../utils/groupMachines.js';
+
+/** Pages read at most while collecting the alarms of machine_groups_ids */
+const MAX_GROUP_PAGES = 10;
 
 export const OverviewAlarmsSchema = z.object({
   from: z.string().describe('Start date in ISO 8601 format (e.g. 2023-10-02T10:17:51.993Z)'),
@@ -13,21 +19,26 @@ export const OverviewAlarmsSchema = z.object({
   limit: z.string().optional().default('100').describe('Limit the results in the response'),
   after: z.string().optional().describe('Pagination cursor'),
   sorting: z.enum(['asc', 'desc']).optional().default('asc').describe('Sort order'),
+  machine_groups_ids: z.array(z.string()).optional().describe('Only return alarms of machines in these groups (optional; pages are read until limit matching alarms are collected)'),
+  since_last_check: z.boolean().optional().describe('Only return alarms that are new since the previous call with the same filters in this session (for repeated monitoring)'),
 });
 
 export type OverviewAlarmsArgs = z.infer<typeof OverviewAlarmsSchema>;
 
 export const getOverviewAlarmsTool = (auth_token: string): Tool => ({
   name: "overview_alarms",
+  argsSchema: OverviewAlarmsSchema,
   description: "Give an overview of the latest machine variables of source events, usually alarms, with severity 'alarm' for user visible devices.",
   inputSchema: fixArraySchemas(zodToJsonSchema(OverviewAlarmsSchema)) as any,
   outputSchema: zodToJsonSchema(z.object({
     alarms: z.array(z.any()),
+    after: z.string().nullable().optional(),
+    since_last_check: z.object({ previous: z.string().nullable(), watermark: z.string().nullable() }).optional(),
   })) as any,
   handler: async (rawArgs: unknown) => {
     let args: OverviewAlarmsArgs;
     try {
-      args = OverviewAlarmsSchema.parse(rawArgs);
+      args = parseToolArgs(OverviewAlarmsSchema, rawArgs);
     } catch (e) {
       throw new Error("Invalid arguments for overview_alarms tool: " + e);
     }
@@ -40,16 +51,69 @@ export const getOverviewAlarmsTool = (auth_token: string): Tool => ({
       to: args.to,
     };
     if (args.limit) params.limit = args.limit;
-    if (args.after) params.after = args.after;
     if (args.sorting) params.sorting = args.sorting;
+
+    // Delta mode: start from the last seen timestamp and read in ascending
+    // order, so a truncated page never skips rows older than the watermark
+    const deltaKey = args.since_last_check ? watermarkKey('overview_alarms', { organization_id, machine_groups_ids: args.machine_groups_ids }) : null;
+    const watermark = deltaKey ? getWatermark(deltaKey) : null;
+    if (deltaKey) {
+      params.sorting = 'asc';
+      if (watermark && Date.parse(watermark.timestamp) > Date.parse(args.from) && Date.parse(watermark.timestamp) < Date.parse(args.to)) {
+        params.from = watermark.timestamp;
+      }
+    }
     
+    // Group scope is resolved from the cached machine context, alongside the first page
+    const groupMachines = args.machine_groups_ids?.length
+      ? resolveGroupMachineIds(auth_token, args.machine_groups_ids)
+      : null;
+    groupMachines?.catch(() => undefined);
+
+    const headers = auth_token ? { Authorization: `Bearer ${auth_token}` } : undefined;
+    const fetchPage = async (after?: string) => {
+      const resp = await axios.get(url, { headers, params: { ...params, ...(after ? { after } : {}) } });
+      return { rows: resp.data?.data ?? [], after: resp.data?.pagination?.after || undefined };
+    };
+
     try {
-      const resp = await axios.get(url, {
-        headers: auth_token ? { Authorization: `Bearer ${auth_token}` } : undefined,
-        params
-      });
-      const alarms = resp.data?.data ?? [];
+      const first = await fetchPage(args.after);
+      let alarms: any[] = first.rows;
+      let next: string | undefined = first.after;
+
+      let ids: Set<string> | null = null;
+      if (groupMachines) {
+        try {
+          ids = await groupMachines;
+        } catch (error: any) {
+          return failure({ message: `❌ Could not resolve the machines of machine_groups_ids: ${error.message}` });
+        }
+        // The alarms endpoint has no machine filter: keep reading pages until
+        // `limit` alarms of the groups are collected or the pages run out
+        const wanted = Number(args.limit) || 100;
+        if (ids.size === 0) next = undefined;
+        let matched = alarms.filter(a => ids!.has(a.device_id)).length;
+        for (let pages = 1; next && matched < wanted && pages < MAX_GROUP_PAGES; pages++) {
+          const page = await fetchPage(next);
+          alarms = alarms.concat(page.rows);
+          matched += page.rows.filter((a: any) => ids!.has(a.device_id)).length;
+          next = page.after !== next ? page.after : undefined;
+        }
+      }
+
+      let delta: { previous: string | null; watermark: string | null } | undefined;
+      if (deltaKey) {
+        alarms = filterSinceWatermark(alarms, watermark);
+        const nextWatermark = advanceWatermark(watermark, alarms);
+        if (nextWatermark) setWatermark(deltaKey, nextWatermark);
+        if (args.sorting === 'desc') alarms = [...alarms].reverse();
+        delta = { previous: watermark?.timestamp ?? null, watermark: nextWatermark?.timestamp ?? null };
+      }
+      if (ids) {
+        alarms = alarms.filter((a: any) => ids!.has(a.device_id));
+      }
       let summary = `# Latest Alarm Events\n`;
+      if (delta?.previous) summary += `_New since ${delta.previous}_\n`;
       if (alarms.length === 0) {
         summary += "No alarm events found.";
       } else {
@@ -61,7 +125,10 @@ export const getOverviewAlarmsTool = (auth_token: string): Tool => ({
           return `- **${a.event_type ?? a.id}**${device}${severity}${ts}${desc}`;
         }).join("\n");
       }
-      return success({ text: summary, structured: { alarms } });
+      if (next) {
+        summary += `\n\n_More alarms may ${ids ? 'match' : 'exist'}: call again with after="${next}"_`;
+      }
+      return success({ text: summary, structured: { alarms, after: next ?? null, ...(delta ? { since_last_check: delta } : {}) } });
     } catch (error: any) {
       const message = `❌ Error fetching alarm events: ${error.response?.data?.message || error.message}`;
       return failure({ message, status: error.response?.status, data: error.response?.data || null });
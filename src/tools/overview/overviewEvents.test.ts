@@ -0,0 +1,50 @@
+import { describe, it, expect, vi, beforeEach } from 'vitest';
+import axios from 'axios';
+import { getOverviewEventsTool, OverviewEventsSchema } from './overviewEvents.js';
+import { getAvailableMachines } from '../../utils/machineContext.js';
+
+vi.mock('axios');
+vi.mock('../organizationUtils.js', () => ({ fetchFirstOrganizationId: vi.fn().mockResolvedValue('org-1') }));
+vi.mock('../../utils/machineContext.js', async (importOriginal) => ({
+  ...await importOriginal<typeof import('../../utils/machineContext.js')>(),
+  getAvailableMachines: vi.fn(),
+}));
+const mockedAxios = axios as any;
+const mockedMachines = getAvailableMachines as any;
+
+const range = { from: '2024-01-01T00:00:00Z', to: '2024-01-02T00:00:00Z' };
+const event = { id: 'e1', event_type: 'door_open', timestamp: '2024-01-01T10:00:00Z' };
+
+describe('overview_events', () => {
+  beforeEach(() => {
+    vi.clearAllMocks();
+    mockedAxios.get = vi.fn().mockResolvedValue({ data: { data: [event] } });
+    mockedMachines.mockResolvedValue([
+      { id: 'd1', name: 'A', serial: '1', is_connected: true, machines_group_id: 'g1' },
+      { id: 'd2', name: 'B', serial: '2', is_connected: true, machines_group_id: 'g2' },
+    ]);
+  });
+
+  it('requires machine_ids or machine_groups_ids', () => {
+    expect(OverviewEventsSchema.safeParse(range).success).toBe(false);
+    expect(OverviewEventsSchema.safeParse({ ...range, machine_groups_ids: ['g1'] }).success).toBe(true);
+    expect(OverviewEventsSchema.safeParse({ ...range, machine_ids: ['d1'] }).success).toBe(true);
+  });
+
+  it('reads the machines of machine_groups_ids when machine_ids is omitted', async () => {
+    await getOverviewEventsTool('token').handler({ ...range, machine_groups_ids: ['g2'] });
+
+    expect(mockedAxios.get.mock.calls[0][1].params.machine_ids).toEqual(['d2']);
+  });
+
+  it('keeps a separate since_last_check watermark per group filter', async () => {
+    const tool = getOverviewEventsTool('token');
+    const first = await tool.handler({ ...range, machine_groups_ids: ['g1'], since_last_check: true });
+    const repeated = await tool.handler({ ...range, machine_groups_ids: ['g1'], since_last_check: true });
+    const otherGroup = await tool.handler({ ...range, machine_groups_ids: ['g2'], since_last_check: true });
+
+    expect(first.structuredContent.events).toHaveLength(1);
+    expect(repeated.structuredContent.events).toHaveLength(0);
+    expect(otherGroup.structuredContent.events).toHaveLength(1);
+  });
+});
@@ -6,9 +6,13 @@ import { fetchFirstOrganizationId } from "../organizationUtils.js";
 import { THINGS5_BASE_URL } from "../../config.js";
 import { success, failure } from "../utils/toolResult.js";
 import { fixArraySchemas } from '../utils/schemaUtils.js';
+import { watermarkKey, getWatermark, setWatermark, filterSinceWatermark, advanceWatermark } from '../../utils/watermarks.js';
+import { parseToolArgs } from '../../utils/toolValidation.js';
+import { resolveGroupMachineIds } from '../utils/groupMachines.js';
 
 export const OverviewEventsSchema = z.object({
-  machine_ids: z.array(z.string()).describe('Array of machine IDs to filter events'),
+  machine_ids: z.array(z.string()).optional().describe('Array of machine IDs to filter events (optional when machine_groups_ids is given)'),
+  machine_groups_ids: z.array(z.string()).optional().describe('Machine group IDs; when machine_ids is omitted, the machines of these groups are used'),
   from: z.string().describe('Start date in ISO 8601 format (e.g. 2023-10-02T10:17:51.993Z)'),
   to: z.string().describe('End date in ISO 8601 format (e.g. 2023-10-05T10:17:51.993Z)'),
   after: z.string().optional().describe('Pagination cursor'),
@@ -17,35 +21,65 @@ export const OverviewEventsSchema = z.object({
   severities: z.array(z.string()).optional().describe('Filter by severity'),
   include_severity: z.string().optional().describe('Include severity information'),
   notifications_only: z.boolean().optional().describe('Only include events that trigger notifications'),
-});
+  since_last_check: z.boolean().optional().describe('Only return events that are new since the previous call with the same filters in this session (for repeated monitoring)'),
+}).refine(
+  data => data.machine_ids?.length || data.machine_groups_ids?.length,
+  { message: "Must provide either machine_ids or machine_groups_ids" }
+);
 
 export type OverviewEventsArgs = z.infer<typeof OverviewEventsSchema>;
 
 export const getOverviewEventsTool = (auth_token: string): Tool => ({
   name: "overview_events",
+  argsSchema: OverviewEventsSchema,
   description: "Display the latest overview events for user visible devices.",
   inputSchema: fixArraySchemas(zodToJsonSchema(OverviewEventsSchema)) as any,
   outputSchema: zodToJsonSchema(z.object({
     events: z.array(z.any()),
+    since_last_check: z.object({ previous: z.string().nullable(), watermark: z.string().nullable() }).optional(),
   })) as any,
   handler: async (rawArgs: unknown) => {
     let args: OverviewEventsArgs;
     try {
-      args = OverviewEventsSchema.parse(rawArgs);
+      args = parseToolArgs(OverviewEventsSchema, rawArgs);
     } catch (e) {
       throw new Error("Invalid arguments for overview_events tool: " + e);
     }
     
     const organization_id = await fetchFirstOrganizationId(auth_token);
     const url = `${THINGS5_BASE_URL}/organizations/${organization_id}/overview/events`;
-    
+
+    // Without machine_ids, the machines of machine_groups_ids are used
+    let machine_ids = args.machine_ids;
+    if (!machine_ids?.length) {
+      try {
+        machine_ids = Array.from(await resolveGroupMachineIds(auth_token, args.machine_groups_ids ?? []));
+      } catch (error: any) {
+        return failure({ message: `❌ Could not resolve the machines of machine_groups_ids: ${error.message}` });
+      }
+      if (machine_ids.length === 0) {
+        return success({ text: `# Latest Overview Events\nNo machines in the given machine_groups_ids.`, structured: { events: [] } });
+      }
+    }
+
     const params: Record<string, any> = {
-      machine_ids: args.machine_ids,
+      machine_ids,
       from: args.from,
       to: args.to,
     };
     if (args.after) params.after = args.after;
     if (args.sorting) params.sorting = args.sorting;
+
+    // Delta mode: start from the last seen timestamp and read in ascending
+    // order, so a truncated page never skips rows older than the watermark
+    const deltaKey = args.since_last_check ? watermarkKey('overview_events', { organization_id, machine_ids: args.machine_ids, machine_groups_ids: args.machine_groups_ids, severities: args.severities, include_severity: args.include_severity, notifications_only: args.notifications_only }) : null;
+    const watermark = deltaKey ? getWatermark(deltaKey) : null;
+    if (deltaKey) {
+      params.sorting = 'asc';
+      if (watermark && Date.parse(watermark.timestamp) > Date.parse(args.from) && Date.parse(watermark.timestamp) < Date.parse(args.to)) {
+        params.from = watermark.timestamp;
+      }
+    }
     if (args.limit) params.limit = args.limit;
     if (args.severities) params.severities = args.severities;
     if (args.include_severity !== undefined) params.include_severity = args.include_severity;
@@ -56,8 +90,17 @@ export const getOverviewEventsTool = (auth_token: string): Tool => ({
         headers: auth_token ? { Authorization: `Bearer ${auth_token}` } : undefined,
         params
       });
-      const events = resp.data?.data ?? [];
+      let events = resp.data?.data ?? [];
+      let delta: { previous: string | null; watermark: string | null } | undefined;
+      if (deltaKey) {
+        events = filterSinceWatermark(events, watermark);
+        const next = advanceWatermark(watermark, events);
+        if (next) setWatermark(deltaKey, next);
+        if (args.sorting === 'desc') events = [...events].reverse();
+        delta = { previous: watermark?.timestamp ?? null, watermark: next?.timestamp ?? null };
+      }
       let summary = `# Latest Overview Events\n`;
+      if (delta?.previous) summary += `_New since ${delta.previous}_\n`;
       if (events.length === 0) {
         summary += "No overview events found.";
       } else {
@@ -69,7 +112,7 @@ export const getOverviewEventsTool = (auth_token: string): Tool => ({
           return `- **${e.event_type ?? e.id}**${device}${severity}${ts}${desc}`;
         }).join("\n");
       }
-      return success({ text: summary, structured: { events } });
+      return success({ text: summary, structured: { events, ...(delta ? { since_last_check: delta } : {}) } });
     } catch (error: any) {
       const message = `❌ Error fetching overview events: ${error.response?.data?.message || error.message}`;
       return failure({ message, status: error.response?.status, data: error.response?.data || null });
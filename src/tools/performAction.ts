@@ -5,6 +5,7 @@ import { zodToJsonSchema } from "zod-to-json-schema";
 import { THINGS5_BASE_URL } from '../config.js';
 import { success, failure } from './utils/toolResult.js';
 import { fixArraySchemas } from './utils/schemaUtils.js';
+import { parseToolArgs } from '../utils/toolValidation.js';
 
 interface Action {
   id: string;
@@ -29,6 +30,7 @@ export type PerformActionArgs = z.infer<typeof PerformActionSchema>;
 
 export const getPerformActionTool = (auth_token: string): Tool => ({
   name: "perform_action",
+  argsSchema: PerformActionSchema,
   description: `
   Executes actions on a device. Device id is needed to perform the action, so if only device name or serial are knows it's necessary to get the device list first. Usage examples:
     - "start recipe cleaning on device fridge-01" → starts the cleaning recipe on device fridge-01. the recipe name must be included in params like this {"name": "recipe_name", "value": "cleaning"}
@@ -72,7 +74,7 @@ export const getPerformActionTool = (auth_token: string): Tool => ({
 
     const action = actions[0]
     try {
-      args = PerformActionSchema.parse(rawArgs);
+      args = parseToolArgs(PerformActionSchema, rawArgs);
     } catch (e) {
       console.error('[perform_action] Zod parse error:', e);
       throw e;
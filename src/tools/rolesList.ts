@@ -5,6 +5,7 @@ import { zodToJsonSchema } from "zod-to-json-schema";
 import { fetchFirstOrganizationId } from "./organizationUtils.js";
 import { THINGS5_BASE_URL } from "../config.js";
 import { success, failure } from './utils/toolResult.js';
+import { parseToolArgs } from '../utils/toolValidation.js';
 
 export const RolesListSchema = z.object({
   organization_id: z.string().optional().describe("Organization id (UUID). If not provided, the first organization will be used.")
@@ -14,6 +15,7 @@ export type RolesListArgs = z.infer<typeof RolesListSchema>;
 
 export const getRolesListTool = (auth_token: string): Tool => ({
   name: "roles_list",
+  argsSchema: RolesListSchema,
   description: `List all roles for a given organization. A role has a set of permissions granted on a group of devices
     These are the permissions on things5:
     "machines:view",
@@ -61,7 +63,7 @@ export const getRolesListTool = (auth_token: string): Tool => ({
   handler: async (rawArgs: unknown) => {
     let args: RolesListArgs;
     try {
-      args = RolesListSchema.parse(rawArgs);
+      args = parseToolArgs(RolesListSchema, rawArgs);
     } catch (e) {
       throw new Error('Invalid arguments for roles_list tool: ' + e);
     }
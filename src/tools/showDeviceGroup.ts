@@ -5,6 +5,7 @@ import { zodToJsonSchema } from "zod-to-json-schema";
 import { fetchFirstOrganizationId } from "./organizationUtils.js";
 import { THINGS5_BASE_URL } from "../config.js";
 import { success, failure } from "./utils/toolResult.js";
+import { parseToolArgs } from '../utils/toolValidation.js';
 
 export const ShowDeviceGroupSchema = z.object({
   group_id: z.string().describe("ID of the device group to show"),
@@ -14,6 +15,7 @@ export type ShowDeviceGroupArgs = z.infer<typeof ShowDeviceGroupSchema>;
 
 export const getShowDeviceGroupTool = (auth_token: string): Tool => ({
   name: "show_device_group",
+  argsSchema: ShowDeviceGroupSchema,
   description: "Show details of a specific device group by group_id.",
   inputSchema: zodToJsonSchema(ShowDeviceGroupSchema) as any,
   outputSchema: zodToJsonSchema(z.object({
@@ -23,7 +25,7 @@ export const getShowDeviceGroupTool = (auth_token: string): Tool => ({
   handler: async (rawArgs: unknown) => {
     let args: ShowDeviceGroupArgs;
     try {
-      args = ShowDeviceGroupSchema.parse(rawArgs);
+      args = parseToolArgs(ShowDeviceGroupSchema, rawArgs);
     } catch (e) {
       throw new Error("Invalid arguments for show_device_group tool: " + e);
     }
@@ -6,6 +6,7 @@ import { zodToJsonSchema } from "zod-to-json-schema";
 import { THINGS5_BASE_URL } from '../config.js';
 import { fetchFirstOrganizationId } from './organizationUtils.js';
 import { success, failure } from './utils/toolResult.js';
+import { parseToolArgs } from '../utils/toolValidation.js';
 
 interface Action {
   id: string;
@@ -25,6 +26,7 @@ export type StartRecipeArgs = z.infer<typeof StartRecipeSchema>;
 
 export const getStartRecipeTool = (auth_token: string): Tool => ({
   name: "start_recipe",
+  argsSchema: StartRecipeSchema,
   description: 'Executes the provided recipe on the device. Device uuid is needed, if only device name or serial are known list machines must be used first to retrieve the uuid',
   inputSchema: zodToJsonSchema(StartRecipeSchema) as any,
   outputSchema: zodToJsonSchema(z.object({
@@ -46,7 +48,7 @@ export const getStartRecipeTool = (auth_token: string): Tool => ({
 
     const action = actions[0]
     try {
-      args = StartRecipeSchema.parse(rawArgs);
+      args = parseToolArgs(StartRecipeSchema, rawArgs);
     } catch (e) {
       console.error('[start_recipe] Zod parse error:', e);
       throw e;
@@ -5,6 +5,7 @@ import { zodToJsonSchema } from "zod-to-json-schema";
 import { fetchFirstOrganizationId } from "../organizationUtils.js";
 import { THINGS5_BASE_URL } from "../../config.js";
 import { success, failure } from "../utils/toolResult.js";
+import { parseToolArgs } from '../../utils/toolValidation.js';
 
 export const UserCreateSchema = z.object({
   email: z.string().describe('Email address of the new user'),
@@ -20,6 +21,7 @@ export type UserCreateArgs = z.infer<typeof UserCreateSchema>;
 
 export const getUserCreateTool = (auth_token: string): Tool => ({
   name: "user_create",
+  argsSchema: UserCreateSchema,
   description: "Create a new user in the current organization.",
   inputSchema: zodToJsonSchema(UserCreateSchema) as any,
   outputSchema: zodToJsonSchema(z.object({
@@ -28,7 +30,7 @@ export const getUserCreateTool = (auth_token: string): Tool => ({
   handler: async (rawArgs: unknown) => {
     let args: UserCreateArgs;
     try {
-      args = UserCreateSchema.parse(rawArgs);
+      args = parseToolArgs(UserCreateSchema, rawArgs);
     } catch (e) {
       throw new Error("Invalid arguments for user_create tool: " + e);
     }
@@ -5,6 +5,7 @@ import { zodToJsonSchema } from "zod-to-json-schema";
 import { fetchFirstOrganizationId } from "../organizationUtils.js";
 import { THINGS5_BASE_URL } from "../../config.js";
 import { success, failure } from "../utils/toolResult.js";
+import { parseToolArgs } from '../../utils/toolValidation.js';
 
 export const UsersDetailSchema = z.object({
   user_id: z.string().describe('ID of the user to fetch details for'),
@@ -14,6 +15,7 @@ export type UsersDetailArgs = z.infer<typeof UsersDetailSchema>;
 
 export const getUsersDetailTool = (auth_token: string): Tool => ({
   name: "users_detail",
+  argsSchema: UsersDetailSchema,
   description: "Show details of a specific user by user_id.",
   inputSchema: zodToJsonSchema(UsersDetailSchema) as any,
   outputSchema: zodToJsonSchema(z.object({
@@ -23,7 +25,7 @@ export const getUsersDetailTool = (auth_token: string): Tool => ({
   handler: async (rawArgs: unknown) => {
     let args: UsersDetailArgs;
     try {
-      args = UsersDetailSchema.parse(rawArgs);
+      args = parseToolArgs(UsersDetailSchema, rawArgs);
     } catch (e) {
       throw new Error("Invalid arguments for users_detail tool: " + e);
     }
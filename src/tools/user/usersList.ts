@@ -6,6 +6,7 @@ import { THINGS5_BASE_URL } from '../../config.js';
 import { fetchFirstOrganizationId } from '../organizationUtils.js';
 import { success, failure } from '../utils/toolResult.js';
 import { fixArraySchemas } from '../utils/schemaUtils.js';
+import { parseToolArgs } from '../../utils/toolValidation.js';
 
 export const UsersListSchema = z.object({
   search: z.string().optional().describe('Optional search string to filter users by name/email'),
@@ -18,6 +19,7 @@ export type UsersListArgs = z.infer<typeof UsersListSchema>;
 
 export const getUsersListTool = (auth_token: string): Tool => ({
   name: "users_list",
+  argsSchema: UsersListSchema,
   description: "List all users for the current organization.",
   inputSchema: fixArraySchemas(zodToJsonSchema(UsersListSchema)) as any,
   outputSchema: zodToJsonSchema(z.object({
@@ -28,7 +30,7 @@ export const getUsersListTool = (auth_token: string): Tool => ({
   handler: async (rawArgs: unknown) => {
     let args: UsersListArgs;
     try {
-      args = UsersListSchema.parse(rawArgs);
+      args = parseToolArgs(UsersListSchema, rawArgs);
     } catch (e) {
       console.log(e)
       throw new Error("Invalid arguments for users_list tool: " + e);
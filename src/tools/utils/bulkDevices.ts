@@ -0,0 +1,184 @@
+import { z } from "zod";
+import { getAvailableMachines } from '../../utils/machineContext.js';
+import { mapWithConcurrency } from '../../utils/concurrency.js';
+import { TextResultBuilder } from './resultBuilder.js';
+
+/** Max per-device reads in flight for one bulk tool call */
+export const BULK_READ_CONCURRENCY = Number(process.env.BULK_READ_CONCURRENCY) || 8;
+
+/** Device selection shared by the bulk read tools */
+export const BulkDeviceSelectionShape = {
+  device_ids: z.array(z.string()).optional().describe("Device ids (UUID) to read (optional; default: devices matching device_filter)"),
+  device_filter: z.string().optional().describe("Read devices whose name or serial contains this text, e.g. \"fridge\" (optional; default: all devices)"),
+  only_connected: z.boolean().optional().default(false).describe("Only read connected devices (default false)"),
+  max_devices: z.number().int().min(1).max(500).optional().default(100).describe("Max devices to read (default 100)"),
+};
+
+export const BulkPredicateSchema = z.object({
+  name: z.string().describe("Parameter/state name the condition applies to"),
+  op: z.enum(['gt', 'gte', 'lt', 'lte', 'eq', 'neq', 'contains']).describe("Comparison operator"),
+  value: z.union([z.number(), z.string(), z.boolean()]).describe("Value to compare with"),
+});
+
+export type BulkPredicate = z.infer<typeof BulkPredicateSchema>;
+
+export const BulkMatrixOutputSchema = z.object({
+  columns: z.array(z.string()),
+  rows: z.array(z.object({
+    device_id: z.string(),
+    device_name: z.string(),
+    serial: z.string(),
+    values: z.record(z.any()),
+  })),
+  devices_selected: z.number(),
+  devices_available: z.number(),
+  devices_read: z.number(),
+  matched: z.number(),
+  failed: z.array(z.any()),
+});
+
+export interface BulkDevice {
+  id: string;
+  name: string;
+  serial: string;
+  is_connected?: boolean;
+}
+
+export interface BulkRow {
+  device_id: string;
+  device_name: string;
+  serial: string;
+  values: Record<string, unknown>;
+}
+
+export interface BulkMatrix {
+  columns: string[];
+  rows: BulkRow[];
+  devices_selected: number;
+  devices_available: number;
+  devices_read: number;
+  matched: number;
+  failed: { device_id: string; device_name: string; error: string }[];
+}
+
+/**
+ * Resolve the devices of a bulk read from explicit ids or a name/serial
+ * filter, using the cached machine context
+ */
+export async function selectBulkDevices(
+  auth_token: string,
+  args: { device_ids?: string[]; device_filter?: string; only_connected?: boolean; max_devices: number }
+): Promise<{ devices: BulkDevice[]; available: number }> {
+  const machines = await getAvailableMachines(auth_token);
+  let devices: BulkDevice[];
+  if (args.device_ids?.length) {
+    const byId = new Map(machines.map(m => [m.id, m]));
+    // Ids missing from the context are still read (the context may be stale)
+    devices = args.device_ids.map(id => byId.get(id) ?? { id, name: id, serial: '' });
+  } else {
+    const term = args.device_filter?.toLowerCase().trim();
+    devices = term
+      ? machines.filter(m => m.name.toLowerCase().includes(term) || m.serial.toLowerCase().includes(term))
+      : machines;
+  }
+  if (args.only_connected) {
+    devices = devices.filter(d => d.is_connected !== false);
+  }
+  return { devices: devices.slice(0, args.max_devices), available: devices.length };
+}
+
+export function matchesPredicate(value: unknown, predicate: BulkPredicate): boolean {
+  if (value === undefined || value === null) {
+    return false;
+  }
+  const actual = Number(value);
+  const expected = Number(predicate.value);
+  const numeric = Number.isFinite(actual) && Number.isFinite(expected) && String(value).trim() !== '';
+  switch (predicate.op) {
+    case 'gt': return numeric && actual > expected;
+    case 'gte': return numeric && actual >= expected;
+    case 'lt': return numeric && actual < expected;
+    case 'lte': return numeric && actual <= expected;
+    case 'eq': return numeric ? actual === expected : String(value) === String(predicate.value);
+    case 'neq': return numeric ? actual !== expected : String(value) !== String(predicate.value);
+    case 'contains': return String(value).toLowerCase().includes(String(predicate.value).toLowerCase());
+  }
+}
+
+/**
+ * Read every device concurrently and build the device × name matrix.
+ * `read` returns the values of one device by name.
+ */
+export async function readDeviceMatrix(
+  devices: BulkDevice[],
+  available: number,
+  read: (device: BulkDevice) => Promise<Record<string, unknown>>,
+  options: { names?: string[]; where?: BulkPredicate } = {}
+): Promise<BulkMatrix> {
+  const results = await mapWithConcurrency(devices, BULK_READ_CONCURRENCY, read);
+  const wanted = options.names?.length ? new Set(options.names) : null;
+  const columns: string[] = options.names?.length ? [...options.names] : [];
+  const seen = new Set(columns);
+  const rows: BulkRow[] = [];
+  const failed: BulkMatrix['failed'] = [];
+
+  results.forEach((result, i) => {
+    const device = devices[i];
+    if (result.status === 'rejected') {
+      const error: any = result.reason;
+      failed.push({ device_id: device.id, device_name: device.name, error: error?.response?.data?.message || error?.message || String(error) });
+      return;
+    }
+    const values: Record<string, unknown> = {};
+    for (const [name, value] of Object.entries(result.value)) {
+      if (wanted && !wanted.has(name)) continue;
+      values[name] = value;
+      if (!seen.has(name)) {
+        seen.add(name);
+        columns.push(name);
+      }
+    }
+    if (options.where && !matchesPredicate(values[options.where.name] ?? result.value[options.where.name], options.where)) {
+      return;
+    }
+    rows.push({ device_id: device.id, device_name: device.name, serial: device.serial, values });
+  });
+
+  return {
+    columns,
+    rows,
+    devices_selected: devices.length,
+    devices_available: available,
+    devices_read: devices.length - failed.length,
+    matched: rows.length,
+    failed,
+  };
+}
+
+/**
+ * Markdown summary of a device matrix
+ */
+export function formatDeviceMatrix(title: string, matrix: BulkMatrix, where?: BulkPredicate): string {
+  const summary = new TextResultBuilder();
+  summary.line(`# ${title}`);
+  summary.line(`- **Devices read**: ${matrix.devices_read} of ${matrix.devices_selected}` +
+    (matrix.devices_available > matrix.devices_selected ? ` (${matrix.devices_available} matched the selection, raise max_devices to read more)` : ''));
+  if (where) {
+    summary.line(`- **Condition**: ${where.name} ${where.op} ${where.value} → ${matrix.matched} devices`);
+  }
+  if (matrix.rows.length === 0) {
+    summary.line('\nNo devices to show.');
+  } else {
+    summary.line('');
+    summary.table(['Device', 'Serial', ...matrix.columns]);
+    for (const row of matrix.rows) {
+      summary.row([row.device_name, row.serial, ...matrix.columns.map(c => row.values[c] ?? '-')]);
+    }
+    summary.endTable();
+  }
+  if (matrix.failed.length > 0) {
+    summary.line(`\n⚠️ Could not read ${matrix.failed.length} devices: ` +
+      matrix.failed.slice(0, 10).map(f => `${f.device_name} (${f.error})`).join(', '));
+  }
+  return summary.toString();
+}
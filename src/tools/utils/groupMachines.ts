@@ -0,0 +1,13 @@
+import { getAvailableMachines, filterMachines, hasGroupMembership } from '../../utils/machineContext.js';
+
+/**
+ * Ids of the machines in the given groups, from the cached machine context.
+ * Throws when the context (or its group membership) could not be loaded.
+ */
+export async function resolveGroupMachineIds(auth_token: string, machine_groups_ids: string[]): Promise<Set<string>> {
+  const machines = await getAvailableMachines(auth_token);
+  if (machines.length === 0 || !hasGroupMembership(machines)) {
+    throw new Error('machine list with group membership is not available');
+  }
+  return new Set(filterMachines(machines, { machine_groups_ids }).map(m => m.id));
+}
@@ -0,0 +1,48 @@
+import { describe, it, expect, vi } from 'vitest';
+import { TextResultBuilder, reportProgress } from './resultBuilder.js';
+
+describe('TextResultBuilder', () => {
+  it('builds the same text as joined summary lines', () => {
+    const summary = new TextResultBuilder();
+    summary.line('# Title').table(['A', 'B']).row([1, 2]).row([3, 4]);
+
+    expect(summary.toString()).toBe(['# Title', '| A | B |', '| ------ | ------ |', '| 1 | 2 |', '| 3 | 4 |'].join('\n'));
+  });
+
+  it('caps table rows and notes the omitted ones', () => {
+    const summary = new TextResultBuilder(2);
+    summary.table(['N']);
+    for (let i = 0; i < 5; i++) summary.row([i]);
+    summary.line('after');
+
+    const text = summary.toString();
+    expect(text).toContain('| 1 |');
+    expect(text).not.toContain('| 2 |');
+    expect(text).toContain('3 more rows not shown');
+    expect(text.endsWith('after')).toBe(true);
+  });
+
+  it('stops growing at the text size limit', () => {
+    const summary = new TextResultBuilder(1000, 64);
+    for (let i = 0; i < 100; i++) summary.line(`line ${i}`);
+
+    expect(summary.truncated).toBe(true);
+    expect(summary.toString()).toContain('output truncated');
+    expect(summary.toString().length).toBeLessThan(140);
+  });
+});
+
+describe('reportProgress', () => {
+  it('notifies only when the request carries a progress token', async () => {
+    const sendNotification = vi.fn().mockResolvedValue(undefined);
+
+    await reportProgress({ sendNotification }, 1);
+    expect(sendNotification).not.toHaveBeenCalled();
+
+    await reportProgress({ sendNotification, _meta: { progressToken: 'p1' } }, 2, undefined, '200 rows');
+    expect(sendNotification).toHaveBeenCalledWith({
+      method: 'notifications/progress',
+      params: { progressToken: 'p1', progress: 2, message: '200 rows' },
+    });
+  });
+});
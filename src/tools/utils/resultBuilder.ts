@@ -0,0 +1,97 @@
+/**
+ * Incremental tool result text.
+ *
+ * Tools used to collect every markdown line in an array and join it at the
+ * end, next to the full structuredContent, so large results allocated the
+ * text twice before anything was sent. TextResultBuilder appends lines as
+ * upstream rows are processed, caps markdown tables (the full rows are in
+ * structuredContent) and the overall text size.
+ *
+ * A tool result is a single JSON-RPC message, so it cannot be streamed
+ * itself; `reportProgress` sends `notifications/progress` while upstream
+ * pages arrive when the client asked for progress (progressToken).
+ *
+ * Configuration (environment variables):
+ * - RESULT_MAX_TABLE_ROWS: markdown table rows per table (default: 200)
+ * - RESULT_MAX_TEXT_BYTES: max size of a result's text (default: 262144)
+ */
+
+export const RESULT_MAX_TABLE_ROWS = Number(process.env.RESULT_MAX_TABLE_ROWS) || 200;
+export const RESULT_MAX_TEXT_BYTES = Number(process.env.RESULT_MAX_TEXT_BYTES) || 256 * 1024;
+
+export class TextResultBuilder {
+  private text = '';
+  private bytes = 0;
+  private tableRows = 0;
+  private omittedRows = 0;
+  /** Lines were dropped because the text reached its size limit */
+  truncated = false;
+
+  constructor(private maxTableRows = RESULT_MAX_TABLE_ROWS, private maxBytes = RESULT_MAX_TEXT_BYTES) {}
+
+  line(line: string = ''): this {
+    if (this.truncated) {
+      return this;
+    }
+    const bytes = Buffer.byteLength(line) + 1;
+    if (this.bytes + bytes > this.maxBytes) {
+      this.truncated = true;
+      return this;
+    }
+    this.text += this.bytes === 0 ? line : '\n' + line;
+    this.bytes += bytes;
+    return this;
+  }
+
+  /** Start a markdown table */
+  table(headers: string[]): this {
+    this.endTable();
+    this.tableRows = 0;
+    this.omittedRows = 0;
+    this.line(`| ${headers.join(' | ')} |`);
+    return this.line(`| ${headers.map(() => '------').join(' | ')} |`);
+  }
+
+  row(cells: unknown[]): this {
+    if (this.tableRows >= this.maxTableRows) {
+      this.omittedRows++;
+      return this;
+    }
+    this.tableRows++;
+    return this.line(`| ${cells.join(' | ')} |`);
+  }
+
+  /** Close the current table, noting rows left out of the text */
+  endTable(): this {
+    if (this.omittedRows > 0) {
+      const omitted = this.omittedRows;
+      this.omittedRows = 0;
+      this.line(`\n… ${omitted} more rows not shown (all rows are in the structured result)`);
+    }
+    return this;
+  }
+
+  toString(): string {
+    this.endTable();
+    return this.truncated ? `${this.text}\n\n… output truncated (all data is in the structured result)` : this.text;
+  }
+}
+
+/**
+ * Send a progress notification for the current request, when the client
+ * asked for progress. Never throws.
+ */
+export async function reportProgress(extra: any, progress: number, total?: number, message?: string): Promise<void> {
+  const progressToken = extra?._meta?.progressToken;
+  if (progressToken === undefined || typeof extra?.sendNotification !== 'function') {
+    return;
+  }
+  try {
+    await extra.sendNotification({
+      method: 'notifications/progress',
+      params: { progressToken, progress, ...(total !== undefined ? { total } : {}), ...(message ? { message } : {}) },
+    });
+  } catch (error: any) {
+    console.error('[Progress] ⚠️  Failed to send progress notification:', error?.message);
+  }
+}
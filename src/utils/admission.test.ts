@@ -0,0 +1,117 @@
+import { describe, it, expect } from 'vitest';
+import { AdmissionController, AdmissionRejectedError, publicTenantLabel } from './admission.js';
+
+const tick = () => new Promise(resolve => setTimeout(resolve, 0));
+
+describe('AdmissionController', () => {
+  it('should limit in-flight requests per tenant', async () => {
+    const controller = new AdmissionController({ tenantMaxInFlight: 2, globalMaxInFlight: 10 });
+
+    const first = await controller.acquire('realm:a');
+    await controller.acquire('realm:a');
+    let thirdAdmitted = false;
+    const third = controller.acquire('realm:a').then((release) => { thirdAdmitted = true; return release; });
+
+    await tick();
+    expect(thirdAdmitted).toBe(false);
+    expect(controller.metrics().tenants['realm:a'].queued).toBe(1);
+
+    first();
+    await third;
+    expect(thirdAdmitted).toBe(true);
+  });
+
+  it('should not let one tenant block another', async () => {
+    const controller = new AdmissionController({ tenantMaxInFlight: 1, globalMaxInFlight: 10 });
+
+    await controller.acquire('realm:busy');
+    const queued = controller.acquire('realm:busy');
+    const other = await controller.acquire('realm:quiet');
+
+    expect(typeof other).toBe('function');
+    expect(controller.metrics().tenants['realm:busy'].queued).toBe(1);
+    void queued;
+  });
+
+  it('should share contended capacity fairly between tenants', async () => {
+    const controller = new AdmissionController({ tenantMaxInFlight: 10, globalMaxInFlight: 1 });
+    const order: string[] = [];
+
+    const holder = await controller.acquire('realm:a');
+    const pending: Promise<void>[] = [];
+    // Tenant a floods the queue before tenant b asks for anything
+    for (let i = 0; i < 4; i++) {
+      pending.push(controller.acquire('realm:a').then((release) => { order.push('a'); release(); }));
+    }
+    for (let i = 0; i < 2; i++) {
+      pending.push(controller.acquire('realm:b').then((release) => { order.push('b'); release(); }));
+    }
+
+    holder();
+    await Promise.all(pending);
+
+    // b is interleaved with a instead of waiting for a's whole backlog
+    expect(order.slice(0, 4)).toContain('b');
+    expect(order.filter(t => t === 'b')).toHaveLength(2);
+  });
+
+  it('should serve mutating calls before bulk reads', async () => {
+    const controller = new AdmissionController({ tenantMaxInFlight: 10, globalMaxInFlight: 1 });
+    const order: string[] = [];
+
+    const holder = await controller.acquire('realm:a');
+    const read = controller.acquire('realm:a', 'normal').then((release) => { order.push('read'); release(); });
+    const command = controller.acquire('realm:b', 'high').then((release) => { order.push('command'); release(); });
+
+    holder();
+    await Promise.all([read, command]);
+    expect(order).toEqual(['command', 'read']);
+  });
+
+  it('should prioritize by tool and method', () => {
+    expect(AdmissionController.priorityFor('machine_command_execute', 'put')).toBe('high');
+    expect(AdmissionController.priorityFor('perform_action', 'get')).toBe('high');
+    expect(AdmissionController.priorityFor('device_update', 'put')).toBe('high');
+    expect(AdmissionController.priorityFor('metrics_read', 'get')).toBe('normal');
+  });
+
+  it('should rate limit with a token bucket', async () => {
+    const controller = new AdmissionController({ tenantBurst: 2, tenantRatePerSecond: 50, tenantMaxInFlight: 10 });
+
+    (await controller.acquire('realm:a'))();
+    (await controller.acquire('realm:a'))();
+    const started = Date.now();
+    (await controller.acquire('realm:a'))();
+
+    // Third request had to wait for a token (~20ms at 50 req/s)
+    expect(Date.now() - started).toBeGreaterThanOrEqual(10);
+  });
+
+  it('should reject when the tenant queue is full', async () => {
+    const controller = new AdmissionController({ tenantMaxInFlight: 1, tenantMaxQueue: 1 });
+
+    await controller.acquire('realm:a');
+    void controller.acquire('realm:a');
+    await expect(controller.acquire('realm:a')).rejects.toBeInstanceOf(AdmissionRejectedError);
+    expect(controller.metrics().tenants['realm:a'].rejected).toBe(1);
+  });
+
+  it('should forget idle tenants', async () => {
+    const controller = new AdmissionController({ tenantBurst: 1, tenantRatePerSecond: 1000 });
+
+    const release = await controller.acquire('realm:a');
+    expect(Object.keys(controller.metrics().tenants)).toEqual(['realm:a']);
+
+    release();
+    await new Promise(resolve => setTimeout(resolve, 5));
+    expect(controller.metrics().tenants).toEqual({});
+  });
+});
+
+describe('publicTenantLabel', () => {
+  it('hides the realm name behind a stable label', () => {
+    expect(publicTenantLabel('realm:acme')).toBe(publicTenantLabel('realm:acme'));
+    expect(publicTenantLabel('realm:acme')).not.toContain('acme');
+    expect(publicTenantLabel('realm:acme')).not.toBe(publicTenantLabel('realm:other'));
+  });
+});
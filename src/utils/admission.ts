@@ -0,0 +1,388 @@
+/**
+ * Upstream Admission Control
+ *
+ * Limits how much of the Things5 API quota a single tenant (organization
+ * realm or token) can consume, so one busy tenant or runaway agent loop
+ * cannot starve everyone else or trigger 429 storms.
+ *
+ * Every upstream call made during a tool call must be admitted first:
+ * - per-tenant max in-flight requests
+ * - per-tenant token bucket (sustained rate + burst)
+ * - a global in-flight cap shared by all tenants
+ * - weighted fair queuing between tenants when capacity is contended,
+ *   with mutating calls (commands, actions, writes) served before bulk reads
+ *
+ * Configuration (environment variables):
+ * - ADMISSION_GLOBAL_MAX_IN_FLIGHT (default: 64)
+ * - ADMISSION_TENANT_MAX_IN_FLIGHT (default: 8)
+ * - ADMISSION_TENANT_RATE: sustained requests per second per tenant (default: 20)
+ * - ADMISSION_TENANT_BURST: token bucket size (default: 40)
+ * - ADMISSION_TENANT_MAX_QUEUE: queued requests per tenant before rejecting (default: 200)
+ * - ADMISSION_MAX_WAIT_MS: max time a request may wait in the queue (default: 30000)
+ * - ADMISSION_TENANT_WEIGHTS: e.g. "realm:acme=2,realm:demo10=1" (default weight: 1)
+ *
+ * Tenants with nothing in flight or queued and a full token bucket are
+ * forgotten, so state does not grow with every tenant ever seen. Public
+ * metrics identify tenants by a keyed hash: realm names are customer names.
+ */
+
+import axios, { AxiosAdapter } from "axios";
+import { createHmac, randomBytes } from "node:crypto";
+import { getCallContext } from "./callContext.js";
+
+export type AdmissionPriority = 'high' | 'normal';
+
+export interface AdmissionPolicy {
+  globalMaxInFlight: number;
+  tenantMaxInFlight: number;
+  tenantRatePerSecond: number;
+  tenantBurst: number;
+  tenantMaxQueue: number;
+  maxWaitMs: number;
+  weights: Record<string, number>;
+}
+
+export interface TenantAdmissionMetrics {
+  weight: number;
+  in_flight: number;
+  queued: number;
+  admitted: number;
+  rejected: number;
+  tokens: number;
+}
+
+export interface AdmissionMetrics {
+  in_flight: number;
+  max_in_flight: number;
+  tenants: Record<string, TenantAdmissionMetrics>;
+}
+
+/**
+ * Error raised when a request cannot be admitted for its tenant.
+ * Says nothing about the upstream host: it is neither retried nor counted by the breakers.
+ */
+export class AdmissionRejectedError extends Error {
+  code = 'EADMISSION';
+
+  constructor(public tenant: string, reason: string) {
+    super(`Upstream request rejected for ${tenant}: ${reason}. Please retry shortly.`);
+    this.name = 'AdmissionRejectedError';
+  }
+}
+
+/** Tools that change device state are served before bulk reads */
+export const PRIORITY_TOOLS = new Set(['machine_command_execute', 'perform_action', 'start_recipe']);
+
+function parseWeights(value: string | undefined): Record<string, number> {
+  const weights: Record<string, number> = {};
+  for (const entry of (value || '').split(',')) {
+    const [tenant, weight] = entry.split('=').map(s => s.trim());
+    if (tenant && Number(weight) > 0) weights[tenant] = Number(weight);
+  }
+  return weights;
+}
+
+/** Minimum interval between two sweeps of idle tenants */
+const IDLE_SWEEP_INTERVAL_MS = 60 * 1000;
+/** Per-process key of the tenant hashes in public metrics */
+const TENANT_HASH_KEY = randomBytes(32);
+
+/**
+ * Opaque tenant label for public metrics, stable for the life of the process
+ */
+export function publicTenantLabel(tenantKey: string): string {
+  return 'tenant:' + createHmac('sha256', TENANT_HASH_KEY).update(tenantKey).digest('hex').substring(0, 12);
+}
+
+export const DEFAULT_ADMISSION_POLICY: AdmissionPolicy = {
+  globalMaxInFlight: Number(process.env.ADMISSION_GLOBAL_MAX_IN_FLIGHT) || 64,
+  tenantMaxInFlight: Number(process.env.ADMISSION_TENANT_MAX_IN_FLIGHT) || 8,
+  tenantRatePerSecond: Number(process.env.ADMISSION_TENANT_RATE) || 20,
+  tenantBurst: Number(process.env.ADMISSION_TENANT_BURST) || 40,
+  tenantMaxQueue: Number(process.env.ADMISSION_TENANT_MAX_QUEUE) || 200,
+  maxWaitMs: Number(process.env.ADMISSION_MAX_WAIT_MS) || 30000,
+  weights: parseWeights(process.env.ADMISSION_TENANT_WEIGHTS),
+};
+
+interface Waiter {
+  finishTag: number;
+  resolve: (release: () => void) => void;
+  reject: (error: Error) => void;
+  timer: NodeJS.Timeout;
+}
+
+interface TenantState {
+  key: string;
+  weight: number;
+  inFlight: number;
+  tokens: number;
+  lastRefill: number;
+  lastFinish: number;
+  high: Waiter[];
+  normal: Waiter[];
+  admitted: number;
+  rejected: number;
+}
+
+export class AdmissionController {
+  private tenants = new Map<string, TenantState>();
+  private inFlight = 0;
+  private virtualTime = 0;
+  private wakeTimer: NodeJS.Timeout | null = null;
+  private wakeAt = Infinity;
+  private lastSweep = Date.now();
+  readonly policy: AdmissionPolicy;
+
+  constructor(policy: Partial<AdmissionPolicy> = {}) {
+    this.policy = { ...DEFAULT_ADMISSION_POLICY, ...policy };
+  }
+
+  /**
+   * Priority of an upstream call: writes and calls made by mutating tools first
+   */
+  static priorityFor(toolName: string | undefined, method: string = 'get'): AdmissionPriority {
+    return (toolName && PRIORITY_TOOLS.has(toolName)) || method.toLowerCase() !== 'get' ? 'high' : 'normal';
+  }
+
+  /**
+   * Wait until a request for the tenant may be sent.
+   * Resolves with a release function that must be called when it completes.
+   */
+  acquire(tenantKey: string, priority: AdmissionPriority = 'normal'): Promise<() => void> {
+    if (Date.now() - this.lastSweep >= IDLE_SWEEP_INTERVAL_MS) {
+      this.evictIdle();
+    }
+    const tenant = this.tenantFor(tenantKey);
+    this.refill(tenant);
+
+    const startTag = Math.max(this.virtualTime, tenant.lastFinish);
+    const finishTag = startTag + 1 / tenant.weight;
+
+    // Fast path: nothing queued for this tenant and capacity available
+    if (tenant.high.length === 0 && tenant.normal.length === 0 && this.canDispatch(tenant)) {
+      tenant.lastFinish = finishTag;
+      this.virtualTime = Math.max(this.virtualTime, startTag);
+      return Promise.resolve(this.dispatch(tenant));
+    }
+
+    if (tenant.high.length + tenant.normal.length >= this.policy.tenantMaxQueue) {
+      tenant.rejected++;
+      return Promise.reject(new AdmissionRejectedError(tenantKey, 'too many queued upstream requests'));
+    }
+
+    tenant.lastFinish = finishTag;
+    return new Promise((resolve, reject) => {
+      const queue = priority === 'high' ? tenant.high : tenant.normal;
+      const waiter: Waiter = {
+        finishTag,
+        resolve,
+        reject,
+        timer: setTimeout(() => {
+          const index = queue.indexOf(waiter);
+          if (index !== -1) {
+            queue.splice(index, 1);
+            tenant.rejected++;
+            reject(new AdmissionRejectedError(tenantKey, `queued for more than ${this.policy.maxWaitMs}ms`));
+          }
+        }, this.policy.maxWaitMs),
+      };
+      waiter.timer.unref();
+      queue.push(waiter);
+      this.pump();
+    });
+  }
+
+  /**
+   * Global and per-tenant state, keyed by tenant (see getAdmissionMetrics for
+   * the public form). Idle tenants are evicted first.
+   */
+  metrics(): AdmissionMetrics {
+    this.evictIdle();
+    const tenants: Record<string, TenantAdmissionMetrics> = {};
+    for (const tenant of this.tenants.values()) {
+      tenants[tenant.key] = {
+        weight: tenant.weight,
+        in_flight: tenant.inFlight,
+        queued: tenant.high.length + tenant.normal.length,
+        admitted: tenant.admitted,
+        rejected: tenant.rejected,
+        tokens: Math.floor(tenant.tokens),
+      };
+    }
+    return { in_flight: this.inFlight, max_in_flight: this.policy.globalMaxInFlight, tenants };
+  }
+
+  /**
+   * Forget tenants with nothing in flight or queued and a full bucket: a new
+   * state for them would be identical, apart from the counters
+   */
+  private evictIdle(): void {
+    this.lastSweep = Date.now();
+    for (const [key, tenant] of this.tenants) {
+      this.refill(tenant);
+      if (tenant.inFlight === 0 && tenant.high.length + tenant.normal.length === 0 && tenant.tokens >= this.policy.tenantBurst) {
+        this.tenants.delete(key);
+      }
+    }
+  }
+
+  private tenantFor(key: string): TenantState {
+    let tenant = this.tenants.get(key);
+    if (!tenant) {
+      tenant = {
+        key,
+        weight: this.policy.weights[key] || 1,
+        inFlight: 0,
+        tokens: this.policy.tenantBurst,
+        lastRefill: Date.now(),
+        lastFinish: 0,
+        high: [],
+        normal: [],
+        admitted: 0,
+        rejected: 0,
+      };
+      this.tenants.set(key, tenant);
+    }
+    return tenant;
+  }
+
+  private refill(tenant: TenantState): void {
+    const now = Date.now();
+    const elapsed = (now - tenant.lastRefill) / 1000;
+    tenant.tokens = Math.min(this.policy.tenantBurst, tenant.tokens + elapsed * this.policy.tenantRatePerSecond);
+    tenant.lastRefill = now;
+  }
+
+  private canDispatch(tenant: TenantState): boolean {
+    return this.inFlight < this.policy.globalMaxInFlight
+      && tenant.inFlight < this.policy.tenantMaxInFlight
+      && tenant.tokens >= 1;
+  }
+
+  private dispatch(tenant: TenantState): () => void {
+    tenant.tokens -= 1;
+    tenant.inFlight++;
+    tenant.admitted++;
+    this.inFlight++;
+
+    let released = false;
+    return () => {
+      if (released) return;
+      released = true;
+      tenant.inFlight--;
+      this.inFlight--;
+      this.pump();
+    };
+  }
+
+  /**
+   * Admit queued requests: high priority first, then the smallest virtual
+   * finish tag among eligible tenants (weighted fair queuing).
+   */
+  private pump(): void {
+    while (this.inFlight < this.policy.globalMaxInFlight) {
+      let best: { tenant: TenantState; queue: Waiter[] } | null = null;
+
+      for (const tenant of this.tenants.values()) {
+        const queue = tenant.high.length > 0 ? tenant.high : tenant.normal;
+        if (queue.length === 0) continue;
+        this.refill(tenant);
+        if (!this.canDispatch(tenant)) continue;
+
+        if (!best) {
+          best = { tenant, queue };
+          continue;
+        }
+        const bestIsHigh = best.queue === best.tenant.high;
+        const isHigh = queue === tenant.high;
+        if ((isHigh && !bestIsHigh) || (isHigh === bestIsHigh && queue[0].finishTag < best.queue[0].finishTag)) {
+          best = { tenant, queue };
+        }
+      }
+
+      if (!best) break;
+      const waiter = best.queue.shift()!;
+      clearTimeout(waiter.timer);
+      this.virtualTime = Math.max(this.virtualTime, waiter.finishTag - 1 / best.tenant.weight);
+      waiter.resolve(this.dispatch(best.tenant));
+    }
+    this.scheduleWake();
+  }
+
+  // Tenants waiting only for tokens need a timer, nothing else would wake them up
+  private scheduleWake(): void {
+    let waitMs = Infinity;
+    for (const tenant of this.tenants.values()) {
+      if (tenant.high.length + tenant.normal.length === 0 || tenant.tokens >= 1) continue;
+      waitMs = Math.min(waitMs, ((1 - tenant.tokens) / this.policy.tenantRatePerSecond) * 1000);
+    }
+    if (waitMs === Infinity) return;
+    const wakeAt = Date.now() + Math.max(1, Math.ceil(waitMs));
+    // An armed timer is kept unless this wait is shorter
+    if (this.wakeTimer && this.wakeAt <= wakeAt) return;
+    if (this.wakeTimer) clearTimeout(this.wakeTimer);
+    this.wakeAt = wakeAt;
+    this.wakeTimer = setTimeout(() => {
+      this.wakeTimer = null;
+      this.wakeAt = Infinity;
+      this.pump();
+    }, wakeAt - Date.now());
+    this.wakeTimer.unref();
+  }
+}
+
+let installedController: AdmissionController | null = null;
+
+/**
+ * Install admission control on the default axios instance used by all tools.
+ * Only requests made inside a tool call (with a call context) are subject to it.
+ *
+ * Install it before the resilience layer, so admission wraps the transport
+ * adapter and every attempt (retries, hedged duplicates) is admitted on its
+ * own, while backoff sleeps hold no slot.
+ */
+export function installAdmission(instance: typeof axios = axios, policy: Partial<AdmissionPolicy> = {}): void {
+  if (installedController || typeof instance?.getAdapter !== 'function') {
+    return;
+  }
+  const next: AxiosAdapter = typeof instance.defaults.adapter === 'function'
+    ? instance.defaults.adapter
+    : instance.getAdapter(instance.defaults.adapter);
+  const controller = new AdmissionController(policy);
+  installedController = controller;
+
+  instance.defaults.adapter = async (config) => {
+    const context = getCallContext();
+    if (!context) {
+      return next(config);
+    }
+    let release: () => void;
+    try {
+      release = await controller.acquire(context.tenant, AdmissionController.priorityFor(context.toolName, config.method));
+    } catch (error: any) {
+      error.config = config;
+      throw error;
+    }
+    try {
+      return await next(config);
+    } finally {
+      release();
+    }
+  };
+}
+
+/**
+ * Snapshot of global and per-tenant admission state, with tenants identified
+ * by publicTenantLabel() (safe to expose on the unauthenticated /metrics)
+ */
+export function getAdmissionMetrics(): AdmissionMetrics | null {
+  if (!installedController) {
+    return null;
+  }
+  const metrics = installedController.metrics();
+  const tenants: Record<string, TenantAdmissionMetrics> = {};
+  for (const [key, tenant] of Object.entries(metrics.tenants)) {
+    tenants[publicTenantLabel(key)] = tenant;
+  }
+  return { ...metrics, tenants };
+}
@@ -0,0 +1,47 @@
+/**
+ * Call Context
+ *
+ * Carries information about the tool call in progress (tool name and
+ * tenant) through every async step of the pipeline, so shared layers such
+ * as the upstream admission controller can tell who an HTTP call is for.
+ */
+
+import { AsyncLocalStorage } from "node:async_hooks";
+import jwt from "jsonwebtoken";
+import { hashToken } from "./sessionStore.js";
+
+export interface CallContext {
+  toolName: string;
+  /** Tenant key: Keycloak realm (organization) when available, else a token hash */
+  tenant: string;
+  /** MCP session the call belongs to (Streamable HTTP only) */
+  sessionId?: string;
+}
+
+const contextStorage = new AsyncLocalStorage<CallContext>();
+
+/**
+ * Derive the tenant key for a bearer token
+ */
+export function tenantFromToken(auth_token?: string): string {
+  if (!auth_token) {
+    return 'anonymous';
+  }
+  const decoded = jwt.decode(auth_token) as jwt.JwtPayload | null;
+  const realm = decoded?.iss?.match(/\/realms\/([^\/]+)/)?.[1];
+  return realm ? `realm:${realm}` : `token:${hashToken(auth_token)!.substring(0, 16)}`;
+}
+
+/**
+ * Run a function with the given call context
+ */
+export function runWithCallContext<T>(context: CallContext, fn: () => T): T {
+  return contextStorage.run(context, fn);
+}
+
+/**
+ * Get the context of the tool call in progress (if any)
+ */
+export function getCallContext(): CallContext | undefined {
+  return contextStorage.getStore();
+}
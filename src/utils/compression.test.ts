@@ -0,0 +1,85 @@
+import { describe, it, expect, beforeAll, afterAll } from 'vitest';
+import express from 'express';
+import http from 'node:http';
+import { AddressInfo } from 'node:net';
+import zlib from 'node:zlib';
+import { compressJsonResponses, negotiateEncoding } from './compression.js';
+
+function get(port: number, path: string, acceptEncoding?: string): Promise<{ status?: number; headers: http.IncomingHttpHeaders; body: Buffer }> {
+  return new Promise((resolve, reject) => {
+    http.get({ port, path, headers: acceptEncoding ? { 'Accept-Encoding': acceptEncoding } : {} }, (res) => {
+      const chunks: Buffer[] = [];
+      res.on('data', (chunk) => chunks.push(chunk));
+      res.on('end', () => resolve({ status: res.statusCode, headers: res.headers, body: Buffer.concat(chunks) }));
+    }).on('error', reject);
+  });
+}
+
+describe('negotiateEncoding', () => {
+  it('prefers brotli, then gzip, honouring q=0', () => {
+    expect(negotiateEncoding('gzip, deflate, br')).toBe('br');
+    expect(negotiateEncoding('gzip, br;q=0')).toBe('gzip');
+    expect(negotiateEncoding('*')).toBe('br');
+    expect(negotiateEncoding('identity')).toBeNull();
+    expect(negotiateEncoding(undefined)).toBeNull();
+  });
+});
+
+describe('compressJsonResponses', () => {
+  const large = { devices: Array.from({ length: 200 }, (_, i) => ({ id: `device-${i}`, name: `Fridge ${i}`, is_connected: i % 2 === 0 })) };
+  let server: http.Server;
+  let port: number;
+
+  beforeAll(async () => {
+    const app = express();
+    app.use(compressJsonResponses({ thresholdBytes: 1024 }));
+    // Same shape as the SDK JSON response: writeHead with headers, then end(body)
+    app.get('/large', (_req, res) => { res.writeHead(200, { 'Content-Type': 'application/json' }).end(JSON.stringify(large)); });
+    app.get('/small', (_req, res) => { res.json({ ok: true }); });
+    // Same shape as the SDK GET /mcp stream: writeHead().flushHeaders(), then write()
+    app.get('/sse', (_req, res) => {
+      res.writeHead(200, { 'Content-Type': 'text/event-stream', 'Cache-Control': 'no-cache' }).flushHeaders();
+      res.write(`data: ${JSON.stringify(large)}\n\n`);
+      setTimeout(() => res.end(), 10);
+    });
+    // JSON streamed in chunks cannot be compressed as a whole
+    app.get('/chunked', (_req, res) => {
+      res.setHeader('Content-Type', 'application/json');
+      res.write(JSON.stringify(large).slice(0, 10));
+      res.end(JSON.stringify(large).slice(10));
+    });
+    server = app.listen(0);
+    await new Promise(resolve => server.once('listening', resolve));
+    port = (server.address() as AddressInfo).port;
+  });
+
+  afterAll(() => new Promise(resolve => server.close(resolve)));
+
+  it('compresses large JSON responses with the negotiated encoding', async () => {
+    const br = await get(port, '/large', 'gzip, br');
+    expect(br.headers['content-encoding']).toBe('br');
+    expect(JSON.parse(zlib.brotliDecompressSync(br.body).toString())).toEqual(large);
+
+    const gz = await get(port, '/large', 'gzip');
+    expect(gz.headers['content-encoding']).toBe('gzip');
+    expect(Number(gz.headers['content-length'])).toBe(gz.body.length);
+    expect(JSON.parse(zlib.gunzipSync(gz.body).toString())).toEqual(large);
+  });
+
+  it('leaves small, unnegotiated and SSE responses untouched', async () => {
+    expect((await get(port, '/small', 'br')).headers['content-encoding']).toBeUndefined();
+    expect((await get(port, '/large')).headers['content-encoding']).toBeUndefined();
+
+    const sse = await get(port, '/sse', 'br');
+    expect(sse.status).toBe(200);
+    expect(sse.headers['content-type']).toBe('text/event-stream');
+    expect(sse.headers['cache-control']).toBe('no-cache');
+    expect(sse.headers['content-encoding']).toBeUndefined();
+    expect(sse.body.toString()).toBe(`data: ${JSON.stringify(large)}\n\n`);
+
+    const chunked = await get(port, '/chunked', 'br');
+    expect(chunked.status).toBe(200);
+    expect(chunked.headers['content-encoding']).toBeUndefined();
+    expect(JSON.parse(chunked.body.toString())).toEqual(large);
+  });
+});
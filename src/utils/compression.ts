@@ -0,0 +1,185 @@
+/**
+ * Response Compression
+ *
+ * `/mcp` answers with plain JSON (`enableJsonResponse: true`), and tool
+ * results carrying full `structuredContent` (device lists, metric pages)
+ * can be hundreds of KB. Over mobile and remote links transfer time
+ * dominates, so JSON responses above a size threshold are compressed with
+ * the best encoding the client accepts (brotli, then gzip).
+ *
+ * SSE responses (`text/event-stream`) are never compressed: their frames
+ * must be flushed as soon as they are written.
+ *
+ * Compression runs on the libuv thread pool (async zlib), not on the event loop.
+ *
+ * Configuration (environment variables):
+ * - COMPRESSION_THRESHOLD_BYTES: minimum body size to compress (default: 1024)
+ * - COMPRESSION_ENCODINGS: accepted server-side, in order of preference (default: "br,gzip")
+ * - COMPRESSION_BROTLI_QUALITY: 0-11 (default: 4)
+ * - COMPRESSION_GZIP_LEVEL: 1-9 (default: 6)
+ */
+
+import type { NextFunction, Request, Response } from "express";
+import { promisify } from "node:util";
+import zlib from "node:zlib";
+
+export type ContentEncoding = 'br' | 'gzip';
+
+export interface CompressionOptions {
+  thresholdBytes: number;
+  encodings: ContentEncoding[];
+  brotliQuality: number;
+  gzipLevel: number;
+}
+
+function parseEncodings(value: string | undefined): ContentEncoding[] {
+  const encodings = (value || 'br,gzip')
+    .split(',')
+    .map(e => e.trim())
+    .filter((e): e is ContentEncoding => e === 'br' || e === 'gzip');
+  return Array.from(new Set(encodings));
+}
+
+export const DEFAULT_COMPRESSION_OPTIONS: CompressionOptions = {
+  thresholdBytes: Number(process.env.COMPRESSION_THRESHOLD_BYTES) || 1024,
+  encodings: parseEncodings(process.env.COMPRESSION_ENCODINGS),
+  brotliQuality: Number(process.env.COMPRESSION_BROTLI_QUALITY) || 4,
+  gzipLevel: Number(process.env.COMPRESSION_GZIP_LEVEL) || 6,
+};
+
+const brotliCompress = promisify(zlib.brotliCompress);
+const gzip = promisify(zlib.gzip);
+
+/**
+ * Pick the encoding to use from an Accept-Encoding header: the first
+ * server-preferred encoding the client accepts (q > 0).
+ */
+export function negotiateEncoding(acceptEncoding: string | undefined, encodings: ContentEncoding[] = DEFAULT_COMPRESSION_OPTIONS.encodings): ContentEncoding | null {
+  if (!acceptEncoding) {
+    return null;
+  }
+  const accepted = new Map<string, number>();
+  for (const part of acceptEncoding.toLowerCase().split(',')) {
+    const [name, ...params] = part.trim().split(';');
+    const q = params.map(p => p.trim()).find(p => p.startsWith('q='));
+    accepted.set(name.trim(), q ? Number(q.substring(2)) : 1);
+  }
+  for (const encoding of encodings) {
+    const q = accepted.get(encoding) ?? accepted.get('*');
+    if (q !== undefined && q > 0) {
+      return encoding;
+    }
+  }
+  return null;
+}
+
+export function compressBody(body: Buffer, encoding: ContentEncoding, options: CompressionOptions = DEFAULT_COMPRESSION_OPTIONS): Promise<Buffer> {
+  return encoding === 'br'
+    ? brotliCompress(body, {
+      params: {
+        [zlib.constants.BROTLI_PARAM_QUALITY]: options.brotliQuality,
+        [zlib.constants.BROTLI_PARAM_SIZE_HINT]: body.length,
+        [zlib.constants.BROTLI_PARAM_MODE]: zlib.constants.BROTLI_MODE_TEXT,
+      },
+    })
+    : gzip(body, { level: options.gzipLevel });
+}
+
+function isCompressible(res: Response): boolean {
+  const contentType = String(res.getHeader('content-type') ?? '');
+  return contentType.includes('application/json') && !res.getHeader('content-encoding');
+}
+
+function headerValue(headers: unknown, name: string): unknown {
+  if (Array.isArray(headers)) {
+    for (let i = 0; i + 1 < headers.length; i += 2) {
+      if (String(headers[i]).toLowerCase() === name) return headers[i + 1];
+    }
+    return undefined;
+  }
+  if (headers && typeof headers === 'object') {
+    const key = Object.keys(headers).find(k => k.toLowerCase() === name);
+    return key === undefined ? undefined : (headers as Record<string, unknown>)[key];
+  }
+  return undefined;
+}
+
+/**
+ * Express middleware compressing complete JSON responses above the threshold.
+ * Responses that are not JSON, flush their head or are written in several
+ * chunks (SSE streams) pass through untouched.
+ */
+export function compressJsonResponses(overrides: Partial<CompressionOptions> = {}) {
+  const options = { ...DEFAULT_COMPRESSION_OPTIONS, ...overrides };
+
+  return (req: Request, res: Response, next: NextFunction) => {
+    const encoding = negotiateEncoding(req.headers['accept-encoding'], options.encodings);
+    if (!encoding || req.method === 'HEAD') {
+      return next();
+    }
+    res.vary('Accept-Encoding');
+
+    const { writeHead, end, write, flushHeaders } = res;
+    const restore = () => {
+      res.writeHead = writeHead;
+      res.end = end;
+      res.write = write;
+      res.flushHeaders = flushHeaders;
+    };
+
+    // Keep the head of JSON responses unsent until end() so the body can still
+    // be compressed: status and headers are applied to the response instead.
+    // Anything else (SSE streams) gets the original methods back and goes out as is.
+    res.writeHead = function (this: Response, statusCode: number, ...args: any[]) {
+      const headers = args.find(arg => arg && typeof arg === 'object');
+      if (res.headersSent || !String(headerValue(headers, 'content-type') ?? res.getHeader('content-type') ?? '').includes('application/json')) {
+        restore();
+        return writeHead.call(this, statusCode, ...args);
+      }
+      res.statusCode = statusCode;
+      if (Array.isArray(headers)) {
+        for (let i = 0; i + 1 < headers.length; i += 2) res.setHeader(headers[i], headers[i + 1]);
+      } else if (headers) {
+        for (const [name, value] of Object.entries(headers)) {
+          if (value !== undefined) res.setHeader(name, value as any);
+        }
+      }
+      return this;
+    } as any;
+
+    // Flushing the head or writing a chunk means the response is streamed
+    res.flushHeaders = function (this: Response) {
+      restore();
+      return flushHeaders.call(this);
+    };
+
+    res.write = function (this: Response, ...args: any[]) {
+      restore();
+      return (write as any).apply(this, args);
+    } as any;
+
+    res.end = function (this: Response, chunk?: any, encodingOrCallback?: any, callback?: any) {
+      restore();
+      const done = typeof encodingOrCallback === 'function' ? encodingOrCallback : callback;
+      const body = typeof chunk === 'string'
+        ? Buffer.from(chunk, typeof encodingOrCallback === 'string' ? encodingOrCallback as BufferEncoding : 'utf8')
+        : Buffer.isBuffer(chunk) ? chunk : null;
+
+      if (res.headersSent || !body || body.length < options.thresholdBytes || !isCompressible(res)) {
+        return end.call(this, chunk, encodingOrCallback, callback);
+      }
+
+      compressBody(body, encoding, options).then((compressed) => {
+        res.setHeader('Content-Encoding', encoding);
+        res.setHeader('Content-Length', compressed.length);
+        end.call(res, compressed, done);
+      }, (error: any) => {
+        console.error('[Compression] ❌ Failed to compress response, sending it uncompressed:', error.message);
+        end.call(res, body, done);
+      });
+      return this;
+    } as any;
+
+    next();
+  };
+}
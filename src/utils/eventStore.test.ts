@@ -0,0 +1,70 @@
+import { describe, it, expect, afterEach } from 'vitest';
+import { mkdtemp, rm } from 'node:fs/promises';
+import { tmpdir } from 'node:os';
+import { join } from 'node:path';
+import { BoundedEventStore, DEFAULT_EVENT_STORE_LIMITS } from './eventStore.js';
+
+const message = (id: number) => ({ jsonrpc: '2.0' as const, id, result: { n: id } });
+
+async function replay(store: BoundedEventStore, lastEventId: string) {
+  const sent: { eventId: string; message: any }[] = [];
+  const streamId = await store.replayEventsAfter(lastEventId, {
+    send: async (eventId, message) => { sent.push({ eventId, message }); },
+  });
+  return { streamId, sent };
+}
+
+describe('BoundedEventStore', () => {
+  let dir: string | undefined;
+
+  afterEach(async () => {
+    if (dir) await rm(dir, { recursive: true, force: true });
+    dir = undefined;
+  });
+
+  it('replays only the missed events of the same stream', async () => {
+    const store = new BoundedEventStore();
+    const first = await store.storeEvent('_GET_stream', message(1));
+    await store.storeEvent('request-stream', message(2));
+    await store.storeEvent('_GET_stream', message(3));
+    await store.storeEvent('_GET_stream', message(4));
+
+    const { streamId, sent } = await replay(store, first);
+
+    expect(streamId).toBe('_GET_stream');
+    expect(sent.map(e => e.message.id)).toEqual([3, 4]);
+    expect(sent[0].eventId).toBe('_GET_stream_3');
+  });
+
+  it('bounds stored events and refuses to replay evicted ones', async () => {
+    const store = new BoundedEventStore({ ...DEFAULT_EVENT_STORE_LIMITS, maxEvents: 2 });
+    const first = await store.storeEvent('s', message(1));
+    await store.storeEvent('s', message(2));
+    await store.storeEvent('s', message(3));
+
+    expect(store.size.events).toBe(2);
+    await expect(replay(store, first)).rejects.toThrow('no longer available');
+  });
+
+  it('expires events older than the TTL', async () => {
+    const store = new BoundedEventStore({ ...DEFAULT_EVENT_STORE_LIMITS, ttlSeconds: -1 });
+    const first = await store.storeEvent('s', message(1));
+
+    await expect(replay(store, first)).rejects.toThrow('no longer available');
+  });
+
+  it('reloads a file-backed log after a restart', async () => {
+    dir = await mkdtemp(join(tmpdir(), 'event-store-'));
+    const file = join(dir, 'session.events.jsonl');
+    const store = new BoundedEventStore(DEFAULT_EVENT_STORE_LIMITS, file);
+    const first = await store.storeEvent('s', message(1));
+    await store.storeEvent('s', message(2));
+    await store.dispose(true);
+
+    const restored = new BoundedEventStore(DEFAULT_EVENT_STORE_LIMITS, file);
+    const { sent } = await replay(restored, first);
+
+    expect(sent.map(e => e.message.id)).toEqual([2]);
+    expect(await restored.storeEvent('s', message(3))).toBe('s_3');
+  });
+});
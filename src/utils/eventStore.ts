@@ -0,0 +1,265 @@
+/**
+ * Resumable Stream Event Store
+ *
+ * Bounded per-session store of the SSE events sent by a session's
+ * StreamableHTTPServerTransport. A client whose connection dropped
+ * reconnects with `Last-Event-ID` and only the messages it missed on that
+ * stream are replayed from the store: the request is not re-run, so no
+ * upstream work is repeated.
+ *
+ * Only SSE streams are stored: the /sse transport and the standalone GET /mcp
+ * stream. POST /mcp returns JSON responses (enableJsonResponse), which the
+ * transport never writes to the event store.
+ *
+ * Events are kept in memory, bounded by count, bytes and age. With
+ * EVENT_STORE_DIR set, each session's events are also appended to a JSON
+ * lines file so they can be replayed by a session rehydrated after a
+ * restart (see sessionStore.ts).
+ *
+ * Configuration (environment variables):
+ * - EVENT_STORE_MAX_EVENTS: events kept per session (default: 1000)
+ * - EVENT_STORE_MAX_BYTES: serialized bytes kept per session (default: 5242880)
+ * - EVENT_STORE_TTL_SECONDS: max age of a replayable event (default: 300)
+ * - EVENT_STORE_DIR: directory for file-backed event logs (default: memory only)
+ */
+
+import type { EventStore } from "@modelcontextprotocol/sdk/server/streamableHttp.js";
+import type { JSONRPCMessage } from "@modelcontextprotocol/sdk/types.js";
+import { appendFile, mkdir, readFile, rm, writeFile, rename } from "node:fs/promises";
+import { dirname, join } from "node:path";
+
+export interface EventStoreLimits {
+  maxEvents: number;
+  maxBytes: number;
+  ttlSeconds: number;
+}
+
+export const DEFAULT_EVENT_STORE_LIMITS: EventStoreLimits = {
+  maxEvents: Number(process.env.EVENT_STORE_MAX_EVENTS) || 1000,
+  maxBytes: Number(process.env.EVENT_STORE_MAX_BYTES) || 5 * 1024 * 1024,
+  ttlSeconds: Number(process.env.EVENT_STORE_TTL_SECONDS) || 300,
+};
+
+interface StoredEvent {
+  seq: number;
+  stream: string;
+  at: number;
+  message: JSONRPCMessage;
+  bytes: number;
+}
+
+export interface EventStoreMetrics {
+  sessions: number;
+  events: number;
+  bytes: number;
+  replays: number;
+  replayed_events: number;
+  replay_misses: number;
+}
+
+let replays = 0;
+let replayedEvents = 0;
+let replayMisses = 0;
+
+/**
+ * Event ids are "<stream id>_<sequence>". Stream ids may contain "_"
+ * (the standalone GET stream is "_GET_stream"), the sequence never does.
+ */
+function parseEventId(eventId: string): { stream: string; seq: number } | null {
+  const index = eventId.lastIndexOf('_');
+  const seq = Number(eventId.substring(index + 1));
+  if (index <= 0 || !Number.isInteger(seq)) {
+    return null;
+  }
+  return { stream: eventId.substring(0, index), seq };
+}
+
+export class BoundedEventStore implements EventStore {
+  private events: StoredEvent[] = [];
+  private bytes = 0;
+  private seq = 0;
+  private ready: Promise<unknown>;
+  private fileWrites: Promise<unknown> = Promise.resolve();
+  private fileLines = 0;
+
+  constructor(private limits: EventStoreLimits = DEFAULT_EVENT_STORE_LIMITS, private file?: string) {
+    this.ready = file ? this.load(file) : Promise.resolve();
+  }
+
+  async storeEvent(streamId: string, message: JSONRPCMessage): Promise<string> {
+    await this.ready;
+    const line = JSON.stringify(message);
+    const event: StoredEvent = { seq: ++this.seq, stream: streamId, at: Date.now(), message, bytes: Buffer.byteLength(line) };
+    this.events.push(event);
+    this.bytes += event.bytes;
+    this.evict();
+    if (this.file) {
+      this.appendToFile(event);
+    }
+    return `${streamId}_${event.seq}`;
+  }
+
+  async replayEventsAfter(
+    lastEventId: string,
+    { send }: { send: (eventId: string, message: JSONRPCMessage) => Promise<void> }
+  ): Promise<string> {
+    await this.ready;
+    this.evict();
+    const parsed = parseEventId(lastEventId);
+    // The event must still be stored, otherwise the client already missed evicted messages
+    if (!parsed || !this.events.some(e => e.seq === parsed.seq && e.stream === parsed.stream)) {
+      replayMisses++;
+      throw new Error(`Event ${lastEventId} is no longer available for replay`);
+    }
+    replays++;
+    for (const event of this.events) {
+      if (event.seq > parsed.seq && event.stream === parsed.stream) {
+        replayedEvents++;
+        await send(`${event.stream}_${event.seq}`, event.message);
+      }
+    }
+    return parsed.stream;
+  }
+
+  get size(): { events: number; bytes: number } {
+    return { events: this.events.length, bytes: this.bytes };
+  }
+
+  /**
+   * Drop the stored events (and the file log unless it must survive a restart)
+   */
+  async dispose(keepFile = false): Promise<void> {
+    this.events = [];
+    this.bytes = 0;
+    const file = this.file;
+    this.file = undefined;
+    await this.fileWrites;
+    if (file && !keepFile) {
+      await rm(file, { force: true });
+    }
+  }
+
+  private evict(): void {
+    const oldest = Date.now() - this.limits.ttlSeconds * 1000;
+    let drop = 0;
+    while (
+      drop < this.events.length &&
+      (this.events.length - drop > this.limits.maxEvents || this.bytes > this.limits.maxBytes || this.events[drop].at < oldest)
+    ) {
+      this.bytes -= this.events[drop].bytes;
+      drop++;
+    }
+    if (drop > 0) {
+      this.events.splice(0, drop);
+    }
+  }
+
+  private async load(file: string): Promise<void> {
+    try {
+      await mkdir(dirname(file), { recursive: true });
+      const content = await readFile(file, 'utf8');
+      for (const line of content.split('\n')) {
+        if (!line) continue;
+        try {
+          const event = JSON.parse(line) as StoredEvent;
+          // A compaction may have raced with appends: skip repeated events
+          if (event.seq <= this.seq) continue;
+          this.events.push(event);
+          this.bytes += event.bytes;
+          this.seq = Math.max(this.seq, event.seq);
+          this.fileLines++;
+        } catch {
+          // A partial last line from a crash is ignored
+        }
+      }
+      this.evict();
+    } catch (error: any) {
+      if (error.code !== 'ENOENT') {
+        console.error(`[EventStore] ⚠️  Failed to load ${file}:`, error.message);
+      }
+    }
+  }
+
+  // Appends are serialized; the log is rewritten with the live events once
+  // it holds twice as many lines
+  private appendToFile(event: StoredEvent): void {
+    const file = this.file!;
+    this.fileLines++;
+    const compact = this.fileLines > 2 * Math.max(this.events.length, 1) && this.fileLines > 100;
+    this.fileWrites = this.fileWrites.then(async () => {
+      if (compact) {
+        const tmp = `${file}.${process.pid}.tmp`;
+        await writeFile(tmp, this.events.map(e => JSON.stringify(e) + '\n').join(''), 'utf8');
+        await rename(tmp, file);
+      } else {
+        await appendFile(file, JSON.stringify(event) + '\n', 'utf8');
+      }
+    }).catch((error: any) => {
+      console.error(`[EventStore] ❌ Failed to write ${file}:`, error.message);
+    });
+    if (compact) {
+      this.fileLines = this.events.length;
+    }
+  }
+}
+
+const stores = new Map<string, BoundedEventStore>();
+
+function fileFor(sessionId: string): string | undefined {
+  const dir = process.env.EVENT_STORE_DIR;
+  if (!dir || !/^[A-Za-z0-9_-]+$/.test(sessionId)) {
+    return undefined;
+  }
+  return join(dir, `${sessionId}.events.jsonl`);
+}
+
+/**
+ * Event store of a session, created on first use (and loaded from its file
+ * log when the session is rehydrated)
+ */
+export function getSessionEventStore(sessionId: string): BoundedEventStore {
+  let store = stores.get(sessionId);
+  if (!store) {
+    store = new BoundedEventStore(DEFAULT_EVENT_STORE_LIMITS, fileFor(sessionId));
+    stores.set(sessionId, store);
+  }
+  return store;
+}
+
+/**
+ * EventStore for a session's transport. The underlying store is only
+ * created when the session stores or replays its first event.
+ */
+export function sessionEventStore(sessionId: string): EventStore {
+  return {
+    storeEvent: (streamId, message) => getSessionEventStore(sessionId).storeEvent(streamId, message),
+    replayEventsAfter: (lastEventId, options) => getSessionEventStore(sessionId).replayEventsAfter(lastEventId, options),
+  };
+}
+
+/**
+ * Release a session's event store. The file log is kept on shutdown so the
+ * session can resume its streams after the restart.
+ */
+export async function releaseSessionEventStore(sessionId: string, keepFile = false): Promise<void> {
+  const store = stores.get(sessionId);
+  stores.delete(sessionId);
+  await store?.dispose(keepFile);
+}
+
+export function getEventStoreMetrics(): EventStoreMetrics {
+  let events = 0;
+  let bytes = 0;
+  for (const store of stores.values()) {
+    events += store.size.events;
+    bytes += store.size.bytes;
+  }
+  return {
+    sessions: stores.size,
+    events,
+    bytes,
+    replays,
+    replayed_events: replayedEvents,
+    replay_misses: replayMisses,
+  };
+}
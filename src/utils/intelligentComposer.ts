@@ -12,9 +12,7 @@
  */
 
 import { MachineInfo, findMachine, getAvailableMachines } from './machineContext.js';
-import { THINGS5_BASE_URL } from '../config.js';
-import { fetchFirstOrganizationId } from '../tools/organizationUtils.js';
-import axios from 'axios';
+import { fetchMachineFirmware } from '../tools/organizationUtils.js';
 
 export interface CompositionContext {
   tool_name: string;
@@ -733,16 +731,8 @@ async function getDeviceCommands(
   auth_token: string
 ): Promise<any[]> {
   try {
-    const organizationId = await fetchFirstOrganizationId(auth_token);
-    const response = await axios.get(
-      `${THINGS5_BASE_URL}/organizations/${organizationId}/machines/${deviceId}/machine_firmware`,
-      {
-        headers: { Authorization: `Bearer ${auth_token}` },
-        params: { include_machine_commands: true }
-      }
-    );
-    
-    return response.data?.data?.machine_commands || [];
+    const firmware = await fetchMachineFirmware(auth_token, deviceId, 'machine_commands');
+    return firmware?.machine_commands || [];
   } catch (error) {
     console.error('[IntelligentComposer] Error fetching commands:', error);
     return [];
@@ -757,17 +747,10 @@ async function getDeviceMetrics(
   auth_token: string
 ): Promise<string[]> {
   try {
-    const organizationId = await fetchFirstOrganizationId(auth_token);
-    const response = await axios.get(
-      `${THINGS5_BASE_URL}/organizations/${organizationId}/machines/${deviceId}/machine_firmware`,
-      {
-        headers: { Authorization: `Bearer ${auth_token}` },
-        params: { include_machine_variables: true }
-      }
-    );
+    const firmware = await fetchMachineFirmware(auth_token, deviceId, 'machine_variables');
     
     // Extract metric names from machine_variables
-    const variables = response.data?.data?.machine_variables || [];
+    const variables = firmware?.machine_variables || [];
     const metrics = variables
       .filter((v: any) => v.type === 'metric')
       .map((v: any) => v.name);
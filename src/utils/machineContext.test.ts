@@ -0,0 +1,75 @@
+import { describe, it, expect, vi, beforeEach } from 'vitest';
+import axios from 'axios';
+import jwt from 'jsonwebtoken';
+import { getAvailableMachines, clearMachineCache, filterMachines, getMachineIndex, MachineInfo } from './machineContext.js';
+
+vi.mock('axios');
+vi.mock('../tools/organizationUtils.js', () => ({ fetchFirstOrganizationId: vi.fn().mockResolvedValue('org-1') }));
+const mockedAxios = axios as any;
+
+const device = (id: string, group: string | null, model: string) => ({
+  id,
+  name: `Machine ${id}`,
+  serial: `SN-${id}`,
+  is_connected: true,
+  machine_model: { id: model, name: `Model ${model}` },
+  machines_group: group ? { id: group, name: `Group ${group}` } : null,
+});
+
+describe('getAvailableMachines', () => {
+  beforeEach(() => {
+    vi.clearAllMocks();
+    clearMachineCache();
+    mockedAxios.get = vi.fn().mockImplementation(async (_url: string, { params, headers }: any) => {
+      if (headers.Authorization === 'Bearer other') {
+        return { data: { data: [device('x1', 'g9', 'm9')], pagination: { after: null } } };
+      }
+      return params.after
+        ? { data: { data: [device('d3', null, 'm2')], pagination: { after: null } } }
+        : { data: { data: [device('d1', 'g1', 'm1'), device('d2', 'g2', 'm1')], pagination: { after: 'cursor-1' } } };
+    });
+  });
+
+  it('follows the pagination cursor and keeps group and model membership', async () => {
+    const machines = await getAvailableMachines('token');
+
+    expect(machines.map(m => m.id)).toEqual(['d1', 'd2', 'd3']);
+    expect(mockedAxios.get.mock.calls[0][1].params).toMatchObject({ include_machines_group: true, include_machine_model: true });
+    expect(mockedAxios.get.mock.calls[1][1].params.after).toBe('cursor-1');
+    expect(machines[0]).toMatchObject({ machines_group_id: 'g1', machines_group_name: 'Group g1', machine_model_id: 'm1' });
+    expect(machines[2].machines_group_id).toBeNull();
+  });
+
+  it('shares the cache between the refreshed tokens of a user', async () => {
+    const token = (jti: string) => jwt.sign({ iss: 'https://auth/realms/demo', sub: 'user-1', jti }, 'secret');
+    await getAvailableMachines(token('a'));
+    await getAvailableMachines(token('b'));
+
+    expect(mockedAxios.get).toHaveBeenCalledTimes(2);
+  });
+
+  it('caches machines per token', async () => {
+    await getAvailableMachines('token');
+    const other = await getAvailableMachines('other');
+    await getAvailableMachines('token');
+
+    expect(other.map(m => m.id)).toEqual(['x1']);
+    expect(mockedAxios.get).toHaveBeenCalledTimes(3);
+  });
+});
+
+describe('filterMachines', () => {
+  const machines: MachineInfo[] = [
+    { id: 'd1', name: 'A', serial: '1', is_connected: true, machines_group_id: 'g1', machine_model_id: 'm1' },
+    { id: 'd2', name: 'B', serial: '2', is_connected: true, machines_group_id: 'g2', machine_model_id: 'm1' },
+    { id: 'd3', name: 'C', serial: '3', is_connected: false, machines_group_id: 'g1', machine_model_id: 'm2' },
+  ];
+
+  it('looks up groups and models in the indexes', () => {
+    expect(filterMachines(machines, { machine_groups_ids: ['g1'] }).map(m => m.id)).toEqual(['d1', 'd3']);
+    expect(filterMachines(machines, { machine_model_ids: ['m1'] }).map(m => m.id)).toEqual(['d1', 'd2']);
+    expect(filterMachines(machines, { machine_groups_ids: ['g1'], machine_model_ids: ['m1'] }).map(m => m.id)).toEqual(['d1']);
+    expect(filterMachines(machines, {})).toBe(machines);
+    expect(getMachineIndex(machines)).toBe(getMachineIndex(machines));
+  });
+});
@@ -2,12 +2,21 @@
  * Machine Context System
  * 
  * Automatically loads and caches the list of available machines
- * before every tool call to provide context to the AI
+ * before every tool call to provide context to the AI.
+ *
+ * The list is cached per user (every token of a user shares it) and carries group and model
+ * membership, indexed so group/model-scoped resolution is a local lookup.
+ * With METADATA_CACHE_PATH set, the list is also persisted so the first call
+ * after a restart is served from disk while a fresh list is loaded.
+ *
+ * Configuration (environment variables):
+ * - MACHINE_CONTEXT_MAX_DEVICES: max machines loaded per user (default: 2000)
  */
 
 import axios from "axios";
 import { THINGS5_BASE_URL } from "../config.js";
 import { fetchFirstOrganizationId } from "../tools/organizationUtils.js";
+import { readPersistedMetadata, persistMetadata, metadataIdentity } from "./metadataCache.js";
 
 export interface MachineInfo {
   id: string;
@@ -15,7 +24,10 @@ export interface MachineInfo {
   serial: string;
   is_connected: boolean;
   machine_model_id?: string;
+  machine_model_name?: string;
   machine_firmware_id?: string;
+  machines_group_id?: string | null;
+  machines_group_name?: string | null;
   active?: boolean;
 }
 
@@ -25,9 +37,70 @@ interface MachineContextCache {
   organization_id: string;
 }
 
+/** Secondary indexes over a machine list */
+export interface MachineIndex {
+  byId: Map<string, MachineInfo>;
+  byGroup: Map<string, MachineInfo[]>;
+  byModel: Map<string, MachineInfo[]>;
+}
+
 // Cache per 2 minuti (evita troppe chiamate API)
 const CACHE_TTL_MS = 2 * 60 * 1000;
-let machineCache: MachineContextCache | null = null;
+const PAGE_SIZE = 100;
+/** Upper bound of machines loaded in the context (MACHINE_CONTEXT_MAX_DEVICES) */
+const MAX_DEVICES = Number(process.env.MACHINE_CONTEXT_MAX_DEVICES) || 2000;
+/** Max users with a cached machine list */
+const MAX_CACHED_USERS = 500;
+
+// One cache entry per user (hashed identity): users only see their own machines
+const machineCaches = new Map<string, MachineContextCache>();
+const machineIndexes = new WeakMap<MachineInfo[], MachineIndex>();
+
+function toMachineInfo(device: any): MachineInfo {
+  return {
+    id: device.id,
+    name: device.name,
+    serial: device.serial,
+    is_connected: device.is_connected || false,
+    machine_model_id: device.machine_model_id ?? device.machine_model?.id,
+    machine_model_name: device.machine_model?.name,
+    machine_firmware_id: device.machine_firmware_id,
+    // null means "no group", undefined means the API did not send group data
+    machines_group_id: device.machines_group !== undefined ? device.machines_group?.id ?? null : undefined,
+    machines_group_name: device.machines_group !== undefined ? device.machines_group?.name ?? null : undefined,
+    active: device.active
+  };
+}
+
+/**
+ * Fetch the machines of an organization, bypassing the cache.
+ * Follows the pagination cursor, with group and model membership.
+ */
+export async function fetchMachines(auth_token: string, organizationId: string): Promise<MachineInfo[]> {
+  const machines: MachineInfo[] = [];
+  let after: string | undefined;
+  do {
+    const response = await axios.get(
+      `${THINGS5_BASE_URL}/organizations/${organizationId}/devices`,
+      {
+        headers: { Authorization: `Bearer ${auth_token}` },
+        params: {
+          limit: PAGE_SIZE,
+          include_machines_group: true,
+          include_machine_model: true,
+          ...(after ? { after } : {})
+        }
+      }
+    );
+    for (const device of response.data?.data || []) {
+      machines.push(toMachineInfo(device));
+    }
+    const next = response.data?.pagination?.after || undefined;
+    after = next !== after ? next : undefined;
+  } while (after && machines.length < MAX_DEVICES);
+
+  return machines.slice(0, MAX_DEVICES);
+}
 
 /**
  * Get the list of available machines with caching
@@ -40,44 +113,44 @@ export async function getAvailableMachines(
   auth_token: string,
   force: boolean = false
 ): Promise<MachineInfo[]> {
+  const key = metadataIdentity(auth_token);
+  const machineCache = machineCaches.get(key);
+
   // Check cache
   if (!force && machineCache && Date.now() - machineCache.timestamp < CACHE_TTL_MS) {
     console.log('[MachineContext] ✅ Using cached machines:', machineCache.machines.length);
     return machineCache.machines;
   }
   
+  // After a restart, serve the persisted catalog and refresh it in the background
+  if (!force && !machineCache) {
+    const persisted = await readPersistedMetadata<MachineContextCache>('machines', key);
+    if (persisted && !machineCaches.has(key)) {
+      machineCaches.set(key, { ...persisted.value, timestamp: Date.now() });
+      console.log(`[MachineContext] ✅ Using persisted machines: ${persisted.value.machines.length} (refreshing in background)`);
+      void getAvailableMachines(auth_token, true);
+      return persisted.value.machines;
+    }
+  }
+  
   console.log('[MachineContext] 🔄 Loading available machines...');
   
   try {
     const organizationId = await fetchFirstOrganizationId(auth_token);
     
-    const response = await axios.get(
-      `${THINGS5_BASE_URL}/organizations/${organizationId}/devices`,
-      {
-        headers: { Authorization: `Bearer ${auth_token}` },
-        params: {
-          limit: 100, // Get all machines (adjust if needed)
-          include_machine_model: false // Keep it lightweight
-        }
-      }
-    );
+    const machines = await fetchMachines(auth_token, organizationId);
     
-    const machines: MachineInfo[] = (response.data?.data || []).map((device: any) => ({
-      id: device.id,
-      name: device.name,
-      serial: device.serial,
-      is_connected: device.is_connected || false,
-      machine_model_id: device.machine_model_id,
-      machine_firmware_id: device.machine_firmware_id,
-      active: device.active
-    }));
-    
-    // Update cache
-    machineCache = {
+    // Update cache (re-inserted so the Map keeps the most recent last)
+    machineCaches.delete(key);
+    machineCaches.set(key, {
       machines,
       timestamp: Date.now(),
       organization_id: organizationId
-    };
+    });
+    if (machineCaches.size > MAX_CACHED_USERS) {
+      machineCaches.delete(machineCaches.keys().next().value!);
+    }
+    void persistMetadata('machines', key, { machines, timestamp: Date.now(), organization_id: organizationId });
     
     console.log(`[MachineContext] ✅ Loaded ${machines.length} machines`);
     console.log(`[MachineContext] Connected: ${machines.filter(m => m.is_connected).length}`);
@@ -98,6 +171,60 @@ export async function getAvailableMachines(
   }
 }
 
+/**
+ * Group and model indexes of a machine list, built once per list
+ */
+export function getMachineIndex(machines: MachineInfo[]): MachineIndex {
+  let index = machineIndexes.get(machines);
+  if (!index) {
+    index = { byId: new Map(), byGroup: new Map(), byModel: new Map() };
+    for (const machine of machines) {
+      index.byId.set(machine.id, machine);
+      if (machine.machines_group_id) {
+        const group = index.byGroup.get(machine.machines_group_id);
+        group ? group.push(machine) : index.byGroup.set(machine.machines_group_id, [machine]);
+      }
+      if (machine.machine_model_id) {
+        const model = index.byModel.get(machine.machine_model_id);
+        model ? model.push(machine) : index.byModel.set(machine.machine_model_id, [machine]);
+      }
+    }
+    machineIndexes.set(machines, index);
+  }
+  return index;
+}
+
+/**
+ * True when the list carries group membership (loaded with include_machines_group)
+ */
+export function hasGroupMembership(machines: MachineInfo[]): boolean {
+  return machines.some(m => m.machines_group_id !== undefined);
+}
+
+/**
+ * Machines belonging to any of the given groups and/or models, looked up in
+ * the indexes. Without filters the whole list is returned.
+ */
+export function filterMachines(
+  machines: MachineInfo[],
+  filter: { machine_groups_ids?: string[]; machine_model_ids?: string[] }
+): MachineInfo[] {
+  const index = getMachineIndex(machines);
+  let result = machines;
+  if (filter.machine_groups_ids?.length) {
+    result = filter.machine_groups_ids.flatMap(id => index.byGroup.get(id) ?? []);
+  }
+  if (filter.machine_model_ids?.length) {
+    if (result === machines) {
+      result = filter.machine_model_ids.flatMap(id => index.byModel.get(id) ?? []);
+    } else {
+      const models = new Set(filter.machine_model_ids);
+      result = result.filter(m => m.machine_model_id !== undefined && models.has(m.machine_model_id));
+    }
+  }
+  return result;
+}
+
 /**
  * Find a machine by name, serial, or ID with fuzzy matching
  * 
@@ -188,22 +315,26 @@ export function getMachinesSummary(machines: MachineInfo[]): string {
 }
 
 /**
- * Clear the machine cache (useful for testing or manual refresh)
+ * Clear the machine cache of every token (useful for testing or manual refresh)
  */
 export function clearMachineCache(): void {
-  machineCache = null;
+  machineCaches.clear();
   console.log('[MachineContext] 🗑️  Cache cleared');
 }
 
 /**
- * Get cache info (for debugging)
+ * Get cache info (for debugging), for a token or the most recently loaded one
  */
-export function getCacheInfo(): { 
+export function getCacheInfo(auth_token?: string): { 
   cached: boolean; 
   machines: number; 
+  groups: number;
   age_seconds: number;
   expires_in_seconds: number;
 } | null {
+  const machineCache = auth_token
+    ? machineCaches.get(metadataIdentity(auth_token))
+    : Array.from(machineCaches.values()).pop();
   if (!machineCache) {
     return null;
   }
@@ -214,6 +345,7 @@ export function getCacheInfo(): {
   return {
     cached: true,
     machines: machineCache.machines.length,
+    groups: getMachineIndex(machineCache.machines).byGroup.size,
     age_seconds: Math.floor(ageMs / 1000),
     expires_in_seconds: Math.floor(Math.max(0, expiresInMs) / 1000)
   };
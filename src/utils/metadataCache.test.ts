@@ -0,0 +1,74 @@
+import { describe, it, expect, vi, afterEach } from 'vitest';
+import { mkdtempSync, rmSync } from 'node:fs';
+import { tmpdir } from 'node:os';
+import { join } from 'node:path';
+import jwt from 'jsonwebtoken';
+import { cachedMetadata, openMetadataCache, closeMetadataCache, readPersistedMetadata, persistMetadata, metadataIdentity } from './metadataCache.js';
+
+const SQLITE_MODULE = 'node:sqlite';
+const hasSqlite = await import(SQLITE_MODULE).then(() => true, () => false);
+
+describe('cachedMetadata', () => {
+  afterEach(() => closeMetadataCache());
+
+  it('loads once and shares the load between concurrent callers', async () => {
+    const load = vi.fn().mockResolvedValue('org-1');
+
+    const values = await Promise.all([
+      cachedMetadata('organization', 'token-hash', load),
+      cachedMetadata('organization', 'token-hash', load),
+    ]);
+    const again = await cachedMetadata('organization', 'token-hash', load);
+
+    expect(values).toEqual(['org-1', 'org-1']);
+    expect(again).toBe('org-1');
+    expect(load).toHaveBeenCalledTimes(1);
+  });
+
+  it('does not cache failed loads', async () => {
+    const load = vi.fn()
+      .mockRejectedValueOnce(new Error('upstream down'))
+      .mockResolvedValueOnce({ issuer: 'https://id/realms/demo' });
+
+    await expect(cachedMetadata('oidc', 'demo', load)).rejects.toThrow('upstream down');
+    await expect(cachedMetadata('oidc', 'demo', load)).resolves.toEqual({ issuer: 'https://id/realms/demo' });
+  });
+});
+
+describe('metadataIdentity', () => {
+  const token = (sub: string, jti: string) => jwt.sign({ iss: 'https://auth/realms/demo', sub, jti }, 'secret');
+
+  it('is the same for every token of a user and differs between users', () => {
+    expect(metadataIdentity(token('user-1', 'a'))).toBe(metadataIdentity(token('user-1', 'b')));
+    expect(metadataIdentity(token('user-1', 'a'))).not.toBe(metadataIdentity(token('user-2', 'a')));
+    expect(metadataIdentity('opaque-token')).not.toBe(metadataIdentity('other-opaque-token'));
+  });
+});
+
+describe.skipIf(!hasSqlite)('persistent layer', () => {
+  const dir = mkdtempSync(join(tmpdir(), 'metadata-cache-'));
+  const path = join(dir, 'nested', 'metadata.db');
+
+  afterEach(() => closeMetadataCache());
+
+  it('serves entries written before a restart', async () => {
+    expect(await openMetadataCache(path)).toBe(true);
+    await cachedMetadata('firmware', 'hash|device-1|machine_commands', async () => ({ machine_commands: [{ id: 'c1', name: 'defrost' }] }));
+
+    // A restarted process starts with an empty memory layer
+    await openMetadataCache(path);
+    const load = vi.fn().mockRejectedValue(new Error('should not be called'));
+    const value = await cachedMetadata('firmware', 'hash|device-1|machine_commands', load);
+
+    expect(value).toEqual({ machine_commands: [{ id: 'c1', name: 'defrost' }] });
+    expect(load).not.toHaveBeenCalled();
+  });
+
+  it('never serves expired entries', async () => {
+    await openMetadataCache(path);
+    await persistMetadata('machines', 'hash', { machines: [] }, -1);
+
+    expect(await readPersistedMetadata('machines', 'hash')).toBeNull();
+    rmSync(dir, { recursive: true, force: true });
+  });
+});
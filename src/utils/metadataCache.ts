@@ -0,0 +1,253 @@
+/**
+ * Persistent Metadata Cache
+ *
+ * Slow-changing upstream metadata (OIDC discovery documents, a token's
+ * organization, the machine catalog, firmware variables and commands) is
+ * cached in memory and, when METADATA_CACHE_PATH is set, in a local SQLite
+ * database through node:sqlite (Node.js 22.5+). A redeployed or woken
+ * instance then serves these lookups from disk instead of paying the full
+ * upstream cost for every tenant again. Entries carry an expiry and are
+ * never served past it.
+ *
+ * Keys of per-user entries are built from the user's identity (see
+ * metadataIdentity), which survives token refreshes, so a client coming back
+ * with a new short-lived token after a restart still finds its entries.
+ * Entries are only read on behalf of a bearer token: over HTTP, tokens are
+ * validated with Keycloak before any tool runs. Without METADATA_CACHE_PATH,
+ * or on a Node.js build without node:sqlite, only the in-memory layer is used.
+ *
+ * Expired rows are pruned at startup and periodically while writing, and the
+ * database is capped at METADATA_CACHE_MAX_ROWS rows (oldest removed first).
+ *
+ * Configuration (environment variables):
+ * - METADATA_CACHE_PATH: SQLite database file (default: unset, memory only)
+ * - METADATA_CACHE_MAX_ENTRIES: entries kept in memory (default: 5000)
+ * - METADATA_CACHE_MAX_ROWS: rows kept in the database (default: 20000)
+ */
+
+import { mkdir } from "node:fs/promises";
+import { dirname } from "node:path";
+import jwt from "jsonwebtoken";
+import { hashToken } from "./sessionStore.js";
+
+/** Default lifetime per namespace, in seconds */
+export const METADATA_TTL_SECONDS = {
+  oidc: 60 * 60,
+  organization: 60 * 60,
+  machines: 24 * 60 * 60,
+  firmware: 60 * 60,
+} as const;
+
+export type MetadataNamespace = keyof typeof METADATA_TTL_SECONDS;
+
+const MAX_MEMORY_ENTRIES = Number(process.env.METADATA_CACHE_MAX_ENTRIES) || 5000;
+const MAX_DISK_ROWS = Number(process.env.METADATA_CACHE_MAX_ROWS) || 20000;
+/** Minimum interval between two prunes of the database */
+const PRUNE_INTERVAL_MS = 10 * 60 * 1000;
+// Kept in a variable so the import stays optional for the compiler and older runtimes
+const SQLITE_MODULE = 'node:sqlite';
+
+interface MemoryEntry {
+  value: unknown;
+  expires_at: number;
+}
+
+export interface PersistedMetadata<T> {
+  value: T;
+  stored_at: number;
+  expires_at: number;
+}
+
+const memory = new Map<string, MemoryEntry>();
+const inflight = new Map<string, Promise<unknown>>();
+let database: Promise<any | null> | null = null;
+let persistent = false;
+let lastPruneAt = 0;
+const metrics = { memory_hits: 0, disk_hits: 0, misses: 0, disk_errors: 0, pruned_rows: 0 };
+
+/**
+ * Stable per-user cache key for a bearer token: a hash of the issuer (realm)
+ * and subject of the JWT, the same for every token of the user. Tokens
+ * without them fall back to a hash of the token itself.
+ */
+export function metadataIdentity(auth_token: string): string {
+  const decoded = jwt.decode(auth_token) as jwt.JwtPayload | null;
+  if (decoded?.iss && decoded?.sub) {
+    return hashToken(`${decoded.iss}|${decoded.sub}`)!;
+  }
+  return hashToken(auth_token) ?? 'anonymous';
+}
+
+/**
+ * Remove expired rows, then the oldest rows above MAX_DISK_ROWS
+ */
+function pruneDatabase(db: any, now: number = Date.now()): number {
+  lastPruneAt = now;
+  const expired = db.prepare('DELETE FROM metadata WHERE expires_at <= ?').run(now).changes;
+  const overflow = db.prepare(`DELETE FROM metadata WHERE rowid IN (
+    SELECT rowid FROM metadata ORDER BY stored_at DESC LIMIT -1 OFFSET ?
+  )`).run(MAX_DISK_ROWS).changes;
+  metrics.pruned_rows += Number(expired) + Number(overflow);
+  return Number(expired) + Number(overflow);
+}
+
+async function openDatabase(path: string): Promise<any | null> {
+  if (!path) {
+    return null;
+  }
+  try {
+    const { DatabaseSync } = await import(SQLITE_MODULE);
+    await mkdir(dirname(path), { recursive: true });
+    const db = new DatabaseSync(path);
+    db.exec(`CREATE TABLE IF NOT EXISTS metadata (
+      namespace TEXT NOT NULL,
+      key TEXT NOT NULL,
+      value TEXT NOT NULL,
+      stored_at INTEGER NOT NULL,
+      expires_at INTEGER NOT NULL,
+      PRIMARY KEY (namespace, key)
+    )`);
+    const removed = pruneDatabase(db);
+    persistent = true;
+    console.log(`[MetadataCache] ✅ Persistent cache at ${path} (${removed} expired entries removed)`);
+    return db;
+  } catch (error: any) {
+    console.error(`[MetadataCache] ⚠️  Persistent cache unavailable, using memory only: ${error.message}`);
+    return null;
+  }
+}
+
+function getDatabase(): Promise<any | null> {
+  database ??= openDatabase(process.env.METADATA_CACHE_PATH || '');
+  return database;
+}
+
+/**
+ * Switch the persistent layer to another database file (null: memory only)
+ * and drop the in-memory entries
+ */
+export async function openMetadataCache(path: string | null): Promise<boolean> {
+  await closeMetadataCache();
+  database = openDatabase(path ?? '');
+  return (await database) !== null;
+}
+
+export async function closeMetadataCache(): Promise<void> {
+  const db = database ? await database : null;
+  database = Promise.resolve(null);
+  persistent = false;
+  memory.clear();
+  inflight.clear();
+  try {
+    db?.close();
+  } catch {
+    // already closed
+  }
+}
+
+/**
+ * Read an entry from the persistent layer; expired entries are removed
+ */
+export async function readPersistedMetadata<T>(namespace: MetadataNamespace, key: string): Promise<PersistedMetadata<T> | null> {
+  const db = await getDatabase();
+  if (!db) {
+    return null;
+  }
+  try {
+    const row = db.prepare('SELECT value, stored_at, expires_at FROM metadata WHERE namespace = ? AND key = ?').get(namespace, key);
+    if (!row) {
+      return null;
+    }
+    if (row.expires_at <= Date.now()) {
+      db.prepare('DELETE FROM metadata WHERE namespace = ? AND key = ?').run(namespace, key);
+      return null;
+    }
+    return { value: JSON.parse(row.value), stored_at: row.stored_at, expires_at: row.expires_at };
+  } catch (error: any) {
+    metrics.disk_errors++;
+    console.error(`[MetadataCache] ⚠️  Read failed for ${namespace}: ${error.message}`);
+    return null;
+  }
+}
+
+/**
+ * Write an entry to the persistent layer (no-op when it is disabled)
+ */
+export async function persistMetadata(namespace: MetadataNamespace, key: string, value: unknown, ttlSeconds: number = METADATA_TTL_SECONDS[namespace]): Promise<void> {
+  const db = await getDatabase();
+  if (!db) {
+    return;
+  }
+  try {
+    const now = Date.now();
+    db.prepare('INSERT OR REPLACE INTO metadata (namespace, key, value, stored_at, expires_at) VALUES (?, ?, ?, ?, ?)')
+      .run(namespace, key, JSON.stringify(value), now, now + ttlSeconds * 1000);
+    if (now - lastPruneAt >= PRUNE_INTERVAL_MS) {
+      pruneDatabase(db, now);
+    }
+  } catch (error: any) {
+    metrics.disk_errors++;
+    console.error(`[MetadataCache] ⚠️  Write failed for ${namespace}: ${error.message}`);
+  }
+}
+
+function remember(cacheKey: string, value: unknown, expiresAt: number): void {
+  memory.delete(cacheKey);
+  memory.set(cacheKey, { value, expires_at: expiresAt });
+  if (memory.size > MAX_MEMORY_ENTRIES) {
+    memory.delete(memory.keys().next().value!);
+  }
+}
+
+/**
+ * Return a fresh cached value from memory or disk, or load it once (concurrent
+ * callers share the load) and cache it in both layers. Failed loads are not cached.
+ */
+export async function cachedMetadata<T>(
+  namespace: MetadataNamespace,
+  key: string,
+  load: () => Promise<T>,
+  ttlSeconds: number = METADATA_TTL_SECONDS[namespace]
+): Promise<T> {
+  const cacheKey = `${namespace}|${key}`;
+  const cached = memory.get(cacheKey);
+  if (cached && cached.expires_at > Date.now()) {
+    metrics.memory_hits++;
+    return cached.value as T;
+  }
+
+  const pending = inflight.get(cacheKey);
+  if (pending) {
+    return pending as Promise<T>;
+  }
+
+  const task = (async () => {
+    const persisted = await readPersistedMetadata<T>(namespace, key);
+    if (persisted) {
+      metrics.disk_hits++;
+      remember(cacheKey, persisted.value, persisted.expires_at);
+      return persisted.value;
+    }
+    metrics.misses++;
+    const value = await load();
+    const expiresAt = Date.now() + ttlSeconds * 1000;
+    remember(cacheKey, value, expiresAt);
+    await persistMetadata(namespace, key, value, ttlSeconds);
+    return value;
+  })();
+  inflight.set(cacheKey, task);
+  try {
+    return await task;
+  } finally {
+    inflight.delete(cacheKey);
+  }
+}
+
+export function getMetadataCacheMetrics() {
+  return {
+    persistent,
+    memory_entries: memory.size,
+    max_disk_rows: MAX_DISK_ROWS,
+    ...metrics,
+  };
+}
@@ -0,0 +1,151 @@
+import { describe, it, expect, vi } from 'vitest';
+import { CircuitOpenError, ResilienceLayer } from './resilience.js';
+
+const BASE_URL = 'https://api.things5.test/v1';
+
+const ok = (config: any, data: any = {}) => ({ data, status: 200, statusText: 'OK', headers: {}, config });
+const httpError = (status: number) => Object.assign(new Error(`Request failed with status code ${status}`), {
+  response: { status, headers: {}, data: { message: 'upstream error' } },
+});
+
+const request = (method: string, path: string) => ({ method, url: `${BASE_URL}${path}`, headers: {} } as any);
+
+// Fast policy for tests: no real backoff, no hedging unless enabled explicitly
+const testPolicy = { backoffBaseMs: 1, backoffMaxMs: 1, hedging: false, breakerThreshold: 3, breakerCooldownMs: 60000 };
+
+describe('ResilienceLayer', () => {
+  it('should apply a per-route timeout when none is set', async () => {
+    const base = vi.fn(async (config: any) => ok(config));
+    const layer = new ResilienceLayer(base, testPolicy);
+
+    await layer.adapter(request('put', '/devices/4f0c2b6e-1d2a-4c3b-9e8f-0a1b2c3d4e5f/machine_commands/9a8b7c6d-5e4f-4a3b-8c2d-1e0f9a8b7c6d/execute'));
+    await layer.adapter(request('get', '/organizations'));
+
+    expect(base.mock.calls[0][0].timeout).toBe(30000);
+    expect(base.mock.calls[1][0].timeout).toBe(layer.policy.readTimeoutMs);
+  });
+
+  it('should retry idempotent GETs on transient failures', async () => {
+    const base = vi.fn()
+      .mockRejectedValueOnce(httpError(503))
+      .mockRejectedValueOnce(Object.assign(new Error('socket hang up'), { code: 'ECONNRESET' }))
+      .mockImplementation(async (config: any) => ok(config, { data: [] }));
+    const layer = new ResilienceLayer(base, testPolicy);
+
+    const response = await layer.adapter(request('get', '/organizations'));
+
+    expect(response.status).toBe(200);
+    expect(base).toHaveBeenCalledTimes(3);
+    expect(layer.metrics().retries).toBe(2);
+  });
+
+  it('should never retry non-idempotent requests', async () => {
+    const base = vi.fn().mockRejectedValue(httpError(503));
+    const layer = new ResilienceLayer(base, testPolicy);
+
+    await expect(layer.adapter(request('post', '/actions/4f0c2b6e-1d2a-4c3b-9e8f-0a1b2c3d4e5f/perform'))).rejects.toThrow('503');
+    expect(base).toHaveBeenCalledTimes(1);
+  });
+
+  it('should not retry client errors', async () => {
+    const base = vi.fn().mockRejectedValue(httpError(404));
+    const layer = new ResilienceLayer(base, testPolicy);
+
+    await expect(layer.adapter(request('get', '/devices/unknown'))).rejects.toThrow('404');
+    expect(base).toHaveBeenCalledTimes(1);
+    expect(layer.metrics().breakers['api.things5.test'].state).toBe('closed');
+  });
+
+  it('should open the breaker after repeated failures and fail fast', async () => {
+    const base = vi.fn().mockRejectedValue(httpError(502));
+    const layer = new ResilienceLayer(base, { ...testPolicy, maxRetries: 0 });
+
+    for (let i = 0; i < 3; i++) {
+      await expect(layer.adapter(request('get', '/organizations'))).rejects.toThrow('502');
+    }
+    await expect(layer.adapter(request('get', '/organizations'))).rejects.toBeInstanceOf(CircuitOpenError);
+
+    expect(base).toHaveBeenCalledTimes(3);
+    const breaker = layer.metrics().breakers['api.things5.test'];
+    expect(breaker.state).toBe('open');
+    expect(breaker.rejected).toBe(1);
+  });
+
+  it('should close the breaker after a successful half-open probe', async () => {
+    const base = vi.fn()
+      .mockRejectedValueOnce(httpError(502))
+      .mockImplementation(async (config: any) => ok(config));
+    const layer = new ResilienceLayer(base, { ...testPolicy, maxRetries: 0, breakerThreshold: 1, breakerCooldownMs: 0 });
+
+    await expect(layer.adapter(request('get', '/organizations'))).rejects.toThrow('502');
+    expect(layer.metrics().breakers['api.things5.test'].state).toBe('open');
+
+    await layer.adapter(request('get', '/organizations'));
+    expect(layer.metrics().breakers['api.things5.test'].state).toBe('closed');
+  });
+
+  it('should free the half-open probe when it is canceled', async () => {
+    const canceled = Object.assign(new Error('canceled'), { code: 'ERR_CANCELED', name: 'CanceledError' });
+    const base = vi.fn()
+      .mockRejectedValueOnce(httpError(502))
+      .mockRejectedValueOnce(canceled)
+      .mockImplementation(async (config: any) => ok(config));
+    const layer = new ResilienceLayer(base, { ...testPolicy, maxRetries: 0, breakerThreshold: 1, breakerCooldownMs: 0 });
+
+    await expect(layer.adapter(request('get', '/organizations'))).rejects.toThrow('502');
+    await expect(layer.adapter(request('get', '/organizations'))).rejects.toThrow('canceled');
+
+    // The canceled probe recorded no outcome: the next request becomes the probe
+    await layer.adapter(request('get', '/organizations'));
+    expect(layer.metrics().breakers['api.things5.test'].state).toBe('closed');
+  });
+
+  it('should neither retry nor count requests rejected by admission control', async () => {
+    const rejected = Object.assign(new Error('Upstream request rejected for realm:a'), { code: 'EADMISSION' });
+    const base = vi.fn().mockRejectedValue(rejected);
+    const layer = new ResilienceLayer(base, { ...testPolicy, breakerThreshold: 1 });
+
+    await expect(layer.adapter(request('get', '/organizations'))).rejects.toBe(rejected);
+
+    expect(base).toHaveBeenCalledTimes(1);
+    expect(layer.metrics().breakers['api.things5.test'].state).toBe('closed');
+  });
+
+  it('should hedge slow reads after the observed p95 latency', async () => {
+    let calls = 0;
+    const base = vi.fn((config: any) => {
+      calls++;
+      // After warm-up, the first copy of a request hangs until cancelled
+      if (calls > 20 && calls % 2 === 1) {
+        return new Promise<any>((_, reject) => {
+          config.signal.addEventListener('abort', () => reject(Object.assign(new Error('canceled'), { code: 'ERR_CANCELED' })));
+        });
+      }
+      return Promise.resolve(ok(config));
+    });
+    const layer = new ResilienceLayer(base, { ...testPolicy, hedging: true, hedgeMinSamples: 20, hedgeMinDelayMs: 5 });
+
+    for (let i = 0; i < 20; i++) {
+      await layer.adapter(request('get', '/organizations'));
+    }
+    const response = await layer.adapter(request('get', '/organizations'));
+
+    expect(response.status).toBe(200);
+    expect(layer.metrics().hedges_launched).toBe(1);
+    expect(layer.metrics().hedges_won).toBe(1);
+  });
+
+  it('should remove its abort listener from the caller signal once a hedged read settles', async () => {
+    const base = vi.fn(async (config: any) => ok(config));
+    const layer = new ResilienceLayer(base, { ...testPolicy, hedging: true, hedgeMinSamples: 1, hedgeMinDelayMs: 5 });
+    const outer = new AbortController();
+    const add = vi.spyOn(outer.signal, 'addEventListener');
+    const remove = vi.spyOn(outer.signal, 'removeEventListener');
+
+    await layer.adapter(request('get', '/organizations'));
+    await layer.adapter({ ...request('get', '/organizations'), signal: outer.signal });
+
+    expect(add).toHaveBeenCalledWith('abort', expect.any(Function), { once: true });
+    expect(remove).toHaveBeenCalledWith('abort', add.mock.calls[0][1]);
+  });
+});
@@ -0,0 +1,440 @@
+/**
+ * Upstream Resilience Layer
+ *
+ * Wraps the axios adapter used by every tool so upstream calls get:
+ * - per-route timeouts (no request can hang indefinitely)
+ * - bounded retries with jittered exponential backoff, for idempotent GETs only
+ * - hedged duplicate requests after the route's observed p95 latency (reads only)
+ * - per-host circuit breakers that fail fast while the host is unhealthy
+ *
+ * Breaker state and counters are exposed through getResilienceMetrics().
+ *
+ * Configuration (environment variables):
+ * - UPSTREAM_TIMEOUT_MS: default timeout for reads (default: 10000)
+ * - UPSTREAM_WRITE_TIMEOUT_MS: default timeout for writes (default: 15000)
+ * - UPSTREAM_MAX_RETRIES: retries for idempotent requests (default: 2)
+ * - UPSTREAM_HEDGING: "false" disables hedged reads (default: enabled)
+ * - UPSTREAM_BREAKER_THRESHOLD: consecutive failures that open a breaker (default: 5)
+ * - UPSTREAM_BREAKER_COOLDOWN_MS: time before a half-open probe (default: 30000)
+ */
+
+import axios, { AxiosAdapter, AxiosResponse, InternalAxiosRequestConfig } from "axios";
+import { routeTemplate } from "./tracing.js";
+
+export type BreakerState = 'closed' | 'open' | 'half_open';
+
+export interface RouteTimeout {
+  method?: string;
+  route: RegExp;
+  timeoutMs: number;
+}
+
+export interface ResiliencePolicy {
+  readTimeoutMs: number;
+  writeTimeoutMs: number;
+  routeTimeouts: RouteTimeout[];
+  maxRetries: number;
+  backoffBaseMs: number;
+  backoffMaxMs: number;
+  hedging: boolean;
+  hedgeMinSamples: number;
+  hedgeMinDelayMs: number;
+  breakerThreshold: number;
+  breakerCooldownMs: number;
+}
+
+export interface BreakerMetrics {
+  state: BreakerState;
+  consecutive_failures: number;
+  total_failures: number;
+  total_successes: number;
+  rejected: number;
+  opened_at: string | null;
+}
+
+export interface ResilienceMetrics {
+  breakers: Record<string, BreakerMetrics>;
+  retries: number;
+  timeouts: number;
+  hedges_launched: number;
+  hedges_won: number;
+}
+
+/**
+ * Error raised without contacting the host while its breaker is open
+ */
+export class CircuitOpenError extends Error {
+  code = 'ECIRCUITOPEN';
+
+  constructor(public host: string, retryInMs: number) {
+    super(`Upstream ${host} is temporarily unavailable (circuit open, retry in ${Math.ceil(retryInMs / 1000)}s)`);
+    this.name = 'CircuitOpenError';
+  }
+}
+
+const IDEMPOTENT_METHODS = new Set(['get', 'head', 'options']);
+const RETRYABLE_CODES = new Set(['ECONNRESET', 'ECONNREFUSED', 'ECONNABORTED', 'ETIMEDOUT', 'EPIPE', 'EAI_AGAIN', 'ERR_NETWORK']);
+const LATENCY_SAMPLES = 100;
+
+export const DEFAULT_POLICY: ResiliencePolicy = {
+  readTimeoutMs: Number(process.env.UPSTREAM_TIMEOUT_MS) || 10000,
+  writeTimeoutMs: Number(process.env.UPSTREAM_WRITE_TIMEOUT_MS) || 15000,
+  routeTimeouts: [
+    // Commands and actions wait for the device to acknowledge
+    { method: 'put', route: /\/machine_commands\/\{id\}\/execute$/, timeoutMs: 30000 },
+    { method: 'post', route: /\/actions\/\{id\}\/perform$/, timeoutMs: 30000 },
+    // Wide historical and fleet-level queries
+    { method: 'get', route: /\/metrics\/aggregated$/, timeoutMs: 20000 },
+    { method: 'get', route: /\/overview\/(events|alarms)$/, timeoutMs: 20000 },
+  ],
+  maxRetries: process.env.UPSTREAM_MAX_RETRIES !== undefined ? Number(process.env.UPSTREAM_MAX_RETRIES) : 2,
+  backoffBaseMs: 200,
+  backoffMaxMs: 2000,
+  hedging: process.env.UPSTREAM_HEDGING !== 'false',
+  hedgeMinSamples: 20,
+  hedgeMinDelayMs: 50,
+  breakerThreshold: Number(process.env.UPSTREAM_BREAKER_THRESHOLD) || 5,
+  breakerCooldownMs: Number(process.env.UPSTREAM_BREAKER_COOLDOWN_MS) || 30000,
+};
+
+class CircuitBreaker {
+  state: BreakerState = 'closed';
+  consecutiveFailures = 0;
+  totalFailures = 0;
+  totalSuccesses = 0;
+  rejected = 0;
+  openedAt = 0;
+  private probeInFlight = false;
+  private probeId = 0;
+
+  constructor(private host: string, private threshold: number, private cooldownMs: number) {}
+
+  /**
+   * Throws CircuitOpenError when the request must not reach the host.
+   * Returns the probe id when the request is the half-open probe, else null.
+   */
+  acquire(): number | null {
+    if (this.state === 'open') {
+      const elapsed = Date.now() - this.openedAt;
+      if (elapsed < this.cooldownMs) {
+        this.rejected++;
+        throw new CircuitOpenError(this.host, this.cooldownMs - elapsed);
+      }
+      this.state = 'half_open';
+      console.log(`[Resilience] 🟡 Circuit half-open for ${this.host}, probing`);
+    }
+    if (this.state === 'half_open') {
+      if (this.probeInFlight) {
+        this.rejected++;
+        throw new CircuitOpenError(this.host, 0);
+      }
+      this.probeInFlight = true;
+      return ++this.probeId;
+    }
+    return null;
+  }
+
+  /**
+   * Free the probe slot of a request that ended without recording an outcome
+   * (e.g. canceled). No-op once an outcome was recorded or another probe started.
+   */
+  release(probe: number | null): void {
+    if (probe !== null && probe === this.probeId) {
+      this.probeInFlight = false;
+    }
+  }
+
+  onSuccess(): void {
+    this.totalSuccesses++;
+    this.consecutiveFailures = 0;
+    this.probeInFlight = false;
+    if (this.state !== 'closed') {
+      console.log(`[Resilience] 🟢 Circuit closed for ${this.host}`);
+      this.state = 'closed';
+    }
+  }
+
+  onFailure(): void {
+    this.totalFailures++;
+    this.consecutiveFailures++;
+    this.probeInFlight = false;
+    if (this.state === 'half_open' || this.consecutiveFailures >= this.threshold) {
+      if (this.state !== 'open') {
+        console.error(`[Resilience] 🔴 Circuit opened for ${this.host} after ${this.consecutiveFailures} failures`);
+      }
+      this.state = 'open';
+      this.openedAt = Date.now();
+    }
+  }
+
+  metrics(): BreakerMetrics {
+    return {
+      state: this.state,
+      consecutive_failures: this.consecutiveFailures,
+      total_failures: this.totalFailures,
+      total_successes: this.totalSuccesses,
+      rejected: this.rejected,
+      opened_at: this.state === 'closed' ? null : new Date(this.openedAt).toISOString(),
+    };
+  }
+}
+
+class LatencyTracker {
+  private samples: number[] = [];
+  private cursor = 0;
+  private cachedP95: number | null = null;
+  private recordedSinceCache = 0;
+
+  record(ms: number): void {
+    if (this.samples.length < LATENCY_SAMPLES) {
+      this.samples.push(ms);
+    } else {
+      this.samples[this.cursor] = ms;
+      this.cursor = (this.cursor + 1) % LATENCY_SAMPLES;
+    }
+    if (++this.recordedSinceCache >= 10) {
+      this.cachedP95 = null;
+    }
+  }
+
+  count(): number {
+    return this.samples.length;
+  }
+
+  p95(): number {
+    if (this.cachedP95 === null) {
+      const sorted = [...this.samples].sort((a, b) => a - b);
+      this.cachedP95 = sorted[Math.min(sorted.length - 1, Math.floor(sorted.length * 0.95))] ?? 0;
+      this.recordedSinceCache = 0;
+    }
+    return this.cachedP95;
+  }
+}
+
+function isCanceled(error: any): boolean {
+  return error?.code === 'ERR_CANCELED' || error?.name === 'CanceledError';
+}
+
+function isTimeout(error: any): boolean {
+  return error?.code === 'ECONNABORTED' || error?.code === 'ETIMEDOUT';
+}
+
+/**
+ * Transient failures that say something about the host's health
+ */
+function isRetryable(error: any): boolean {
+  // Canceled, or not admitted for the tenant (see admission.ts): the request never reached the host
+  if (isCanceled(error) || error?.code === 'EADMISSION') return false;
+  const status = error?.response?.status;
+  if (typeof status === 'number') {
+    return status === 429 || (status >= 500 && status !== 501);
+  }
+  return RETRYABLE_CODES.has(error?.code) || !error?.response;
+}
+
+function requestUrl(config: InternalAxiosRequestConfig): string {
+  const url = config.url || '';
+  try {
+    return new URL(url, config.baseURL).toString();
+  } catch {
+    return url;
+  }
+}
+
+function hostOf(url: string): string {
+  try {
+    return new URL(url).host;
+  } catch {
+    return 'unknown';
+  }
+}
+
+const sleep = (ms: number) => new Promise(resolve => setTimeout(resolve, ms));
+
+export class ResilienceLayer {
+  private breakers = new Map<string, CircuitBreaker>();
+  private latencies = new Map<string, LatencyTracker>();
+  private counters = { retries: 0, timeouts: 0, hedges_launched: 0, hedges_won: 0 };
+  readonly policy: ResiliencePolicy;
+
+  constructor(private baseAdapter: AxiosAdapter, policy: Partial<ResiliencePolicy> = {}) {
+    this.policy = { ...DEFAULT_POLICY, ...policy };
+  }
+
+  /** Axios adapter applying the resilience policy around the base adapter */
+  adapter: AxiosAdapter = async (config) => {
+    const url = requestUrl(config);
+    const host = hostOf(url);
+    const route = routeTemplate(url);
+    const method = (config.method || 'get').toLowerCase();
+    const idempotent = IDEMPOTENT_METHODS.has(method);
+    const breaker = this.breakerFor(host);
+
+    if (!config.timeout) {
+      config.timeout = this.timeoutFor(method, route);
+    }
+    const maxAttempts = idempotent ? 1 + this.policy.maxRetries : 1;
+
+    for (let attempt = 0; ; attempt++) {
+      let probe: number | null = null;
+      try {
+        probe = breaker.acquire();
+      } catch (error: any) {
+        // Keep the request config on the error like axios does, for interceptors
+        error.config = config;
+        throw error;
+      }
+      const started = Date.now();
+      try {
+        const hedgeDelay = idempotent ? this.hedgeDelay(route) : null;
+        const response = hedgeDelay !== null
+          ? await this.hedged(config, hedgeDelay)
+          : await this.baseAdapter(config);
+        this.latencyFor(route).record(Date.now() - started);
+        breaker.onSuccess();
+        return response;
+      } catch (error: any) {
+        if (isTimeout(error)) this.counters.timeouts++;
+        const retryable = isRetryable(error);
+        if (retryable && error?.response?.status !== 429) {
+          breaker.onFailure();
+        } else if (error?.response) {
+          // 4xx (including rate limiting): the host answered, it is healthy
+          breaker.onSuccess();
+        }
+        if (!retryable || attempt + 1 >= maxAttempts) {
+          throw error;
+        }
+        this.counters.retries++;
+        const delay = this.backoff(attempt, error);
+        console.log(`[Resilience] 🔁 Retrying ${method.toUpperCase()} ${route} in ${delay}ms (attempt ${attempt + 2}/${maxAttempts})`);
+        await sleep(delay);
+      } finally {
+        breaker.release(probe);
+      }
+    }
+  };
+
+  metrics(): ResilienceMetrics {
+    const breakers: Record<string, BreakerMetrics> = {};
+    for (const [host, breaker] of this.breakers) {
+      breakers[host] = breaker.metrics();
+    }
+    return { breakers, ...this.counters };
+  }
+
+  private breakerFor(host: string): CircuitBreaker {
+    let breaker = this.breakers.get(host);
+    if (!breaker) {
+      breaker = new CircuitBreaker(host, this.policy.breakerThreshold, this.policy.breakerCooldownMs);
+      this.breakers.set(host, breaker);
+    }
+    return breaker;
+  }
+
+  private latencyFor(route: string): LatencyTracker {
+    let tracker = this.latencies.get(route);
+    if (!tracker) {
+      tracker = new LatencyTracker();
+      this.latencies.set(route, tracker);
+    }
+    return tracker;
+  }
+
+  private timeoutFor(method: string, route: string): number {
+    const match = this.policy.routeTimeouts.find(t => (!t.method || t.method === method) && t.route.test(route));
+    if (match) return match.timeoutMs;
+    return IDEMPOTENT_METHODS.has(method) ? this.policy.readTimeoutMs : this.policy.writeTimeoutMs;
+  }
+
+  private hedgeDelay(route: string): number | null {
+    if (!this.policy.hedging) return null;
+    const tracker = this.latencies.get(route);
+    if (!tracker || tracker.count() < this.policy.hedgeMinSamples) return null;
+    return Math.max(this.policy.hedgeMinDelayMs, tracker.p95());
+  }
+
+  // Full jitter: random delay in [0, min(max, base * 2^attempt)], honouring Retry-After
+  private backoff(attempt: number, error: any): number {
+    const ceiling = Math.min(this.policy.backoffMaxMs, this.policy.backoffBaseMs * 2 ** attempt);
+    const retryAfter = Number(error?.response?.headers?.['retry-after']);
+    if (Number.isFinite(retryAfter) && retryAfter > 0) {
+      return Math.min(this.policy.backoffMaxMs, retryAfter * 1000);
+    }
+    return Math.floor(Math.random() * ceiling);
+  }
+
+  /**
+   * Send the request; if it has not completed after `delayMs`, send a
+   * duplicate and take whichever answers first, cancelling the other.
+   */
+  private hedged(config: InternalAxiosRequestConfig, delayMs: number): Promise<AxiosResponse> {
+    const controllers = [new AbortController(), new AbortController()];
+    const outer = config.signal as AbortSignal | undefined;
+    const abortAll = () => controllers.forEach(c => c.abort());
+    outer?.addEventListener?.('abort', abortAll, { once: true });
+
+    return new Promise<AxiosResponse>((resolve, reject) => {
+      let settled = false;
+      let launched = 1;
+      let failed = 0;
+      let timer: NodeJS.Timeout | null = null;
+
+      const attempt = (index: number) => {
+        this.baseAdapter({ ...config, signal: controllers[index].signal }).then(
+          (response) => {
+            if (settled) return;
+            settled = true;
+            if (timer) clearTimeout(timer);
+            if (index === 1) this.counters.hedges_won++;
+            controllers.forEach((c, i) => i !== index && c.abort());
+            resolve(response);
+          },
+          (error) => {
+            failed++;
+            if (settled) return;
+            // Before the hedge is sent, a failure is final for this attempt
+            if (failed >= launched) {
+              settled = true;
+              if (timer) clearTimeout(timer);
+              reject(error);
+            }
+          }
+        );
+      };
+
+      attempt(0);
+      timer = setTimeout(() => {
+        timer = null;
+        if (settled) return;
+        launched = 2;
+        this.counters.hedges_launched++;
+        attempt(1);
+      }, delayMs);
+    }).finally(() => {
+      // Long-lived caller signals must not collect one listener per request
+      outer?.removeEventListener?.('abort', abortAll);
+    });
+  }
+}
+
+let installedLayer: ResilienceLayer | null = null;
+
+/**
+ * Install the resilience layer on the default axios instance used by all tools
+ */
+export function installResilience(instance: typeof axios = axios, policy: Partial<ResiliencePolicy> = {}): void {
+  if (installedLayer || typeof instance?.getAdapter !== 'function') {
+    return;
+  }
+  const baseAdapter = instance.getAdapter(instance.defaults.adapter);
+  installedLayer = new ResilienceLayer(baseAdapter, policy);
+  instance.defaults.adapter = installedLayer.adapter;
+}
+
+/**
+ * Snapshot of breaker states and retry/hedge/timeout counters
+ */
+export function getResilienceMetrics(): ResilienceMetrics | null {
+  return installedLayer ? installedLayer.metrics() : null;
+}
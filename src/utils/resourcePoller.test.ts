@@ -0,0 +1,74 @@
+import { describe, it, expect, vi } from 'vitest';
+import { ResourcePoller, PollTarget } from './resourcePoller.js';
+
+function target(values: string[][]): PollTarget<string[]> & { calls: string[] } {
+  const calls: string[] = [];
+  let index = 0;
+  return {
+    uri: 'things5://org/org-1/machines',
+    calls,
+    fetch: async (auth_token) => {
+      calls.push(auth_token);
+      return values[Math.min(index++, values.length - 1)];
+    },
+    fingerprint: (data) => JSON.stringify(data),
+  };
+}
+
+describe('ResourcePoller', () => {
+  it('polls once per resource for all subscribers and notifies only on changes', async () => {
+    const poller = new ResourcePoller(60_000);
+    const source = target([['a'], ['a'], ['a', 'b']]);
+    const notifyA = vi.fn().mockResolvedValue(undefined);
+    const notifyB = vi.fn().mockResolvedValue(undefined);
+
+    poller.subscribe(source, 'session-a', 'token-a', notifyA, ['a']);
+    poller.subscribe(source, 'session-b', 'token-b', notifyB);
+
+    await poller.poll(source.uri);
+    expect(notifyA).not.toHaveBeenCalled();
+
+    await poller.poll(source.uri);
+    await poller.poll(source.uri);
+    expect(source.calls).toHaveLength(3);
+    expect(notifyA).toHaveBeenCalledWith(source.uri);
+    expect(notifyB).toHaveBeenCalledTimes(1);
+    expect(poller.metrics()).toMatchObject({ topics: 1, subscribers: 2, changes: 1 });
+
+    poller.unsubscribeAll('session-a');
+    poller.unsubscribeAll('session-b');
+    expect(poller.metrics().topics).toBe(0);
+  });
+
+  it('drops subscribers whose token is rejected and retries with another one', async () => {
+    const poller = new ResourcePoller(60_000);
+    const tokens: string[] = [];
+    const source: PollTarget<string[]> = {
+      uri: 'things5://org/org-1/alarms',
+      fetch: async (auth_token) => {
+        tokens.push(auth_token);
+        if (auth_token === 'expired') throw Object.assign(new Error('Unauthorized'), { response: { status: 401 } });
+        return [];
+      },
+      fingerprint: (data) => JSON.stringify(data),
+    };
+
+    poller.subscribe(source, 'old', 'valid', vi.fn(), []);
+    poller.subscribe(source, 'new', 'expired', vi.fn());
+    await poller.poll(source.uri);
+
+    expect(tokens).toEqual(['expired', 'valid']);
+    expect(poller.metrics().subscribers).toBe(1);
+    poller.unsubscribeAll('old');
+  });
+
+  it('unsubscribes sessions whose notification fails', async () => {
+    const poller = new ResourcePoller(60_000);
+    const source = target([['a'], ['b']]);
+
+    poller.subscribe(source, 'closed', 'token', vi.fn().mockRejectedValue(new Error('Not connected')), ['a']);
+    await poller.poll(source.uri);
+
+    expect(poller.metrics().topics).toBe(0);
+  });
+});
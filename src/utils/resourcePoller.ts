@@ -0,0 +1,175 @@
+/**
+ * Shared Resource Poller
+ *
+ * Backs MCP resource subscriptions with a single background poll per
+ * resource URI (the URI includes the organization), no matter how many
+ * sessions are subscribed to it. Each poll result is reduced to a
+ * fingerprint, and subscribers are only sent `notifications/resources/updated`
+ * when the fingerprint changes.
+ *
+ * Notifications only carry the URI: subscribers read the new content with
+ * their own token, so polled data is never handed to another identity.
+ *
+ * Configuration (environment variables):
+ * - RESOURCE_POLL_INTERVAL_MS: poll interval per subscribed resource (default: 30000)
+ */
+
+export const RESOURCE_POLL_INTERVAL_MS = Number(process.env.RESOURCE_POLL_INTERVAL_MS) || 30000;
+
+export interface PollTarget<T = unknown> {
+  uri: string;
+  /** Read the current state of the resource with the given token */
+  fetch: (auth_token: string) => Promise<T>;
+  /** Reduce the state to the part whose changes subscribers care about */
+  fingerprint: (data: T) => string;
+}
+
+interface Subscriber {
+  auth_token: string;
+  notify: (uri: string) => Promise<void>;
+}
+
+interface Topic {
+  target: PollTarget<any>;
+  subscribers: Map<string, Subscriber>;
+  timer: NodeJS.Timeout;
+  fingerprint: string | null;
+  polling: boolean;
+  changes: number;
+  errors: number;
+}
+
+export interface ResourcePollerMetrics {
+  interval_ms: number;
+  /** resources currently polled (one per organization and resource kind) */
+  topics: number;
+  subscribers: number;
+  changes: number;
+  errors: number;
+}
+
+export class ResourcePoller {
+  private topics = new Map<string, Topic>();
+
+  constructor(private intervalMs: number = RESOURCE_POLL_INTERVAL_MS) {}
+
+  /**
+   * Subscribe to a resource. `initialData`, when given, is used as the
+   * baseline of a new topic so the first poll does not fire a notification.
+   */
+  subscribe<T>(target: PollTarget<T>, subscriberId: string, auth_token: string, notify: (uri: string) => Promise<void>, initialData?: T): void {
+    let topic = this.topics.get(target.uri);
+    if (!topic) {
+      const timer = setInterval(() => void this.poll(target.uri), this.intervalMs);
+      timer.unref();
+      topic = {
+        target,
+        subscribers: new Map(),
+        timer,
+        fingerprint: initialData !== undefined ? target.fingerprint(initialData) : null,
+        polling: false,
+        changes: 0,
+        errors: 0,
+      };
+      this.topics.set(target.uri, topic);
+      console.error(`[ResourcePoller] Polling ${target.uri} every ${this.intervalMs}ms`);
+    }
+    // Re-inserting keeps the most recent subscriber (freshest token) last
+    topic.subscribers.delete(subscriberId);
+    topic.subscribers.set(subscriberId, { auth_token, notify });
+  }
+
+  unsubscribe(uri: string, subscriberId: string): void {
+    const topic = this.topics.get(uri);
+    if (!topic) return;
+    topic.subscribers.delete(subscriberId);
+    if (topic.subscribers.size === 0) {
+      clearInterval(topic.timer);
+      this.topics.delete(uri);
+      console.error(`[ResourcePoller] Stopped polling ${uri}`);
+    }
+  }
+
+  /**
+   * Drop every subscription of a subscriber (e.g. when its session closes)
+   */
+  unsubscribeAll(subscriberId: string): void {
+    for (const uri of Array.from(this.topics.keys())) {
+      this.unsubscribe(uri, subscriberId);
+    }
+  }
+
+  /**
+   * Poll a resource once and notify subscribers if it changed
+   */
+  async poll(uri: string): Promise<void> {
+    const topic = this.topics.get(uri);
+    if (!topic || topic.polling) return;
+    topic.polling = true;
+
+    try {
+      const data = await this.fetchWithAnyToken(topic);
+      if (data === undefined) return;
+
+      const fingerprint = topic.target.fingerprint(data);
+      if (topic.fingerprint === null) {
+        topic.fingerprint = fingerprint;
+        return;
+      }
+      if (fingerprint === topic.fingerprint) return;
+
+      topic.fingerprint = fingerprint;
+      topic.changes++;
+      const subscribers = Array.from(topic.subscribers.entries());
+      const results = await Promise.allSettled(subscribers.map(([, subscriber]) => subscriber.notify(uri)));
+      results.forEach((result, i) => {
+        if (result.status === 'rejected') {
+          // The session is gone or its transport is broken
+          this.unsubscribe(uri, subscribers[i][0]);
+        }
+      });
+    } finally {
+      topic.polling = false;
+    }
+  }
+
+  // Newest subscriber first; fall back to older ones when a token was rejected
+  private async fetchWithAnyToken(topic: Topic): Promise<unknown> {
+    const subscribers = Array.from(topic.subscribers.entries()).reverse();
+    for (const [subscriberId, subscriber] of subscribers) {
+      try {
+        return await topic.target.fetch(subscriber.auth_token);
+      } catch (error: any) {
+        topic.errors++;
+        const status = error?.response?.status;
+        if (status === 401 || status === 403) {
+          console.error(`[ResourcePoller] ⚠️  Token of ${subscriberId} rejected for ${topic.target.uri}, dropping subscriber`);
+          this.unsubscribe(topic.target.uri, subscriberId);
+          continue;
+        }
+        console.error(`[ResourcePoller] ❌ Failed to poll ${topic.target.uri}:`, error?.message);
+        return undefined;
+      }
+    }
+    return undefined;
+  }
+
+  // Aggregated only: topic URIs contain organization ids
+  metrics(): ResourcePollerMetrics {
+    const topics = Array.from(this.topics.values());
+    return {
+      interval_ms: this.intervalMs,
+      topics: topics.length,
+      subscribers: topics.reduce((sum, topic) => sum + topic.subscribers.size, 0),
+      changes: topics.reduce((sum, topic) => sum + topic.changes, 0),
+      errors: topics.reduce((sum, topic) => sum + topic.errors, 0),
+    };
+  }
+}
+
+/** Poller shared by every session of the process */
+export const resourcePoller = new ResourcePoller();
+
+export function getResourcePollerMetrics(): ResourcePollerMetrics {
+  return resourcePoller.metrics();
+}
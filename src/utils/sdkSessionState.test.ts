@@ -0,0 +1,93 @@
+import { describe, it, expect, afterEach } from 'vitest';
+import http from 'node:http';
+import { AddressInfo } from 'node:net';
+import { Server } from '@modelcontextprotocol/sdk/server/index.js';
+import { StreamableHTTPServerTransport } from '@modelcontextprotocol/sdk/server/streamableHttp.js';
+import { ListToolsRequestSchema } from '@modelcontextprotocol/sdk/types.js';
+import { restoreInitializedSession, SDK_SERVER_FIELDS, SDK_TRANSPORT_FIELDS } from './sdkSessionState.js';
+
+const SESSION_ID = '5b0f7a4e-3c9d-4e1a-8f2b-6d7c8e9f0a1b';
+const CLIENT_CAPABILITIES = { sampling: {} };
+const CLIENT_INFO = { name: 'openai-mcp', version: '1.0.0' };
+
+function makePair() {
+  const server = new Server({ name: 'test', version: '0.0.0' }, { capabilities: { tools: {} } });
+  server.setRequestHandler(ListToolsRequestSchema, async () => ({ tools: [] }));
+  const transport = new StreamableHTTPServerTransport({
+    sessionIdGenerator: () => SESSION_ID,
+    enableJsonResponse: true,
+  });
+  return { server, transport };
+}
+
+let httpServer: http.Server | undefined;
+
+async function listen(transport: StreamableHTTPServerTransport): Promise<string> {
+  httpServer = http.createServer((req, res) => { void transport.handleRequest(req, res); });
+  await new Promise<void>((resolve) => httpServer!.listen(0, '127.0.0.1', resolve));
+  return `http://127.0.0.1:${(httpServer.address() as AddressInfo).port}/mcp`;
+}
+
+function post(url: string, body: unknown, sessionId?: string) {
+  return fetch(url, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+      Accept: 'application/json, text/event-stream',
+      ...(sessionId ? { 'mcp-session-id': sessionId } : {}),
+    },
+    body: JSON.stringify(body),
+  });
+}
+
+describe('sdkSessionState', () => {
+  afterEach(async () => {
+    if (httpServer) await new Promise((resolve) => httpServer!.close(resolve));
+    httpServer = undefined;
+  });
+
+  it('matches the private fields the SDK sets during the initialize handshake', async () => {
+    // Fails when an SDK upgrade renames the fields restoreInitializedSession writes
+    const { server, transport } = makePair();
+    await server.connect(transport);
+    const url = await listen(transport);
+
+    const response = await post(url, {
+      jsonrpc: '2.0',
+      id: 1,
+      method: 'initialize',
+      params: { protocolVersion: '2025-03-26', capabilities: CLIENT_CAPABILITIES, clientInfo: CLIENT_INFO },
+    });
+    expect(response.status).toBe(200);
+
+    const sdkTransport = transport as any;
+    const sdkServer = server as any;
+    for (const field of SDK_TRANSPORT_FIELDS) {
+      expect(sdkTransport).toHaveProperty(field);
+    }
+    for (const field of SDK_SERVER_FIELDS) {
+      expect(sdkServer).toHaveProperty(field);
+    }
+    expect(sdkTransport.sessionId).toBe(SESSION_ID);
+    expect(sdkTransport._initialized).toBe(true);
+    expect(sdkServer._clientCapabilities).toEqual(CLIENT_CAPABILITIES);
+    expect(sdkServer._clientVersion).toEqual(CLIENT_INFO);
+  });
+
+  it('lets a fresh transport serve requests for a restored session', async () => {
+    const { server, transport } = makePair();
+    await server.connect(transport);
+    restoreInitializedSession(transport, server, {
+      sessionId: SESSION_ID,
+      client_capabilities: CLIENT_CAPABILITIES,
+      client_info: CLIENT_INFO,
+    });
+    const url = await listen(transport);
+
+    const response = await post(url, { jsonrpc: '2.0', id: 2, method: 'tools/list' }, SESSION_ID);
+    expect(response.status).toBe(200);
+    expect((await response.json()).result).toEqual({ tools: [] });
+    expect(server.getClientCapabilities()).toEqual(CLIENT_CAPABILITIES);
+    expect(server.getClientVersion()).toEqual(CLIENT_INFO);
+  });
+});
@@ -0,0 +1,40 @@
+/**
+ * MCP SDK Session State
+ *
+ * Rehydrating a stored session means recreating, on a fresh server and
+ * transport, the state normally established by the initialize handshake.
+ * The SDK keeps that state in private fields and offers no public API to
+ * restore it, so every write to SDK internals lives here. The field names
+ * are checked by sdkSessionState.test.ts against the installed SDK, and the
+ * SDK version range is pinned in package.json.
+ */
+
+import type { Server } from "@modelcontextprotocol/sdk/server/index.js";
+import type { StreamableHTTPServerTransport } from "@modelcontextprotocol/sdk/server/streamableHttp.js";
+
+/** Private SDK fields written when restoring a session */
+export const SDK_TRANSPORT_FIELDS = ['sessionId', '_initialized'] as const;
+export const SDK_SERVER_FIELDS = ['_clientCapabilities', '_clientVersion'] as const;
+
+export interface InitializedSessionState {
+  sessionId: string;
+  client_capabilities?: Record<string, unknown>;
+  client_info?: { name: string; version: string };
+}
+
+/**
+ * Mark a connected transport/server pair as if the client had just completed
+ * the initialize handshake for the given session
+ */
+export function restoreInitializedSession(
+  transport: StreamableHTTPServerTransport,
+  server: Server,
+  state: InitializedSessionState
+): void {
+  const sdkTransport = transport as any;
+  const sdkServer = server as any;
+  sdkTransport.sessionId = state.sessionId;
+  sdkTransport._initialized = true;
+  sdkServer._clientCapabilities = state.client_capabilities;
+  sdkServer._clientVersion = state.client_info;
+}
@@ -0,0 +1,118 @@
+import { describe, it, expect, vi, beforeEach } from 'vitest';
+import jwt from 'jsonwebtoken';
+
+// The cache is disabled unless given a budget
+vi.hoisted(() => { process.env.SERIES_CACHE_MAX_BYTES = String(32 * 1024 * 1024); });
+
+import { readSeriesCached, uncoveredRanges, clearSeriesCache, seriesScope, isSeriesCacheable } from './seriesCache.js';
+import { TimeWindow } from './timeWindows.js';
+
+const HOUR = 60 * 60 * 1000;
+
+/** Upstream stub: one row per variable per hour in the requested range */
+function hourlyUpstream() {
+  return vi.fn(async (range: TimeWindow, names?: string[]) => {
+    const data: any[] = [];
+    for (let t = Math.ceil(Date.parse(range.from) / HOUR) * HOUR; t <= Date.parse(range.to); t += HOUR) {
+      for (const name of names ?? ['temperature', 'pressure']) {
+        data.push({ name, value: t / HOUR, timestamp: new Date(t).toISOString() });
+      }
+    }
+    return { data, windows: [{ ...range, status: 'complete' as const, pages: 1, rows: data.length }], duplicates_removed: 0, truncated: false };
+  });
+}
+
+const read = (fetchRange: ReturnType<typeof hourlyUpstream>, from: string, to: string, names?: string[]) => readSeriesCached({
+  scope: seriesScope('token', 'https://api/devices/d1/metrics'),
+  names,
+  from,
+  to,
+  timestampKey: 'timestamp',
+  fetchRange,
+});
+
+describe('uncoveredRanges', () => {
+  it('returns the parts of the range no segment covers', () => {
+    expect(uncoveredRanges([{ from: 10, to: 20 }, { from: 30, to: 40 }], 0, 50)).toEqual([
+      { from: 0, to: 10 }, { from: 20, to: 30 }, { from: 40, to: 50 },
+    ]);
+    expect(uncoveredRanges([{ from: 0, to: 60 }], 10, 50)).toEqual([]);
+  });
+});
+
+describe('seriesScope', () => {
+  it('is shared by refreshed tokens of the same user only', () => {
+    const token = (sub: string, jti: string) => jwt.sign({ iss: 'https://auth/realms/demo', sub, jti }, 'secret');
+    const url = 'https://api/devices/d1/metrics';
+
+    expect(seriesScope(token('user-1', 'a'), url)).toBe(seriesScope(token('user-1', 'b'), url));
+    expect(seriesScope(token('user-1', 'a'), url)).not.toBe(seriesScope(token('user-2', 'a'), url));
+  });
+});
+
+describe('isSeriesCacheable', () => {
+  it('accepts closed ranges starting before the grace period', () => {
+    const now = Date.parse('2024-01-10T00:00:00Z');
+    expect(isSeriesCacheable('2024-01-01T00:00:00Z', '2024-01-02T00:00:00Z', now)).toBe(true);
+    expect(isSeriesCacheable('2024-01-09T23:59:00Z', '2024-01-10T00:00:00Z', now)).toBe(false);
+    expect(isSeriesCacheable(undefined, '2024-01-02T00:00:00Z', now)).toBe(false);
+  });
+});
+
+describe('readSeriesCached', () => {
+  beforeEach(() => clearSeriesCache());
+
+  it('fetches only the ranges not covered by earlier reads', async () => {
+    const upstream = hourlyUpstream();
+    const first = await read(upstream, '2024-01-02T00:00:00.000Z', '2024-01-03T00:00:00.000Z', ['temperature']);
+    const second = await read(upstream, '2024-01-01T00:00:00.000Z', '2024-01-03T00:00:00.000Z', ['temperature']);
+    const third = await read(upstream, '2024-01-01T12:00:00.000Z', '2024-01-01T18:00:00.000Z', ['temperature']);
+
+    expect(first.data).toHaveLength(25);
+    expect(second.cache.fetched).toEqual([{ from: '2024-01-01T00:00:00.000Z', to: '2024-01-02T00:00:00.000Z' }]);
+    expect(second.data).toHaveLength(49);
+    expect(second.duplicates_removed).toBe(1);
+    expect(third.cache.fetched).toEqual([]);
+    expect(third.data.map(row => row.value)).toEqual(Array.from({ length: 7 }, (_, i) => Date.parse('2024-01-01T12:00:00Z') / HOUR + i));
+    expect(upstream).toHaveBeenCalledTimes(2);
+  });
+
+  it('stores segments on whole minutes so nearby ranges reuse them', async () => {
+    const upstream = hourlyUpstream();
+    const first = await read(upstream, '2024-01-01T00:00:17.000Z', '2024-01-01T05:59:40.000Z', ['temperature']);
+    const second = await read(upstream, '2024-01-01T00:00:40.000Z', '2024-01-01T05:59:10.000Z', ['temperature']);
+
+    expect(first.cache.fetched).toEqual([{ from: '2024-01-01T00:00:00.000Z', to: '2024-01-01T06:00:00.000Z' }]);
+    // Rows fetched outside the requested range are not returned
+    expect(first.data.map(row => row.timestamp)).toEqual(
+      [1, 2, 3, 4, 5].map(h => `2024-01-01T0${h}:00:00.000Z`)
+    );
+    expect(second.cache.fetched).toEqual([]);
+    expect(second.data).toHaveLength(5);
+    expect(upstream).toHaveBeenCalledTimes(1);
+  });
+
+  it('caches each variable separately', async () => {
+    const upstream = hourlyUpstream();
+    await read(upstream, '2024-01-01T00:00:00.000Z', '2024-01-01T06:00:00.000Z', ['temperature']);
+    const both = await read(upstream, '2024-01-01T00:00:00.000Z', '2024-01-01T06:00:00.000Z', ['temperature', 'pressure']);
+
+    expect(upstream).toHaveBeenLastCalledWith({ from: '2024-01-01T00:00:00.000Z', to: '2024-01-01T06:00:00.000Z' }, ['pressure']);
+    expect(both.data).toHaveLength(14);
+  });
+
+  it('always fetches the recent range and does not store it', async () => {
+    const upstream = hourlyUpstream();
+    const to = new Date().toISOString();
+    const from = new Date(Date.now() - 3 * HOUR).toISOString();
+
+    const first = await read(upstream, from, to);
+    const second = await read(upstream, from, to);
+
+    expect(first.cache.segments_stored).toBe(1);
+    expect(second.cache.segments_used).toBe(1);
+    expect(second.cache.fetched).toHaveLength(1);
+    expect(Date.parse(second.cache.fetched[0].from)).toBeGreaterThan(Date.parse(from));
+    expect(upstream).toHaveBeenCalledTimes(2);
+  });
+});
@@ -0,0 +1,315 @@
+/**
+ * Time-Series Interval Cache
+ *
+ * Agents often ask overlapping questions about the same device ("last 24h",
+ * then "last 48h", then "yesterday afternoon"). Data older than a grace
+ * period no longer changes, so completed reads of historical ranges are kept
+ * as immutable segments per device endpoint, filters and variable. A new
+ * query only fetches the ranges no segment covers, plus the recent part that
+ * may still change, and merges everything back in timestamp order.
+ *
+ * Segments share one memory budget and are evicted least recently used first.
+ * Cache scopes include the hashed user identity (JWT iss|sub), so users never
+ * read rows fetched with someone else's permissions, and a refreshed token
+ * keeps its segments. The grace cutoff and segment edges fall on whole
+ * minutes, so reads a few seconds apart line up with the same segments.
+ *
+ * The cache is opt-in: missing ranges are paged to completion, so a cached
+ * read can make more upstream calls and return more rows than the single
+ * page a plain historical read returns.
+ *
+ * Configuration (environment variables):
+ * - SERIES_CACHE_MAX_BYTES: memory budget of cached segments, 0 disables the cache (default: 0)
+ * - SERIES_CACHE_GRACE_SECONDS: data younger than this is never cached (default: 300)
+ */
+
+import { mapWithConcurrency } from "./concurrency.js";
+import { metadataIdentity } from "./metadataCache.js";
+import {
+  mergeByTimestamp,
+  PARALLEL_WINDOWS_CONCURRENCY,
+  PARALLEL_WINDOWS_MAX_ROWS,
+  ParallelWindowsResult,
+  TimeWindow,
+  WindowReport,
+} from "./timeWindows.js";
+
+export const SERIES_CACHE_MAX_BYTES = Number(process.env.SERIES_CACHE_MAX_BYTES) || 0;
+export const SERIES_CACHE_GRACE_SECONDS = Number(process.env.SERIES_CACHE_GRACE_SECONDS) || 300;
+
+interface Segment {
+  key: string;
+  from: number;
+  to: number;
+  rows: any[];
+  bytes: number;
+}
+
+export interface SeriesCacheReport {
+  /** ranges fetched upstream (the rest came from cached segments) */
+  fetched: TimeWindow[];
+  /** cached segments used */
+  segments_used: number;
+  /** fetched ranges stored as new segments */
+  segments_stored: number;
+}
+
+export interface SeriesReadOptions {
+  /** endpoint and non-time filters, see seriesScope() */
+  scope: string;
+  /** variable names filter; rows are cached per variable by `nameKey` */
+  names?: string[];
+  nameKey?: string;
+  from: string;
+  to: string;
+  sorting?: 'asc' | 'desc';
+  /** row field holding the ISO timestamp used for ordering */
+  timestampKey: string;
+  /** row field holding the end of interval rows (states); open intervals are never cached */
+  endTimestampKey?: string;
+  maxRows?: number;
+  /** fetch a range to completion, for the given variables (all when undefined) */
+  fetchRange: (range: TimeWindow, names?: string[]) => Promise<ParallelWindowsResult>;
+}
+
+export interface SeriesReadResult extends ParallelWindowsResult {
+  cache: SeriesCacheReport;
+}
+
+interface Gap {
+  from: number;
+  to: number;
+  /** end of the part old enough to be stored */
+  storeTo: number;
+}
+
+const series = new Map<string, Segment[]>();
+/** Segments in least recently used order */
+const lru = new Set<Segment>();
+let totalBytes = 0;
+let segmentHits = 0;
+let rangesFetched = 0;
+
+const iso = (ms: number) => new Date(ms).toISOString();
+const MINUTE_MS = 60 * 1000;
+const floorMinute = (ms: number) => Math.floor(ms / MINUTE_MS) * MINUTE_MS;
+const ceilMinute = (ms: number) => Math.ceil(ms / MINUTE_MS) * MINUTE_MS;
+
+/**
+ * Cache scope of a series endpoint: user identity, URL and the filters that
+ * are not time or variable names
+ */
+export function seriesScope(auth_token: string, url: string, filters: Record<string, unknown> = {}): string {
+  return `${auth_token ? metadataIdentity(auth_token) : 'anonymous'}|${url}|${JSON.stringify(filters)}`;
+}
+
+/**
+ * True when part of [from, to] is old enough to be served from the cache
+ */
+export function isSeriesCacheable(from: string | undefined, to: string | undefined, now: number = Date.now()): boolean {
+  if (!from || !to || SERIES_CACHE_MAX_BYTES <= 0) {
+    return false;
+  }
+  const start = Date.parse(from);
+  const end = Date.parse(to);
+  return Number.isFinite(start) && Number.isFinite(end) && start < end && start < now - SERIES_CACHE_GRACE_SECONDS * 1000;
+}
+
+/**
+ * Sub-ranges of [from, to] not covered by the (sorted) segments
+ */
+export function uncoveredRanges(segments: { from: number; to: number }[], from: number, to: number): { from: number; to: number }[] {
+  const gaps: { from: number; to: number }[] = [];
+  let cursor = from;
+  for (const segment of segments) {
+    if (segment.to < cursor) continue;
+    if (segment.from > to) break;
+    if (segment.from > cursor) gaps.push({ from: cursor, to: segment.from });
+    cursor = Math.max(cursor, segment.to);
+    if (cursor >= to) break;
+  }
+  if (cursor < to) gaps.push({ from: cursor, to });
+  return gaps;
+}
+
+function inRange(row: any, from: number, to: number, timestampKey: string, endTimestampKey?: string): boolean {
+  const start = Date.parse(row?.[timestampKey]);
+  if (!Number.isFinite(start)) return false;
+  if (!endTimestampKey) return start >= from && start <= to;
+  const end = Date.parse(row?.[endTimestampKey]);
+  return start <= to && (Number.isFinite(end) ? end : Infinity) >= from;
+}
+
+function touch(segment: Segment): void {
+  lru.delete(segment);
+  lru.add(segment);
+}
+
+function removeSegment(segment: Segment): void {
+  const list = series.get(segment.key);
+  if (list) {
+    const index = list.indexOf(segment);
+    if (index !== -1) list.splice(index, 1);
+    if (list.length === 0) series.delete(segment.key);
+  }
+  if (lru.delete(segment)) totalBytes -= segment.bytes;
+}
+
+function storeSegment(key: string, from: number, to: number, rows: any[]): boolean {
+  const bytes = Buffer.byteLength(JSON.stringify(rows)) + 64;
+  if (bytes > SERIES_CACHE_MAX_BYTES) {
+    return false;
+  }
+  const list = series.get(key) ?? [];
+  // Segments inside the new one are redundant
+  for (const segment of list.filter(s => s.from >= from && s.to <= to)) {
+    removeSegment(segment);
+  }
+  const segment: Segment = { key, from, to, rows, bytes };
+  const current = series.get(key) ?? [];
+  const index = current.findIndex(s => s.from > from);
+  index === -1 ? current.push(segment) : current.splice(index, 0, segment);
+  series.set(key, current);
+  lru.add(segment);
+  totalBytes += bytes;
+
+  while (totalBytes > SERIES_CACHE_MAX_BYTES && lru.size > 0) {
+    removeSegment(lru.values().next().value!);
+  }
+  return true;
+}
+
+/**
+ * Read [from, to] from cached segments and fetch only the missing ranges.
+ * Fetched ranges older than the grace period are stored when they completed.
+ */
+export async function readSeriesCached(options: SeriesReadOptions): Promise<SeriesReadResult> {
+  const nameKey = options.nameKey ?? 'name';
+  const from = Date.parse(options.from);
+  const to = Date.parse(options.to);
+  const cutoff = floorMinute(Date.now() - SERIES_CACHE_GRACE_SECONDS * 1000);
+  const cachedTo = Math.min(to, cutoff);
+  // Historical ranges are fetched and stored widened to whole minutes
+  const alignedFrom = floorMinute(from);
+  const alignedTo = ceilMinute(cachedTo);
+  const variables: (string | undefined)[] = options.names?.length ? options.names : [undefined];
+
+  const lists: any[][] = [];
+  const usedSegments: Segment[] = [];
+  let segmentsUsed = 0;
+  // Variables missing the same ranges are fetched together
+  const groups = new Map<string, { names: (string | undefined)[]; gaps: Gap[] }>();
+
+  for (const name of variables) {
+    const key = `${options.scope}|${name ?? '*'}`;
+    const segments = series.get(key) ?? [];
+    for (const segment of segments) {
+      if (segment.to < from || segment.from > cachedTo) continue;
+      touch(segment);
+      usedSegments.push(segment);
+      segmentsUsed++;
+      lists.push(segment.rows.filter(row => inRange(row, from, to, options.timestampKey, options.endTimestampKey)));
+    }
+
+    const gaps: Gap[] = from < cachedTo
+      ? uncoveredRanges(segments, alignedFrom, alignedTo).map(gap => ({ ...gap, storeTo: gap.to }))
+      : [];
+    // The recent part is always fetched, together with a gap ending at the cutoff
+    if (to > cutoff) {
+      const last = gaps[gaps.length - 1];
+      if (last && last.to === alignedTo) {
+        last.to = to;
+      } else {
+        gaps.push({ from: Math.max(from, cutoff), to, storeTo: Math.max(from, cutoff) });
+      }
+    }
+    const signature = JSON.stringify(gaps);
+    const group = groups.get(signature);
+    group ? group.names.push(name) : groups.set(signature, { names: [name], gaps });
+  }
+
+  const tasks = Array.from(groups.values()).flatMap(group => group.gaps.map(gap => ({ gap, names: group.names })));
+  const windows: WindowReport[] = [];
+  let duplicates = 0;
+  let truncated = false;
+  let segmentsStored = 0;
+  segmentHits += segmentsUsed;
+  rangesFetched += tasks.length;
+
+  const results = await mapWithConcurrency(tasks, PARALLEL_WINDOWS_CONCURRENCY, ({ gap, names }) => {
+    const filter = names[0] === undefined ? undefined : names as string[];
+    return options.fetchRange({ from: iso(gap.from), to: iso(gap.to) }, filter);
+  });
+
+  results.forEach((settled, index) => {
+    const { gap, names } = tasks[index];
+    if (settled.status === 'rejected') {
+      const error: any = settled.reason;
+      windows.push({ from: iso(gap.from), to: iso(gap.to), status: 'failed', pages: 0, rows: 0, message: error?.message || String(error) });
+      return;
+    }
+    const result = settled.value;
+    windows.push(...result.windows);
+    duplicates += result.duplicates_removed;
+    truncated ||= result.truncated;
+    lists.push(result.data.filter(row => inRange(row, from, to, options.timestampKey, options.endTimestampKey)));
+
+    const complete = !result.truncated && result.windows.every(w => w.status === 'complete');
+    if (!complete || gap.storeTo <= gap.from) return;
+    for (const name of names) {
+      const rows = result.data.filter(row =>
+        (name === undefined || row?.[nameKey] === name) &&
+        inRange(row, gap.from, gap.storeTo, options.timestampKey, options.endTimestampKey)
+      );
+      // Intervals still open (or closed after the cutoff) can still change
+      if (options.endTimestampKey && rows.some(row => !(Date.parse(row?.[options.endTimestampKey!]) <= cutoff))) {
+        continue;
+      }
+      if (storeSegment(`${options.scope}|${name ?? '*'}`, gap.from, gap.storeTo, rows)) segmentsStored++;
+    }
+  });
+
+  // Segments and fetched ranges only share rows at their edges
+  const edges = [
+    ...usedSegments.flatMap(segment => [segment.from, segment.to]),
+    ...tasks.flatMap(({ gap }) => [gap.from, gap.to]),
+  ];
+  const merged = mergeByTimestamp(lists, options.timestampKey, options.sorting, {
+    edges,
+    identityKeys: [nameKey],
+    endTimestampKey: options.endTimestampKey,
+  });
+  const maxRows = options.maxRows ?? PARALLEL_WINDOWS_MAX_ROWS;
+  truncated ||= merged.data.length > maxRows;
+  return {
+    data: merged.data.length > maxRows ? merged.data.slice(0, maxRows) : merged.data,
+    windows,
+    duplicates_removed: duplicates + merged.duplicates,
+    truncated,
+    cache: {
+      fetched: tasks.map(({ gap }) => ({ from: iso(gap.from), to: iso(gap.to) })),
+      segments_used: segmentsUsed,
+      segments_stored: segmentsStored,
+    },
+  };
+}
+
+/**
+ * Drop every cached segment
+ */
+export function clearSeriesCache(): void {
+  series.clear();
+  lru.clear();
+  totalBytes = 0;
+}
+
+export function getSeriesCacheMetrics() {
+  return {
+    series: series.size,
+    segments: lru.size,
+    bytes: totalBytes,
+    max_bytes: SERIES_CACHE_MAX_BYTES,
+    segment_hits: segmentHits,
+    ranges_fetched: rangesFetched,
+  };
+}
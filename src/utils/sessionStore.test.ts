@@ -0,0 +1,123 @@
+import { describe, it, expect, afterAll } from 'vitest';
+import { mkdtempSync, rmSync } from 'node:fs';
+import { tmpdir } from 'node:os';
+import { join } from 'node:path';
+import net from 'node:net';
+import {
+  FileSessionStore,
+  InMemorySessionStore,
+  RedisSessionStore,
+  SessionRecord,
+  SessionStore,
+  hashToken,
+} from './sessionStore.js';
+
+const makeRecord = (overrides: Partial<SessionRecord> = {}): SessionRecord => ({
+  session_id: '5b0f7a4e-3c9d-4e1a-8f2b-6d7c8e9f0a1b',
+  auth_binding: hashToken('test-token'),
+  no_auth: false,
+  client_capabilities: { sampling: {} },
+  client_info: { name: 'openai-mcp', version: '1.0.0' },
+  created_at: Date.now(),
+  last_seen_at: Date.now(),
+  ...overrides,
+});
+
+/**
+ * Tiny stand-in for a Redis server: understands GET, SET (ignoring EX) and DEL
+ */
+function startFakeRedis(): Promise<{ url: string; close: () => void }> {
+  const data = new Map<string, string>();
+  const server = net.createServer((socket) => {
+    let buffer = '';
+    socket.on('data', (chunk) => {
+      buffer += chunk.toString('utf8');
+      // Every command arrives as a RESP array of bulk strings
+      while (true) {
+        const lines = buffer.split('\r\n');
+        const count = Number(lines[0]?.slice(1));
+        if (!lines[0]?.startsWith('*') || lines.length < 1 + count * 2) return;
+        const args: string[] = [];
+        for (let i = 0; i < count; i++) args.push(lines[2 + i * 2]);
+        buffer = lines.slice(1 + count * 2).join('\r\n');
+        const [command, key, value] = args;
+        if (command === 'GET') {
+          const stored = data.get(key);
+          socket.write(stored === undefined ? '$-1\r\n' : `$${Buffer.byteLength(stored)}\r\n${stored}\r\n`);
+        } else if (command === 'SET') {
+          data.set(key, value);
+          socket.write('+OK\r\n');
+        } else if (command === 'DEL') {
+          socket.write(`:${data.delete(key) ? 1 : 0}\r\n`);
+        } else {
+          socket.write(`-ERR unknown command '${command}'\r\n`);
+        }
+      }
+    });
+  });
+  return new Promise((resolve) => {
+    server.listen(0, '127.0.0.1', () => {
+      const { port } = server.address() as net.AddressInfo;
+      resolve({ url: `redis://127.0.0.1:${port}`, close: () => server.close() });
+    });
+  });
+}
+
+const dir = mkdtempSync(join(tmpdir(), 'things5-sessions-'));
+
+afterAll(() => {
+  rmSync(dir, { recursive: true, force: true });
+});
+
+const exerciseStore = async (store: SessionStore) => {
+  const record = makeRecord();
+  expect(await store.get(record.session_id)).toBeNull();
+
+  await store.set(record);
+  expect(await store.get(record.session_id)).toEqual(record);
+
+  await store.delete(record.session_id);
+  expect(await store.get(record.session_id)).toBeNull();
+};
+
+describe('sessionStore', () => {
+  it('should hash tokens without exposing them', () => {
+    expect(hashToken('test-token')).toMatch(/^[0-9a-f]{64}$/);
+    expect(hashToken('test-token')).not.toContain('test-token');
+    expect(hashToken(undefined)).toBeNull();
+  });
+
+  it('should store, load and delete records in memory', async () => {
+    await exerciseStore(new InMemorySessionStore());
+  });
+
+  it('should store, load and delete records on disk', async () => {
+    await exerciseStore(new FileSessionStore(dir));
+  });
+
+  it('should share records between file store instances', async () => {
+    const record = makeRecord();
+    await new FileSessionStore(dir).set(record);
+    expect(await new FileSessionStore(dir).get(record.session_id)).toEqual(record);
+  });
+
+  it('should drop expired records', async () => {
+    const store = new InMemorySessionStore(60);
+    const record = makeRecord({ last_seen_at: Date.now() - 120 * 1000 });
+    await store.set(record);
+    expect(await store.get(record.session_id)).toBeNull();
+  });
+
+  it('should reject session ids that are not safe file names', async () => {
+    await expect(new FileSessionStore(dir).get('../etc/passwd')).rejects.toThrow('Invalid session id');
+  });
+
+  it('should store, load and delete records over the Redis protocol', async () => {
+    const redis = await startFakeRedis();
+    try {
+      await exerciseStore(new RedisSessionStore(redis.url));
+    } finally {
+      redis.close();
+    }
+  });
+});
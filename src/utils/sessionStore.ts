@@ -0,0 +1,308 @@
+/**
+ * Session Store
+ *
+ * Externalized MCP session state so a session created on one instance (or
+ * before a restart) can be rehydrated on demand by any instance.
+ *
+ * The store only keeps what is needed to rebuild a session: the auth binding
+ * (a hash of the bearer token, never the token itself) and the capabilities
+ * negotiated during `initialize`. Transports and McpServer instances stay
+ * in-process and are recreated from the record.
+ *
+ * Configuration (environment variables):
+ * - SESSION_STORE: "memory" (default), "file" or "redis"
+ * - SESSION_STORE_DIR: directory for the file store (default: ./.sessions)
+ * - SESSION_STORE_URL: redis://[:password@]host:port[/db] for the redis store
+ * - SESSION_TTL_SECONDS: idle lifetime of a session record (default: 24h)
+ */
+
+import { createHash } from "node:crypto";
+import { mkdir, readFile, rm, writeFile, rename } from "node:fs/promises";
+import { join } from "node:path";
+import net from "node:net";
+
+export interface SessionRecord {
+  session_id: string;
+  /** Hashed identity (JWT iss|sub, see metadataIdentity) the session was created for (null for no_auth sessions) */
+  auth_binding: string | null;
+  no_auth: boolean;
+  client_capabilities?: Record<string, unknown>;
+  client_info?: { name: string; version: string };
+  /** tool subset requested when the session was created (all tools when absent) */
+  allowed_tools?: string[];
+  created_at: number;
+  last_seen_at: number;
+}
+
+export interface SessionStore {
+  get(sessionId: string): Promise<SessionRecord | null>;
+  set(record: SessionRecord): Promise<void>;
+  delete(sessionId: string): Promise<void>;
+}
+
+const DEFAULT_TTL_SECONDS = 24 * 60 * 60;
+
+/**
+ * Hash a bearer token so sessions can be bound to it without storing it
+ */
+export function hashToken(token: string | undefined | null): string | null {
+  return token ? createHash('sha256').update(token).digest('hex') : null;
+}
+
+function isExpired(record: SessionRecord, ttlSeconds: number): boolean {
+  return Date.now() - record.last_seen_at > ttlSeconds * 1000;
+}
+
+/**
+ * In-process store (default). Sessions survive transport loss but not restarts.
+ */
+export class InMemorySessionStore implements SessionStore {
+  private records = new Map<string, SessionRecord>();
+
+  constructor(private ttlSeconds: number = DEFAULT_TTL_SECONDS) {}
+
+  async get(sessionId: string): Promise<SessionRecord | null> {
+    const record = this.records.get(sessionId);
+    if (!record) return null;
+    if (isExpired(record, this.ttlSeconds)) {
+      this.records.delete(sessionId);
+      return null;
+    }
+    return record;
+  }
+
+  async set(record: SessionRecord): Promise<void> {
+    this.records.set(record.session_id, record);
+  }
+
+  async delete(sessionId: string): Promise<void> {
+    this.records.delete(sessionId);
+  }
+}
+
+/**
+ * One JSON file per session. Suitable for restarts and for several
+ * processes on the same host (e.g. cluster workers) sharing a directory.
+ */
+export class FileSessionStore implements SessionStore {
+  private ready: Promise<unknown>;
+
+  constructor(private dir: string, private ttlSeconds: number = DEFAULT_TTL_SECONDS) {
+    this.ready = mkdir(dir, { recursive: true });
+  }
+
+  private pathFor(sessionId: string): string {
+    if (!/^[A-Za-z0-9_-]+$/.test(sessionId)) {
+      throw new Error(`Invalid session id: ${sessionId}`);
+    }
+    return join(this.dir, `${sessionId}.json`);
+  }
+
+  async get(sessionId: string): Promise<SessionRecord | null> {
+    await this.ready;
+    try {
+      const record = JSON.parse(await readFile(this.pathFor(sessionId), 'utf8')) as SessionRecord;
+      if (isExpired(record, this.ttlSeconds)) {
+        await this.delete(sessionId);
+        return null;
+      }
+      return record;
+    } catch (error: any) {
+      if (error.code === 'ENOENT') return null;
+      throw error;
+    }
+  }
+
+  async set(record: SessionRecord): Promise<void> {
+    await this.ready;
+    const path = this.pathFor(record.session_id);
+    // Write-then-rename so concurrent readers never see a partial file
+    const tmp = `${path}.${process.pid}.tmp`;
+    await writeFile(tmp, JSON.stringify(record), 'utf8');
+    await rename(tmp, path);
+  }
+
+  async delete(sessionId: string): Promise<void> {
+    await this.ready;
+    await rm(this.pathFor(sessionId), { force: true });
+  }
+}
+
+type RespReply = string | number | null | RespReply[];
+
+/**
+ * Minimal RESP (Redis protocol) client supporting the few commands the
+ * session store needs. Works with Redis, Valkey, KeyDB or any local
+ * process speaking the protocol.
+ */
+class RespClient {
+  private socket: net.Socket | null = null;
+  private connecting: Promise<net.Socket> | null = null;
+  private buffer = Buffer.alloc(0);
+  private pending: { resolve: (value: RespReply) => void; reject: (error: Error) => void }[] = [];
+
+  constructor(private url: URL) {}
+
+  async command(...args: string[]): Promise<RespReply> {
+    const socket = await this.connect();
+    return this.send(socket, args);
+  }
+
+  private send(socket: net.Socket, args: string[]): Promise<RespReply> {
+    return new Promise((resolve, reject) => {
+      this.pending.push({ resolve, reject });
+      let payload = `*${args.length}\r\n`;
+      for (const arg of args) {
+        payload += `$${Buffer.byteLength(arg)}\r\n${arg}\r\n`;
+      }
+      socket.write(payload);
+    });
+  }
+
+  private connect(): Promise<net.Socket> {
+    if (this.socket) return Promise.resolve(this.socket);
+    if (this.connecting) return this.connecting;
+
+    this.connecting = new Promise<net.Socket>((resolve, reject) => {
+      const socket = net.createConnection({
+        host: this.url.hostname || '127.0.0.1',
+        port: Number(this.url.port || 6379),
+      });
+      socket.setNoDelay(true);
+      socket.on('data', (chunk) => this.onData(chunk));
+      socket.on('error', (error) => {
+        console.error('[SessionStore] ❌ Redis connection error:', error.message);
+        reject(error);
+      });
+      socket.on('close', () => {
+        this.socket = null;
+        this.connecting = null;
+        this.buffer = Buffer.alloc(0);
+        const pending = this.pending.splice(0, this.pending.length);
+        pending.forEach(p => p.reject(new Error('Redis connection closed')));
+      });
+      socket.once('connect', async () => {
+        try {
+          if (this.url.password) {
+            const user = decodeURIComponent(this.url.username || '');
+            const password = decodeURIComponent(this.url.password);
+            await this.send(socket, user ? ['AUTH', user, password] : ['AUTH', password]);
+          }
+          const db = this.url.pathname.replace('/', '');
+          if (db) {
+            await this.send(socket, ['SELECT', db]);
+          }
+          this.socket = socket;
+          resolve(socket);
+        } catch (error: any) {
+          socket.destroy();
+          reject(error);
+        }
+      });
+    });
+    this.connecting.catch(() => { this.connecting = null; });
+    return this.connecting;
+  }
+
+  private onData(chunk: Buffer): void {
+    this.buffer = this.buffer.length ? Buffer.concat([this.buffer, chunk]) : chunk;
+    while (this.pending.length > 0) {
+      const parsed = parseReply(this.buffer, 0);
+      if (!parsed) return;
+      this.buffer = this.buffer.subarray(parsed.offset);
+      const waiter = this.pending.shift()!;
+      if (parsed.error) {
+        waiter.reject(new Error(parsed.error));
+      } else {
+        waiter.resolve(parsed.value);
+      }
+    }
+  }
+}
+
+function parseReply(buffer: Buffer, offset: number): { value: RespReply; offset: number; error?: string } | null {
+  const lineEnd = buffer.indexOf('\r\n', offset);
+  if (lineEnd === -1) return null;
+  const type = String.fromCharCode(buffer[offset]);
+  const line = buffer.toString('utf8', offset + 1, lineEnd);
+  const next = lineEnd + 2;
+
+  switch (type) {
+    case '+':
+      return { value: line, offset: next };
+    case '-':
+      return { value: null, offset: next, error: line };
+    case ':':
+      return { value: Number(line), offset: next };
+    case '$': {
+      const length = Number(line);
+      if (length === -1) return { value: null, offset: next };
+      if (buffer.length < next + length + 2) return null;
+      return { value: buffer.toString('utf8', next, next + length), offset: next + length + 2 };
+    }
+    case '*': {
+      const count = Number(line);
+      if (count === -1) return { value: null, offset: next };
+      const items: RespReply[] = [];
+      let cursor = next;
+      for (let i = 0; i < count; i++) {
+        const item = parseReply(buffer, cursor);
+        if (!item) return null;
+        items.push(item.value);
+        cursor = item.offset;
+      }
+      return { value: items, offset: cursor };
+    }
+    default:
+      return { value: null, offset: next, error: `Unexpected RESP reply type: ${type}` };
+  }
+}
+
+/**
+ * Store backed by any server speaking the Redis protocol. Shared by all
+ * instances behind a load balancer; expiry is handled by the server.
+ */
+export class RedisSessionStore implements SessionStore {
+  private client: RespClient;
+  private prefix = 'things5:mcp:session:';
+
+  constructor(url: string, private ttlSeconds: number = DEFAULT_TTL_SECONDS) {
+    this.client = new RespClient(new URL(url));
+  }
+
+  async get(sessionId: string): Promise<SessionRecord | null> {
+    const value = await this.client.command('GET', this.prefix + sessionId);
+    return typeof value === 'string' ? JSON.parse(value) : null;
+  }
+
+  async set(record: SessionRecord): Promise<void> {
+    await this.client.command('SET', this.prefix + record.session_id, JSON.stringify(record), 'EX', String(this.ttlSeconds));
+  }
+
+  async delete(sessionId: string): Promise<void> {
+    await this.client.command('DEL', this.prefix + sessionId);
+  }
+}
+
+/**
+ * Build the session store selected by the environment
+ */
+export function createSessionStore(): SessionStore {
+  const kind = process.env.SESSION_STORE || 'memory';
+  const ttlSeconds = Number(process.env.SESSION_TTL_SECONDS) || DEFAULT_TTL_SECONDS;
+
+  switch (kind) {
+    case 'file': {
+      const dir = process.env.SESSION_STORE_DIR || './.sessions';
+      console.error(`[SessionStore] Using file session store in ${dir}`);
+      return new FileSessionStore(dir, ttlSeconds);
+    }
+    case 'redis': {
+      const url = process.env.SESSION_STORE_URL || 'redis://127.0.0.1:6379';
+      console.error(`[SessionStore] Using redis session store at ${new URL(url).host}`);
+      return new RedisSessionStore(url, ttlSeconds);
+    }
+    default:
+      return new InMemorySessionStore(ttlSeconds);
+  }
+}
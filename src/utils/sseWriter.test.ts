@@ -0,0 +1,102 @@
+import { describe, it, expect, beforeEach, afterEach, vi } from 'vitest';
+import { EventEmitter } from 'node:events';
+import { attachSseWriter, getSseMetrics } from './sseWriter.js';
+
+// Response whose client never reads: everything written stays buffered
+class FakeResponse extends EventEmitter {
+  chunks: string[] = [];
+  writableLength = 0;
+  writableEnded = false;
+  destroyed = false;
+
+  write(chunk: any): boolean {
+    this.chunks.push(String(chunk));
+    this.writableLength += Buffer.byteLength(String(chunk));
+    return this.writableLength < 16;
+  }
+
+  destroy(): void {
+    this.destroyed = true;
+    this.emit('close');
+  }
+
+  drain(): void {
+    this.writableLength = 0;
+    this.emit('drain');
+  }
+}
+
+const response = (id: number) => `event: message\ndata: {"jsonrpc":"2.0","id":${id},"result":{}}\n\n`;
+const notification = `event: message\ndata: {"jsonrpc":"2.0","method":"notifications/progress","params":{}}\n\n`;
+
+describe('SseWriter', () => {
+  beforeEach(() => vi.useFakeTimers());
+  afterEach(() => vi.useRealTimers());
+
+  it('drops notifications but keeps responses while over the buffer limit', () => {
+    const res = new FakeResponse();
+    const writer = attachSseWriter(res, 'session-1', { maxBufferedBytes: 100, heartbeatIntervalMs: 0, slowClientPolicy: 'drop' });
+
+    res.write(response(1));
+    res.write(response(2));
+    res.write(notification);
+    res.write(response(3));
+
+    expect(res.chunks).toEqual([response(1), response(2), response(3)]);
+    expect(writer.metrics()).toMatchObject({ dropped_events: 1, queued_bytes: res.writableLength });
+    res.destroy();
+  });
+
+  it('disconnects clients that stay over the limit', () => {
+    const res = new FakeResponse();
+    attachSseWriter(res, 'session-2', { maxBufferedBytes: 100, heartbeatIntervalMs: 0, slowClientPolicy: 'drop', slowClientTimeoutMs: 1000 });
+
+    res.write(response(1));
+    res.write(response(2));
+    res.write(response(3));
+    expect(res.destroyed).toBe(false);
+
+    vi.advanceTimersByTime(1000);
+    res.write(response(4));
+    expect(res.destroyed).toBe(true);
+    expect(res.chunks).toHaveLength(3);
+  });
+
+  it('disconnects immediately with the disconnect policy', () => {
+    const res = new FakeResponse();
+    attachSseWriter(res, undefined, { maxBufferedBytes: 100, heartbeatIntervalMs: 0, slowClientPolicy: 'disconnect' });
+
+    res.write(response(1));
+    res.write(response(2));
+    res.write(response(3));
+
+    expect(res.destroyed).toBe(true);
+  });
+
+  it('sends heartbeats only on idle, drained streams', () => {
+    const res = new FakeResponse();
+    attachSseWriter(res, 'session-3', { maxBufferedBytes: 1000, heartbeatIntervalMs: 1000 });
+
+    res.write(response(1));
+    vi.advanceTimersByTime(1000);
+    expect(res.chunks).toEqual([response(1)]);
+
+    res.drain();
+    vi.advanceTimersByTime(1000);
+    expect(res.chunks).toEqual([response(1), ': keepalive\n\n']);
+    res.destroy();
+  });
+
+  it('tracks connections until they close', () => {
+    const res = new FakeResponse();
+    attachSseWriter(res, 'session-4', { heartbeatIntervalMs: 0 });
+    res.write(response(1));
+
+    const metrics = getSseMetrics();
+    expect(metrics.connections).toBe(1);
+    expect(metrics.by_session[0].session).not.toContain('session-4');
+
+    res.destroy();
+    expect(getSseMetrics().connections).toBe(0);
+  });
+});
@@ -0,0 +1,192 @@
+/**
+ * Backpressure-aware SSE Writer
+ *
+ * The MCP transport writes SSE events with `res.write` and never waits for
+ * `drain`, so a slow consumer makes Node buffer every pending event in
+ * process memory, and idle streams are closed by proxies (e.g. Render)
+ * forcing full reconnects.
+ *
+ * `attachSseWriter` wraps an SSE response:
+ * - bytes buffered for the connection are bounded: while the buffer is over
+ *   the limit, notification events are dropped (responses are always sent)
+ * - slow clients that stay over the limit are disconnected (immediately with
+ *   the `disconnect` policy, after SSE_SLOW_CLIENT_TIMEOUT_MS with `drop`)
+ * - a `: keepalive` comment is sent when the stream has been idle for the
+ *   heartbeat interval, but never while the client is still draining
+ * - bytes queued/written and dropped events are tracked per session
+ *
+ * Configuration (environment variables):
+ * - SSE_MAX_BUFFERED_BYTES: per-connection buffer limit (default: 1048576)
+ * - SSE_HEARTBEAT_INTERVAL_MS: keepalive interval, 0 disables it (default: 15000)
+ * - SSE_SLOW_CLIENT_POLICY: "drop" or "disconnect" (default: drop)
+ * - SSE_SLOW_CLIENT_TIMEOUT_MS: time over the limit before a "drop" client is disconnected (default: 30000)
+ */
+
+import { createHash, randomUUID } from "node:crypto";
+
+export type SlowClientPolicy = 'drop' | 'disconnect';
+
+export interface SseWriterOptions {
+  maxBufferedBytes: number;
+  heartbeatIntervalMs: number;
+  slowClientPolicy: SlowClientPolicy;
+  slowClientTimeoutMs: number;
+}
+
+export const DEFAULT_SSE_WRITER_OPTIONS: SseWriterOptions = {
+  maxBufferedBytes: Number(process.env.SSE_MAX_BUFFERED_BYTES) || 1024 * 1024,
+  heartbeatIntervalMs: process.env.SSE_HEARTBEAT_INTERVAL_MS !== undefined ? Number(process.env.SSE_HEARTBEAT_INTERVAL_MS) : 15000,
+  slowClientPolicy: process.env.SSE_SLOW_CLIENT_POLICY === 'disconnect' ? 'disconnect' : 'drop',
+  slowClientTimeoutMs: Number(process.env.SSE_SLOW_CLIENT_TIMEOUT_MS) || 30000,
+};
+
+/** Minimal view of the HTTP response used by the writer */
+export interface SseResponse {
+  write(chunk: any, ...args: any[]): boolean;
+  destroy(error?: Error): unknown;
+  on(event: 'drain' | 'close', listener: () => void): unknown;
+  readonly writableLength: number;
+  readonly writableEnded: boolean;
+  readonly destroyed: boolean;
+}
+
+export interface SseConnectionMetrics {
+  /** Short hash of the session id (session ids are credentials for no-auth sessions) */
+  session: string | null;
+  queued_bytes: number;
+  written_bytes: number;
+  dropped_events: number;
+  heartbeats: number;
+}
+
+export interface SseMetrics {
+  connections: number;
+  queued_bytes: number;
+  max_buffered_bytes: number;
+  slow_client_policy: SlowClientPolicy;
+  dropped_events: number;
+  slow_client_disconnects: number;
+  by_session: SseConnectionMetrics[];
+}
+
+const connections = new Map<string, SseWriter>();
+let totalDropped = 0;
+let slowClientDisconnects = 0;
+
+// Notifications (progress, logging, resource updates) can be skipped; responses cannot
+function isDroppable(chunk: unknown): boolean {
+  const text = typeof chunk === 'string' ? chunk : Buffer.isBuffer(chunk) ? chunk.toString('utf8') : '';
+  return text.startsWith(':') || text.includes('"method":"notifications/');
+}
+
+function chunkBytes(chunk: unknown): number {
+  if (typeof chunk === 'string') return Buffer.byteLength(chunk);
+  if (chunk && typeof (chunk as any).length === 'number') return (chunk as any).length;
+  return 0;
+}
+
+export class SseWriter {
+  readonly id = randomUUID();
+  sessionId: string | undefined;
+  private writtenBytes = 0;
+  private droppedEvents = 0;
+  private heartbeats = 0;
+  private lastWriteAt = Date.now();
+  private overLimitSince: number | null = null;
+  private heartbeatTimer: NodeJS.Timeout | null = null;
+  private readonly write: (chunk: any, ...args: any[]) => boolean;
+
+  constructor(private res: SseResponse, private options: SseWriterOptions, sessionId?: string) {
+    this.sessionId = sessionId;
+    this.write = res.write.bind(res);
+    res.write = (chunk: any, ...args: any[]) => this.send(chunk, args);
+    res.on('drain', () => { this.overLimitSince = null; });
+    res.on('close', () => this.close());
+
+    if (options.heartbeatIntervalMs > 0) {
+      this.heartbeatTimer = setInterval(() => this.heartbeat(), options.heartbeatIntervalMs);
+      this.heartbeatTimer.unref();
+    }
+    connections.set(this.id, this);
+  }
+
+  get queuedBytes(): number {
+    return this.res.writableLength;
+  }
+
+  private send(chunk: any, args: any[]): boolean {
+    if (this.res.writableEnded || this.res.destroyed) {
+      return false;
+    }
+    if (this.queuedBytes >= this.options.maxBufferedBytes) {
+      const now = Date.now();
+      this.overLimitSince ??= now;
+      if (this.options.slowClientPolicy === 'disconnect' || now - this.overLimitSince >= this.options.slowClientTimeoutMs) {
+        this.disconnect();
+        return false;
+      }
+      if (isDroppable(chunk)) {
+        this.droppedEvents++;
+        totalDropped++;
+        return false;
+      }
+    }
+    this.writtenBytes += chunkBytes(chunk);
+    this.lastWriteAt = Date.now();
+    return this.write(chunk, ...args);
+  }
+
+  private heartbeat(): void {
+    // A client that has not drained yet does not need more bytes
+    if (this.queuedBytes > 0 || Date.now() - this.lastWriteAt < this.options.heartbeatIntervalMs) {
+      return;
+    }
+    this.heartbeats++;
+    this.send(': keepalive\n\n', []);
+  }
+
+  private disconnect(): void {
+    slowClientDisconnects++;
+    console.error(`[SSE] ⚠️  Disconnecting slow client${this.sessionId ? ` of session ${this.sessionId}` : ''}: ${this.queuedBytes} bytes buffered`);
+    this.res.destroy();
+    this.close();
+  }
+
+  close(): void {
+    if (this.heartbeatTimer) {
+      clearInterval(this.heartbeatTimer);
+      this.heartbeatTimer = null;
+    }
+    connections.delete(this.id);
+  }
+
+  metrics(): SseConnectionMetrics {
+    return {
+      session: this.sessionId ? createHash('sha256').update(this.sessionId).digest('hex').substring(0, 12) : null,
+      queued_bytes: this.queuedBytes,
+      written_bytes: this.writtenBytes,
+      dropped_events: this.droppedEvents,
+      heartbeats: this.heartbeats,
+    };
+  }
+}
+
+/**
+ * Route every write of an SSE response through a bounded, heartbeating writer
+ */
+export function attachSseWriter(res: SseResponse, sessionId?: string, options: Partial<SseWriterOptions> = {}): SseWriter {
+  return new SseWriter(res, { ...DEFAULT_SSE_WRITER_OPTIONS, ...options }, sessionId);
+}
+
+export function getSseMetrics(): SseMetrics {
+  const byConnection = Array.from(connections.values()).map(writer => writer.metrics());
+  return {
+    connections: byConnection.length,
+    queued_bytes: byConnection.reduce((sum, c) => sum + c.queued_bytes, 0),
+    max_buffered_bytes: DEFAULT_SSE_WRITER_OPTIONS.maxBufferedBytes,
+    slow_client_policy: DEFAULT_SSE_WRITER_OPTIONS.slowClientPolicy,
+    dropped_events: totalDropped,
+    slow_client_disconnects: slowClientDisconnects,
+    by_session: byConnection,
+  };
+}
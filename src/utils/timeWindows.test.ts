@@ -0,0 +1,121 @@
+import { describe, it, expect } from 'vitest';
+import { splitTimeRange, mergeByTimestamp, fetchParallelWindows } from './timeWindows.js';
+
+describe('splitTimeRange', () => {
+  it('splits a range into contiguous windows sharing their boundaries', () => {
+    const windows = splitTimeRange('2024-01-01T00:00:00.000Z', '2024-01-05T00:00:00.000Z', 4);
+
+    expect(windows).toEqual([
+      { from: '2024-01-01T00:00:00.000Z', to: '2024-01-02T00:00:00.000Z' },
+      { from: '2024-01-02T00:00:00.000Z', to: '2024-01-03T00:00:00.000Z' },
+      { from: '2024-01-03T00:00:00.000Z', to: '2024-01-04T00:00:00.000Z' },
+      { from: '2024-01-04T00:00:00.000Z', to: '2024-01-05T00:00:00.000Z' },
+    ]);
+  });
+
+  it('does not create windows shorter than a minute', () => {
+    expect(splitTimeRange('2024-01-01T00:00:00Z', '2024-01-01T00:02:00Z', 10)).toHaveLength(2);
+    expect(splitTimeRange('2024-01-01T00:00:00Z', '2024-01-01T00:00:30Z', 10)).toHaveLength(1);
+  });
+
+  it('aligns inner edges to whole minutes', () => {
+    const windows = splitTimeRange('2024-01-01T00:00:17.250Z', '2024-01-01T01:00:41.000Z', 7);
+
+    expect(windows[0].from).toBe('2024-01-01T00:00:17.250Z');
+    expect(windows[windows.length - 1].to).toBe('2024-01-01T01:00:41.000Z');
+    for (let i = 1; i < windows.length; i++) {
+      expect(windows[i].from).toBe(windows[i - 1].to);
+      expect(Date.parse(windows[i].from) % 60000).toBe(0);
+    }
+  });
+});
+
+describe('mergeByTimestamp', () => {
+  it('merges sorted lists and drops rows repeated at window boundaries', () => {
+    const boundary = { name: 'alarm', timestamp: '2024-01-02T00:00:00Z' };
+    const { data, duplicates } = mergeByTimestamp([
+      [{ name: 'a', timestamp: '2024-01-01T10:00:00Z' }, boundary],
+      [boundary, { name: 'b', timestamp: '2024-01-02T10:00:00Z' }],
+    ], 'timestamp', 'desc');
+
+    expect(data.map(row => row.name)).toEqual(['b', 'alarm', 'a']);
+    expect(duplicates).toBe(1);
+  });
+
+  it('compares only rows at a window edge, by name and timestamp', () => {
+    const edge = Date.parse('2024-01-02T00:00:00Z');
+    const { data, duplicates } = mergeByTimestamp([
+      [
+        { name: 'a', value: 1, timestamp: '2024-01-01T10:00:00Z' },
+        { name: 'a', value: 2, timestamp: '2024-01-02T00:00:00Z' },
+      ],
+      [
+        // Same reading at the edge, serialized differently by the second request
+        { value: 2, name: 'a', timestamp: '2024-01-02T00:00:00.000Z' },
+        { name: 'b', value: 3, timestamp: '2024-01-02T00:00:00Z' },
+        // Identical rows away from an edge are distinct readings
+        { name: 'a', value: 1, timestamp: '2024-01-01T10:00:00Z' },
+      ],
+    ], 'timestamp', 'asc', { edges: [edge] });
+
+    expect(data.map(row => `${row.name}${row.value}`)).toEqual(['a1', 'a1', 'a2', 'b3']);
+    expect(duplicates).toBe(1);
+  });
+
+  it('treats intervals spanning an edge as boundary rows', () => {
+    const edge = Date.parse('2024-01-02T00:00:00Z');
+    const state = { name: 'running', start_time: '2024-01-01T23:00:00Z', end_time: '2024-01-02T01:00:00Z' };
+    const { data, duplicates } = mergeByTimestamp([[state], [{ ...state }]], 'start_time', 'asc', {
+      edges: [edge],
+      endTimestampKey: 'end_time',
+    });
+
+    expect(data).toHaveLength(1);
+    expect(duplicates).toBe(1);
+  });
+});
+
+describe('fetchParallelWindows', () => {
+  it('pages every window with its own cursor and reports failures per window', async () => {
+    const calls: string[] = [];
+    const result = await fetchParallelWindows({
+      from: '2024-01-01T00:00:00.000Z',
+      to: '2024-01-04T00:00:00.000Z',
+      windows: 3,
+      timestampKey: 'timestamp',
+      fetchPage: async (window, after) => {
+        calls.push(`${window.from}|${after ?? ''}`);
+        if (window.from.startsWith('2024-01-03')) {
+          throw new Error('upstream down');
+        }
+        if (!after) {
+          return { data: [{ timestamp: window.from }], after: 'next' };
+        }
+        return { data: [{ timestamp: window.to }] };
+      },
+    });
+
+    expect(calls).toHaveLength(5);
+    expect(result.data.map(row => row.timestamp)).toEqual([
+      '2024-01-01T00:00:00.000Z',
+      '2024-01-02T00:00:00.000Z',
+      '2024-01-03T00:00:00.000Z',
+    ]);
+    expect(result.duplicates_removed).toBe(1);
+    expect(result.windows.map(w => w.status)).toEqual(['complete', 'complete', 'failed']);
+    expect(result.windows[2].message).toBe('upstream down');
+  });
+
+  it('stops paging a window after the page limit and returns its cursor', async () => {
+    const result = await fetchParallelWindows({
+      from: '2024-01-01T00:00:00Z',
+      to: '2024-01-02T00:00:00Z',
+      windows: 2,
+      timestampKey: 'timestamp',
+      maxPagesPerWindow: 2,
+      fetchPage: async (_window, after) => ({ data: [], after: `${after ?? ''}x` }),
+    });
+
+    expect(result.windows.every(w => w.status === 'incomplete' && w.pages === 2 && w.after === 'xx')).toBe(true);
+  });
+});
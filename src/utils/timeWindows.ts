@@ -0,0 +1,234 @@
+/**
+ * Time-Sliced Parallel Fetching
+ *
+ * Long from/to ranges are normally read page by page with the opaque
+ * `after` cursor, which forces strictly sequential requests. This helper
+ * splits the range into independent sub-windows, pages through each of
+ * them concurrently with its own cursor, and merges the results back in
+ * timestamp order. Window edges fall on whole minutes. Rows returned by two
+ * adjacent windows (upstream ranges are inclusive at both ends) are removed
+ * while merging: only rows at an edge (or intervals spanning one) are
+ * compared, by name and timestamp.
+ *
+ * Configuration (environment variables):
+ * - PARALLEL_WINDOWS_CONCURRENCY: sub-windows fetched at once (default: 4)
+ * - PARALLEL_WINDOWS_MAX_PAGES: pages read per sub-window before giving up (default: 20)
+ * - PARALLEL_WINDOWS_MAX_ROWS: rows returned by a single tool call (default: 10000)
+ */
+
+import { mapWithConcurrency } from "./concurrency.js";
+
+export const PARALLEL_WINDOWS_CONCURRENCY = Number(process.env.PARALLEL_WINDOWS_CONCURRENCY) || 4;
+export const PARALLEL_WINDOWS_MAX_PAGES = Number(process.env.PARALLEL_WINDOWS_MAX_PAGES) || 20;
+export const PARALLEL_WINDOWS_MAX_ROWS = Number(process.env.PARALLEL_WINDOWS_MAX_ROWS) || 10000;
+
+/** Sub-windows shorter than this are not worth a separate request */
+const MIN_WINDOW_MS = 60 * 1000;
+
+export interface TimeWindow {
+  from: string;
+  to: string;
+}
+
+export interface WindowPage {
+  data: any[];
+  after?: string | null;
+}
+
+export interface WindowReport extends TimeWindow {
+  status: 'complete' | 'incomplete' | 'failed';
+  pages: number;
+  rows: number;
+  /** cursor to resume an incomplete window with the regular paginated call */
+  after?: string;
+  message?: string;
+  http_status?: number;
+}
+
+export interface ParallelWindowsOptions {
+  from: string;
+  to: string;
+  windows: number;
+  sorting?: 'asc' | 'desc';
+  /** row field holding the ISO timestamp used for ordering */
+  timestampKey: string;
+  /** row field holding the end of interval rows (states) */
+  endTimestampKey?: string;
+  /** row fields that, with the timestamp, identify a row (default: name) */
+  identityKeys?: string[];
+  fetchPage: (window: TimeWindow, after?: string) => Promise<WindowPage>;
+  /** called after every fetched page (e.g. to report progress) */
+  onPage?: (window: TimeWindow, rows: number) => void;
+  concurrency?: number;
+  maxPagesPerWindow?: number;
+  maxRows?: number;
+}
+
+export interface ParallelWindowsResult {
+  data: any[];
+  windows: WindowReport[];
+  duplicates_removed: number;
+  truncated: boolean;
+}
+
+export interface MergeOptions {
+  /** window edges (epoch ms); when set, only rows at an edge (or intervals spanning one) can be duplicates */
+  edges?: number[];
+  /** row fields that, with the timestamp, identify a row (default: name) */
+  identityKeys?: string[];
+  /** row field holding the end of interval rows (states) */
+  endTimestampKey?: string;
+}
+
+/**
+ * Split [from, to] into `count` contiguous sub-windows of about equal length.
+ * Inner edges are rounded to whole minutes, so repeated calls over similar
+ * ranges produce the same edges and the same boundary rows.
+ */
+export function splitTimeRange(from: string, to: string, count: number): TimeWindow[] {
+  const start = Date.parse(from);
+  const end = Date.parse(to);
+  if (!Number.isFinite(start) || !Number.isFinite(end) || end <= start) {
+    return [{ from, to }];
+  }
+  const windows = Math.max(1, Math.min(Math.floor(count), Math.floor((end - start) / MIN_WINDOW_MS)));
+  const step = (end - start) / windows;
+  const edges: number[] = [];
+  for (let i = 1; i < windows; i++) {
+    const edge = Math.round((start + step * i) / MIN_WINDOW_MS) * MIN_WINDOW_MS;
+    if (edge > (edges[edges.length - 1] ?? start) && edge < end) edges.push(edge);
+  }
+  const bounds = [from, ...edges.map(edge => new Date(edge).toISOString()), to];
+  return bounds.slice(1).map((windowTo, i) => ({ from: bounds[i], to: windowTo }));
+}
+
+/**
+ * Merge lists that are each sorted by timestamp into one sorted list,
+ * dropping rows another list already returned at a shared window edge.
+ */
+export function mergeByTimestamp(
+  lists: any[][],
+  timestampKey: string,
+  sorting: 'asc' | 'desc' = 'asc',
+  options: MergeOptions = {}
+): { data: any[]; duplicates: number } {
+  const direction = sorting === 'desc' ? -1 : 1;
+  const time = (row: any) => {
+    const value = Date.parse(row?.[timestampKey]);
+    return Number.isFinite(value) ? value : 0;
+  };
+  const identityKeys = options.identityKeys ?? ['name'];
+  const edges = options.edges ? new Set(options.edges) : undefined;
+  const atEdge = (row: any) => {
+    if (!edges) return true;
+    const start = Date.parse(row?.[timestampKey]);
+    if (!Number.isFinite(start)) return false;
+    if (!options.endTimestampKey) return edges.has(start);
+    const parsedEnd = Date.parse(row?.[options.endTimestampKey]);
+    const end = Number.isFinite(parsedEnd) ? parsedEnd : Infinity;
+    for (const edge of edges) {
+      if (start <= edge && edge <= end) return true;
+    }
+    return false;
+  };
+  const sorted = lists.map(list => [...list].sort((a, b) => direction * (time(a) - time(b))));
+  const heads = sorted.map(() => 0);
+  // identity key -> list that emitted it; rows are only duplicates across lists
+  const seen = new Map<string, number>();
+  const data: any[] = [];
+  let duplicates = 0;
+
+  while (true) {
+    let best = -1;
+    for (let i = 0; i < sorted.length; i++) {
+      if (heads[i] >= sorted[i].length) continue;
+      if (best === -1 || direction * (time(sorted[i][heads[i]]) - time(sorted[best][heads[best]])) < 0) {
+        best = i;
+      }
+    }
+    if (best === -1) break;
+
+    const row = sorted[best][heads[best]++];
+    if (atEdge(row)) {
+      const key = JSON.stringify([...identityKeys.map(field => row?.[field]), time(row)]);
+      const owner = seen.get(key);
+      if (owner !== undefined && owner !== best) {
+        duplicates++;
+        continue;
+      }
+      seen.set(key, best);
+    }
+    data.push(row);
+  }
+  return { data, duplicates };
+}
+
+/**
+ * Fetch a long time range as concurrent sub-windows, each paged to
+ * completion, and merge the rows in timestamp order.
+ */
+export async function fetchParallelWindows(options: ParallelWindowsOptions): Promise<ParallelWindowsResult> {
+  const maxPages = options.maxPagesPerWindow ?? PARALLEL_WINDOWS_MAX_PAGES;
+  const maxRows = options.maxRows ?? PARALLEL_WINDOWS_MAX_ROWS;
+  const windows = splitTimeRange(options.from, options.to, options.windows);
+  const reports: WindowReport[] = windows.map(window => ({ ...window, status: 'complete', pages: 0, rows: 0 }));
+  const lists: any[][] = windows.map(() => []);
+
+  await mapWithConcurrency(windows, options.concurrency ?? PARALLEL_WINDOWS_CONCURRENCY, async (window, index) => {
+    const report = reports[index];
+    let after: string | undefined;
+    try {
+      do {
+        const page = await options.fetchPage(window, after);
+        report.pages++;
+        if (Array.isArray(page.data)) lists[index].push(...page.data);
+        options.onPage?.(window, Array.isArray(page.data) ? page.data.length : 0);
+        after = page.after || undefined;
+      } while (after && report.pages < maxPages);
+
+      if (after) {
+        report.status = 'incomplete';
+        report.after = after;
+      }
+    } catch (error: any) {
+      report.status = 'failed';
+      report.message = error?.response?.data?.message || error?.message || String(error);
+      report.http_status = error?.response?.status;
+      if (after) report.after = after;
+    }
+    report.rows = lists[index].length;
+  });
+
+  const merged = mergeByTimestamp(lists, options.timestampKey, options.sorting, {
+    edges: windows.slice(1).map(window => Date.parse(window.from)),
+    identityKeys: options.identityKeys,
+    endTimestampKey: options.endTimestampKey,
+  });
+  const truncated = merged.data.length > maxRows;
+  return {
+    data: truncated ? merged.data.slice(0, maxRows) : merged.data,
+    windows: reports,
+    duplicates_removed: merged.duplicates,
+    truncated,
+  };
+}
+
+/**
+ * Short markdown note about windows that did not complete
+ */
+export function describeWindowIssues(result: ParallelWindowsResult): string {
+  const lines: string[] = [];
+  const failed = result.windows.filter(w => w.status === 'failed');
+  const incomplete = result.windows.filter(w => w.status === 'incomplete');
+  if (failed.length > 0) {
+    lines.push(`⚠️ ${failed.length} of ${result.windows.length} time windows failed: ` +
+      failed.map(w => `${w.from} → ${w.to}: ${w.message}`).join('; '));
+  }
+  if (incomplete.length > 0) {
+    lines.push(`⚠️ ${incomplete.length} time windows have more pages than were read; resume them with their "after" cursor.`);
+  }
+  if (result.truncated) {
+    lines.push(`⚠️ Results truncated to ${result.data.length} rows; narrow the time range for the rest.`);
+  }
+  return lines.length > 0 ? '\n\n' + lines.join('\n') : '';
+}
@@ -0,0 +1,45 @@
+import { describe, it, expect } from 'vitest';
+import { autoResolveParameters, needsMachineContext } from './toolDependencies.js';
+import { MachineInfo } from './machineContext.js';
+
+const machines: MachineInfo[] = [
+  { id: 'device-1', name: 'Fridge Kitchen', serial: 'SN001', is_connected: true, machines_group_id: 'group-1' },
+  { id: 'device-2', name: 'Oven Bakery', serial: 'SN002', is_connected: false, machines_group_id: 'group-2' },
+];
+
+describe('needsMachineContext', () => {
+  it('is false for tools without device parameters', () => {
+    expect(needsMachineContext('user_create', { email: 'a@b.c' })).toBe(false);
+    expect(needsMachineContext('roles_list', {})).toBe(false);
+    expect(needsMachineContext('device_model_create', { name: 'model' })).toBe(false);
+  });
+
+  it('is true only while a machine-list parameter is missing', () => {
+    expect(needsMachineContext('metrics_read', { device_name: 'Fridge' })).toBe(true);
+    expect(needsMachineContext('metrics_read', { device_id: 'device-1' })).toBe(false);
+    expect(needsMachineContext('aggregated_metrics', {})).toBe(true);
+    expect(needsMachineContext('aggregated_metrics', { machine_ids: ['device-1'] })).toBe(false);
+  });
+});
+
+describe('autoResolveParameters', () => {
+  it('waits for a pending machine context preload', async () => {
+    const preload = new Promise<MachineInfo[] | undefined>(resolve => setTimeout(() => resolve(machines), 5));
+
+    const resolved = await autoResolveParameters('device_details', { device_name: 'Oven Bakery' }, 'token', preload);
+
+    expect(resolved.device_id).toBe('device-2');
+  });
+
+  it('accepts an already loaded machine context', async () => {
+    const resolved = await autoResolveParameters('overview_events', { limit: 1 }, 'token', machines);
+
+    expect(resolved.machine_ids).toEqual(['device-1']);
+  });
+
+  it('resolves machine_ids of a group from the context', async () => {
+    const resolved = await autoResolveParameters('overview_events', { machine_groups_ids: ['group-2'] }, 'token', machines);
+
+    expect(resolved.machine_ids).toEqual(['device-2']);
+  });
+});
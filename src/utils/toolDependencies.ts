@@ -7,11 +7,13 @@
 
 import axios from "axios";
 import { THINGS5_BASE_URL } from "../config.js";
-import { fetchFirstOrganizationId } from "../tools/organizationUtils.js";
+import { fetchFirstOrganizationId, fetchMachineFirmware } from "../tools/organizationUtils.js";
 import { 
   getAvailableMachines, 
   findMachine, 
   resolveDeviceIdFromContext,
+  filterMachines,
+  hasGroupMembership,
   MachineInfo 
 } from "./machineContext.js";
 
@@ -22,8 +24,13 @@ export interface ToolDependency {
   resolver: (args: any, auth_token: string, machineContext?: MachineInfo[]) => Promise<string | string[] | null>;
   /** Description of what this resolver does */
   description: string;
+  /** The resolver looks the parameter up in the organization's machine list */
+  usesMachineContext?: boolean;
 }
 
+/** Pre-loaded machine list, or a preload still in flight */
+export type MachineContextSource = MachineInfo[] | Promise<MachineInfo[] | undefined>;
+
 /**
  * Resolve device_id from machine name or serial
  * Uses pre-loaded machine context for better performance
@@ -103,16 +110,8 @@ export async function resolveMachineCommandId(
   console.log(`[AutoResolve] Searching command "${commandName}" for device ${deviceId}`);
   
   try {
-    const organizationId = await fetchFirstOrganizationId(auth_token);
-    const response = await axios.get(
-      `${THINGS5_BASE_URL}/organizations/${organizationId}/machines/${deviceId}/machine_firmware`,
-      {
-        headers: { Authorization: `Bearer ${auth_token}` },
-        params: { include_machine_commands: true }
-      }
-    );
-    
-    const commands = response.data?.data?.machine_commands || [];
+    const firmware = await fetchMachineFirmware(auth_token, deviceId, 'machine_commands');
+    const commands = firmware?.machine_commands || [];
     const command = commands.find((cmd: any) => 
       cmd.name === commandName || 
       cmd.name.toLowerCase().includes(commandName.toLowerCase())
@@ -151,16 +150,8 @@ export async function resolveMetricNames(
   console.log(`[AutoResolve] Getting available metrics for device ${deviceId}`);
   
   try {
-    const organizationId = await fetchFirstOrganizationId(auth_token);
-    const response = await axios.get(
-      `${THINGS5_BASE_URL}/organizations/${organizationId}/machines/${deviceId}/machine_firmware`,
-      {
-        headers: { Authorization: `Bearer ${auth_token}` },
-        params: { include_machine_variables: true }
-      }
-    );
-    
-    const variables = response.data?.data?.machine_variables || [];
+    const firmware = await fetchMachineFirmware(auth_token, deviceId, 'machine_variables');
+    const variables = firmware?.machine_variables || [];
     const metricNames = variables
       .filter((v: any) => v.source === 'metrics')
       .map((v: any) => v.name);
@@ -189,14 +180,17 @@ export async function resolveMachineIds(
   if (machineContext && machineContext.length > 0) {
     console.log('[AutoResolve] Using pre-loaded machine context');
     
-    let machines = machineContext;
-    
-    // Filter by group if specified
-    if (args.machine_groups_ids && Array.isArray(args.machine_groups_ids)) {
-      // Note: machineContext doesn't include group info, would need to be enhanced
-      console.log('[AutoResolve] ⚠️  Group filtering not available in context, using all machines');
+    if (args.machine_groups_ids?.length && !hasGroupMembership(machineContext)) {
+      console.log('[AutoResolve] ⚠️  Group membership not in context, falling back to API call');
+      return resolveMachineIdsFromApi(args, auth_token);
     }
     
+    // Group/model filtering is an index lookup on the context
+    let machines = filterMachines(machineContext, {
+      machine_groups_ids: Array.isArray(args.machine_groups_ids) ? args.machine_groups_ids : undefined,
+      machine_model_ids: Array.isArray(args.machine_model_ids) ? args.machine_model_ids : undefined,
+    });
+    
     // Apply limit
     const limit = args.limit || machines.length;
     machines = machines.slice(0, limit);
@@ -208,7 +202,10 @@ export async function resolveMachineIds(
   
   // Fallback to API call
   console.log('[AutoResolve] ⚠️  Machine context not available, falling back to API call');
-  
+  return resolveMachineIdsFromApi(args, auth_token);
+}
+
+async function resolveMachineIdsFromApi(args: any, auth_token: string): Promise<string[] | null> {
   try {
     const organizationId = await fetchFirstOrganizationId(auth_token);
     const response = await axios.get(
@@ -244,7 +241,8 @@ export const TOOL_DEPENDENCIES: Record<string, ToolDependency[]> = {
     { 
       parameter: 'device_id', 
       resolver: resolveDeviceId,
-      description: 'Auto-resolve device_id from device_name/search/serial'
+      description: 'Auto-resolve device_id from device_name/search/serial',
+      usesMachineContext: true
     }
   ],
   
@@ -252,7 +250,8 @@ export const TOOL_DEPENDENCIES: Record<string, ToolDependency[]> = {
     { 
       parameter: 'device_id', 
       resolver: resolveDeviceId,
-      description: 'Auto-resolve device_id from device_name/search/serial'
+      description: 'Auto-resolve device_id from device_name/search/serial',
+      usesMachineContext: true
     }
   ],
   
@@ -261,7 +260,8 @@ export const TOOL_DEPENDENCIES: Record<string, ToolDependency[]> = {
     { 
       parameter: 'machine_id', 
       resolver: resolveDeviceId,
-      description: 'Auto-resolve machine_id from device_name/search/serial'
+      description: 'Auto-resolve machine_id from device_name/search/serial',
+      usesMachineContext: true
     }
   ],
   
@@ -270,7 +270,8 @@ export const TOOL_DEPENDENCIES: Record<string, ToolDependency[]> = {
     { 
       parameter: 'device_id', 
       resolver: resolveDeviceId,
-      description: 'Auto-resolve device_id from device_name/search/serial'
+      description: 'Auto-resolve device_id from device_name/search/serial',
+      usesMachineContext: true
     },
     { 
       parameter: 'machine_command_id', 
@@ -283,7 +284,8 @@ export const TOOL_DEPENDENCIES: Record<string, ToolDependency[]> = {
     { 
       parameter: 'device_id', 
       resolver: resolveDeviceId,
-      description: 'Auto-resolve device_id from device_name/search/serial'
+      description: 'Auto-resolve device_id from device_name/search/serial',
+      usesMachineContext: true
     }
   ],
   
@@ -291,7 +293,8 @@ export const TOOL_DEPENDENCIES: Record<string, ToolDependency[]> = {
     { 
       parameter: 'device_id', 
       resolver: resolveDeviceId,
-      description: 'Auto-resolve device_id from device_name/search/serial'
+      description: 'Auto-resolve device_id from device_name/search/serial',
+      usesMachineContext: true
     }
   ],
   
@@ -299,7 +302,8 @@ export const TOOL_DEPENDENCIES: Record<string, ToolDependency[]> = {
     { 
       parameter: 'device_id', 
       resolver: resolveDeviceId,
-      description: 'Auto-resolve device_id from device_name/search/serial'
+      description: 'Auto-resolve device_id from device_name/search/serial',
+      usesMachineContext: true
     }
   ],
   
@@ -308,7 +312,8 @@ export const TOOL_DEPENDENCIES: Record<string, ToolDependency[]> = {
     { 
       parameter: 'device_id', 
       resolver: resolveDeviceId,
-      description: 'Auto-resolve device_id from device_name/search/serial'
+      description: 'Auto-resolve device_id from device_name/search/serial',
+      usesMachineContext: true
     }
   ],
   
@@ -316,7 +321,8 @@ export const TOOL_DEPENDENCIES: Record<string, ToolDependency[]> = {
     { 
       parameter: 'device_id', 
       resolver: resolveDeviceId,
-      description: 'Auto-resolve device_id from device_name/search/serial'
+      description: 'Auto-resolve device_id from device_name/search/serial',
+      usesMachineContext: true
     }
   ],
   
@@ -324,7 +330,8 @@ export const TOOL_DEPENDENCIES: Record<string, ToolDependency[]> = {
     { 
       parameter: 'device_id', 
       resolver: resolveDeviceId,
-      description: 'Auto-resolve device_id from device_name/search/serial'
+      description: 'Auto-resolve device_id from device_name/search/serial',
+      usesMachineContext: true
     }
   ],
   
@@ -332,7 +339,8 @@ export const TOOL_DEPENDENCIES: Record<string, ToolDependency[]> = {
     { 
       parameter: 'device_id', 
       resolver: resolveDeviceId,
-      description: 'Auto-resolve device_id from device_name/search/serial'
+      description: 'Auto-resolve device_id from device_name/search/serial',
+      usesMachineContext: true
     }
   ],
   
@@ -340,7 +348,8 @@ export const TOOL_DEPENDENCIES: Record<string, ToolDependency[]> = {
     { 
       parameter: 'device_id', 
       resolver: resolveDeviceId,
-      description: 'Auto-resolve device_id from device_name/search/serial'
+      description: 'Auto-resolve device_id from device_name/search/serial',
+      usesMachineContext: true
     }
   ],
   
@@ -348,7 +357,8 @@ export const TOOL_DEPENDENCIES: Record<string, ToolDependency[]> = {
     { 
       parameter: 'device_id', 
       resolver: resolveDeviceId,
-      description: 'Auto-resolve device_id from device_name/search/serial'
+      description: 'Auto-resolve device_id from device_name/search/serial',
+      usesMachineContext: true
     }
   ],
   
@@ -356,7 +366,8 @@ export const TOOL_DEPENDENCIES: Record<string, ToolDependency[]> = {
     { 
       parameter: 'device_id', 
       resolver: resolveDeviceId,
-      description: 'Auto-resolve device_id from device_name/search/serial'
+      description: 'Auto-resolve device_id from device_name/search/serial',
+      usesMachineContext: true
     }
   ],
   
@@ -365,7 +376,8 @@ export const TOOL_DEPENDENCIES: Record<string, ToolDependency[]> = {
     { 
       parameter: 'machine_id', 
       resolver: resolveDeviceId,
-      description: 'Auto-resolve machine_id from device_name/search/serial'
+      description: 'Auto-resolve machine_id from device_name/search/serial',
+      usesMachineContext: true
     }
   ],
   
@@ -374,7 +386,8 @@ export const TOOL_DEPENDENCIES: Record<string, ToolDependency[]> = {
     { 
       parameter: 'machine_ids', 
       resolver: resolveMachineIds,
-      description: 'Auto-resolve machine_ids from organization if not provided'
+      description: 'Auto-resolve machine_ids from organization if not provided',
+      usesMachineContext: true
     }
   ],
   
@@ -382,7 +395,8 @@ export const TOOL_DEPENDENCIES: Record<string, ToolDependency[]> = {
     { 
       parameter: 'machine_ids', 
       resolver: resolveMachineIds,
-      description: 'Auto-resolve machine_ids from organization if not provided'
+      description: 'Auto-resolve machine_ids from organization if not provided',
+      usesMachineContext: true
     }
   ]
 };
@@ -393,14 +407,15 @@ export const TOOL_DEPENDENCIES: Record<string, ToolDependency[]> = {
  * @param toolName - Name of the tool being called
  * @param args - Arguments provided by user
  * @param auth_token - Authentication token
- * @param machineContext - Pre-loaded machine context (optional)
+ * @param machineContext - Pre-loaded machine context, or its pending preload (optional);
+ *   only awaited by resolvers that use it
  * @returns Updated args with resolved parameters
  */
 export async function autoResolveParameters(
   toolName: string,
   args: any,
   auth_token: string,
-  machineContext?: MachineInfo[]
+  machineContext?: MachineContextSource
 ): Promise<any> {
   const dependencies = TOOL_DEPENDENCIES[toolName];
   
@@ -423,7 +438,8 @@ export async function autoResolveParameters(
     console.log(`[AutoResolve] ${dep.description}`);
     
     try {
-      const resolvedValue = await dep.resolver(resolvedArgs, auth_token, machineContext);
+      const context = dep.usesMachineContext ? await machineContext : undefined;
+      const resolvedValue = await dep.resolver(resolvedArgs, auth_token, context);
       
       if (resolvedValue) {
         resolvedArgs[dep.parameter] = resolvedValue;
@@ -451,6 +467,18 @@ export function canAutoResolve(toolName: string): boolean {
   return !!TOOL_DEPENDENCIES[toolName];
 }
 
+/**
+ * Check if resolving the missing parameters of a call needs the machine list,
+ * i.e. if it is worth pre-loading the machine context for it
+ */
+export function needsMachineContext(toolName: string, args: any): boolean {
+  const dependencies = TOOL_DEPENDENCIES[toolName];
+  if (!dependencies) {
+    return false;
+  }
+  return dependencies.some(dep => dep.usesMachineContext && !args?.[dep.parameter]);
+}
+
 /**
  * Get list of parameters that can be auto-resolved for a tool
  */
@@ -0,0 +1,55 @@
+import { describe, it, expect, beforeEach, vi } from 'vitest';
+import { z } from 'zod';
+import { clearToolValidators, getToolValidator, parseToolArgs } from './toolValidation.js';
+
+const EventsSchema = z.object({
+  device_id: z.string(),
+  events_names: z.array(z.string()).optional(),
+  limit: z.number().int().optional().default(100),
+});
+
+describe('toolValidation', () => {
+  beforeEach(() => clearToolValidators());
+
+  it('sanitizes and applies the tool schema in one pass', () => {
+    const validate = getToolValidator('events_read', EventsSchema);
+    const result = validate({ device_id: 'd1', events_names: 'alarm', limit: '20', extra: true });
+
+    expect(result).toEqual({ success: true, data: { device_id: 'd1', events_names: ['alarm'], limit: 20 } });
+  });
+
+  it('compiles each validator once per process', () => {
+    const validate = getToolValidator('events_read', EventsSchema);
+
+    expect(getToolValidator('events_read', EventsSchema)).toBe(validate);
+  });
+
+  it('reports schema errors without throwing', () => {
+    const result = getToolValidator('events_read', EventsSchema)({ events_names: ['alarm'] });
+
+    expect(result.success).toBe(false);
+    expect(!result.success && result.error.issues[0].path).toEqual(['device_id']);
+  });
+
+  it('falls back to the JSON input schema for tools without a Zod schema', () => {
+    const validate = getToolValidator('device_models_list', undefined, {
+      type: 'object',
+      properties: { limit: { type: 'integer' } },
+    });
+
+    expect(validate({ limit: 5 })).toEqual({ success: true, data: { limit: 5 } });
+    expect(validate({ limit: 'many' }).success).toBe(false);
+  });
+
+  it('hands validated arguments to handlers without parsing them again', () => {
+    const result = getToolValidator('events_read', EventsSchema)({ device_id: 'd1' });
+    const parse = vi.spyOn(EventsSchema, 'parse');
+
+    expect(result.success && parseToolArgs(EventsSchema, result.data)).toEqual({ device_id: 'd1', limit: 100 });
+    expect(parse).not.toHaveBeenCalled();
+
+    expect(parseToolArgs(EventsSchema, { device_id: 'd2' })).toEqual({ device_id: 'd2', limit: 100 });
+    expect(parse).toHaveBeenCalledTimes(1);
+    parse.mockRestore();
+  });
+});
@@ -0,0 +1,90 @@
+/**
+ * Compiled Tool Input Validation
+ *
+ * Each tool call used to be validated twice (the SDK parsed the input
+ * against a Zod shape rebuilt from the JSON Schema for every session, then
+ * the handler parsed it again with the tool's own schema), with the input
+ * sanitizer copying and rewriting it in between.
+ *
+ * Every tool now gets one validator, compiled on its first call and shared
+ * by all sessions of the process, that applies the sanitizer coercions and
+ * the tool's own Zod schema (defaults, enums, refinements) in a single pass.
+ * Handlers receive the already-typed result: `parseToolArgs` returns
+ * arguments produced by a compiled validator as-is and only parses
+ * arguments coming from anywhere else (tests, direct calls).
+ *
+ * Validation runs after auto-resolution, so parameters filled in from the
+ * machine context (device_id, machine_ids, ...) are validated too.
+ */
+
+import { z } from "zod";
+import { fullSanitize } from "./inputSanitizer.js";
+import { jsonSchemaPropertiesToZodShape } from "./jsonSchemaToZod.js";
+
+export type ToolValidationResult =
+  | { success: true; data: any }
+  | { success: false; error: z.ZodError };
+
+export type ToolValidator = (input: unknown) => ToolValidationResult;
+
+const validators = new Map<string, ToolValidator>();
+const inputShapes = new Map<string, z.ZodRawShape>();
+
+// Arguments produced by a compiled validator (handlers skip re-parsing them)
+const validatedArgs = new WeakSet<object>();
+
+/**
+ * Zod shape of a tool's JSON input schema, built once per process.
+ * Used to advertise the tool and as the validator of tools without a Zod schema.
+ */
+export function getToolInputShape(toolName: string, jsonSchema: any): z.ZodRawShape {
+  let shape = inputShapes.get(toolName);
+  if (!shape) {
+    shape = jsonSchemaPropertiesToZodShape(jsonSchema || { type: 'object', properties: {} });
+    inputShapes.set(toolName, shape);
+  }
+  return shape;
+}
+
+/**
+ * Compile (once per tool and process) the validator of a tool: sanitizer
+ * coercions followed by the tool's Zod schema, or by a schema built from its
+ * JSON input schema when the tool does not expose one.
+ */
+export function getToolValidator(toolName: string, schema: z.ZodTypeAny | undefined, jsonSchema?: any): ToolValidator {
+  let validator = validators.get(toolName);
+  if (!validator) {
+    const compiled = schema ?? z.object(getToolInputShape(toolName, jsonSchema));
+    validator = (input) => {
+      const result = compiled.safeParse(fullSanitize(toolName, input ?? {}));
+      if (!result.success) {
+        return { success: false, error: result.error };
+      }
+      if (result.data && typeof result.data === 'object') {
+        validatedArgs.add(result.data);
+      }
+      return { success: true, data: result.data };
+    };
+    validators.set(toolName, validator);
+  }
+  return validator;
+}
+
+/**
+ * Typed arguments of a handler: returned as-is when they come from a
+ * compiled validator, parsed with the tool's schema otherwise.
+ */
+export function parseToolArgs<S extends z.ZodTypeAny>(schema: S, rawArgs: unknown): z.infer<S> {
+  if (rawArgs && typeof rawArgs === 'object' && validatedArgs.has(rawArgs)) {
+    return rawArgs as z.infer<S>;
+  }
+  return schema.parse(rawArgs);
+}
+
+/**
+ * Drop compiled validators (tests)
+ */
+export function clearToolValidators(): void {
+  validators.clear();
+  inputShapes.clear();
+}
@@ -0,0 +1,78 @@
+import { describe, it, expect, beforeAll, afterAll } from 'vitest';
+import { mkdtempSync, readFileSync, rmSync } from 'node:fs';
+import { tmpdir } from 'node:os';
+import { join } from 'node:path';
+
+const dir = mkdtempSync(join(tmpdir(), 'things5-tracing-'));
+const traceFile = join(dir, 'traces.jsonl');
+
+describe('tracing', () => {
+  let tracing: typeof import('./tracing.js');
+
+  beforeAll(async () => {
+    process.env.TRACING_EXPORTER = 'file';
+    process.env.TRACING_FILE = traceFile;
+    tracing = await import('./tracing.js');
+  });
+
+  afterAll(() => {
+    delete process.env.TRACING_EXPORTER;
+    delete process.env.TRACING_FILE;
+    rmSync(dir, { recursive: true, force: true });
+  });
+
+  it('should parse and format traceparent headers', () => {
+    const header = '00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01';
+    const context = tracing.parseTraceparent(header);
+
+    expect(context).toEqual({ traceId: '4bf92f3577b34da6a3ce929d0e0e4736', spanId: '00f067aa0ba902b7' });
+    expect(tracing.formatTraceparent(context!)).toBe(header);
+    expect(tracing.parseTraceparent('not-a-header')).toBeUndefined();
+    expect(tracing.parseTraceparent(undefined)).toBeUndefined();
+  });
+
+  it('should collapse ids in route templates', () => {
+    expect(tracing.routeTemplate('https://api.things5.digital/v1/devices/4f0c2b6e-1d2a-4c3b-9e8f-0a1b2c3d4e5f/metrics?limit=10'))
+      .toBe('/v1/devices/{id}/metrics');
+  });
+
+  it('should nest stage spans under the tool span and export them', async () => {
+    let toolSpan: any;
+    let stageSpan: any;
+
+    await tracing.withSpan('tool metrics_read', { 'mcp.tool': 'metrics_read' }, async (span) => {
+      toolSpan = span;
+      await tracing.withSpan('handler', {}, async (child) => {
+        stageSpan = child;
+        expect(tracing.getActiveSpan()).toBe(child);
+      });
+    });
+
+    expect(stageSpan.traceId).toBe(toolSpan.traceId);
+    expect(stageSpan.parentSpanId).toBe(toolSpan.spanId);
+    expect(toolSpan.status).toBe('ok');
+
+    await tracing.flushSpans();
+    const exported = readFileSync(traceFile, 'utf8').trim().split('\n').map(line => JSON.parse(line));
+    expect(exported.map(span => span.name)).toEqual(['handler', 'tool metrics_read']);
+  });
+
+  it('should mark spans as failed when the function throws', async () => {
+    let failed: any;
+    await expect(tracing.withSpan('auto_resolve', {}, (span) => {
+      failed = span;
+      throw new Error('boom');
+    })).rejects.toThrow('boom');
+
+    expect(failed.status).toBe('error');
+    expect(failed.errorMessage).toBe('boom');
+  });
+
+  it('should continue a remote trace when a parent context is given', async () => {
+    const parent = { traceId: '4bf92f3577b34da6a3ce929d0e0e4736', spanId: '00f067aa0ba902b7' };
+    const span = await tracing.withSpan('tool list_machines', {}, (s) => s, { parent, kind: 'server' });
+
+    expect(span.traceId).toBe(parent.traceId);
+    expect(span.parentSpanId).toBe(parent.spanId);
+  });
+});
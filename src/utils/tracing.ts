@@ -0,0 +1,324 @@
+/**
+ * Tracing System
+ *
+ * Records spans for every stage of the tool execution pipeline and for every
+ * upstream HTTP call made through axios, so a slow tool call can be broken
+ * down into where the time actually went.
+ *
+ * Trace context is carried with AsyncLocalStorage inside the process and
+ * propagated to upstream services with the W3C `traceparent` header.
+ * Finished spans are exported to a local JSONL file or to an
+ * OTLP/HTTP (JSON) compatible collector.
+ *
+ * Configuration (environment variables):
+ * - TRACING_EXPORTER: "none" (default), "file" or "otlp"
+ * - TRACING_FILE: output file for the file exporter (default: ./traces.jsonl)
+ * - OTEL_EXPORTER_OTLP_ENDPOINT: collector base URL (default: http://localhost:4318)
+ * - OTEL_SERVICE_NAME: service name reported to the collector
+ */
+
+import { AsyncLocalStorage } from "node:async_hooks";
+import { randomBytes } from "node:crypto";
+import { appendFile } from "node:fs/promises";
+import type { AxiosInstance, AxiosResponse, InternalAxiosRequestConfig } from "axios";
+
+export type SpanAttributes = Record<string, string | number | boolean>;
+
+export interface Span {
+  traceId: string;
+  spanId: string;
+  parentSpanId?: string;
+  name: string;
+  kind: 'internal' | 'server' | 'client';
+  startTime: number;
+  endTime?: number;
+  attributes: SpanAttributes;
+  status: 'unset' | 'ok' | 'error';
+  errorMessage?: string;
+}
+
+export interface TraceContext {
+  traceId: string;
+  spanId: string;
+}
+
+type ExporterKind = 'none' | 'file' | 'otlp';
+
+const EXPORTER: ExporterKind = (['file', 'otlp'].includes(process.env.TRACING_EXPORTER || '')
+  ? process.env.TRACING_EXPORTER
+  : 'none') as ExporterKind;
+const TRACING_FILE = process.env.TRACING_FILE || './traces.jsonl';
+const OTLP_ENDPOINT = (process.env.OTEL_EXPORTER_OTLP_ENDPOINT || 'http://localhost:4318').replace(/\/$/, '');
+const SERVICE_NAME = process.env.OTEL_SERVICE_NAME || 'things5-mcp-server';
+
+// Spans are exported in batches to keep the hot path free of I/O
+const FLUSH_INTERVAL_MS = 2000;
+const MAX_BATCH_SIZE = 100;
+
+const spanStorage = new AsyncLocalStorage<Span>();
+const pendingSpans: Span[] = [];
+let flushTimer: NodeJS.Timeout | null = null;
+
+/**
+ * Check whether spans are being recorded
+ */
+export function isTracingEnabled(): boolean {
+  return EXPORTER !== 'none';
+}
+
+/**
+ * Get the span active in the current async context (if any)
+ */
+export function getActiveSpan(): Span | undefined {
+  return spanStorage.getStore();
+}
+
+/**
+ * Start a new span as a child of the given parent (or of the active span)
+ */
+export function startSpan(
+  name: string,
+  attributes: SpanAttributes = {},
+  options: { parent?: TraceContext; kind?: Span['kind'] } = {}
+): Span {
+  const parent = options.parent || getActiveSpan();
+  return {
+    traceId: parent?.traceId || randomBytes(16).toString('hex'),
+    spanId: randomBytes(8).toString('hex'),
+    parentSpanId: parent?.spanId,
+    name,
+    kind: options.kind || 'internal',
+    startTime: Date.now(),
+    attributes: { ...attributes },
+    status: 'unset',
+  };
+}
+
+/**
+ * Finish a span and queue it for export
+ */
+export function endSpan(span: Span, error?: unknown): void {
+  if (span.endTime !== undefined) {
+    return;
+  }
+  span.endTime = Date.now();
+  if (error) {
+    span.status = 'error';
+    span.errorMessage = (error as any)?.message || String(error);
+  } else if (span.status === 'unset') {
+    span.status = 'ok';
+  }
+  if (isTracingEnabled()) {
+    pendingSpans.push(span);
+    scheduleFlush();
+  }
+}
+
+/**
+ * Run a function inside a new span, making it the active span for
+ * everything (including upstream HTTP calls) started by the function.
+ */
+export async function withSpan<T>(
+  name: string,
+  attributes: SpanAttributes,
+  fn: (span: Span) => T | Promise<T>,
+  options: { parent?: TraceContext; kind?: Span['kind'] } = {}
+): Promise<T> {
+  if (!isTracingEnabled()) {
+    return fn(startSpan(name, attributes, options));
+  }
+
+  const span = startSpan(name, attributes, options);
+  try {
+    const result = await spanStorage.run(span, () => fn(span));
+    endSpan(span);
+    return result;
+  } catch (error) {
+    endSpan(span, error);
+    throw error;
+  }
+}
+
+/**
+ * Serialize a span as a W3C traceparent header value
+ */
+export function formatTraceparent(context: TraceContext): string {
+  return `00-${context.traceId}-${context.spanId}-01`;
+}
+
+/**
+ * Parse a W3C traceparent header value
+ */
+export function parseTraceparent(header: unknown): TraceContext | undefined {
+  if (typeof header !== 'string') {
+    return undefined;
+  }
+  const match = header.trim().match(/^[0-9a-f]{2}-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$/);
+  if (!match || /^0+$/.test(match[1]) || /^0+$/.test(match[2])) {
+    return undefined;
+  }
+  return { traceId: match[1], spanId: match[2] };
+}
+
+/**
+ * Turn an upstream URL into a low-cardinality route template,
+ * e.g. /devices/4f0c…/metrics → /devices/{id}/metrics
+ */
+export function routeTemplate(url: string): string {
+  let path = url;
+  try {
+    path = new URL(url).pathname;
+  } catch {
+    path = url.split('?')[0];
+  }
+  return path
+    .split('/')
+    .map(segment =>
+      /^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$/i.test(segment) || /^\d+$/.test(segment)
+        ? '{id}'
+        : segment
+    )
+    .join('/');
+}
+
+const instrumentedInstances = new WeakSet<AxiosInstance>();
+
+/**
+ * Record a client span for every request made through an axios instance
+ * and propagate the trace context with the traceparent header.
+ */
+export function instrumentAxios(instance: AxiosInstance): void {
+  if (instrumentedInstances.has(instance) || !instance?.interceptors) {
+    return;
+  }
+  instrumentedInstances.add(instance);
+
+  instance.interceptors.request.use((config: InternalAxiosRequestConfig) => {
+    if (!isTracingEnabled()) {
+      return config;
+    }
+    const method = (config.method || 'get').toUpperCase();
+    const url = instance.getUri ? instance.getUri(config) : (config.url || '');
+    const span = startSpan(`HTTP ${method} ${routeTemplate(url)}`, {
+      'http.method': method,
+      'http.url': url.split('?')[0],
+      'http.route': routeTemplate(url),
+    }, { kind: 'client' });
+    config.headers?.set?.('traceparent', formatTraceparent(span));
+    (config as any).__span = span;
+    return config;
+  });
+
+  instance.interceptors.response.use(
+    (response: AxiosResponse) => {
+      const span: Span | undefined = (response.config as any)?.__span;
+      if (span) {
+        span.attributes['http.status_code'] = response.status;
+        endSpan(span);
+      }
+      return response;
+    },
+    (error: any) => {
+      const span: Span | undefined = error?.config?.__span;
+      if (span) {
+        if (error.response?.status) {
+          span.attributes['http.status_code'] = error.response.status;
+        }
+        endSpan(span, error);
+      }
+      return Promise.reject(error);
+    }
+  );
+}
+
+function scheduleFlush(): void {
+  if (pendingSpans.length >= MAX_BATCH_SIZE) {
+    void flushSpans();
+    return;
+  }
+  if (!flushTimer) {
+    flushTimer = setTimeout(() => {
+      flushTimer = null;
+      void flushSpans();
+    }, FLUSH_INTERVAL_MS);
+    flushTimer.unref();
+  }
+}
+
+function toOtlpAttributes(attributes: SpanAttributes) {
+  return Object.entries(attributes).map(([key, value]) => ({
+    key,
+    value: typeof value === 'number'
+      ? (Number.isInteger(value) ? { intValue: value } : { doubleValue: value })
+      : typeof value === 'boolean'
+        ? { boolValue: value }
+        : { stringValue: value },
+  }));
+}
+
+function toOtlpPayload(spans: Span[]) {
+  const kinds = { internal: 1, server: 2, client: 3 };
+  return {
+    resourceSpans: [{
+      resource: { attributes: toOtlpAttributes({ 'service.name': SERVICE_NAME }) },
+      scopeSpans: [{
+        scope: { name: SERVICE_NAME },
+        spans: spans.map(span => ({
+          traceId: span.traceId,
+          spanId: span.spanId,
+          ...(span.parentSpanId ? { parentSpanId: span.parentSpanId } : {}),
+          name: span.name,
+          kind: kinds[span.kind],
+          startTimeUnixNano: `${span.startTime}000000`,
+          endTimeUnixNano: `${span.endTime ?? span.startTime}000000`,
+          attributes: toOtlpAttributes(span.attributes),
+          status: span.status === 'error'
+            ? { code: 2, message: span.errorMessage || '' }
+            : { code: span.status === 'ok' ? 1 : 0 },
+        })),
+      }],
+    }],
+  };
+}
+
+/**
+ * Export all pending spans
+ */
+export async function flushSpans(): Promise<void> {
+  if (pendingSpans.length === 0) {
+    return;
+  }
+  const batch = pendingSpans.splice(0, pendingSpans.length);
+
+  try {
+    if (EXPORTER === 'file') {
+      const lines = batch.map(span => JSON.stringify({
+        ...span,
+        duration_ms: (span.endTime ?? span.startTime) - span.startTime,
+      })).join('\n') + '\n';
+      await appendFile(TRACING_FILE, lines, 'utf8');
+    } else if (EXPORTER === 'otlp') {
+      const response = await fetch(`${OTLP_ENDPOINT}/v1/traces`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(toOtlpPayload(batch)),
+      });
+      if (!response.ok) {
+        console.error(`[Tracing] ⚠️  Collector rejected ${batch.length} spans: HTTP ${response.status}`);
+      }
+    }
+  } catch (error: any) {
+    console.error(`[Tracing] ❌ Failed to export ${batch.length} spans:`, error.message);
+  }
+}
+
+/**
+ * Flush pending spans and stop the export timer (call on shutdown)
+ */
+export async function shutdownTracing(): Promise<void> {
+  if (flushTimer) {
+    clearTimeout(flushTimer);
+    flushTimer = null;
+  }
+  await flushSpans();
+}
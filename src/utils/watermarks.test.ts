@@ -0,0 +1,52 @@
+import { describe, it, expect, beforeEach } from 'vitest';
+import {
+  watermarkKey,
+  getWatermark,
+  setWatermark,
+  clearWatermarks,
+  filterSinceWatermark,
+  advanceWatermark,
+} from './watermarks.js';
+import { runWithCallContext } from './callContext.js';
+
+describe('watermarks', () => {
+  beforeEach(() => clearWatermarks());
+
+  it('scopes keys by session, tool and filters regardless of key order', () => {
+    const inSession = (sessionId: string, filters: Record<string, unknown>) =>
+      runWithCallContext({ toolName: 'overview_alarms', tenant: 'realm:acme', sessionId }, () => watermarkKey('overview_alarms', filters));
+
+    expect(inSession('s1', { a: 1, b: 2 })).toBe(inSession('s1', { b: 2, a: 1 }));
+    expect(inSession('s1', { a: 1 })).not.toBe(inSession('s2', { a: 1 }));
+    expect(inSession('s1', { a: 1 })).not.toBe(inSession('s1', { a: 2 }));
+  });
+
+  it('returns only rows newer than the watermark across calls', () => {
+    const first = [
+      { id: 1, timestamp: '2024-01-01T10:00:00Z' },
+      { id: 2, timestamp: '2024-01-01T11:00:00Z' },
+    ];
+    const watermark = advanceWatermark(null, first);
+    setWatermark('k', watermark!);
+
+    const second = [
+      { id: 2, timestamp: '2024-01-01T11:00:00Z' },
+      { id: 3, timestamp: '2024-01-01T11:00:00Z' },
+      { id: 4, timestamp: '2024-01-01T12:00:00Z' },
+    ];
+    const fresh = filterSinceWatermark(second, getWatermark('k'));
+
+    expect(fresh.map(row => row.id)).toEqual([3, 4]);
+    expect(advanceWatermark(getWatermark('k'), fresh)).toMatchObject({ timestamp: '2024-01-01T12:00:00.000Z', ids: ['4'] });
+  });
+
+  it('keeps all ids seen at the newest timestamp', () => {
+    const watermark = advanceWatermark(null, [
+      { id: 'a', timestamp: '2024-01-01T11:00:00Z' },
+      { id: 'b', timestamp: '2024-01-01T11:00:00Z' },
+    ]);
+
+    expect(watermark?.ids).toEqual(['a', 'b']);
+    expect(filterSinceWatermark([{ id: 'b', timestamp: '2024-01-01T11:00:00Z' }], watermark)).toEqual([]);
+  });
+});
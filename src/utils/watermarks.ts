@@ -0,0 +1,100 @@
+/**
+ * Delta Watermarks
+ *
+ * Remembers, per session (or per tenant when there is no session) and per
+ * query, the newest timestamp already returned and the ids seen at that
+ * timestamp. Monitoring tools use it for a "since last check" mode that
+ * only fetches and returns rows that are new since the previous call.
+ *
+ * Configuration (environment variables):
+ * - WATERMARK_TTL_SECONDS: idle lifetime of a watermark (default: 24h)
+ * - WATERMARK_MAX_ENTRIES: watermarks kept in memory (default: 5000)
+ */
+
+import { createHash } from "node:crypto";
+import { getCallContext } from "./callContext.js";
+
+export interface Watermark {
+  /** newest timestamp already returned (ISO8601) */
+  timestamp: string;
+  /** ids of the rows returned with exactly that timestamp */
+  ids: string[];
+  updated_at: number;
+}
+
+const TTL_MS = (Number(process.env.WATERMARK_TTL_SECONDS) || 24 * 60 * 60) * 1000;
+const MAX_ENTRIES = Number(process.env.WATERMARK_MAX_ENTRIES) || 5000;
+
+// Map keeps insertion order: re-inserting on write makes the first key the least recently used
+const watermarks = new Map<string, Watermark>();
+
+/**
+ * Key of a watermark: the caller's scope, the tool and its query filters
+ */
+export function watermarkKey(toolName: string, filters: Record<string, unknown>): string {
+  const context = getCallContext();
+  const scope = context?.sessionId ? `session:${context.sessionId}` : context?.tenant ?? 'anonymous';
+  const normalized = JSON.stringify(Object.keys(filters).sort().map(key => [key, filters[key]]));
+  return `${scope}|${toolName}|${createHash('sha256').update(normalized).digest('hex').substring(0, 16)}`;
+}
+
+export function getWatermark(key: string): Watermark | null {
+  const watermark = watermarks.get(key);
+  if (!watermark) return null;
+  if (Date.now() - watermark.updated_at > TTL_MS) {
+    watermarks.delete(key);
+    return null;
+  }
+  return watermark;
+}
+
+export function setWatermark(key: string, watermark: Watermark): void {
+  watermarks.delete(key);
+  watermarks.set(key, watermark);
+  while (watermarks.size > MAX_ENTRIES) {
+    watermarks.delete(watermarks.keys().next().value!);
+  }
+}
+
+export function clearWatermarks(): void {
+  watermarks.clear();
+}
+
+function rowId(row: any): string {
+  return row?.id !== undefined ? String(row.id) : JSON.stringify(row);
+}
+
+/**
+ * Keep only rows newer than the watermark (or at its timestamp but not seen yet)
+ */
+export function filterSinceWatermark<T = any>(rows: T[], watermark: Watermark | null, timestampKey: string = 'timestamp'): T[] {
+  if (!watermark) return rows;
+  const mark = Date.parse(watermark.timestamp);
+  const seen = new Set(watermark.ids);
+  return rows.filter((row: any) => {
+    const time = Date.parse(row?.[timestampKey]);
+    if (!Number.isFinite(time)) return true;
+    return time > mark || (time === mark && !seen.has(rowId(row)));
+  });
+}
+
+/**
+ * Move a watermark forward past the given rows
+ */
+export function advanceWatermark(previous: Watermark | null, rows: any[], timestampKey: string = 'timestamp'): Watermark | null {
+  let newest = previous ? Date.parse(previous.timestamp) : -Infinity;
+  let ids = new Set(previous?.ids ?? []);
+
+  for (const row of rows) {
+    const time = Date.parse(row?.[timestampKey]);
+    if (!Number.isFinite(time)) continue;
+    if (time > newest) {
+      newest = time;
+      ids = new Set([rowId(row)]);
+    } else if (time === newest) {
+      ids.add(rowId(row));
+    }
+  }
+  if (!Number.isFinite(newest)) return previous;
+  return { timestamp: new Date(newest).toISOString(), ids: Array.from(ids), updated_at: Date.now() };
+}